@@ -1,9 +1,9 @@
 import logging
-import boto3
 from pathlib import Path
 from botocore.exceptions import ClientError
 from typing import Union, BinaryIO, Optional
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 import os
 
 logger = logging.getLogger("django")
@@ -16,12 +16,16 @@ class S3Utils:
         aws_access_key_id: Optional[str] = None,
         aws_secret_access_key: Optional[str] = None,
         region_name: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
     ):
         """
         Initialize S3 utility with credentials and bucket name.
         If credentials are not provided, boto3 will look for them in the standard locations
-        (environment variables, AWS credentials file, IAM role)
+        (environment variables, AWS credentials file, IAM role).
+        endpoint_url points the client at an S3-compatible server such as MinIO or moto.
         """
+        import boto3
+
         self.bucket_name = bucket_name
         try:
             self.s3_client = boto3.client(
@@ -29,6 +33,7 @@ class S3Utils:
                 aws_access_key_id=aws_access_key_id,
                 aws_secret_access_key=aws_secret_access_key,
                 region_name=region_name,
+                endpoint_url=endpoint_url,
             )
             # Test connection
             self.s3_client.head_bucket(Bucket=bucket_name)
@@ -213,6 +218,110 @@ class S3Utils:
             logger.error(f"💥Unexpected error generating presigned URL for {s3_key}: {str(e)}")
             return None
 
+    def generate_presigned_post(
+        self,
+        s3_key: str,
+        max_size: int,
+        content_type: Optional[str] = None,
+        expiration: int = 900,
+    ) -> Optional[dict]:
+        """
+        Generate a presigned POST so a browser can upload straight to S3.
+
+        Args:
+            s3_key: Destination path in S3
+            max_size: Maximum accepted object size in bytes (enforced by S3)
+            content_type: Content type the upload must be sent with
+            expiration: Time in seconds until the policy expires
+
+        Returns:
+            dict: {"url": ..., "fields": {...}} or None if generation fails
+        """
+        try:
+            fields = {}
+            conditions = [["content-length-range", 1, max_size]]
+            if content_type:
+                fields["Content-Type"] = content_type
+                conditions.append({"Content-Type": content_type})
+
+            post = self.s3_client.generate_presigned_post(
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                Fields=fields,
+                Conditions=conditions,
+                ExpiresIn=expiration,
+            )
+            logger.info(f"👌Generated presigned POST for {s3_key}")
+            return post
+
+        except ClientError as e:
+            error_code = e.response.get("Error", {}).get("Code", "Unknown")
+            error_msg = e.response.get("Error", {}).get("Message", str(e))
+            logger.error(f"🔥Failed to generate presigned POST for {s3_key}. Error code: {error_code}, Message: {error_msg}")
+            return None
+        except Exception as e:
+            logger.error(f"💥Unexpected error generating presigned POST for {s3_key}: {str(e)}")
+            return None
+
+    def get_file_size(self, s3_key: str) -> Optional[int]:
+        """
+        Get the size of an object in the S3 bucket.
+
+        Args:
+            s3_key: Path to the object in S3
+
+        Returns:
+            int: Size in bytes, or None if the object does not exist
+        """
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+            return response["ContentLength"]
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "404":
+                logger.error(f"🔥Error reading object size for {s3_key}: {str(e)}")
+            return None
+
+    def copy_file(self, source_key: str, dest_key: str) -> bool:
+        """
+        Copy an object to another key inside the bucket.
+
+        Args:
+            source_key: Existing path in S3
+            dest_key: Destination path in S3
+
+        Returns:
+            bool: True if copy was successful, False otherwise
+        """
+        try:
+            self.s3_client.copy_object(
+                Bucket=self.bucket_name,
+                Key=dest_key,
+                CopySource={"Bucket": self.bucket_name, "Key": source_key},
+            )
+            logger.info(f"👌Successfully copied {source_key} to {dest_key}")
+            return True
+        except ClientError as e:
+            logger.error(f"🔥Failed to copy {source_key} to {dest_key}: {str(e)}")
+            return False
+
+    def delete_file(self, s3_key: str) -> bool:
+        """
+        Delete an object from the S3 bucket.
+
+        Args:
+            s3_key: Path to the object in S3
+
+        Returns:
+            bool: True if delete was successful, False otherwise
+        """
+        try:
+            self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
+            logger.info(f"🗑️Deleted {s3_key}")
+            return True
+        except ClientError as e:
+            logger.error(f"🔥Failed to delete {s3_key}: {str(e)}")
+            return False
+
     def check_file_exists(self, s3_key: str) -> bool:
         """
         Check if a file exists in the S3 bucket.
@@ -234,9 +343,15 @@ class S3Utils:
                 return False
 
 
-s3_utils = S3Utils(
-    bucket_name=settings.AWS_BUCKET,
-    aws_access_key_id=settings.AWS_KEY,
-    aws_secret_access_key=settings.AWS_SECRET,
-    region_name=settings.AWS_REGION,
-)  # noqa
+def get_s3_utils() -> S3Utils:
+    return S3Utils(
+        bucket_name=settings.AWS_BUCKET,
+        aws_access_key_id=settings.AWS_KEY,
+        aws_secret_access_key=settings.AWS_SECRET,
+        region_name=settings.AWS_REGION,
+        endpoint_url=settings.AWS_ENDPOINT_URL,
+    )
+
+
+# Connects to S3 on first use rather than when the module is imported
+s3_utils = SimpleLazyObject(get_s3_utils)  # noqa
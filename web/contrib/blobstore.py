@@ -0,0 +1,312 @@
+import hashlib
+import logging
+import os
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Iterable, Tuple, Union
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from contrib.aws import s3_utils
+from models.models import DocumentBlob
+
+logger = logging.getLogger("django")
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def hash_file(file_path: Union[str, Path]) -> Tuple[str, int]:
+    """
+    Compute the SHA-256 digest and size of a local file.
+
+    Returns:
+        Tuple of (hex digest, size in bytes)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def blob_key(tenant_id, digest: str, filename: str = "") -> str:
+    """S3 key of a tenant's blob. The extension is kept so file type sniffing still works."""
+    ext = Path(filename).suffix.lower()
+    return f"{settings.ENV}/{tenant_id}/blobs/{digest[:2]}/{digest}{ext}"
+
+
+def store_file(
+    tenant,
+    file_path: Union[str, Path],
+    filename: str,
+    content_type: str = "",
+    references: int = 1,
+) -> Tuple[DocumentBlob, bool]:
+    """
+    Store a local file in the tenant's blob store and take references to it.
+
+    Identical bytes are uploaded once; later calls only bump the reference count.
+    Pass one reference per row about to point at the returned blob's s3_key; rows
+    created later (e.g. the Order once extraction succeeds) take theirs with retain().
+    Unreferenced blobs survive collect_garbage's grace period.
+
+    Returns:
+        Tuple of (blob, created) where created means new bytes were stored
+    """
+    digest, size = hash_file(file_path)
+    return _acquire(
+        tenant,
+        digest,
+        size,
+        filename,
+        content_type,
+        references,
+        lambda key: s3_utils.upload_file(file_path, key),
+    )
+
+
+def adopt_file(
+    tenant,
+    file_path: Union[str, Path],
+    staging_key: str,
+    filename: str,
+    content_type: str = "",
+    references: int = 1,
+) -> Tuple[DocumentBlob, bool]:
+    """
+    Move an object already in S3 (e.g. a direct browser upload) under its content key.
+
+    file_path is a local copy of the object used for hashing. The staging object
+    is removed once the blob holds the bytes.
+
+    Returns:
+        Tuple of (blob, created) where created means new bytes were stored
+    """
+    digest, size = hash_file(file_path)
+    blob, created = _acquire(
+        tenant,
+        digest,
+        size,
+        filename,
+        content_type,
+        references,
+        lambda key: s3_utils.copy_file(staging_key, key),
+    )
+    if staging_key != blob.s3_key:
+        s3_utils.delete_file(staging_key)
+    return blob, created
+
+
+def _acquire(
+    tenant,
+    digest: str,
+    size: int,
+    filename: str,
+    content_type: str,
+    references: int,
+    put: Callable[[str], bool],
+) -> Tuple[DocumentBlob, bool]:
+    """Reference an existing blob, or write the bytes with `put` and create one."""
+    blob = _add_references(tenant, digest, references)
+    if blob:
+        logger.info(f"♻️Reusing blob {blob.s3_key} for {filename}")
+        return blob, False
+
+    key = blob_key(tenant.id, digest, filename)
+    if not s3_utils.check_file_exists(key) and not put(key):
+        raise ValidationError("Failed to upload file to S3")
+
+    try:
+        with transaction.atomic():
+            blob = DocumentBlob.objects.create(
+                tenant=tenant,
+                sha256=digest,
+                size_bytes=size,
+                s3_key=key,
+                content_type=content_type or "",
+                ref_count=references,
+            )
+        logger.info(f"👌Stored new blob {key} ({size} bytes)")
+        return blob, True
+    except IntegrityError:
+        # Someone stored the same bytes concurrently
+        return _add_references(tenant, digest, references), False
+
+
+def _add_references(tenant, digest: str, references: int):
+    updated = DocumentBlob.objects.filter(tenant=tenant, sha256=digest).update(
+        ref_count=F("ref_count") + references, updated_at=timezone.now()
+    )
+    if not updated:
+        return None
+    return DocumentBlob.objects.get(tenant=tenant, sha256=digest)
+
+
+def retain(tenant, s3_key: str, references: int = 1) -> None:
+    """Take references to a stored blob for rows created after it was stored."""
+    if not s3_key or references <= 0:
+        return
+    DocumentBlob.objects.filter(tenant=tenant, s3_key=s3_key).update(
+        ref_count=F("ref_count") + references, updated_at=timezone.now()
+    )
+
+
+def release(tenant, s3_key: str) -> None:
+    """Drop one reference to a blob. Unreferenced blobs are removed by collect_garbage."""
+    if not s3_key:
+        return
+    DocumentBlob.objects.filter(tenant=tenant, s3_key=s3_key, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1, updated_at=timezone.now()
+    )
+
+
+def unique_storage_bytes(tenant) -> int:
+    """Bytes a tenant occupies in the blob store, counting each distinct file once."""
+    return (
+        DocumentBlob.objects.filter(tenant=tenant).aggregate(total=Sum("size_bytes"))[
+            "total"
+        ]
+        or 0
+    )
+
+
+def _reference_fields():
+    """(model, field) pairs whose rows point at blob S3 keys."""
+    from dispatch.models import Order, UploadFile
+    from fleet.models import DriverLicense
+
+    return [(UploadFile, "file"), (Order, "pdf"), (DriverLicense, "file_save_path")]
+
+
+def count_references(keys: Iterable[str]) -> Counter:
+    """Count the rows pointing at each of the given S3 keys."""
+    keys = list(keys)
+    references = Counter()
+    for model, field in _reference_fields():
+        references.update(
+            model.objects.filter(**{f"{field}__in": keys}).values_list(field, flat=True)
+        )
+    return references
+
+
+def legacy_references(tenant_id=None) -> Counter:
+    """Rows per (tenant id, S3 key) pointing at objects stored before the blob store."""
+    stored = DocumentBlob.objects.values("s3_key")
+    owners = {"tenant_id": tenant_id} if tenant_id else {"tenant__isnull": False}
+    references = Counter()
+    for model, field in _reference_fields():
+        rows = (
+            model.objects.filter(**owners)
+            .exclude(**{f"{field}__isnull": True})
+            .exclude(**{field: ""})
+            .exclude(**{f"{field}__in": stored})
+            .values_list("tenant_id", field)
+        )
+        references.update(rows)
+    return references
+
+
+def backfill_blobs(tenant_id=None, dry_run: bool = False) -> dict:
+    """
+    Move objects uploaded before the blob store under their content keys.
+
+    Each legacy object is hashed and adopted like a direct upload: identical
+    bytes end up in one blob, the rows pointing at the old key are repointed
+    and the old object is removed. Afterwards the storage quota, which only
+    counts blobs, covers them again. Safe to run repeatedly.
+    """
+    from tenant.models import Tenant
+
+    stats = {"objects": 0, "stored": 0, "deduplicated": 0, "missing": 0, "bytes": 0}
+    references = legacy_references(tenant_id)
+    tenants = Tenant.objects.in_bulk({ref[0] for ref in references})
+
+    for (owner, key), count in sorted(references.items(), key=lambda item: item[0][1]):
+        stats["objects"] += 1
+        if dry_run:
+            continue
+        with tempfile.TemporaryDirectory() as directory:
+            local_path = os.path.join(directory, Path(key).name or "object")
+            if not s3_utils.download_file(key, local_path):
+                logger.warning(f"⚠️Legacy object {key} is missing from S3, left as is")
+                stats["missing"] += 1
+                continue
+            digest, size = hash_file(local_path)
+
+        blob, created = _acquire(
+            tenants[owner],
+            digest,
+            size,
+            key,
+            "",
+            count,
+            lambda blob_key: s3_utils.copy_file(key, blob_key),
+        )
+        for model, field in _reference_fields():
+            model.objects.filter(tenant_id=owner, **{field: key}).update(**{field: blob.s3_key})
+        if key != blob.s3_key:
+            s3_utils.delete_file(key)
+
+        stats["stored" if created else "deduplicated"] += 1
+        if created:
+            stats["bytes"] += size
+
+    logger.info(
+        f"👌Backfilled {stats['objects']} legacy objects: {stats['stored']} stored, "
+        f"{stats['deduplicated']} deduplicated, {stats['missing']} missing"
+    )
+    return stats
+
+
+def collect_garbage(grace: timedelta = timedelta(days=1), batch_size: int = 500) -> dict:
+    """
+    Reconcile reference counts and delete blobs nothing points at any more.
+
+    Blobs touched within `grace` are skipped so in-flight uploads are never collected.
+    """
+    cutoff = timezone.now() - grace
+    stats = {"checked": 0, "reconciled": 0, "deleted": 0, "freed_bytes": 0}
+
+    blobs = DocumentBlob.objects.filter(updated_at__lt=cutoff).only(
+        "id", "s3_key", "ref_count", "size_bytes"
+    )
+    batch = []
+    for blob in blobs.iterator(chunk_size=batch_size):
+        batch.append(blob)
+        if len(batch) >= batch_size:
+            _collect_batch(batch, cutoff, stats)
+            batch = []
+    if batch:
+        _collect_batch(batch, cutoff, stats)
+
+    logger.info(
+        f"🧹Blob GC checked {stats['checked']} blobs, reconciled {stats['reconciled']}, "
+        f"deleted {stats['deleted']} ({stats['freed_bytes']} bytes)"
+    )
+    return stats
+
+
+def _collect_batch(blobs, cutoff, stats: dict) -> None:
+    references = count_references(blob.s3_key for blob in blobs)
+    for blob in blobs:
+        stats["checked"] += 1
+        actual = references.get(blob.s3_key, 0)
+
+        if actual:
+            if actual != blob.ref_count:
+                DocumentBlob.objects.filter(pk=blob.pk).update(ref_count=actual)
+                stats["reconciled"] += 1
+            continue
+
+        # Re-check the cutoff so a blob referenced since the scan started survives
+        deleted, _ = DocumentBlob.objects.filter(pk=blob.pk, updated_at__lt=cutoff).delete()
+        if deleted:
+            s3_utils.delete_file(blob.s3_key)
+            stats["deleted"] += 1
+            stats["freed_bytes"] += blob.size_bytes
@@ -1,9 +1,11 @@
 # TBD
-import pandas as pd
-import numpy as np
 from uuid import UUID
 from expense.models import BVD
 import logging
+from contrib.lazy import lazy_import
+
+pd = lazy_import("pandas")
+np = lazy_import("numpy")
 
 logger = logging.getLogger("django")
 
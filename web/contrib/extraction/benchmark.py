@@ -0,0 +1,169 @@
+"""
+Extraction benchmark: corpus, scoring and baseline comparison.
+
+The corpus (contrib/extraction/corpus) holds anonymized rate confirmations
+and licenses, one JSON case per document:
+
+    {
+        "name": "single_trip_ratecon",
+        "kind": "order",                      # or "license"
+        "pages": [["line", ...], ...],        # rendered to a PDF, or
+        "file": "scan.pdf",                   # a document next to the case
+        "expected": {"order_info.order_id": "RC-10452", ...},
+        "responses": {"default": {...}, "gpt-4o-mini-2024-07-18": {...}}
+    }
+
+`expected` lists the fields that are scored, by dotted path. `responses` are
+recorded model outputs, served by the fake model server so a run is offline
+and repeatable; a model name picks a different answer for that model (e.g.
+a mini model answer that must be escalated).
+
+`manage.py benchmark_extraction` runs the corpus through the real
+extraction code and compares the summary with baseline.json.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+BASELINE_PATH = CORPUS_DIR / "baseline.json"
+KINDS = ("order", "license")
+
+# A run regresses when it is worse than the baseline by more than these
+LATENCY_TOLERANCE = 0.25  # share of the baseline p95
+LATENCY_FLOOR_MS = 50  # differences below this are noise
+TOKEN_TOLERANCE = 0.10  # share of the baseline mean
+ACCURACY_TOLERANCE = 0.02  # absolute, per field
+
+
+def load_corpus(directory: Path = CORPUS_DIR, kinds=KINDS) -> List[Dict[str, Any]]:
+    """Cases in name order, each with its "path" set to the case file."""
+    cases = []
+    for path in sorted(Path(directory).glob("*/*.json")):
+        case = json.loads(path.read_text())
+        if case.get("kind") in kinds:
+            cases.append({**case, "path": path})
+    return cases
+
+
+def document_bytes(case: Dict[str, Any]) -> bytes:
+    if case.get("file"):
+        return (case["path"].parent / case["file"]).read_bytes()
+    from contrib.tests.pdfs import make_pdf
+
+    return make_pdf(case["pages"])
+
+
+def recorded_responder(case: Dict[str, Any]) -> Callable[[dict], str]:
+    """FakeModelServer content answering with the case's recorded response for the requested model."""
+    responses = case["responses"]
+    return lambda body: json.dumps(responses.get(body.get("model"), responses["default"]))
+
+
+# Scoring
+
+def flatten(data: Any, prefix: str = "") -> Dict[str, Any]:
+    if isinstance(data, dict):
+        items = data.items()
+    elif isinstance(data, list):
+        items = enumerate(data)
+    else:
+        return {prefix[:-1]: data}
+    flat = {}
+    for key, value in items:
+        flat.update(flatten(value, f"{prefix}{key}."))
+    return flat
+
+
+def _normalize(value: Any) -> str:
+    return re.sub(r"\s+", " ", str(value)).strip().lower()
+
+
+def field_matches(expected: Any, actual: Any) -> bool:
+    if expected in (None, "") or actual in (None, ""):
+        return expected in (None, "") and actual in (None, "")
+    if isinstance(expected, (int, float)):
+        try:
+            return abs(float(actual) - expected) < 0.01
+        except (TypeError, ValueError):
+            return False
+    return _normalize(expected) == _normalize(actual)
+
+
+def score(expected: Dict[str, Any], actual: Optional[dict]) -> Dict[str, bool]:
+    """Whether each expected field was extracted correctly. A failed extraction misses them all."""
+    flat = flatten(actual) if actual is not None else {}
+    return {path: actual is not None and field_matches(value, flat.get(path)) for path, value in expected.items()}
+
+
+def percentile(samples: List[float], percentile: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per kind: case count, failures, latency p50/p95, mean tokens, escalations
+    and the accuracy of every scored field.
+
+    Args:
+        results: One dict per case with kind, latency_ms, total_tokens,
+            escalated, fields (path -> correct) and error
+    """
+    summary = {}
+    for kind in sorted({result["kind"] for result in results}):
+        runs = [result for result in results if result["kind"] == kind]
+        latencies = [run["latency_ms"] for run in runs if not run["error"]]
+        fields: Dict[str, List[bool]] = {}
+        for run in runs:
+            for path, correct in run["fields"].items():
+                fields.setdefault(path, []).append(correct)
+        scored = [correct for values in fields.values() for correct in values]
+        summary[kind] = {
+            "cases": len(runs),
+            "failed": sum(1 for run in runs if run["error"]),
+            "latency_ms_p50": round(percentile(latencies, 0.5), 1),
+            "latency_ms_p95": round(percentile(latencies, 0.95), 1),
+            "tokens_mean": round(sum(run["total_tokens"] for run in runs) / len(runs), 1),
+            "escalated": sum(1 for run in runs if run.get("escalated")),
+            "accuracy": round(sum(scored) / len(scored), 4) if scored else 1.0,
+            "field_accuracy": {
+                path: round(sum(values) / len(values), 4) for path, values in sorted(fields.items())
+            },
+        }
+    return summary
+
+
+def compare(summary: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Regressions of a summary against a baseline, as readable messages."""
+    regressions = []
+    for kind, current in summary.items():
+        previous = baseline.get(kind)
+        if not previous:
+            continue
+        if current["failed"] > previous["failed"]:
+            regressions.append(f"{kind}: {current['failed']} failed cases (baseline {previous['failed']})")
+        p95, baseline_p95 = current["latency_ms_p95"], previous["latency_ms_p95"]
+        if p95 > baseline_p95 * (1 + LATENCY_TOLERANCE) and p95 - baseline_p95 > LATENCY_FLOOR_MS:
+            regressions.append(f"{kind}: p95 latency {p95:.0f}ms (baseline {baseline_p95:.0f}ms)")
+        tokens, baseline_tokens = current["tokens_mean"], previous["tokens_mean"]
+        if tokens > baseline_tokens * (1 + TOKEN_TOLERANCE):
+            regressions.append(f"{kind}: {tokens:.0f} tokens per document (baseline {baseline_tokens:.0f})")
+        for path, accuracy in current["field_accuracy"].items():
+            baseline_accuracy = previous["field_accuracy"].get(path)
+            if baseline_accuracy is not None and accuracy < baseline_accuracy - ACCURACY_TOLERANCE:
+                regressions.append(f"{kind}: {path} accuracy {accuracy:.0%} (baseline {baseline_accuracy:.0%})")
+    return regressions
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, Dict[str, Any]]:
+    path = Path(path)
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def save_baseline(summary: Dict[str, Dict[str, Any]], path: Path = BASELINE_PATH):
+    Path(path).write_text(json.dumps(summary, indent=2, sort_keys=True) + "\n")
@@ -0,0 +1,235 @@
+"""
+Map-reduce extraction for documents too long for a single prompt.
+
+Pages are split into overlapping windows and every window is extracted
+concurrently through the gateway (map). The partial TripResponses are then
+merged deterministically (reduce): trips repeated on the overlap pages are
+deduplicated and the document totals come from the page that reads most like
+a summary.
+"""
+
+import logging
+import re
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+from contrib.extraction.document.invoice import (
+    MODELS,
+    CustomerDetails,
+    FreightDetails,
+    OrderInfo,
+    OtherDetails,
+    TripResponse,
+    invoice_request,
+)
+from contrib.extraction.oai import gateway
+
+logger = logging.getLogger("django")
+
+SUMMARY_PATTERNS = [
+    r"\bgrand\s+total\b",
+    r"\btotal\s+(?:amount|due|charges?|rate|pay)\b",
+    r"\bamount\s+due\b",
+    r"\bbalance\s+due\b",
+    r"\btotal\s+carrier\s+pay\b",
+    r"\btotal\b",
+]
+
+
+def page_windows(page_count: int, size: int, overlap: int = 1) -> List[range]:
+    """Page index ranges of `size` pages, each repeating the last `overlap` pages of the previous one."""
+    if size <= overlap:
+        raise ValueError("Window size must be larger than the overlap")
+    windows = []
+    start = 0
+    while True:
+        stop = min(page_count, start + size)
+        windows.append(range(start, stop))
+        if stop >= page_count:
+            return windows
+        start = stop - overlap
+
+
+def summary_score(text: str) -> int:
+    """How much a window reads like a totals/summary page. Specific phrases weigh more."""
+    text = text.lower()
+    return sum(
+        (len(SUMMARY_PATTERNS) - rank) * len(re.findall(pattern, text))
+        for rank, pattern in enumerate(SUMMARY_PATTERNS)
+    )
+
+
+# Reduce
+
+def _normalize(value: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", str(value or "").lower()).strip()
+
+
+def _pick(values: Sequence[Any]) -> Any:
+    """Most common non-empty value, ties going to the one seen first."""
+    present = [value for value in values if value not in (None, "", [])]
+    if not present:
+        return values[0] if values else None
+    counts = Counter(_normalize(value) for value in present)
+    best = max(counts.values())
+    return next(value for value in present if counts[_normalize(value)] == best)
+
+
+def _merge_model(model_class, parts: Sequence[Any]):
+    """Field by field _pick over partial models of the same class."""
+    return model_class(
+        **{field: _pick([getattr(part, field) for part in parts]) for field in model_class.model_fields}
+    )
+
+
+def _unique(values, key=_normalize) -> list:
+    seen = set()
+    unique = []
+    for value in values:
+        if value in (None, "") or key(value) in seen:
+            continue
+        seen.add(key(value))
+        unique.append(value)
+    return unique
+
+
+def _filled(value: Any) -> int:
+    """Number of non-empty leaf values, used to keep the most complete duplicate."""
+    if isinstance(value, dict):
+        return sum(_filled(v) for v in value.values())
+    if isinstance(value, list):
+        return sum(_filled(v) for v in value)
+    return 0 if value in (None, "", 0) else 1
+
+
+def trip_key(trip) -> Tuple[str, ...]:
+    return (
+        _normalize(trip.pickup_address),
+        _normalize(trip.pickup_date),
+        _normalize(trip.delivery_address),
+        _normalize(trip.delivery_date),
+    )
+
+
+def merge_trips(window_trips: Sequence[Sequence[Any]]) -> list:
+    """
+    Deduplicate trips repeated at the seam between consecutive windows.
+
+    Only neighbouring windows share pages, so a trip is only matched against
+    the previous window's trips, each of them at most once. Separate loads on
+    the same lane and dates, in one window or far apart, stay separate.
+    Keeps page order and the most complete copy of a repeated trip.
+    """
+    merged: List[Any] = []
+    previous: List[int] = []
+    for trips in window_trips:
+        unmatched = list(previous)
+        current = []
+        for trip in trips:
+            key = trip_key(trip)
+            index = next((i for i in unmatched if trip_key(merged[i]) == key), None)
+            if index is None:
+                merged.append(trip)
+                index = len(merged) - 1
+            else:
+                unmatched.remove(index)
+                if _filled(trip.model_dump()) > _filled(merged[index].model_dump()):
+                    # Replaced in place, so the trip keeps its original position
+                    merged[index] = trip
+            current.append(index)
+        previous = current
+    return merged
+
+
+def merge_responses(parts: Sequence[TripResponse], window_texts: Sequence[str]) -> TripResponse:
+    """
+    Merge partial extractions of consecutive windows into one TripResponse.
+
+    Args:
+        parts: Extraction of each window, in page order
+        window_texts: Text of each window, used to find the summary page
+    """
+    scores = [summary_score(text) for text in window_texts]
+    # Totals come from the most summary-like window, the later one on a tie
+    summary_index = max(range(len(parts)), key=lambda index: (scores[index], index))
+    if scores[summary_index] == 0:
+        # Nothing reads like a summary; a total is at least as large as any partial one
+        summary_index = max(
+            range(len(parts)), key=lambda index: (parts[index].total_load_details.load_total, -index)
+        )
+
+    other_details = OtherDetails(
+        **{
+            field: _unique(value for part in parts for value in (getattr(part.other_details, field) or []))
+            for field in OtherDetails.model_fields
+        }
+    )
+    entities = _unique(
+        (entity for part in parts for entity in (part.miscellaneous_entities or [])),
+        key=lambda entity: (_normalize(entity.entity_type), _normalize(entity.entity_value)),
+    )
+    remarks = _unique(part.remarks_or_special_instructions for part in parts)
+
+    return TripResponse(
+        order_info=_merge_model(OrderInfo, [part.order_info for part in parts]),
+        customer_details=_merge_model(CustomerDetails, [part.customer_details for part in parts]),
+        total_load_details=parts[summary_index].total_load_details,
+        freight_details=_merge_model(FreightDetails, [part.freight_details for part in parts]),
+        trips=merge_trips([part.trips for part in parts]),
+        remarks_or_special_instructions="\n".join(remarks) or None,
+        miscellaneous_entities=entities or None,
+        other_details=other_details,
+    )
+
+
+def _add_usage(total: Dict[str, Any], usage: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in usage.items():
+        if isinstance(value, dict):
+            total[key] = _add_usage(total.get(key) or {}, value)
+        elif isinstance(value, (int, float)):
+            total[key] = (total.get(key) or 0) + value
+    return total
+
+
+def extract_invoice_chunked(
+    page_texts: Sequence[str],
+    window_pages: int,
+    overlap: int = 1,
+    model: str = MODELS.GPT4o_16k.value,
+    tenant_id=None,
+) -> Tuple[TripResponse, Dict[str, Any]]:
+    """
+    Extract a long document window by window and merge the results.
+
+    Args:
+        page_texts: Text of each page
+        window_pages: Pages per prompt
+        overlap: Pages repeated between consecutive windows, so a trip split
+            across a window boundary is complete in at least one of them
+        model: Model to extract with
+        tenant_id: Tenant whose rate limit the model calls count against
+
+    Returns:
+        Tuple of the merged TripResponse and the summed token usage
+    """
+    windows = page_windows(len(page_texts), window_pages, overlap)
+    window_texts = ["".join(page_texts[i] + "\n\n" for i in window) for window in windows]
+
+    completions = gateway.parse_many(
+        [invoice_request(text, model=model) for text in window_texts], tenant_id=tenant_id
+    )
+
+    parts, usage = [], {}
+    for window, completion in zip(windows, completions):
+        # A failed window would silently lose trips, so the whole document fails
+        if isinstance(completion, Exception):
+            raise completion
+        parsed = completion.choices[0].message.parsed
+        if parsed is None:
+            raise ValueError(f"Pages {window.start + 1}-{window.stop} could not be extracted")
+        parts.append(parsed)
+        usage = _add_usage(usage, completion.usage.model_dump())
+
+    logger.info(
+        f"👏Extracted {len(page_texts)} pages in {len(windows)} windows of {window_pages} pages"
+    )
+    return merge_responses(parts, window_texts), usage
@@ -1,16 +1,28 @@
 import logging
 import base64
-from pathlib import Path
+import io
 import os
 import mimetypes
-from typing import Optional
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
 from pydantic import BaseModel, Field
-from contrib.extraction.oai import client, MODELS
-from PyPDF2 import PdfReader
+from contrib.extraction.oai import gateway
+from contrib.extraction.routing import route
 import json
 
 logger = logging.getLogger("django")
 
+# Longest side sent to the vision model. A cropped card at 1024px keeps its
+# smallest print around 10px tall, and fits in four 512px high-detail tiles
+LICENSE_IMAGE_MAX_SIDE = 1024
+LICENSE_IMAGE_QUALITY = 80
+# Formats the vision API accepts as they are
+VISION_MIME_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
+# Per channel difference from the corner colour that counts as part of the card
+CROP_THRESHOLD = 32
+CROP_MARGIN = 0.02  # Share of the longest side kept around the card
+CROP_MIN_AREA = 0.1  # Smaller crops are more likely noise than a card
+
 
 def determine_file_type(file_path: str) -> str:
     """Determine if the file is a PDF or an image"""
@@ -50,29 +62,77 @@ def determine_file_type(file_path: str) -> str:
         return "unknown"
 
 
-def encode_image(image_path: str) -> str | None:
-    """Encode an image file to base64"""
-    try:
-        # Using Path for better cross-platform compatibility
-        path = Path(image_path)
-        with path.open("rb") as image_file:
-            return base64.b64encode(image_file.read()).decode("utf-8")
-    except FileNotFoundError:
-        logger.error(f"File not found: {image_path}")
-        return None
-    except Exception as e:
-        logger.error(f"Error encoding image: {e}")
-        return None
+def crop_to_card(image):
+    """Cut away the uniform background around the card (table, scanner bed)."""
+    from PIL import Image, ImageChops
+
+    background = Image.new(image.mode, image.size, image.getpixel((0, 0)))
+    mask = ImageChops.difference(image, background).convert("L").point(
+        lambda value: 255 if value > CROP_THRESHOLD else 0
+    )
+    bbox = mask.getbbox()
+    if not bbox:
+        return image
+
+    margin = int(CROP_MARGIN * max(image.size))
+    left, top, right, bottom = bbox
+    box = (
+        max(0, left - margin),
+        max(0, top - margin),
+        min(image.width, right + margin),
+        min(image.height, bottom + margin),
+    )
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    if area < CROP_MIN_AREA * image.width * image.height:
+        return image
+    return image.crop(box)
+
+
+def prepare_license_image(image_path: str) -> Tuple[bytes, str]:
+    """
+    Crop, downscale and recompress a license photo for the vision model.
+
+    Phone photos are often 12MP or more, which costs upload time and image
+    tokens without making the card more legible.
+
+    Returns:
+        Tuple of (image bytes, mime type). The original file is kept when it
+        is already small enough and smaller than the recompressed image.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(image_path) as original:
+        original_size = original.size
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    image = crop_to_card(image)
+    image.thumbnail((LICENSE_IMAGE_MAX_SIDE, LICENSE_IMAGE_MAX_SIDE), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=LICENSE_IMAGE_QUALITY, optimize=True)
+    prepared = buffer.getvalue()
+
+    mime_type, _ = mimetypes.guess_type(image_path)
+    if (
+        mime_type in VISION_MIME_TYPES
+        and image.size == original_size
+        and os.path.getsize(image_path) <= len(prepared)
+    ):
+        with open(image_path, "rb") as image_file:
+            return image_file.read(), mime_type
+
+    logger.info(
+        f"✂️License image {original_size[0]}x{original_size[1]} -> {image.width}x{image.height}, "
+        f"{os.path.getsize(image_path) // 1024}KB -> {len(prepared) // 1024}KB"
+    )
+    return prepared, "image/jpeg"
 
 
 def extract_text_from_pdf(pdf_path: str) -> str:
     """Extract text from a PDF file"""
+    from contrib.pdf_text import read_pdf_text
+
     try:
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n\n"
-        return text
+        return read_pdf_text(pdf_path)
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {e}")
         raise
@@ -107,15 +167,93 @@ class DriverLicenseExtraction(BaseModel):
         extra = "forbid"
 
 
-def extract_license_info(file_path: str) -> DriverLicenseExtraction:
+def license_problems(license_info: DriverLicenseExtraction) -> List[str]:
+    """Checks a parsed license must pass before the mini model's result is kept."""
+    problems = []
+    if not license_info.name.strip():
+        problems.append("no name")
+    if not license_info.license_number.strip():
+        problems.append("no license number")
+    for field in ("date_of_birth", "expiry_date"):
+        try:
+            date.fromisoformat(getattr(license_info, field))
+        except (TypeError, ValueError):
+            problems.append(f"{field} is not an ISO date")
+    return problems
+
+
+def parse_license_text(
+    system_prompt: str, user_prompt: str, tenant_id=None
+) -> Tuple[DriverLicenseExtraction, Dict[str, Any]]:
+    """Structure license text as JSON, on the mini model first (see contrib.extraction.routing)."""
+
+    def call(model):
+        response = gateway.create(
+            tenant_id=tenant_id,
+            model=model,
+            temperature=0,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=500,
+        )
+        license_data = json.loads(response.choices[0].message.content)
+        return DriverLicenseExtraction(**license_data), response.usage.model_dump()
+
+    return route("license", call, license_problems, tenant_id=tenant_id)
+
+
+def read_license_image(image_path: str, tenant_id=None) -> Tuple[DriverLicenseExtraction, Dict[str, Any]]:
+    """Read a license photo straight into DriverLicenseExtraction with one structured-output call."""
+    image, mime_type = prepare_license_image(image_path)
+    image_url = f"data:{mime_type};base64,{base64.b64encode(image).decode('utf-8')}"
+
+    def call(model):
+        completion = gateway.parse(
+            tenant_id=tenant_id,
+            model=model,
+            temperature=0,
+            messages=[
+                {
+                    "role": "system",
+                    "content": """You are an expert at reading driver's licenses.
+Extract the license information from the image. Convert all dates to ISO format (YYYY-MM-DD).
+If a field is not visible, use an empty string for required fields and null for optional ones.""",
+                },
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": "Read this driver's license."},
+                        {"type": "image_url", "image_url": {"url": image_url, "detail": "high"}},
+                    ],
+                },
+            ],
+            response_format=DriverLicenseExtraction,
+            max_tokens=500,
+        )
+        message = completion.choices[0].message
+        if message.parsed is None:
+            raise ValueError(f"Could not read text from image: {message.refusal}")
+        return message.parsed, completion.usage.model_dump()
+
+    # Image tokens cost the mini model about as much as the large one, so skip it
+    return route("license", call, license_problems, small_first=False, tenant_id=tenant_id)
+
+
+def extract_license_info(
+    file_path: str, tenant_id=None
+) -> Tuple[DriverLicenseExtraction, Dict[str, Any]]:
     """
     Extract driver's license information from an image or PDF and return structured data.
 
     Args:
         file_path (str): Path to the license image or PDF
+        tenant_id: Tenant whose rate limit the model calls count against
 
     Returns:
-        DriverLicenseExtraction: Structured license information
+        Tuple of (DriverLicenseExtraction, token usage with a "routing" entry)
     """
     # Check if file exists
     if not os.path.exists(file_path):
@@ -134,97 +272,14 @@ def extract_license_info(file_path: str) -> DriverLicenseExtraction:
                 raise ValueError("No text could be extracted from the PDF")
 
             # Process the extracted text
-            response = client.chat.completions.create(
-                model=MODELS.GPT4o_16k.value,
-                temperature=0,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Extract driver's license information into a structured JSON format. Convert dates to ISO format (YYYY-MM-DD). Return the data as a JSON object with the following fields: name, license_number, date_of_birth, issued_date, expiry_date, gender, address, country, province, state.",
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Extract license information from this text and return as JSON: {extracted_text}",
-                    },
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=500,
+            return parse_license_text(
+                "Extract driver's license information into a structured JSON format. Convert dates to ISO format (YYYY-MM-DD). Return the data as a JSON object with the following fields: name, license_number, date_of_birth, issued_date, expiry_date, gender, address, country, province, state.",
+                f"Extract license information from this text and return as JSON: {extracted_text}",
+                tenant_id=tenant_id,
             )
-            
-            # Parse the JSON response into our Pydantic model
-            license_data = json.loads(response.choices[0].message.content)
-            return DriverLicenseExtraction(**license_data)
 
         elif file_type == "image":
-            # Process image
-            base64_image = encode_image(file_path)
-            if not base64_image:
-                raise FileNotFoundError(f"Could not load image from {file_path}")
-
-            # Extract text from image using GPT-4 Vision
-            text_response = client.chat.completions.create(
-                model=MODELS.GPT4o_16k.value,
-                temperature=0,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at reading driver's licenses. Extract all text from the image, including names, numbers, dates, and addresses. If you can't read the image clearly, explain what parts are unclear.",
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Read this driver's license image and extract all text you can see. Include every detail visible.",
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                },
-                            },
-                        ],
-                    }
-                ],
-                max_tokens=500,
-            )
-
-            extracted_text = text_response.choices[0].message.content
-            if "error" in extracted_text.lower() or "no text" in extracted_text.lower():
-                logger.error(f"GPT-4 Vision failed to read image: {extracted_text}")
-                raise ValueError(f"Could not read text from image: {extracted_text}")
-
-            # Process the extracted text into structured format
-            response = client.chat.completions.create(
-                model=MODELS.GPT4o_16k.value,
-                temperature=0,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert at parsing driver's license information.
-Extract the information into a structured JSON format. Convert all dates to ISO format (YYYY-MM-DD).
-If a field is not found, use an empty string or null as appropriate.
-Return a JSON object with these fields: name, license_number, date_of_birth, issued_date, expiry_date, gender, address, country, province, state."""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Parse this driver's license text into JSON format. If any field is unclear or missing, use an empty string: {extracted_text}",
-                    },
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=500,
-            )
-            
-            # Parse the JSON response into our Pydantic model
-            try:
-                license_data = json.loads(response.choices[0].message.content)
-                return DriverLicenseExtraction(**license_data)
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON response: {response.choices[0].message.content}")
-                raise ValueError(f"Failed to parse license data: {str(e)}")
-            except Exception as e:
-                logger.error(f"Failed to create DriverLicenseExtraction: {str(e)}")
-                raise ValueError(f"Invalid license data format: {str(e)}")
+            return read_license_image(file_path, tenant_id=tenant_id)
         else:
             # Unsupported file type
             raise ValueError(f"Unsupported file type: {file_type}")
@@ -1,6 +1,8 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from dateutil import parser as date_parser
 from pydantic import BaseModel
-from contrib.extraction.oai import MODELS, client
+from contrib.extraction.oai import MODELS, gateway
+from contrib.extraction.routing import route
 
 INVOICE_TEMPLATE = """You are an expert at structured data extraction.
                 You will be given unstructured text from an invoice from a logistics consigment and
@@ -149,14 +151,15 @@ class TripResponse(BaseModel):
         extra = "forbid"
 
 
-def extract_invoice(
+def invoice_request(
     pages: str,
     model: str = MODELS.GPT4o_16k.value,
     temperature: int = 0,
     template: str = INVOICE_TEMPLATE,
     response_format: BaseModel = TripResponse,
-):
-    completion = client.beta.chat.completions.parse(
+) -> dict:
+    """Keyword arguments of the structured-output completion for a document's text."""
+    return dict(
         model=model,
         temperature=temperature,
         messages=[
@@ -168,4 +171,86 @@ def extract_invoice(
         response_format=response_format,
         seed=42,
     )
+
+
+def extract_invoice(
+    pages: str,
+    model: str = MODELS.GPT4o_16k.value,
+    temperature: int = 0,
+    template: str = INVOICE_TEMPLATE,
+    response_format: BaseModel = TripResponse,
+    tenant_id=None,
+):
+    completion = gateway.parse(
+        tenant_id=tenant_id,
+        **invoice_request(pages, model, temperature, template, response_format),
+    )
     return completion
+
+
+def _parse_date(value: str):
+    # Documents mix "2024-01-05T10:00Z" with "01/06/2024"; compare them as the
+    # wall-clock times they show, since aware and naive datetimes don't order
+    try:
+        return date_parser.parse(value).replace(tzinfo=None)
+    except (ValueError, OverflowError, TypeError):
+        return None
+
+
+def trip_response_problems(response: TripResponse) -> List[str]:
+    """
+    Invariants an extraction must satisfy to be kept without a second opinion.
+
+    Returns:
+        Human readable problems, empty when the response is consistent
+    """
+    problems = []
+    if not (response.order_info.order_id or "").strip():
+        problems.append("no order id")
+    if not response.trips:
+        problems.append("no trips")
+
+    for number, trip in enumerate(response.trips, start=1):
+        if not (trip.pickup_address or "").strip() or not (trip.delivery_address or "").strip():
+            problems.append(f"trip {number} is missing an address")
+        dates = {}
+        for name, value in (("pickup", trip.pickup_date), ("delivery", trip.delivery_date)):
+            if value and value.strip():
+                dates[name] = _parse_date(value)
+                if dates[name] is None:
+                    problems.append(f"trip {number} {name} date '{value}' does not parse")
+        if dates.get("pickup") and dates.get("delivery") and dates["delivery"] < dates["pickup"]:
+            problems.append(f"trip {number} is delivered before pickup")
+
+    total = response.total_load_details.load_total
+    if total <= 0:
+        problems.append("no load total")
+    trip_totals = [trip.load_details.load_total for trip in response.trips if trip.load_details.load_total > 0]
+    tolerance = max(1.0, total * 0.01)
+    # Trips either add up to the total, or each repeats it (single-trip documents)
+    if trip_totals and abs(sum(trip_totals) - total) > tolerance and any(
+        abs(trip_total - total) > tolerance for trip_total in trip_totals
+    ):
+        problems.append(f"trip totals {sum(trip_totals):.2f} do not match load total {total:.2f}")
+    return problems
+
+
+def extract_invoice_routed(
+    pages: str, small_first: bool = True, tenant_id=None
+) -> Tuple[TripResponse, Dict[str, Any]]:
+    """
+    Extract with the mini model first, escalating to the large model when the
+    result breaks an invariant of trip_response_problems.
+
+    Returns:
+        Tuple of (TripResponse, token usage with a "routing" entry)
+    """
+
+    def call(model):
+        completion = extract_invoice(pages, model=model, tenant_id=tenant_id)
+        parsed = completion.choices[0].message.parsed
+        if parsed is None:
+            raise ValueError("The model returned no structured output")
+        return parsed, completion.usage.model_dump()
+
+    return route("order", call, trip_response_problems, small_first=small_first, tenant_id=tenant_id)
@@ -0,0 +1,304 @@
+"""
+Layout fingerprints and rule-based extraction for known document templates.
+
+Large shippers send rate confirmations with the same layout every day. A
+layout is recognised by its anchors, the static labels of the document
+("Load #", "Pickup", "Consignee"...). For a known layout, compiled regex
+rules pull each TripResponse field straight from the text, so the model is
+only needed for unknown layouts or when a rule does not match cleanly.
+
+Rules are plain dicts, stored on dispatch.ExtractionTemplate:
+
+    {"field": "order_info.order_id", "pattern": "^Load #: (.+)$", "type": "str", "index": 0}
+
+`pattern` has one capture group and is matched per line. `index` picks the
+n-th match, for fields that repeat positionally such as the stops of trips.
+"""
+
+import hashlib
+import re
+import typing
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from pydantic import BaseModel, ValidationError
+
+ANCHOR_MAX_CHARS = 40
+MIN_ANCHORS = 5
+
+# Without these an order cannot be created, so a template must extract them
+CORE_FIELDS = [
+    "customer_details.customer_name",
+    "customer_details.customer_email",
+    "total_load_details.load_total",
+    "trips.0.pickup_details.pickup_address",
+    "trips.0.deliver_to_details.delivery_address",
+]
+# Free-form lists the model fills in; rules are not learned for them
+SKIPPED_FIELDS = ("other_details", "miscellaneous_entities")
+
+VALUE_PATTERNS = {
+    "float": r"[$€£]?\s*\d[\d,]*(?:\.\d+)?",
+    "date": r"\d{1,4}[/.-]\d{1,2}[/.-]\d{1,4}",
+    "str": r".+?",
+}
+
+
+# Fingerprints
+
+def _normalize(text: Any) -> str:
+    return re.sub(r"\s+", " ", str(text if text is not None else "")).strip().lower()
+
+
+def line_label(line: str) -> Optional[str]:
+    """Static part of a line: the text before a colon, or a short line without digits."""
+    line = _normalize(line)
+    if ":" in line:
+        label = line.split(":", 1)[0].strip()
+    elif not re.search(r"\d", line):
+        label = line
+    else:
+        return None
+    if 2 <= len(label) <= ANCHOR_MAX_CHARS and not re.search(r"\d", label):
+        return label
+    return None
+
+
+def document_labels(text: str) -> set:
+    return {label for label in map(line_label, text.splitlines()) if label}
+
+
+def layout_fingerprint(anchors: Iterable[str]) -> str:
+    return hashlib.sha256("\n".join(sorted(anchors)).encode("utf-8")).hexdigest()
+
+
+def anchor_score(anchors: Sequence[str], labels: set) -> float:
+    """Share of a template's anchors present in a document."""
+    if not anchors:
+        return 0.0
+    return sum(1 for anchor in anchors if anchor in labels) / len(anchors)
+
+
+# Applying rules
+
+@lru_cache(maxsize=1024)
+def _compile(pattern: str):
+    return re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+
+
+def _coerce(value: str, value_type: str):
+    value = value.strip()
+    if value_type == "float":
+        return float(re.sub(r"[^\d.]", "", value))
+    return value
+
+
+def _set_path(data: dict, path: str, value: Any):
+    keys = path.split(".")
+    target = data
+    for key, next_key in zip(keys, keys[1:]):
+        if isinstance(target, list):
+            target = target[int(key)]
+        else:
+            target = target.setdefault(key, [] if next_key.isdigit() else {})
+        if isinstance(target, list) and next_key.isdigit():
+            while len(target) <= int(next_key):
+                target.append({})
+    if isinstance(target, list):
+        target[int(keys[-1])] = value
+    else:
+        target[keys[-1]] = value
+
+
+def _skeleton(model_class) -> dict:
+    """Empty values for every field of a pydantic model, so partial rule output validates."""
+    data = {}
+    for name, field in model_class.model_fields.items():
+        annotation = field.annotation
+        args = typing.get_args(annotation)
+        if not field.is_required():
+            data[name] = field.default
+        elif type(None) in args:
+            data[name] = None
+        elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            data[name] = _skeleton(annotation)
+        elif typing.get_origin(annotation) in (list, List):
+            data[name] = []
+        elif annotation is float:
+            data[name] = 0.0
+        else:
+            data[name] = ""
+    return data
+
+
+def _merge(base: dict, values: dict) -> dict:
+    for key, value in values.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge(base[key], value)
+        else:
+            base[key] = value
+    return base
+
+
+def apply_rules(rules: Sequence[dict], text: str, response_model) -> Tuple[Optional[BaseModel], List[str]]:
+    """
+    Extract a response with a template's rules.
+
+    Returns:
+        Tuple of (validated response or None, fields whose rule did not match
+        cleanly). A rule is low-confidence when it has no match at its index or
+        the value does not convert to the field's type.
+    """
+    values: Dict[str, Any] = {}
+    low_confidence = []
+    for rule in rules:
+        matches = _compile(rule["pattern"]).findall(text)
+        index = rule.get("index", 0)
+        if len(matches) <= index or not str(matches[index]).strip():
+            low_confidence.append(rule["field"])
+            continue
+        try:
+            _set_path(values, rule["field"], _coerce(matches[index], rule.get("type", "str")))
+        except (TypeError, ValueError):
+            low_confidence.append(rule["field"])
+
+    if low_confidence:
+        return None, low_confidence
+
+    trip_model = typing.get_args(response_model.model_fields["trips"].annotation)[0]
+    data = _skeleton(response_model)
+    data["trips"] = [_merge(_skeleton(trip_model), trip) for trip in values.pop("trips", [])]
+    try:
+        return response_model(**_merge(data, values)), []
+    except ValidationError as e:
+        return None, [".".join(str(p) for p in error["loc"]) for error in e.errors()]
+
+
+# Proposing templates
+
+def _leaf_values(data: Any, prefix: str = "") -> Iterable[Tuple[str, Any]]:
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in SKIPPED_FIELDS or key.endswith("_others"):
+                continue
+            yield from _leaf_values(value, f"{prefix}{key}.")
+    elif isinstance(data, list):
+        for index, value in enumerate(data):
+            yield from _leaf_values(value, f"{prefix}{index}.")
+    elif data not in (None, "", 0, 0.0):
+        yield prefix[:-1], data
+
+
+def _value_type(value: Any) -> str:
+    if isinstance(value, (int, float)):
+        return "float"
+    if re.fullmatch(VALUE_PATTERNS["date"], str(value).strip()):
+        return "date"
+    return "str"
+
+
+def _value_spellings(value: Any) -> List[str]:
+    if isinstance(value, (int, float)):
+        return [f"{value:,.2f}", f"{value:.2f}", f"{value:,.0f}", f"{value:.0f}"]
+    return [str(value).strip()]
+
+
+def _candidate_patterns(text: str, value: Any, value_type: str) -> List[str]:
+    """Line patterns that capture `value` where it appears after a static label."""
+    patterns = []
+    for line in text.splitlines():
+        for spelling in _value_spellings(value):
+            position = line.lower().find(spelling.lower())
+            if position < 0:
+                continue
+            prefix = line[:position].rstrip(" $€£")
+            suffix = line[position + len(spelling):].strip()
+            # The label must be static text, otherwise the rule only fits this document
+            if len(prefix.strip()) < 2 or re.search(r"\d", prefix):
+                continue
+            tail = ""
+            if value_type == "str":
+                # Free text runs to the end of the line, or to a static suffix such as "(shipper)"
+                static_suffix = suffix and not re.search(r"\d", suffix)
+                tail = (r"\s*" + re.escape(suffix) if static_suffix else "") + r"\s*$"
+            patterns.append(
+                r"^\s*" + re.escape(prefix.strip()) + r"\s*(" + VALUE_PATTERNS[value_type] + ")" + tail
+            )
+            break
+    return patterns
+
+
+def _same(extracted: Any, expected: Any, value_type: str) -> bool:
+    if value_type == "float":
+        try:
+            return abs(_coerce(str(extracted), "float") - float(expected)) < 0.005
+        except (TypeError, ValueError):
+            return False
+    return _normalize(extracted) == _normalize(expected)
+
+
+def propose_layout(
+    samples: Sequence[Tuple[str, dict]], min_share: float = 0.9
+) -> Tuple[Optional[dict], str]:
+    """
+    Learn anchors and rules from documents of one layout and their extractions.
+
+    Args:
+        samples: (document text, Order.raw_extract) pairs
+        min_share: Share of samples an anchor must appear in, and a rule must reproduce
+
+    Returns:
+        Tuple of ({"anchors", "fingerprint", "rules", "accuracy"} or None, reason)
+    """
+    if len(samples) < 2:
+        return None, "Need at least two documents"
+    needed = max(2, int(min_share * len(samples) + 0.999))
+
+    label_counts: Dict[str, int] = {}
+    for text, _ in samples:
+        for label in document_labels(text):
+            label_counts[label] = label_counts.get(label, 0) + 1
+    anchors = sorted(label for label, count in label_counts.items() if count >= needed)
+    if len(anchors) < MIN_ANCHORS:
+        return None, f"Only {len(anchors)} labels are shared by the documents"
+
+    fields: Dict[str, str] = {}
+    for _, extract in samples:
+        for path, value in _leaf_values(extract):
+            fields.setdefault(path, _value_type(value))
+
+    rules, accuracy = [], {}
+    for path, value_type in sorted(fields.items()):
+        expected = [dict(_leaf_values(extract)).get(path) for _, extract in samples]
+        candidates = []
+        for (text, _), value in zip(samples, expected):
+            if value is not None:
+                candidates += [p for p in _candidate_patterns(text, value, value_type) if p not in candidates]
+
+        best, best_hits = None, 0
+        for pattern in candidates:
+            try:
+                compiled = _compile(pattern)
+            except re.error:
+                continue
+            hits = 0
+            for (text, _), value in zip(samples, expected):
+                found = compiled.findall(text)
+                if value is not None and found and _same(found[0], value, value_type):
+                    hits += 1
+            if hits > best_hits:
+                best, best_hits = pattern, hits
+        if best and best_hits >= needed:
+            rules.append({"field": path, "pattern": best, "type": value_type, "index": 0})
+            accuracy[path] = round(best_hits / len(samples), 3)
+
+    learned = {rule["field"] for rule in rules}
+    missing = [field for field in CORE_FIELDS if field not in learned]
+    if missing:
+        return None, f"No reliable rule for {', '.join(missing)}"
+
+    return {
+        "anchors": anchors,
+        "fingerprint": layout_fingerprint(anchors),
+        "rules": rules,
+        "accuracy": accuracy,
+    }, f"{len(rules)} rules from {len(samples)} documents"
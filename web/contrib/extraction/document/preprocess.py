@@ -0,0 +1,207 @@
+"""
+Shrinks document text before it is sent to the model.
+
+Everything in the prompt is billed and counts against monthly_token_limit,
+but much of a rate confirmation's text carries no order data: whitespace
+runs, the same header and footer on every page, and legal terms. This
+module removes those, keeping the first copy of repeated page furniture
+because the customer's name is often only in the letterhead.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger("django")
+
+# Lines this close to the top or bottom of a page count as header/footer
+FURNITURE_LINES = 4
+# A header/footer line must repeat on at least this share of pages
+FURNITURE_MIN_SHARE = 0.5
+
+# Paragraphs of legal prose opening with these are dropped
+BOILERPLATE_PATTERNS = [
+    r"terms\s+(?:and|&)\s+conditions",
+    r"carrier\s+(?:agrees|acknowledges|shall|warrants|certifies)",
+    r"(?:this|the)\s+(?:rate\s+)?(?:confirmation|agreement)\s+(?:is|constitutes|shall|supersedes)",
+    r"limitation\s+of\s+liability",
+    r"indemnif",
+    r"confidentiality\s+notice",
+    r"by\s+(?:signing|accepting)\s+(?:this|the)",
+    r"double\s+brokering",
+    r"in\s+no\s+event\s+shall",
+]
+BOILERPLATE_MIN_CHARS = 200  # Short lines with these words are often real instructions
+BOILERPLATE_RE = re.compile(
+    r"^\W*(?:\d+[.)]\s*)?(?:" + "|".join(BOILERPLATE_PATTERNS) + ")", re.IGNORECASE
+)
+
+TOKENIZER_ENCODING = "o200k_base"  # gpt-4o family
+# Estimate when the encoding cannot load. tiktoken downloads it on first use
+# unless TIKTOKEN_CACHE_DIR holds it (the Docker image bakes it in)
+CHARS_PER_TOKEN = 4
+ENCODING_RETRY_SECONDS = 300
+
+_encoding = None
+_encoding_failed_at = None
+
+
+def load_encoding():
+    """
+    The tiktoken encoding, loaded once per process; Celery workers load it at start.
+
+    Returns None while it cannot be loaded. A failure (e.g. the download timing
+    out) is retried after ENCODING_RETRY_SECONDS instead of lasting until restart.
+    """
+    global _encoding, _encoding_failed_at
+    if _encoding is None and (
+        _encoding_failed_at is None or time.monotonic() - _encoding_failed_at >= ENCODING_RETRY_SECONDS
+    ):
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+            _encoding_failed_at = None
+        except Exception as e:
+            logger.warning(f"🔥Could not load the {TOKENIZER_ENCODING} encoding ({e}), estimating tokens")
+            _encoding_failed_at = time.monotonic()
+    return _encoding
+
+
+def count_tokens(text: str) -> Tuple[int, str]:
+    """
+    Count prompt tokens locally.
+
+    Returns:
+        Tuple of (token count, tokenizer name). The name is "estimate" when
+        the tiktoken encoding cannot be loaded and the count is characters / 4.
+    """
+    encoding = load_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=())), TOKENIZER_ENCODING
+    return -(-len(text) // CHARS_PER_TOKEN), "estimate"
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse blank runs and drop separator-only lines such as '-----'."""
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r"[ \t\u00a0]+", " ", line).strip()
+        if line and not re.search(r"[A-Za-z0-9]", line) and len(line) > 3:
+            continue
+        lines.append(line)
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _furniture_key(line: str) -> str:
+    key = line.lower()
+    # "Page 2 of 5" and printed dates repeat with different digits; other lines must match exactly
+    if re.search(r"\bpage\b", key) or re.fullmatch(r"[\d\s/.:-]+", key):
+        return re.sub(r"\d+", "#", key)
+    return key
+
+
+def strip_page_furniture(pages: List[str]) -> Tuple[List[str], int]:
+    """
+    Remove header/footer lines repeated across pages, keeping their first occurrence.
+
+    Returns:
+        Tuple of (pages, number of lines removed)
+    """
+    if len(pages) < 2:
+        return pages, 0
+
+    def edges(lines):
+        return lines[:FURNITURE_LINES] + lines[-FURNITURE_LINES:]
+
+    page_lines = [page.splitlines() for page in pages]
+    counts = Counter()
+    for lines in page_lines:
+        counts.update({_furniture_key(line) for line in edges(lines) if line.strip()})
+    threshold = max(2, FURNITURE_MIN_SHARE * len(pages))
+    furniture = {key for key, count in counts.items() if count >= threshold}
+
+    seen = set()
+    removed = 0
+    cleaned = []
+    for lines in page_lines:
+        edge = set(range(min(FURNITURE_LINES, len(lines)))) | set(
+            range(max(0, len(lines) - FURNITURE_LINES), len(lines))
+        )
+        kept = []
+        for index, line in enumerate(lines):
+            key = _furniture_key(line)
+            if index in edge and key in furniture:
+                if key in seen:
+                    removed += 1
+                    continue
+                seen.add(key)
+            kept.append(line)
+        cleaned.append("\n".join(kept))
+    return cleaned, removed
+
+
+def strip_boilerplate(text: str, seen: set = None) -> Tuple[str, int]:
+    """
+    Drop legal paragraphs (terms, liability, indemnity) and repeated long paragraphs.
+
+    Args:
+        text: Page text
+        seen: Paragraphs already kept, shared between the pages of a document
+
+    Returns:
+        Tuple of (text, number of paragraphs removed)
+    """
+    seen = set() if seen is None else seen
+    removed = 0
+    kept = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        normalized = re.sub(r"\s+", " ", paragraph).strip()
+        if len(normalized) >= BOILERPLATE_MIN_CHARS and (
+            BOILERPLATE_RE.match(normalized) or normalized.lower() in seen
+        ):
+            removed += 1
+            continue
+        seen.add(normalized.lower())
+        kept.append(paragraph)
+    return "\n\n".join(kept), removed
+
+
+def preprocess_pages(pages: List[str]) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Clean the text of each page before extraction.
+
+    Args:
+        pages: Text of each page, in order
+
+    Returns:
+        Tuple of the cleaned pages and stats for Order.usage_details:
+        tokens_before, tokens_after, tokens_saved, tokenizer,
+        furniture_lines_removed and boilerplate_paragraphs_removed
+    """
+    tokens_before, tokenizer = count_tokens("".join(page + "\n\n" for page in pages))
+
+    cleaned = [normalize_whitespace(page) for page in pages]
+    cleaned, furniture_removed = strip_page_furniture(cleaned)
+    boilerplate_removed = 0
+    seen = set()
+    for index, page in enumerate(cleaned):
+        cleaned[index], removed = strip_boilerplate(page, seen)
+        boilerplate_removed += removed
+
+    tokens_after, _ = count_tokens("".join(page + "\n\n" for page in cleaned))
+    stats = {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "tokenizer": tokenizer,
+        "furniture_lines_removed": furniture_removed,
+        "boilerplate_paragraphs_removed": boilerplate_removed,
+    }
+    logger.info(
+        f"✂️Prompt text {tokens_before} -> {tokens_after} tokens ({tokenizer}), "
+        f"{furniture_removed} header/footer lines and {boilerplate_removed} boilerplate paragraphs removed"
+    )
+    return cleaned, stats
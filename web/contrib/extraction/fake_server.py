@@ -0,0 +1,158 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Used by the gateway tests, and handy for running extraction offline:
+
+    python -m contrib.extraction.fake_server --port 8765
+    python -m contrib.extraction.fake_server --case single_trip_ratecon --latency 2
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python manage.py runserver
+"""
+
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeModelServer:
+    """
+    Threaded HTTP server answering POST /v1/chat/completions with canned content.
+
+    Args:
+        content: Assistant message content returned by every successful call, or a
+            callable taking the request body and returning the content
+        latency: Seconds each request takes, to exercise concurrency limits
+        port: Port to listen on; 0 picks a free one
+        host: Interface to listen on
+    """
+
+    def __init__(self, content="{}", latency: float = 0.0, port: int = 0, host: str = "127.0.0.1"):
+        self.content = content
+        self.latency = latency
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._failures = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def fail_next(self, status: int, times: int = 1, retry_after: float = None):
+        """Answer the next `times` requests with an error status."""
+        with self._lock:
+            self._failures.extend([(status, retry_after)] * times)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _respond(self, body: dict):
+        with self._lock:
+            self.requests.append(body)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failure = self._failures.popleft() if self._failures else None
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if failure:
+                status, retry_after = failure
+                headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+                return status, headers, {"error": {"message": "Injected failure", "type": "fake", "code": None}}
+
+            content = self.content(body) if callable(self.content) else self.content
+            prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+            completion_tokens = len(content) // 4
+            return 200, {}, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake-model"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, headers, payload = server._respond(body)
+
+                encoded = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(encoded)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(encoded)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client gave up, e.g. a timeout test
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve canned chat completions locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--content", default="{}", help="Assistant message content to return")
+    parser.add_argument("--case", help="Answer with the recorded responses of this benchmark corpus case")
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    content = args.content
+    if args.case:
+        from contrib.extraction.benchmark import load_corpus, recorded_responder
+
+        cases = {case["name"]: case for case in load_corpus()}
+        if args.case not in cases:
+            parser.error(f"unknown case {args.case}; choose from {', '.join(cases)}")
+        content = recorded_responder(cases[args.case])
+
+    fake = FakeModelServer(content=content, latency=args.latency, port=args.port, host=args.host)
+    print(f"Fake model server on {fake.url}")
+    fake._server.serve_forever()
@@ -0,0 +1,368 @@
+"""
+Rate limited access to the model provider for document extraction.
+
+All calls in a process go through one ExtractionGateway. It runs the async
+OpenAI client on a private event loop thread, so sync code (views, Celery
+tasks) can share a single concurrency cap and per-tenant rate limits.
+
+The per-tenant buckets live in Redis when a URL is given, so the rate holds
+across every gunicorn and Celery process. The concurrency cap is per process:
+the provider sees up to (processes x max_concurrency) requests in flight.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("django")
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+METRIC_SAMPLES = 1000  # Recent calls kept for percentiles
+
+# Refills and takes in one round trip, on Redis' clock so processes agree.
+# Returns the seconds to wait before the tokens are there, "0" once taken.
+REDIS_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "updated_at")
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = (requested - tokens) / rate
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "updated_at", now)
+redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, holding at most `capacity`.
+
+    Only used from the gateway's event loop, so it needs no locking.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, tokens: float = 1):
+        while True:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class RedisTokenBucket:
+    """
+    Token bucket kept in Redis, shared by every process using the same key.
+
+    While Redis is unreachable it falls back to a local TokenBucket, so an
+    outage throttles no harder than the per-process limit.
+    """
+
+    def __init__(self, client, key: str, rate: float, capacity: float):
+        self.client = client
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity
+        self.local = TokenBucket(rate, capacity)
+
+    async def acquire(self, tokens: float = 1):
+        from redis.exceptions import RedisError
+
+        while True:
+            try:
+                wait = float(
+                    await self.client.eval(
+                        REDIS_BUCKET_SCRIPT, 1, self.key, self.rate, self.capacity, tokens
+                    )
+                )
+            except RedisError as e:
+                logger.warning(f"🔥Rate limit store unavailable ({e.__class__.__name__}), using the local bucket")
+                await self.local.acquire(tokens)
+                return
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+
+class GatewayMetrics:
+    """In-process counters and recent timings for queue wait and model latency."""
+
+    def __init__(self):
+        self.counters = defaultdict(int)
+        self.queue_wait_ms = deque(maxlen=METRIC_SAMPLES)
+        self.latency_ms = deque(maxlen=METRIC_SAMPLES)
+        self._lock = threading.Lock()
+
+    def record(self, queue_wait_ms: float, latency_ms: float, attempts: int, ok: bool):
+        with self._lock:
+            self.counters["requests"] += 1
+            self.counters["retries"] += attempts - 1
+            self.counters["succeeded" if ok else "failed"] += 1
+            self.queue_wait_ms.append(queue_wait_ms)
+            self.latency_ms.append(latency_ms)
+
+    @staticmethod
+    def _percentile(samples, percentile: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.counters,
+                "queue_wait_ms_p50": self._percentile(self.queue_wait_ms, 0.5),
+                "queue_wait_ms_p95": self._percentile(self.queue_wait_ms, 0.95),
+                "latency_ms_p50": self._percentile(self.latency_ms, 0.5),
+                "latency_ms_p95": self._percentile(self.latency_ms, 0.95),
+            }
+
+
+class ExtractionGateway:
+    """
+    Concurrency limited, per-tenant rate limited model client with retries.
+
+    Args:
+        max_concurrency: Requests in flight at once in this process
+        tenant_rate_per_minute: Sustained requests per minute per tenant, across
+            processes when redis_url is set and per process otherwise
+        tenant_burst: Requests a tenant may send back to back before throttling
+        timeout: Seconds before a single request is abandoned
+        max_retries: Retries after a 429, 5xx, timeout or connection error
+        backoff_base: Seconds the jittered exponential backoff starts from
+        backoff_max: Longest wait between retries, in seconds
+        base_url: Alternative API endpoint (e.g. the fake server in tests)
+        api_key: API key, defaults to OPENAI_API_KEY
+        redis_url: Redis holding the tenant buckets; None keeps them in the process
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        tenant_rate_per_minute: float = 30,
+        tenant_burst: int = 5,
+        timeout: float = 60,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        redis_url: Optional[str] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.tenant_rate = tenant_rate_per_minute / 60
+        self.tenant_burst = tenant_burst
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.base_url = base_url
+        self.api_key = api_key
+        self.redis_url = redis_url
+        self.metrics = GatewayMetrics()
+
+        self._loop = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._client = None
+        self._semaphore = None
+        self._redis = None
+        self._buckets = {}
+
+    # Event loop plumbing
+
+    def _ensure_loop(self):
+        # A forked worker (Celery prefork, gunicorn) inherits no running thread
+        if self._loop is not None and self._pid == os.getpid():
+            return self._loop
+        with self._start_lock:
+            if self._loop is None or self._pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="extraction-gateway", daemon=True
+                )
+                thread.start()
+                self._loop = loop
+                self._pid = os.getpid()
+                self._client = None
+                self._semaphore = None
+                self._redis = None
+                self._buckets = {}
+        return self._loop
+
+    def _run(self, coroutine):
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+
+            # Retries are ours, with jitter and per-tenant accounting
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _get_redis(self):
+        if self._redis is None:
+            from redis.asyncio import Redis
+
+            # Short timeouts: a slow Redis should fall back, not stall extraction
+            self._redis = Redis.from_url(
+                self.redis_url, socket_timeout=1, socket_connect_timeout=1
+            )
+        return self._redis
+
+    def _bucket(self, tenant_id):
+        key = str(tenant_id) if tenant_id else "default"
+        if key not in self._buckets:
+            if self.redis_url:
+                self._buckets[key] = RedisTokenBucket(
+                    self._get_redis(), f"llm_rate_{key}", self.tenant_rate, self.tenant_burst
+                )
+            else:
+                self._buckets[key] = TokenBucket(self.tenant_rate, self.tenant_burst)
+        return self._buckets[key]
+
+    # Requests
+
+    def _is_retryable(self, error: Exception) -> bool:
+        import openai
+
+        if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in RETRYABLE_STATUS_CODES
+        return False
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter keeps retries from many workers from lining up
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def _request(self, operation: str, tenant_id=None, **kwargs):
+        client = self._get_client()
+        method = (
+            client.beta.chat.completions.parse
+            if operation == "parse"
+            else client.chat.completions.create
+        )
+
+        attempt = 0
+        queue_wait = 0.0
+        latency = 0.0
+        while True:
+            queued_at = time.monotonic()
+            await self._bucket(tenant_id).acquire()
+            async with self._semaphore:
+                started_at = time.monotonic()
+                queue_wait += started_at - queued_at
+                try:
+                    result = await method(**kwargs)
+                    latency += time.monotonic() - started_at
+                    self._record(operation, tenant_id, queue_wait, latency, attempt + 1, True)
+                    return result
+                except Exception as e:
+                    latency += time.monotonic() - started_at
+                    if attempt >= self.max_retries or not self._is_retryable(e):
+                        self._record(operation, tenant_id, queue_wait, latency, attempt + 1, False)
+                        raise
+                    delay = self._backoff(attempt, e)
+                    logger.warning(
+                        f"🔥LLM {operation} attempt {attempt + 1} failed ({e.__class__.__name__}), "
+                        f"retrying in {delay:.2f}s"
+                    )
+            # Back off outside the semaphore so waiting does not hold a slot
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _record(self, operation, tenant_id, queue_wait, latency, attempts, ok):
+        self.metrics.record(queue_wait * 1000, latency * 1000, attempts, ok)
+        logger.info(
+            f"🤖LLM {operation} tenant={tenant_id or 'default'} ok={ok} attempts={attempts} "
+            f"queue_wait={queue_wait * 1000:.0f}ms latency={latency * 1000:.0f}ms"
+        )
+
+    async def aparse(self, tenant_id=None, **kwargs):
+        """Structured-output completion. Must be awaited on the gateway's loop; see parse()."""
+        return await self._request("parse", tenant_id, **kwargs)
+
+    async def acreate(self, tenant_id=None, **kwargs):
+        """Plain chat completion. Must be awaited on the gateway's loop; see create()."""
+        return await self._request("create", tenant_id, **kwargs)
+
+    def parse(self, tenant_id=None, **kwargs):
+        """Blocking `client.beta.chat.completions.parse` through the gateway."""
+        return self._run(self.aparse(tenant_id, **kwargs))
+
+    def create(self, tenant_id=None, **kwargs):
+        """Blocking `client.chat.completions.create` through the gateway."""
+        return self._run(self.acreate(tenant_id, **kwargs))
+
+    def parse_many(self, requests, tenant_id=None):
+        """
+        Run several structured-output completions concurrently and wait for all of them.
+
+        Returns one entry per request, in order: the completion or the exception it raised.
+        """
+
+        async def gather():
+            return await asyncio.gather(
+                *(self.aparse(tenant_id, **kwargs) for kwargs in requests),
+                return_exceptions=True,
+            )
+
+        return self._run(gather())
+
+
+def get_gateway() -> ExtractionGateway:
+    from django.conf import settings
+
+    return ExtractionGateway(
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        tenant_rate_per_minute=settings.LLM_TENANT_RATE_PER_MINUTE,
+        tenant_burst=settings.LLM_TENANT_BURST,
+        timeout=settings.LLM_REQUEST_TIMEOUT,
+        max_retries=settings.LLM_MAX_RETRIES,
+        base_url=settings.OPENAI_BASE_URL,
+        redis_url=settings.LLM_RATE_LIMIT_REDIS_URL,
+    )
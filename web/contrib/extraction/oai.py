@@ -1,13 +1,23 @@
+from contextlib import contextmanager
 from enum import Enum
-from openai import OpenAI
-
-# Handle the case where no API key is set
-try:
-    client = OpenAI()
-except Exception:
-    # During migrations or when API key isn't needed, provide a dummy client
-    print("Warning: OpenAI client initialization failed. This is fine for migrations.")
-    client = None
+from django.utils.functional import SimpleLazyObject
+from contrib.extraction.gateway import get_gateway
+
+
+# Every model call goes through the gateway for concurrency, rate limits and retries.
+# Created on first use, so commands like migrations run without an API key.
+gateway = SimpleLazyObject(get_gateway)
+
+
+@contextmanager
+def use_gateway(instance):
+    """Send every model call in the process through `instance`, e.g. a gateway on the fake server."""
+    previous = gateway._wrapped
+    gateway._wrapped = instance
+    try:
+        yield instance
+    finally:
+        gateway._wrapped = previous
 
 
 class MODELS(Enum):
@@ -0,0 +1,107 @@
+"""
+Tiered model routing.
+
+Most documents are short, single-stop rate confirmations the mini model
+extracts as well as the large one, at a fraction of the price and latency.
+The router starts those on the mini model, checks the result against the
+task's invariants, and escalates to the large model only when a check fails.
+Every routed extraction is recorded per tenant in subscriptions.ModelRouteLog.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from contrib.extraction.oai import MODELS
+
+logger = logging.getLogger("django")
+
+SMALL_MODEL = MODELS.GPT4o_MINI.value
+LARGE_MODEL = MODELS.GPT4o_16k.value
+USAGE_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def route(
+    task: str,
+    call: Callable[[str], Tuple[Any, Dict[str, Any]]],
+    validate: Callable[[Any], List[str]],
+    small_first: bool = True,
+    tenant_id=None,
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Run `call` on the small model, escalating to the large model when `validate` rejects the result.
+
+    Args:
+        task: Name the route is recorded under, e.g. "order"
+        call: Runs the extraction with a model name, returning (result, token usage).
+            Exceptions on the small model escalate; on the large model they propagate
+        validate: Problems with a result, empty when it can be kept
+        small_first: False sends the request straight to the large model
+        tenant_id: Tenant the call and its record belong to
+
+    Returns:
+        Tuple of (result, token usage summed over the attempts, with a "routing" entry)
+    """
+    models = [SMALL_MODEL, LARGE_MODEL] if small_first else [LARGE_MODEL]
+    usage = {field: 0 for field in USAGE_FIELDS}
+    attempts, reasons = [], []
+    started = time.perf_counter()
+
+    for model in models:
+        attempt_started = time.perf_counter()
+        last = model == models[-1]
+        try:
+            result, attempt_usage = call(model)
+            problems = validate(result)
+        except Exception as e:
+            if last:
+                raise
+            result, attempt_usage, problems = None, {}, [f"{e.__class__.__name__}: {e}"]
+
+        for field in USAGE_FIELDS:
+            usage[field] += attempt_usage.get(field) or 0
+        attempts.append(
+            {
+                "model": model,
+                "latency_ms": round((time.perf_counter() - attempt_started) * 1000, 1),
+                "total_tokens": attempt_usage.get("total_tokens") or 0,
+                "problems": problems,
+            }
+        )
+        if not problems or last:
+            break
+        reasons += problems
+        logger.info(f"💫{task} extraction escalated from {model}: {'; '.join(problems)}")
+
+    usage["routing"] = {
+        "model": model,
+        "first_model": models[0],
+        "escalated": len(attempts) > 1,
+        "reasons": reasons,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        "attempts": attempts,
+    }
+    record_route(task, tenant_id, usage)
+    return result, usage
+
+
+def record_route(task: str, tenant_id, usage: Dict[str, Any]):
+    """Keep the route for per-tenant reporting. Never fails the extraction."""
+    from django.db import transaction
+    from subscriptions.models import ModelRouteLog
+
+    routing = usage["routing"]
+    try:
+        # A savepoint, so a failed insert does not break the caller's transaction
+        with transaction.atomic():
+            ModelRouteLog.objects.create(
+                tenant_id=tenant_id,
+                task=task,
+                first_model=routing["first_model"],
+                model=routing["model"],
+                escalated=routing["escalated"],
+                reasons=routing["reasons"],
+                latency_ms=routing["latency_ms"],
+                **{field: usage[field] for field in USAGE_FIELDS},
+            )
+    except Exception as e:
+        logger.warning(f"🔥Could not record {task} model route: {e}")
@@ -1,5 +1,5 @@
 import logging
-from PyPDF2 import PdfReader
+from contrib.pdf_text import iter_pages
 
 
 logger = logging.getLogger("django")
@@ -9,12 +9,6 @@ PDF_MAX_PAGE_LIMIT = 10
 
 def open_pdf(filepath: str):
     logger.debug(f"Opening PDF file: {filepath}")
-    reader = PdfReader(filepath)
-    number_of_pages = len(reader.pages)
-    if number_of_pages > PDF_MAX_PAGE_LIMIT:
-        raise ValueError(f"PDF has more than {PDF_MAX_PAGE_LIMIT} pages")
-    pages = ""
-    for page in reader.pages:
-        text = page.extract_text()
-        pages += text + "\n\n"
-    return pages, number_of_pages
+    texts = list(iter_pages(filepath, max_pages=PDF_MAX_PAGE_LIMIT))
+    pages = "".join(text + "\n\n" for text in texts)
+    return pages, len(texts)
@@ -0,0 +1,12 @@
+import importlib
+from django.utils.functional import SimpleLazyObject
+
+
+def lazy_import(name: str):
+    """
+    Stand-in for a heavy module that is imported on first attribute access.
+
+    Use as `pd = lazy_import("pandas")` so processes that never touch the
+    module do not pay for loading it at startup.
+    """
+    return SimpleLazyObject(lambda: importlib.import_module(name))
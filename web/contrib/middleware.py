@@ -0,0 +1,50 @@
+import json
+import logging
+from django.conf import settings
+from django.http import HttpRequest
+from contrib.queries import QueryRecorder, budget_for
+
+logger = logging.getLogger("django")
+metrics = logging.getLogger("queries")
+
+
+class QueryCountMiddleware:
+    """
+    Record the database work behind each response.
+
+    With QUERY_COUNT_HEADERS (on with DEBUG) the counts go out in response
+    headers, which load tests and the browser's network tab can read:
+    X-DB-Queries, X-DB-Time-Ms and X-DB-Duplicates, the runs of the most
+    repeated query shape. With QUERY_METRICS (on in production) every request
+    writes one JSON line to the "queries" logger instead. Requests over their
+    view's @query_budget are also logged as warnings.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        problems = recorder.over(budget_for(match))
+        if problems:
+            logger.warning(f"🔥 {request.path} over its query budget: {'; '.join(problems)}")
+
+        if settings.QUERY_COUNT_HEADERS:
+            response["X-DB-Queries"] = str(recorder.count)
+            response["X-DB-Time-Ms"] = f"{recorder.milliseconds:.1f}"
+            response["X-DB-Duplicates"] = str(recorder.worst_duplicate())
+
+        if settings.QUERY_METRICS:
+            metrics.info(json.dumps({
+                "view": match.view_name if match else None,
+                "method": request.method,
+                "status": response.status_code,
+                "queries": recorder.count,
+                "db_ms": round(recorder.milliseconds, 1),
+                "duplicates": recorder.worst_duplicate(),
+                "over_budget": bool(problems),
+            }))
+        return response
@@ -0,0 +1,153 @@
+"""
+Local OCR for scanned PDF pages.
+
+Scanned rate confirmations and licenses have no text layer, or one made of
+glyph garbage. Rather than sending those pages to a vision model, pages whose
+text layer is unusable are rendered with pdfium and read by the Tesseract
+command line tool, and the OCR text feeds the usual text prompts.
+
+OCR is slow (around a second per page), so pages are read in the pdf_text
+process pool and the result is cached by the hash of the rendered page: the
+same scanned page in a re-upload or another document is only read once.
+
+Needs the `tesseract` binary; pages are rendered with pypdfium2, a project
+dependency. Without tesseract, pages keep their text layer.
+"""
+
+import hashlib
+import io
+import logging
+import re
+import shutil
+import subprocess
+from typing import Dict, List
+
+logger = logging.getLogger("django")
+
+OCR_CACHE_TIMEOUT = 60 * 60 * 24 * 30  # 30 days
+# A page with fewer letters and digits than this has no usable text layer
+MIN_TEXT_CHARS = 40
+# Below this share of ordinary characters, the text layer is glyph garbage
+MIN_READABLE_SHARE = 0.8
+READABLE_RE = re.compile(r"[\w\s.,:;#@&$%/()'\"+\-]", re.UNICODE)
+
+_unavailable_warned = False
+
+
+def needs_ocr(text: str) -> bool:
+    """True when a page's text layer is empty or unreadable."""
+    text = (text or "").strip()
+    if sum(char.isalnum() for char in text) < MIN_TEXT_CHARS:
+        return True
+    # PDFs without a font ToUnicode map come out as "(cid:71)(cid:82)..." or replacement chars
+    text = re.sub(r"\(cid:\d+\)", "�", text)
+    return len(READABLE_RE.findall(text)) / len(text) < MIN_READABLE_SHARE
+
+
+def ocr_available() -> bool:
+    from django.conf import settings
+
+    global _unavailable_warned
+    try:
+        import pypdfium2  # noqa: F401
+    except ImportError:
+        missing = "pypdfium2"
+    else:
+        missing = None if shutil.which(settings.OCR_TESSERACT_CMD) else settings.OCR_TESSERACT_CMD
+    if missing and not _unavailable_warned:
+        logger.warning(f"🔥OCR is unavailable ({missing} is not installed), scanned pages stay empty")
+        _unavailable_warned = True
+    return missing is None
+
+
+def render_page(filepath: str, index: int, dpi: int) -> bytes:
+    """A page as a grayscale PNG, at the resolution Tesseract reads best."""
+    import pypdfium2
+
+    document = pypdfium2.PdfDocument(filepath)
+    try:
+        page = document[index]
+        image = page.render(scale=dpi / 72, grayscale=True).to_pil()
+        page.close()
+    finally:
+        document.close()
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def ocr_image(image: bytes, command: str, language: str, timeout: float) -> str:
+    """Run Tesseract on an image. Runs in pool workers, so it must not touch Django."""
+    result = subprocess.run(
+        [command, "stdin", "stdout", "-l", language, "--psm", "3"],
+        input=image,
+        capture_output=True,
+        timeout=timeout,
+        check=True,
+    )
+    return result.stdout.decode("utf-8", errors="replace")
+
+
+def ocr_pages(filepath: str, indexes: List[int]) -> Dict[int, str]:
+    """
+    OCR text of the given pages of a PDF.
+
+    Returns:
+        Page index to text, for the pages that could be read
+    """
+    from django.conf import settings
+    from django.core.cache import cache
+    from contrib.pdf_text import get_pool
+
+    images = {}
+    for index in indexes:
+        try:
+            images[index] = render_page(filepath, index, settings.OCR_DPI)
+        except Exception as e:
+            logger.warning(f"🔥Could not render page {index + 1} of {filepath} for OCR: {e}")
+    indexes = list(images)
+    keys = {
+        index: f"ocr_{settings.OCR_LANGUAGE}_{hashlib.sha256(image).hexdigest()}"
+        for index, image in images.items()
+    }
+    cached = cache.get_many(list(keys.values()))
+    missing = [index for index in indexes if keys[index] not in cached]
+
+    options = (settings.OCR_TESSERACT_CMD, settings.OCR_LANGUAGE, settings.OCR_TIMEOUT)
+    if len(missing) > 1 and settings.PDF_TEXT_WORKERS > 1:
+        pool = get_pool(settings.PDF_TEXT_WORKERS)
+        pending = {index: pool.submit(ocr_image, images[index], *options) for index in missing}
+
+        def read(index):
+            return pending[index].result()
+
+    else:
+
+        def read(index):
+            return ocr_image(images[index], *options)
+
+    results = {}
+    for index in missing:
+        try:
+            results[index] = read(index)
+        except Exception as e:
+            logger.warning(f"🔥OCR failed on page {index + 1} of {filepath}: {e}")
+
+    cache.set_many({keys[index]: text for index, text in results.items()}, timeout=OCR_CACHE_TIMEOUT)
+    logger.info(
+        f"👌OCR read {len(indexes)} pages of {filepath}, {len(indexes) - len(missing)} from cache"
+    )
+    return {
+        index: cached[keys[index]] if keys[index] in cached else results[index]
+        for index in indexes
+        if keys[index] in cached or index in results
+    }
+
+
+def ocr_fallback(filepath: str, start: int, texts: List[str]) -> List[str]:
+    """Replace unusable text layers of pages [start, start + len(texts)) with OCR text."""
+    scanned = [start + offset for offset, text in enumerate(texts) if needs_ocr(text)]
+    if not scanned or not ocr_available():
+        return texts
+    read = ocr_pages(filepath, scanned)
+    return [read.get(index, "").strip() or text for index, text in enumerate(texts, start=start)]
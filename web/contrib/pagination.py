@@ -0,0 +1,195 @@
+"""
+Keyset (cursor) pagination for list views and tables.
+
+OFFSET pagination reads and throws away every row before the page, and
+Django's paginator runs a COUNT(*) over the whole list on every request.
+Cursor pages filter on the sort key of the last row seen instead:
+
+    WHERE (created_at, id) < (:created_at, :id) ORDER BY created_at DESC, id DESC LIMIT 11
+
+which an index on (tenant, created_at, id) answers in constant time however
+deep the page. The catch is there are no page numbers, only newer/older
+links; totals come from approximate_count(), only when a page shows them.
+"""
+
+import base64
+import binascii
+import json
+from functools import cached_property
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+
+# On PostgreSQL, trust the planner's row estimate above this many rows
+ESTIMATE_ABOVE = 10000
+
+
+def approximate_count(queryset) -> tuple[int, bool]:
+    """
+    Rows of queryset, and whether the number is an estimate.
+
+    On PostgreSQL, EXPLAIN gives the planner's estimate for the filtered query
+    (the per-query cousin of pg_class.reltuples) without running it; above
+    ESTIMATE_ABOVE rows that is used instead of counting. Smaller lists, and
+    other databases, get an exact COUNT(*).
+    """
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor == "postgresql":
+        try:
+            plan = json.loads(queryset.explain(format="json"))
+        except EmptyResultSet:
+            return 0, False
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate > ESTIMATE_ABOVE:
+            return estimate, True
+    return queryset.count(), False
+
+
+def encode_cursor(backwards: bool, values) -> str:
+    payload = json.dumps({"b": backwards, "v": [str(value) for value in values]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, model, fields) -> tuple[bool, list]:
+    """Direction and key values of a cursor; Http404 when it was tampered with."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        values = payload["v"]
+        if len(values) != len(fields):
+            raise ValueError("cursor does not match the ordering")
+        return bool(payload["b"]), [
+            model._meta.get_field(field).to_python(value) for field, value in zip(fields, values)
+        ]
+    except (binascii.Error, ValueError, KeyError, TypeError, ValidationError):
+        raise Http404("Invalid cursor")
+
+
+def keyset_filter(ordering, values, backwards: bool = False) -> Q:
+    """Rows after values in ordering (before them when backwards), compared as a tuple."""
+    condition, equal = Q(), Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        descending = field.startswith("-") != backwards
+        condition |= equal & Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+class CursorPage:
+    """
+    One page of a keyset-paginated queryset. Quacks enough like a Django Page
+    (object_list, has_next, has_previous, has_other_pages) for the list views;
+    next_url and previous_url are set by CursorPaginationMixin.
+    """
+
+    def __init__(self, queryset, ordering, per_page: int, cursor: str | None = None):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        fields = [field.lstrip("-") for field in self.ordering]
+
+        backwards, values = decode_cursor(cursor, queryset.model, fields) if cursor else (False, None)
+        order = [field[1:] if field.startswith("-") else f"-{field}" for field in self.ordering] if backwards else self.ordering
+        rows = queryset.order_by(*order)
+        if values is not None:
+            rows = rows.filter(keyset_filter(self.ordering, values, backwards))
+
+        rows = list(rows[:per_page + 1])
+        more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+
+        self.object_list = rows
+        self._has_next = True if backwards else more
+        self._has_previous = more if backwards else values is not None
+        self.next_cursor = encode_cursor(False, self._key(rows[-1], fields)) if rows and self._has_next else None
+        self.previous_cursor = encode_cursor(True, self._key(rows[0], fields)) if rows and self._has_previous else None
+        self.next_url = self.previous_url = self.first_url = None
+
+    @staticmethod
+    def _key(row, fields):
+        return [getattr(row, field) for field in fields]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self._has_next or self._has_previous
+
+    @cached_property
+    def _count(self):
+        return approximate_count(self.queryset)
+
+    @property
+    def count(self) -> int:
+        """Rows across all pages; only counted when a template asks for it."""
+        return self._count[0]
+
+    @property
+    def count_is_estimate(self) -> bool:
+        return self._count[1]
+
+
+class CursorPaginationMixin:
+    """
+    Keyset pagination for ListView and django_tables2's SingleTableView.
+
+    Pages are keyed on cursor_ordering, which must end in a unique field so
+    every row has its own position. Templates get page_obj (a CursorPage) and
+    cursor_pagination=True; include "partials/cursor_pagination.html" for the
+    links. Tables sorted by a column (?sort=) fall back to numbered pages,
+    since the cursor only follows the default order.
+    """
+
+    cursor_ordering = ("-created_at", "-id")
+    cursor_param = "cursor"
+
+    def use_cursor(self) -> bool:
+        return "sort" not in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor():
+            return super().paginate_queryset(queryset, page_size)
+
+        page = CursorPage(queryset, self.cursor_ordering, page_size, self.request.GET.get(self.cursor_param))
+        page.first_url = self._cursor_url(None)
+        page.next_url = self._cursor_url(page.next_cursor) if page.next_cursor else None
+        page.previous_url = self._cursor_url(page.previous_cursor) if page.previous_cursor else None
+        self.cursor_page = page
+        return None, page, page.object_list, page.has_other_pages()
+
+    def _cursor_url(self, cursor) -> str:
+        params = self.request.GET.copy()
+        params.pop("page", None)
+        params.pop(self.cursor_param, None)
+        if cursor:
+            params[self.cursor_param] = cursor
+        return f"?{params.urlencode()}" if params else "?"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["cursor_pagination"] = hasattr(self, "cursor_page")
+        return context
+
+    # django_tables2: the table shows the rows of the cursor page as they are
+
+    def get_table_data(self):
+        if hasattr(self, "cursor_page"):
+            return self.cursor_page.object_list
+        return super().get_table_data()
+
+    def get_table_pagination(self, table):
+        if hasattr(self, "cursor_page"):
+            return False
+        return super().get_table_pagination(table)
@@ -0,0 +1,283 @@
+"""
+Text extraction from PDFs with pluggable engines.
+
+pypdfium2 (pdfium's C text layer) is faster than PyPDF2's pure Python parser.
+When it cannot open a document, or fails on some of its pages, PyPDF2 reads
+them instead. Compare them with `manage.py benchmark_pdf_text`.
+
+Page text is cached by document hash, so re-reading a document (retries,
+re-extraction with another prompt) costs nothing. Long documents can be split
+across a process pool (PDF_TEXT_WORKERS). Pages without a usable text layer
+(scans) are read with local OCR, see contrib.ocr.
+
+This module is imported by pool workers, so it keeps Django imports inside
+the functions that need them.
+"""
+
+import atexit
+import hashlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger("django")
+
+PAGE_SEPARATOR = "\n\n"
+PDF_TEXT_CACHE_TIMEOUT = 60 * 60 * 24 * 7  # 7 days
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class PdfTextEngine:
+    """Reads page text from a PDF file. Subclasses wrap one library each."""
+
+    name = ""
+    module = ""
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            __import__(cls.module)
+            return True
+        except ImportError:
+            return False
+
+    def page_count(self, filepath: str) -> int:
+        raise NotImplementedError
+
+    def extract(self, filepath: str, start: int, stop: int) -> List[str]:
+        """Text of pages [start, stop), one string per page."""
+        raise NotImplementedError
+
+
+class PyPDF2Engine(PdfTextEngine):
+    name = "pypdf2"
+    module = "PyPDF2"
+
+    def page_count(self, filepath: str) -> int:
+        from PyPDF2 import PdfReader
+
+        return len(PdfReader(filepath).pages)
+
+    def extract(self, filepath: str, start: int, stop: int) -> List[str]:
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(filepath)
+        return [reader.pages[index].extract_text() for index in range(start, stop)]
+
+
+class PdfiumEngine(PdfTextEngine):
+    name = "pypdfium2"
+    module = "pypdfium2"
+
+    def page_count(self, filepath: str) -> int:
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(filepath)
+        try:
+            return len(document)
+        finally:
+            document.close()
+
+    def extract(self, filepath: str, start: int, stop: int) -> List[str]:
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(filepath)
+        try:
+            texts = []
+            for index in range(start, stop):
+                page = document[index]
+                textpage = page.get_textpage()
+                # pdfium ends lines with CRLF
+                texts.append(textpage.get_text_range().replace("\r\n", "\n"))
+                textpage.close()
+                page.close()
+            return texts
+        finally:
+            document.close()
+
+
+ENGINES = {engine.name: engine for engine in (PdfiumEngine, PyPDF2Engine)}
+FALLBACK_ENGINE = PyPDF2Engine.name
+_missing_engines = set()  # Warned about once per process
+
+
+def get_engine(name: Optional[str] = None) -> PdfTextEngine:
+    """Engine by name, defaulting to PDF_TEXT_ENGINE and falling back to PyPDF2."""
+    if name is None:
+        from django.conf import settings
+
+        name = settings.PDF_TEXT_ENGINE
+    engine = ENGINES.get(name)
+    if engine is None:
+        raise ValueError(f"Unknown PDF text engine {name}. Choices: {', '.join(ENGINES)}")
+    if not engine.available():
+        if name not in _missing_engines:
+            logger.warning(f"🔥PDF text engine {name} is not installed, using {FALLBACK_ENGINE}")
+            _missing_engines.add(name)
+        engine = ENGINES[FALLBACK_ENGINE]
+    return engine()
+
+
+# Process pool
+
+_pool = None
+_pool_pid = None
+
+
+def _extract_range(engine_name: str, filepath: str, start: int, stop: int) -> List[str]:
+    return ENGINES[engine_name]().extract(filepath, start, stop)
+
+
+def get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """One pool per process. forkserver, because web and worker processes run threads."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        _pool = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("forkserver")
+        )
+        _pool_pid = os.getpid()
+    return _pool
+
+
+@atexit.register
+def shutdown_pool():
+    """Stop this process's pool workers; runs at interpreter exit."""
+    global _pool, _pool_pid
+    # A forked child must not shut down the pool its parent owns
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown(wait=True, cancel_futures=True)
+    _pool = _pool_pid = None
+
+
+def _file_digest(filepath: str) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _page_ranges(pages: List[int], size: int) -> List[range]:
+    """Group page indexes into contiguous ranges of at most `size` pages."""
+    ranges = []
+    start = previous = None
+    for index in pages:
+        if start is None:
+            start = previous = index
+        elif index == previous + 1 and index - start < size:
+            previous = index
+        else:
+            ranges.append(range(start, previous + 1))
+            start = previous = index
+    if start is not None:
+        ranges.append(range(start, previous + 1))
+    return ranges
+
+
+def _fallback(engine: PdfTextEngine, filepath: str, page_range: range, error: Exception) -> List[str]:
+    """Read the pages an engine failed on with the fallback engine."""
+    if engine.name == FALLBACK_ENGINE:
+        raise error
+    logger.warning(
+        f"🔥{engine.name} could not read pages {page_range.start + 1}-{page_range.stop} of {filepath} "
+        f"({error}), using {FALLBACK_ENGINE}"
+    )
+    return ENGINES[FALLBACK_ENGINE]().extract(filepath, page_range.start, page_range.stop)
+
+
+def _extract_pages(engine: PdfTextEngine, filepath: str, pages: List[int]) -> Iterator[List[str]]:
+    """Yield the text of `pages` range by range, in order."""
+    from django.conf import settings
+
+    workers = settings.PDF_TEXT_WORKERS
+    if workers <= 1 or len(pages) < settings.PDF_TEXT_PARALLEL_MIN_PAGES:
+        for page_range in _page_ranges(pages, len(pages)):
+            try:
+                texts = engine.extract(filepath, page_range.start, page_range.stop)
+            except Exception as e:
+                texts = _fallback(engine, filepath, page_range, e)
+            yield texts
+        return
+
+    # Enough pages per worker to amortise opening the document in each one
+    page_ranges = _page_ranges(pages, max(1, -(-len(pages) // workers)))
+    futures = [
+        get_pool(workers).submit(_extract_range, engine.name, filepath, r.start, r.stop)
+        for r in page_ranges
+    ]
+    for page_range, future in zip(page_ranges, futures):
+        try:
+            texts = future.result()
+        except Exception as e:
+            texts = _fallback(engine, filepath, page_range, e)
+        yield texts
+
+
+def iter_pages(filepath: str, engine: Optional[str] = None, max_pages: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the text of each page of a PDF, in order.
+
+    Args:
+        filepath: Path to the PDF file
+        engine: Engine name, defaults to PDF_TEXT_ENGINE
+        max_pages: Raise ValueError before reading anything if the document is longer
+
+    Yields:
+        Page text, as cached pages become available or extraction finishes
+    """
+    from django.conf import settings
+    from django.core.cache import cache
+
+    pdf_engine = get_engine(engine)
+    digest = _file_digest(filepath)
+    prefix = f"pdf_text_{pdf_engine.name}_{digest}"
+
+    try:
+        number_of_pages = cache.get(prefix)
+        if number_of_pages is None:
+            number_of_pages = pdf_engine.page_count(filepath)
+    except Exception as e:
+        if pdf_engine.name == FALLBACK_ENGINE:
+            raise
+        logger.warning(f"🔥{pdf_engine.name} could not open {filepath} ({e}), using {FALLBACK_ENGINE}")
+        yield from iter_pages(filepath, FALLBACK_ENGINE, max_pages)
+        return
+
+    if max_pages is not None and number_of_pages > max_pages:
+        raise ValueError(f"PDF has more than {max_pages} pages")
+
+    keys = [f"{prefix}_{index}" for index in range(number_of_pages)]
+    cached = cache.get_many(keys)
+    missing = [index for index, key in enumerate(keys) if key not in cached]
+    logger.debug(
+        f"Reading {filepath} with {pdf_engine.name}: {number_of_pages} pages, {len(missing)} not cached"
+    )
+
+    extracted = _extract_pages(pdf_engine, filepath, missing) if missing else iter(())
+    index = 0
+    while index < number_of_pages:
+        if keys[index] in cached:
+            yield cached[keys[index]]
+            index += 1
+            continue
+        texts = next(extracted)
+        if settings.OCR_ENABLED:
+            from contrib.ocr import ocr_fallback
+
+            texts = ocr_fallback(filepath, index, texts)
+        cache.set_many(
+            {keys[index + offset]: text for offset, text in enumerate(texts)},
+            timeout=PDF_TEXT_CACHE_TIMEOUT,
+        )
+        yield from texts
+        index += len(texts)
+
+    cache.set(prefix, number_of_pages, timeout=PDF_TEXT_CACHE_TIMEOUT)
+
+
+def read_pdf_text(filepath: str, engine: Optional[str] = None, max_pages: Optional[int] = None) -> str:
+    """Whole document text, pages separated by a blank line."""
+    return "".join(text + PAGE_SEPARATOR for text in iter_pages(filepath, engine, max_pages))
@@ -0,0 +1,88 @@
+"""
+PostgreSQL-only schema pieces that must not break the SQLite dev database.
+
+Indexes and constraints built on PostgreSQL types (ranges, GiST) can't live
+in a model's Meta: migrate would try to create them on SQLite too. Put them
+in a migration wrapped in PostgresOnly instead:
+
+    PostgresOnly(migrations.AddIndex(
+        model_name="drivertruckassignment",
+        index=GistIndex(TsTzRange("start_date", "end_date"), name="assignment_period_gist"),
+    ))
+
+The wrapped operation runs its SQL on PostgreSQL and does nothing elsewhere.
+It never touches the migration state, so makemigrations doesn't see the
+index and won't try to remove it from Meta-less models.
+
+Indexes declared in Meta on large tables are added with
+AddIndexConcurrentlyOnPostgres, in a migration with atomic = False, so
+building them does not lock writes on PostgreSQL.
+"""
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db.migrations.operations import AddIndex
+from django.db.migrations.operations.base import Operation
+from django.db.models import Func
+
+
+class TsTzRange(Func):
+    """TSTZRANGE(lower, upper), half open; a NULL upper bound is open ended."""
+
+    function = "TSTZRANGE"
+
+    @property
+    def output_field(self):
+        from django.contrib.postgres.fields import DateTimeRangeField  # type: ignore
+
+        return DateTimeRangeField()
+
+
+class PostgresOnly(Operation):
+    """Run the database side of operation on PostgreSQL only, leaving the state alone."""
+
+    reduces_to_sql = True
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    @property
+    def reversible(self):
+        return self.operation.reversible
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            self.operation.database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            self.operation.database_backwards(app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return f"{self.operation.describe()} (PostgreSQL only)"
+
+    @property
+    def migration_name_fragment(self):
+        return self.operation.migration_name_fragment
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL and a plain AddIndex elsewhere
+    (SQLite has no concurrent builds). Records the index in the migration
+    state on every database, like AddIndex.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,141 @@
+"""
+Query recording for requests and tests.
+
+QueryRecorder counts the queries run on every database connection, their
+time, and how often each query *shape* repeats. The shape (fingerprint) is
+the SQL with literals and IN lists collapsed, so the 40 `SELECT ... WHERE
+id = %s` of an N+1 loop share one fingerprint while two unrelated queries
+don't.
+
+Views declare how many queries they may run with @query_budget; the
+middleware reports against it and QueryBudgetMixin asserts it in tests.
+"""
+
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from dataclasses import dataclass
+from django.db import connections
+
+# A fingerprint running more often than this in one request is an N+1 suspect
+DUPLICATE_THRESHOLD = 3
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?|'[^']*'|-?\d+(?:\.\d+)?)\s*,?)+\)", re.I)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.\"])-?\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """The shape of a query: literals become ?, IN lists become IN (...)."""
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _SPACE.sub(" ", sql).strip().replace("%s", "?")
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    max_queries: int
+    max_duplicates: int = DUPLICATE_THRESHOLD
+
+
+def query_budget(max_queries: int, max_duplicates: int = DUPLICATE_THRESHOLD):
+    """
+    Declare the most queries a view may run, and how often one query shape
+    may repeat. Works on view functions and view classes:
+
+        @query_budget(12)
+        class OrderListView(LoginRequiredMixin, SingleTableView): ...
+    """
+    def decorate(view):
+        view.query_budget = QueryBudget(max_queries, max_duplicates)
+        return view
+    return decorate
+
+
+def budget_for(resolver_match) -> QueryBudget | None:
+    """The budget of the view a request resolved to, if it declares one."""
+    if resolver_match is None:
+        return None
+    view = getattr(resolver_match.func, "view_class", resolver_match.func)
+    return getattr(view, "query_budget", None)
+
+
+class QueryRecorder:
+    """
+    Record the queries run inside a with block, on every connection.
+
+        with QueryRecorder() as recorder:
+            response = view(request)
+        recorder.count, recorder.milliseconds, recorder.duplicates()
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def milliseconds(self) -> float:
+        return self.seconds * 1000
+
+    def duplicates(self, threshold: int = 1) -> dict[str, int]:
+        """Fingerprints that ran more than threshold times, most repeated first."""
+        return {sql: count for sql, count in self.fingerprints.most_common() if count > threshold}
+
+    def worst_duplicate(self) -> int:
+        """Runs of the most repeated fingerprint, 0 without queries."""
+        return max(self.fingerprints.values(), default=0)
+
+    def over(self, budget: QueryBudget | None) -> list[str]:
+        """How the recorded queries exceed budget, empty when within it."""
+        if budget is None:
+            return []
+        problems = []
+        if self.count > budget.max_queries:
+            problems.append(f"{self.count} queries, budget {budget.max_queries}")
+        for sql, count in self.duplicates(budget.max_duplicates).items():
+            problems.append(f"{count}x {sql[:300]}")
+        return problems
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin: fetch a URL and fail when its view goes over its
+    @query_budget, listing the repeated queries that look like N+1.
+
+    Give the page more rows than the duplicate threshold, otherwise a
+    query per row stays under it.
+    """
+
+    def assertQueryBudget(self, url, method="get", **kwargs):
+        with QueryRecorder() as recorder:
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400, f"{url} returned {response.status_code}")
+        budget = budget_for(response.resolver_match)
+        self.assertIsNotNone(budget, f"{url} has no @query_budget")
+        problems = recorder.over(budget)
+        if problems:
+            self.fail(f"{url} is over its query budget:\n" + "\n".join(problems))
+        return response
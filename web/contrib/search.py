@@ -0,0 +1,252 @@
+"""
+Indexed text search over a model's search_fields.
+
+Models opt in with a class attribute naming the columns people look things
+up by:
+
+    class Order(BaseModel):
+        search_fields = ("order_number", "customer_name", "origin", "destination")
+
+and search(queryset, text) returns the rows containing every word of text,
+best match first (annotated as search_rank). Scope the queryset to the
+tenant before searching.
+
+On PostgreSQL the words are matched as prefixes against a 'simple'
+to_tsvector of the fields, and the whole text as a substring of any field;
+AddSearchIndex (in the app's migrations) creates the GIN indexes both use,
+the tsvector expression and a pg_trgm index per text field. Rank is
+ts_rank plus the best trigram word similarity.
+
+On SQLite, for development, each model gets an FTS5 table with the trigram
+tokenizer (substring matches, SQLite >= 3.34), kept in sync by triggers.
+sync_search_tables() rebuilds them after every migrate, since SQLite
+migrations recreate tables and drop their triggers. Rank is -bm25().
+
+Other databases fall back to icontains.
+"""
+
+import re
+from functools import reduce
+from operator import and_, or_
+from django.apps import apps as global_apps
+from django.db import DEFAULT_DB_ALIAS, connections, models, router
+from django.db.migrations.operations.base import Operation
+from django.db.models import F, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Upper
+
+# No stemming or stop words: the searched fields are names, numbers and places
+CONFIG = "simple"
+# Shortest word the trigram indexes can find
+MIN_TRIGRAM = 3
+
+_WORD = re.compile(r"\w+")
+
+
+def terms(text: str) -> list[str]:
+    """Words of a search, lowercased, without duplicates or punctuation."""
+    return list(dict.fromkeys(word.lower() for word in _WORD.findall(text or "")))
+
+
+def search_fields(model) -> tuple[str, ...]:
+    fields = getattr(model, "search_fields", None)
+    if not fields:
+        raise ValueError(f"{model.__name__} has no search_fields")
+    return tuple(fields)
+
+
+def text_fields(model, fields) -> list[str]:
+    """The fields stored as text, which the trigram indexes and icontains cover."""
+    return [field for field in fields if isinstance(model._meta.get_field(field), (models.CharField, models.TextField))]
+
+
+def search_table(model) -> str:
+    return f"{model._meta.db_table}_search"
+
+
+def _vendor(model) -> str:
+    return connections[router.db_for_read(model)].vendor
+
+
+def _contains_any(model, fields, word) -> Q:
+    return reduce(or_, (Q(**{f"{field}__icontains": word}) for field in text_fields(model, fields)), Q(pk__in=[]))
+
+
+def _fts_match(words) -> str | None:
+    """FTS5 query requiring every word long enough for the trigram tokenizer."""
+    words = [word for word in words if len(word) >= MIN_TRIGRAM]
+    if not words:
+        return None
+    return " AND ".join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def _postgres_vector(fields):
+    from django.contrib.postgres.search import SearchVector  # type: ignore
+
+    return SearchVector(*fields, config=CONFIG)
+
+
+def _postgres_query(words):
+    from django.contrib.postgres.search import SearchQuery  # type: ignore
+
+    return SearchQuery(" & ".join(f"{word}:*" for word in words), config=CONFIG, search_type="raw")
+
+
+def search_q(model, text: str, fields=None) -> Q:
+    """Q for the rows of model matching every word of text; empty text matches nothing."""
+    fields = tuple(fields or search_fields(model))
+    words = terms(text)
+    if not words:
+        return Q(pk__in=[])
+
+    vendor = _vendor(model)
+    if vendor == "postgresql":
+        from django.contrib.postgres.search import SearchVectorExact  # type: ignore
+
+        matches = Q(SearchVectorExact(_postgres_vector(fields), _postgres_query(words)))
+        for field in text_fields(model, fields):
+            matches |= Q(**{f"{field}__icontains": text.strip()})
+        return matches
+
+    if vendor == "sqlite":
+        table, fts = model._meta.db_table, search_table(model)
+        condition = Q()
+        match = _fts_match(words)
+        if match:
+            condition &= Q(pk__in=RawSQL(
+                f'SELECT "{table}"."{model._meta.pk.column}" FROM "{table}" '
+                f'JOIN "{fts}" ON "{fts}".rowid = "{table}".rowid WHERE "{fts}" MATCH %s',
+                [match],
+            ))
+        for word in words:
+            if len(word) < MIN_TRIGRAM:
+                condition &= _contains_any(model, fields, word)
+        return condition
+
+    return reduce(and_, (_contains_any(model, fields, word) for word in words))
+
+
+def search_rank(model, text: str, fields=None):
+    """How well a row matches text, higher is better, for rows that match search_q()."""
+    fields = tuple(fields or search_fields(model))
+    words = terms(text)
+    vendor = _vendor(model)
+
+    if words and vendor == "postgresql":
+        from django.contrib.postgres.search import SearchRank, TrigramWordSimilarity  # type: ignore
+        from django.db.models.functions import Greatest
+
+        rank = SearchRank(_postgres_vector(fields), _postgres_query(words))
+        similarities = [TrigramWordSimilarity(text.strip(), field) for field in text_fields(model, fields)]
+        if similarities:
+            rank = rank + (Greatest(*similarities) if len(similarities) > 1 else similarities[0])
+        return rank
+
+    match = _fts_match(words) if vendor == "sqlite" else None
+    if match:
+        table, fts = model._meta.db_table, search_table(model)
+        return RawSQL(
+            f'SELECT -bm25("{fts}") FROM "{fts}" WHERE "{fts}" MATCH %s AND "{fts}".rowid = "{table}".rowid',
+            [match],
+            output_field=models.FloatField(),
+        )
+    return Value(0.0, output_field=models.FloatField())
+
+
+def search(queryset, text: str, fields=None):
+    """Rows of queryset matching every word of text, best first, annotated with search_rank."""
+    model = queryset.model
+    return queryset.filter(search_q(model, text, fields)).annotate(
+        search_rank=search_rank(model, text, fields)
+    ).order_by("-search_rank", "pk")
+
+
+class AddSearchIndex(Operation):
+    """
+    Migration operation creating the PostgreSQL indexes search() uses:
+
+        AddSearchIndex("order", ["order_number", "customer_name"])
+
+    a GIN index on the fields' tsvector and a gin_trgm_ops index on
+    UPPER(field) for each text field, which is what icontains compiles to.
+    Needs pg_trgm, so put TrigramExtension() first. Does nothing on other
+    databases; SQLite gets its FTS5 tables from sync_search_tables().
+    """
+
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, model_name, fields):
+        self.model_name = model_name
+        self.fields = list(fields)
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def indexes(self, model):
+        from django.contrib.postgres.indexes import GinIndex, OpClass  # type: ignore
+
+        table = model._meta.db_table
+        yield GinIndex(_postgres_vector(self.fields), name=f"{table}_fts"[:63])
+        for field in text_fields(model, self.fields):
+            yield GinIndex(OpClass(Upper(F(field)), name="gin_trgm_ops"), name=f"{table}_{field}_trgm"[:63])
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if schema_editor.connection.vendor == "postgresql" and self.allow_migrate_model(schema_editor.connection.alias, model):
+            for index in self.indexes(model):
+                schema_editor.add_index(model, index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if schema_editor.connection.vendor == "postgresql" and self.allow_migrate_model(schema_editor.connection.alias, model):
+            for index in self.indexes(model):
+                schema_editor.remove_index(model, index)
+
+    def describe(self):
+        return f"Create search indexes on {self.model_name} ({', '.join(self.fields)})"
+
+    @property
+    def migration_name_fragment(self):
+        return f"{self.model_name.lower()}_search"
+
+
+def sync_search_table(connection, model):
+    """(Re)create the FTS5 table and triggers of model on SQLite, and fill it."""
+    table, fts = model._meta.db_table, search_table(model)
+    columns = [model._meta.get_field(field).column for field in search_fields(model)]
+    names = ", ".join(f'"{column}"' for column in columns)
+    new = ", ".join(f'new."{column}"' for column in columns)
+    old = ", ".join(f'old."{column}"' for column in columns)
+
+    with connection.cursor() as cursor:
+        for trigger in ("insert", "delete", "update"):
+            cursor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{trigger}"')
+        cursor.execute(f'DROP TABLE IF EXISTS "{fts}"')
+        cursor.execute(f"CREATE VIRTUAL TABLE \"{fts}\" USING fts5({names}, content='{table}', tokenize='trigram')")
+        cursor.execute(
+            f'CREATE TRIGGER "{fts}_insert" AFTER INSERT ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}"(rowid, {names}) VALUES (new.rowid, {new}); END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER "{fts}_delete" AFTER DELETE ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {names}) VALUES (\'delete\', old.rowid, {old}); END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER "{fts}_update" AFTER UPDATE ON "{table}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, {names}) VALUES (\'delete\', old.rowid, {old}); '
+            f'INSERT INTO "{fts}"(rowid, {names}) VALUES (new.rowid, {new}); END'
+        )
+        cursor.execute(f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')')
+
+
+def sync_search_tables(using=DEFAULT_DB_ALIAS, **kwargs):
+    """post_migrate receiver: the SQLite FTS5 tables of every model with search_fields."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    existing = set(connection.introspection.table_names())
+    for model in global_apps.get_models():
+        if getattr(model, "search_fields", None) and model._meta.db_table in existing:
+            if router.allow_migrate_model(using, model):
+                sync_search_table(connection, model)
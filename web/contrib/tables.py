@@ -0,0 +1,46 @@
+"""
+Tables that say what their rows need from the database.
+
+A table's columns and render_* methods decide which relations and fields a
+page reads, so the table is where that is declared:
+
+    class DispatchTable(EagerLoadingTable):
+        select_related = ("order", "driver", "truck", "carrier")
+        only = ("dispatch_id", "status", "order__order_number", "driver__first_name", ...)
+
+EagerLoadingTableMixin applies it to a list view's queryset; anything else
+showing the table calls prepare_queryset() itself. A field read by the page
+but missing from only() is loaded by one query per row, which the query
+budget tests (contrib/queries.py) catch.
+"""
+
+import django_tables2 as tables  # type: ignore
+
+
+class EagerLoadingTable(tables.Table):
+    # Relations followed by the columns, for select_related()
+    select_related = ()
+    # Fields read by the columns, for only(); None loads every field
+    only = None
+
+    @classmethod
+    def prepare_queryset(cls, queryset, *extra_fields):
+        """Queryset with the table's relations joined and only its fields loaded, plus extra_fields."""
+        if cls.select_related:
+            queryset = queryset.select_related(*cls.select_related)
+        if cls.only is not None:
+            queryset = queryset.only(*cls.only, *cls.select_related, *extra_fields)
+        return queryset
+
+
+class EagerLoadingTableMixin:
+    """
+    For SingleTableView: load the rows the way the table class declares.
+    Also covers the rows of the cursor pages (contrib/pagination.py).
+    """
+
+    def get_context_data(self, **kwargs):
+        table_class = self.get_table_class()
+        if hasattr(table_class, "prepare_queryset"):
+            self.object_list = table_class.prepare_queryset(self.object_list)
+        return super().get_context_data(**kwargs)
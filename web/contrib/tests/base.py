@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+from fleet.examples.synthetic import SyntheticDataset, tenant_name, username
+from tenant.models import Tenant
+
+# Pages render {% static %}; the manifest only exists after collectstatic
+STATIC = {**settings.STORAGES, "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}}
+
+
+def free_fleet(tenant):
+    """Free every driver and truck from the assignments still running at the end of the dataset."""
+    from dispatch.models import AssignmentStatus, DriverTruckAssignment
+    from fleet.models import DriverEmployment, DutyStatus, Truck, TruckDutyStatus
+
+    DriverTruckAssignment.objects.filter(tenant=tenant, end_date=None).update(status=AssignmentStatus.OFF_DUTY)
+    Truck.objects.filter(tenant=tenant).update(duty_status=TruckDutyStatus.AVAILABLE)
+    DriverEmployment.objects.filter(tenant=tenant).update(duty_status=DutyStatus.AVAILABLE)
+
+
+@override_settings(STORAGES=STATIC)
+class SyntheticTenantTestCase(TestCase):
+    """One synthetic tenant (the first of `tenants`), with its user logged in for every test."""
+
+    seed = 43
+    tenants = 1
+    dataset = {"drivers": 8, "trucks": 6, "customers": 4, "days": 20}
+
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataset(seed=cls.seed, tenants=cls.tenants, log=lambda message: None, **cls.dataset).generate()
+        cls.tenant = Tenant.objects.get(name=tenant_name(cls.seed, 1))
+
+    def setUp(self):
+        self.client.login(username=username(self.seed, 1), password="synthetic")
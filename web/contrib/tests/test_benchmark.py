@@ -0,0 +1,70 @@
+import json
+import os
+import tempfile
+import unittest
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+from contrib.extraction import benchmark
+from contrib.pdf_text import PdfiumEngine
+
+
+def run(kind, latency_ms, tokens, fields, error=None):
+    return {
+        "case": f"{kind}-case",
+        "kind": kind,
+        "latency_ms": latency_ms,
+        "total_tokens": tokens,
+        "escalated": False,
+        "fields": fields,
+        "error": error,
+    }
+
+
+class ScoreTest(SimpleTestCase):
+    def test_fields_are_compared_by_path_with_loose_formatting(self):
+        expected = {"order_info.order_id": "RC-1", "trips.0.pickup_details.pickup_address": "1 Main St", "total": 1850}
+        actual = {
+            "order_info": {"order_id": "rc-1"},
+            "trips": [{"pickup_details": {"pickup_address": "1  Main St "}}],
+            "total": "1850.00",
+        }
+        self.assertEqual(set(benchmark.score(expected, actual).values()), {True})
+        self.assertEqual(set(benchmark.score(expected, None).values()), {False})
+
+    def test_compare_flags_worse_runs_only(self):
+        baseline = benchmark.summarize([run("order", 100, 1000, {"order_info.order_id": True})])
+        self.assertEqual(benchmark.compare(baseline, baseline), [])
+
+        # Within the latency floor and token tolerance
+        close = benchmark.summarize([run("order", 140, 1080, {"order_info.order_id": True})])
+        self.assertEqual(benchmark.compare(close, baseline), [])
+
+        worse = benchmark.summarize([run("order", 400, 1500, {"order_info.order_id": False})])
+        regressions = benchmark.compare(worse, baseline)
+        self.assertEqual(len(regressions), 3)
+        self.assertIn("order_info.order_id", regressions[-1])
+
+
+@unittest.skipUnless(PdfiumEngine.available(), "pypdfium2 is not installed")
+class BenchmarkCommandTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.baseline = os.path.join(self.tmp_dir.name, "baseline.json")
+
+    def test_corpus_runs_offline_and_regressions_fail(self):
+        out = StringIO()
+        call_command("benchmark_extraction", "--baseline", self.baseline, "--save-baseline", stdout=out)
+        summary = benchmark.load_baseline(self.baseline)
+        self.assertEqual(summary["order"]["accuracy"], 1.0)
+        self.assertEqual(summary["order"]["escalated"], 1)
+        self.assertEqual(summary["license"]["failed"], 0)
+
+        # A baseline no run can match: every field right in half the tokens
+        summary["order"]["tokens_mean"] /= 2
+        with open(self.baseline, "w") as f:
+            json.dump(summary, f)
+        with self.assertRaises(CommandError):
+            call_command("benchmark_extraction", "--baseline", self.baseline, "--fail-on-regression", stdout=StringIO())
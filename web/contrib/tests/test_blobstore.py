@@ -0,0 +1,152 @@
+import os
+import tempfile
+from io import StringIO
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase
+from django.utils import timezone
+from django.conf import settings
+from django.core.management import call_command
+from contrib import blobstore
+from dispatch.models import UploadFile
+from dispatch.utils import process_order_document
+from models.models import DocumentBlob
+from subscriptions.models import QuotaService
+from tenant.models import Tenant
+
+MB = 1024 * 1024
+
+
+class BlobStoreTest(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="Acme")
+        # An explicit mock, so patching does not inspect (and connect) the lazy S3 client
+        self.s3 = mock.MagicMock()
+        self.s3.check_file_exists.return_value = False
+        patcher = mock.patch.object(blobstore, "s3_utils", self.s3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, content: bytes) -> str:
+        handle, path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(handle, "wb") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_identical_bytes_are_stored_once_per_tenant(self):
+        path = self.write(b"%PDF rate confirmation")
+        blob, created = blobstore.store_file(self.tenant, path, "a.pdf")
+        again, created_again = blobstore.store_file(self.tenant, self.write(b"%PDF rate confirmation"), "b.pdf")
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, blob.pk)
+        self.assertEqual(again.ref_count, 2)
+        self.assertTrue(blob.s3_key.endswith(f"/blobs/{blob.sha256[:2]}/{blob.sha256}.pdf"))
+        self.s3.upload_file.assert_called_once_with(path, blob.s3_key)
+
+        other, created_other = blobstore.store_file(Tenant.objects.create(name="Other"), path, "a.pdf")
+        self.assertTrue(created_other)
+        self.assertNotEqual(other.s3_key, blob.s3_key)
+
+    def test_adopt_moves_the_staging_object(self):
+        path = self.write(b"%PDF direct upload")
+        blob, created = blobstore.adopt_file(self.tenant, path, "dev/orders/staged.pdf", "staged.pdf")
+        self.assertTrue(created)
+        self.s3.copy_file.assert_called_once_with("dev/orders/staged.pdf", blob.s3_key)
+        self.s3.delete_file.assert_called_once_with("dev/orders/staged.pdf")
+
+        again, created = blobstore.adopt_file(self.tenant, path, "dev/orders/again.pdf", "again.pdf")
+        self.assertFalse(created)
+        self.assertEqual(again.ref_count, 2)
+        self.assertEqual(self.s3.copy_file.call_count, 1)
+        self.s3.delete_file.assert_called_with("dev/orders/again.pdf")
+
+    def test_retain_and_release_count_references(self):
+        blob, _ = blobstore.store_file(self.tenant, self.write(b"%PDF"), "a.pdf", references=0)
+        blobstore.retain(self.tenant, blob.s3_key, 2)
+        blobstore.release(self.tenant, blob.s3_key)
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+        blobstore.release(self.tenant, blob.s3_key)
+        blobstore.release(self.tenant, blob.s3_key)
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+
+    def test_failed_extraction_keeps_only_the_upload_reference(self):
+        path = self.write(b"%PDF unreadable")
+        blob, _ = blobstore.store_file(self.tenant, path, "a.pdf")
+        with mock.patch("dispatch.utils.extract", side_effect=ValueError("unreadable")):
+            with self.assertRaises(ValueError):
+                process_order_document(path, self.tenant, blob.s3_key)
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+    def test_garbage_collection(self):
+        referenced, _ = blobstore.store_file(self.tenant, self.write(b"%PDF kept"), "kept.pdf", references=3)
+        UploadFile.objects.create(file=referenced.s3_key, tenant=self.tenant)
+        orphan, _ = blobstore.store_file(self.tenant, self.write(b"%PDF orphan"), "orphan.pdf", references=0)
+        recent, _ = blobstore.store_file(self.tenant, self.write(b"%PDF recent"), "recent.pdf", references=0)
+        DocumentBlob.objects.exclude(pk=recent.pk).update(updated_at=timezone.now() - timedelta(days=2))
+
+        stats = blobstore.collect_garbage(grace=timedelta(days=1))
+
+        self.assertEqual(stats["deleted"], 1)
+        self.assertEqual(stats["reconciled"], 1)
+        self.assertEqual(stats["freed_bytes"], orphan.size_bytes)
+        self.assertFalse(DocumentBlob.objects.filter(pk=orphan.pk).exists())
+        self.s3.delete_file.assert_called_once_with(orphan.s3_key)
+        self.assertEqual(DocumentBlob.objects.get(pk=referenced.pk).ref_count, 1)
+        self.assertTrue(DocumentBlob.objects.filter(pk=recent.pk).exists())
+
+    def test_storage_quota_counts_unique_bytes(self):
+        path = self.write(b"x" * MB)
+        blobstore.store_file(self.tenant, path, "a.pdf")
+        blobstore.store_file(self.tenant, path, "copy.pdf")
+        quota = QuotaService(self.tenant)
+        self.assertEqual(blobstore.unique_storage_bytes(self.tenant), MB)
+        self.assertEqual(quota.storage_used_mb, 1.0)
+
+        DocumentBlob.objects.filter(tenant=self.tenant).delete()
+        self.assertEqual(quota.storage_used_mb, 0)
+
+    def test_backfill_adopts_objects_stored_before_the_blob_store(self):
+        legacy = {
+            f"{settings.ENV}/{self.tenant.id}/orders/a.pdf": b"%PDF rate confirmation",
+            f"{settings.ENV}/{self.tenant.id}/orders/copy.pdf": b"%PDF rate confirmation",
+            f"{settings.ENV}/{self.tenant.id}/orders/other.pdf": b"%PDF other",
+        }
+        for key in legacy:
+            UploadFile.objects.create(file=key, tenant=self.tenant)
+        UploadFile.objects.create(file=f"{settings.ENV}/{self.tenant.id}/orders/gone.pdf", tenant=self.tenant)
+
+        def download(key, local_path):
+            if key not in legacy:
+                return False
+            with open(local_path, "wb") as f:
+                f.write(legacy[key])
+            return True
+
+        self.s3.download_file.side_effect = download
+        self.assertEqual(blobstore.unique_storage_bytes(self.tenant), 0)
+
+        out = StringIO()
+        call_command("backfill_document_blobs", "--dry-run", stdout=out)
+        self.assertIn("4 legacy objects", out.getvalue())
+        self.assertFalse(DocumentBlob.objects.exists())
+
+        stats = blobstore.backfill_blobs()
+
+        self.assertEqual((stats["stored"], stats["deduplicated"], stats["missing"]), (2, 1, 1))
+        blobs = DocumentBlob.objects.filter(tenant=self.tenant)
+        self.assertEqual(sorted(blob.ref_count for blob in blobs), [1, 2])
+        self.assertEqual(blobstore.unique_storage_bytes(self.tenant), len(b"%PDF rate confirmation%PDF other"))
+        files = set(UploadFile.objects.filter(tenant=self.tenant).values_list("file", flat=True))
+        self.assertEqual(files, {blob.s3_key for blob in blobs} | {f"{settings.ENV}/{self.tenant.id}/orders/gone.pdf"})
+        self.assertEqual(self.s3.copy_file.call_count, 2)
+        self.assertEqual({call.args[0] for call in self.s3.delete_file.call_args_list}, set(legacy))
+
+        # Only the missing object is left to backfill
+        self.assertEqual(blobstore.backfill_blobs()["objects"], 1)
@@ -0,0 +1,169 @@
+import json
+import re
+from unittest import mock
+from django.test import SimpleTestCase
+from contrib.extraction.document import chunked
+from contrib.extraction.document.chunked import (
+    extract_invoice_chunked,
+    merge_responses,
+    page_windows,
+)
+from contrib.extraction.document.invoice import TripResponse
+from contrib.extraction.fake_server import FakeModelServer
+from contrib.tests.test_gateway import make_gateway
+
+
+def trip(pickup, delivery, day, contact=""):
+    return {
+        "pickup_details": {
+            "pickup_date": f"01/{day:02d}/2025",
+            "pickup_address": pickup,
+            "pickup_contact_person": contact,
+            "pickup_contact_phone": "",
+            "pickup_details_others": None,
+        },
+        "deliver_to_details": {
+            "delivery_date": f"01/{day + 1:02d}/2025",
+            "delivery_address": delivery,
+            "delivery_contact_person": "",
+            "delivery_contact_phone": "",
+            "delivery_details_others": None,
+        },
+        "carrier_details": {
+            "carrier_name": "",
+            "carrier_contact_person": "",
+            "carrier_contact_phone": "",
+            "carrier_email": "",
+            "carrier_others": None,
+        },
+        "freight_details": {
+            "freight_type": "",
+            "freight_weight": "",
+            "freight_dimensions": "",
+            "freight_value": "",
+            "freight_details_others": None,
+        },
+        "load_details": {"load_rate": 500, "load_amount": 0, "load_total": 500, "currency": "CAD"},
+    }
+
+
+def response(trips, total=0.0, order_id=None, email=""):
+    return {
+        "order_info": {
+            "order_id": order_id,
+            "invoice_number": None,
+            "carrier_confirmation": None,
+            "order_confirmation": None,
+        },
+        "customer_details": {
+            "customer_name": "Acme Logistics" if email else "",
+            "customer_address": "",
+            "customer_email": email,
+            "customer_phone": "",
+            "customer_others": None,
+        },
+        "total_load_details": {"load_rate": total, "load_amount": 0, "load_total": total, "currency": "CAD"},
+        "freight_details": {
+            "freight_type": "",
+            "freight_weight": "",
+            "freight_dimensions": "",
+            "freight_value": "",
+            "freight_details_others": None,
+        },
+        "trips": trips,
+        "remarks_or_special_instructions": None,
+        "miscellaneous_entities": None,
+        "other_details": {
+            "names": [],
+            "emails": [email] if email else [],
+            "person_names": [],
+            "contact_numbers": [],
+            "addresses": [],
+            "dates": [],
+            "other": None,
+        },
+    }
+
+
+class PageWindowsTest(SimpleTestCase):
+    def test_windows_overlap_and_cover_every_page(self):
+        self.assertEqual(
+            [list(w) for w in page_windows(10, 4, 1)],
+            [[0, 1, 2, 3], [3, 4, 5, 6], [6, 7, 8, 9]],
+        )
+        self.assertEqual([list(w) for w in page_windows(3, 4, 1)], [[0, 1, 2]])
+
+
+class MergeResponsesTest(SimpleTestCase):
+    def test_deduplicates_trips_and_takes_totals_from_summary(self):
+        parts = [
+            TripResponse(**response([trip("Toronto", "Montreal", 1)], total=500, order_id="RC-9")),
+            # The overlap page repeats the first trip, with more detail
+            TripResponse(
+                **response(
+                    [trip("Toronto", "Montreal", 1, contact="Sam"), trip("Ottawa", "Quebec", 3)],
+                    total=1000,
+                    email="ops@acme.test",
+                )
+            ),
+            TripResponse(**response([trip("Ottawa", "Quebec", 3)], total=1500, order_id="RC-9")),
+        ]
+        texts = ["Stop 1", "Stop 2 subtotal", "GRAND TOTAL 1,500.00\nAmount due"]
+
+        merged = merge_responses(parts, texts)
+
+        self.assertEqual(
+            [(t.pickup_address, t.delivery_address) for t in merged.trips],
+            [("Toronto", "Montreal"), ("Ottawa", "Quebec")],
+        )
+        self.assertEqual(merged.trips[0].pickup_details.pickup_contact_person, "Sam")
+        self.assertEqual(merged.total_load_details.load_total, 1500)
+        self.assertEqual(merged.order_info.order_id, "RC-9")
+        self.assertEqual(merged.customer_details.customer_email, "ops@acme.test")
+        self.assertEqual(merged.other_details.emails, ["ops@acme.test"])
+
+    def test_separate_loads_on_one_lane_stay_separate(self):
+        def lanes(*windows):
+            parts = [TripResponse(**response(trips, total=100)) for trips in windows]
+            merged = merge_responses(parts, ["page"] * len(parts))
+            return [t.pickup_address for t in merged.trips]
+
+        toronto, ottawa = trip("Toronto", "Montreal", 1), trip("Ottawa", "Quebec", 3)
+        # Two loads in one window; the overlap page repeats one of them
+        self.assertEqual(lanes([toronto, toronto], [toronto, ottawa]), ["Toronto", "Toronto", "Ottawa"])
+        # Windows without shared pages never merge
+        self.assertEqual(lanes([toronto], [ottawa], [ottawa, toronto]), ["Toronto", "Ottawa", "Toronto"])
+
+    def test_merge_is_deterministic(self):
+        parts = [
+            TripResponse(**response([trip("A", "B", 1)], total=100)),
+            TripResponse(**response([trip("C", "D", 2)], total=200)),
+        ]
+        first = merge_responses(parts, ["one", "two"]).model_dump()
+        self.assertEqual(first, merge_responses(parts, ["one", "two"]).model_dump())
+        # No summary page: the largest total wins
+        self.assertEqual(first["total_load_details"]["load_total"], 200)
+
+
+class ChunkedExtractionTest(SimpleTestCase):
+    def setUp(self):
+        def answer(body):
+            # One trip per "Stop N" line in the window
+            prompt = body["messages"][0]["content"]
+            stops = [int(n) for n in re.findall(r"Stop (\d+)", prompt)]
+            return json.dumps(response([trip(f"Origin {n}", f"Destination {n}", n) for n in stops], total=100))
+
+        self.server = FakeModelServer(content=answer, latency=0.1).start()
+        self.addCleanup(self.server.stop)
+
+    def test_windows_are_extracted_concurrently_and_merged(self):
+        pages = [f"Stop {n}" for n in range(1, 13)]
+        gateway = make_gateway(self.server, max_concurrency=8)
+
+        with mock.patch.object(chunked, "gateway", gateway):
+            merged, usage = extract_invoice_chunked(pages, window_pages=4, overlap=1)
+
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertEqual([t.pickup_address for t in merged.trips], [f"Origin {n}" for n in range(1, 13)])
+        self.assertGreater(usage["total_tokens"], 0)
@@ -0,0 +1,74 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+from PIL import Image, ImageDraw
+from django.test import TestCase
+from contrib.extraction.document import driver_license
+from contrib.extraction.document.driver_license import (
+    LICENSE_IMAGE_MAX_SIDE,
+    extract_license_info,
+    prepare_license_image,
+)
+from contrib.extraction.fake_server import FakeModelServer
+from contrib.tests.test_gateway import make_gateway
+
+LICENSE = {
+    "name": "Jordan Lee",
+    "license_number": "L1234-56789-01234",
+    "date_of_birth": "1988-04-02",
+    "expiry_date": "2029-04-02",
+    "issued_date": "2024-04-02",
+    "gender": "X",
+    "address": "12 King St, Toronto ON",
+    "country": "Canada",
+    "province": "ON",
+    "state": None,
+    "license_type": None,
+    "conditions": None,
+    "license_class": "G",
+    "public_safety_commission": None,
+}
+
+
+def license_photo(path):
+    """A card on a plain table, as a large phone photo."""
+    photo = Image.new("RGB", (4000, 3000), (250, 250, 250))
+    draw = ImageDraw.Draw(photo)
+    draw.rectangle((900, 800, 3100, 2190), fill=(120, 160, 200))
+    for row in range(10):
+        draw.rectangle((1000, 900 + row * 120, 2800, 940 + row * 120), fill=(20, 20, 20))
+    photo.save(path, "PNG")
+
+
+class LicenseImageTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "license.png")
+        license_photo(self.path)
+
+    def test_image_is_cropped_downscaled_and_recompressed(self):
+        data, mime_type = prepare_license_image(self.path)
+
+        image = Image.open(io.BytesIO(data))
+        self.assertEqual(mime_type, "image/jpeg")
+        self.assertEqual(max(image.size), LICENSE_IMAGE_MAX_SIDE)
+        # Cropped to the card plus a 2% margin, not the photo's 4:3
+        self.assertAlmostEqual(image.width / image.height, (2200 + 160) / (1390 + 160), delta=0.02)
+        self.assertLess(len(data), os.path.getsize(self.path))
+
+    def test_license_photo_is_read_in_one_call(self):
+        server = FakeModelServer(content=json.dumps(LICENSE)).start()
+        self.addCleanup(server.stop)
+
+        with mock.patch.object(driver_license, "gateway", make_gateway(server)):
+            license_info, usage = extract_license_info(self.path, tenant_id=None)
+
+        self.assertEqual(len(server.requests), 1)
+        image_url = server.requests[0]["messages"][1]["content"][1]["image_url"]["url"]
+        self.assertTrue(image_url.startswith("data:image/jpeg;base64,"))
+        self.assertEqual(license_info.license_number, LICENSE["license_number"])
+        self.assertGreater(usage["total_tokens"], 0)
+        self.assertFalse(usage["routing"]["escalated"])
@@ -0,0 +1,171 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.test import SimpleTestCase
+from pydantic import BaseModel
+from contrib.extraction.fake_server import FakeModelServer
+from contrib.extraction.gateway import ExtractionGateway, RedisTokenBucket, TokenBucket
+
+
+class Greeting(BaseModel):
+    text: str
+
+
+def make_gateway(server, **kwargs):
+    options = {
+        "max_concurrency": 4,
+        "tenant_rate_per_minute": 6000,
+        "tenant_burst": 100,
+        "timeout": 5,
+        "max_retries": 3,
+        "backoff_base": 0.01,
+        "backoff_max": 0.05,
+        "base_url": server.url,
+        "api_key": "fake",
+    }
+    options.update(kwargs)
+    return ExtractionGateway(**options)
+
+
+def chat(gateway, tenant_id="tenant-a"):
+    return gateway.create(
+        tenant_id=tenant_id,
+        model="fake-model",
+        messages=[{"role": "user", "content": "hello"}],
+    )
+
+
+class ExtractionGatewayTest(SimpleTestCase):
+    def setUp(self):
+        self.server = FakeModelServer(content=json.dumps({"text": "hi"})).start()
+        self.addCleanup(self.server.stop)
+
+    def test_parse_returns_structured_output(self):
+        gateway = make_gateway(self.server)
+        completion = gateway.parse(
+            tenant_id="tenant-a",
+            model="fake-model",
+            messages=[{"role": "user", "content": "hello"}],
+            response_format=Greeting,
+        )
+        self.assertEqual(completion.choices[0].message.parsed.text, "hi")
+        self.assertGreater(completion.usage.total_tokens, 0)
+
+    def test_retries_rate_limits_and_server_errors(self):
+        self.server.fail_next(429, retry_after=0)
+        self.server.fail_next(503)
+        gateway = make_gateway(self.server)
+
+        response = chat(gateway)
+
+        self.assertEqual(response.choices[0].message.content, json.dumps({"text": "hi"}))
+        self.assertEqual(len(self.server.requests), 3)
+        metrics = gateway.metrics.snapshot()
+        self.assertEqual(metrics["retries"], 2)
+        self.assertEqual(metrics["succeeded"], 1)
+
+    def test_does_not_retry_client_errors(self):
+        import openai
+
+        self.server.fail_next(400)
+        gateway = make_gateway(self.server)
+
+        with self.assertRaises(openai.BadRequestError):
+            chat(gateway)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(gateway.metrics.snapshot()["failed"], 1)
+
+    def test_gives_up_after_max_retries(self):
+        import openai
+
+        self.server.fail_next(500, times=10)
+        gateway = make_gateway(self.server, max_retries=2)
+
+        with self.assertRaises(openai.InternalServerError):
+            chat(gateway)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_request_timeout(self):
+        import openai
+
+        self.server.latency = 1
+        gateway = make_gateway(self.server, timeout=0.2, max_retries=0)
+
+        with self.assertRaises(openai.APITimeoutError):
+            chat(gateway)
+
+    def test_concurrency_is_capped_across_threads(self):
+        self.server.latency = 0.1
+        gateway = make_gateway(self.server, max_concurrency=2)
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            list(pool.map(lambda _: chat(gateway), range(6)))
+
+        self.assertEqual(self.server.max_in_flight, 2)
+        self.assertGreater(gateway.metrics.snapshot()["queue_wait_ms_p95"], 0)
+
+    def test_tenant_rate_limit_does_not_slow_other_tenants(self):
+        # One request per second after a burst of one
+        gateway = make_gateway(self.server, tenant_rate_per_minute=60, tenant_burst=1)
+        chat(gateway, "busy")
+
+        started = time.monotonic()
+        chat(gateway, "quiet")
+        self.assertLess(time.monotonic() - started, 0.5)
+
+        started = time.monotonic()
+        chat(gateway, "busy")
+        self.assertGreater(time.monotonic() - started, 0.5)
+
+
+class TokenBucketTest(SimpleTestCase):
+    def test_refills_over_time(self):
+        import asyncio
+
+        bucket = TokenBucket(rate=20, capacity=2)
+
+        async def drain():
+            started = time.monotonic()
+            for _ in range(4):
+                await bucket.acquire()
+            return time.monotonic() - started
+
+        # Two immediately from the burst, two more at 20/s
+        elapsed = asyncio.run(drain())
+        self.assertGreater(elapsed, 0.08)
+        self.assertLess(elapsed, 0.5)
+
+
+class ScriptedRedis:
+    """Stands in for redis.asyncio.Redis, answering the bucket script with canned waits."""
+
+    def __init__(self, waits):
+        self.waits = list(waits)
+        self.calls = []
+
+    async def eval(self, script, numkeys, *args):
+        self.calls.append(args)
+        return self.waits.pop(0)
+
+
+class RedisTokenBucketTest(SimpleTestCase):
+    def test_waits_as_long_as_redis_says(self):
+        import asyncio
+
+        client = ScriptedRedis([b"0.1", b"0"])
+        bucket = RedisTokenBucket(client, "llm_rate_tenant-a", rate=10, capacity=2)
+
+        started = time.monotonic()
+        asyncio.run(bucket.acquire())
+        self.assertGreater(time.monotonic() - started, 0.08)
+        self.assertEqual(client.calls, [("llm_rate_tenant-a", 10, 2, 1)] * 2)
+
+    def test_falls_back_to_the_process_when_redis_is_down(self):
+        server = FakeModelServer(content=json.dumps({"text": "hi"})).start()
+        self.addCleanup(server.stop)
+        gateway = make_gateway(server, redis_url="redis://127.0.0.1:1/0")
+
+        with self.assertLogs("django", "WARNING"):
+            chat(gateway)
+        self.assertIsInstance(gateway._buckets["tenant-a"], RedisTokenBucket)
+        self.assertEqual(gateway.metrics.snapshot()["succeeded"], 1)
@@ -0,0 +1,99 @@
+from django.test import SimpleTestCase, TestCase
+from contrib.extraction.document.invoice import TripResponse
+from contrib.extraction.document.layout import (
+    CORE_FIELDS,
+    anchor_score,
+    apply_rules,
+    document_labels,
+    propose_layout,
+)
+from contrib.tests.test_chunked_extraction import response, trip
+from dispatch.models import ExtractionTemplate
+from dispatch.utils import extract_with_template
+from tenant.models import Tenant
+
+RATECON = """Acme Logistics
+Rate Confirmation
+Load #: {load}
+Customer: Acme Logistics
+Email: ops@acme.test
+Pickup: {pickup}
+Ship Date: 01/{day:02d}/2025
+Consignee: {delivery}
+Total Rate: ${total:,.2f}
+Carrier Pay Terms
+Signature
+"""
+
+
+def sample(load, pickup, delivery, day, total):
+    text = RATECON.format(load=load, pickup=pickup, delivery=delivery, day=day, total=total)
+    extract = response([trip(pickup, delivery, day)], total=total, order_id=load, email="ops@acme.test")
+    return text, extract
+
+
+SAMPLES = [
+    sample("RC-1001", "12 King St, Toronto ON", "4 Rue Peel, Montreal QC", 2, 1850),
+    sample("RC-1002", "77 Bay Rd, Hamilton ON", "9 Main St, Ottawa ON", 5, 1200.5),
+    sample("RC-1003", "3 Dock Ave, London ON", "18 Pine Blvd, Quebec QC", 9, 2400),
+]
+
+
+class LayoutTest(SimpleTestCase):
+    def setUp(self):
+        self.proposal, self.reason = propose_layout(SAMPLES)
+
+    def test_proposes_anchors_and_rules_from_past_extractions(self):
+        self.assertIsNotNone(self.proposal, self.reason)
+        self.assertIn("load #", self.proposal["anchors"])
+        # Values differ per document, so they are never anchors
+        self.assertFalse([a for a in self.proposal["anchors"] if "rc-" in a or "toronto" in a])
+        fields = {rule["field"] for rule in self.proposal["rules"]}
+        self.assertTrue(set(CORE_FIELDS) <= fields)
+        self.assertIn("order_info.order_id", fields)
+
+    def test_known_layout_is_extracted_without_the_model(self):
+        text, _ = sample("RC-2001", "5 Lake Rd, Barrie ON", "1 Port St, Halifax NS", 12, 3125.75)
+        self.assertEqual(anchor_score(self.proposal["anchors"], document_labels(text)), 1.0)
+
+        extracted, low_confidence = apply_rules(self.proposal["rules"], text, TripResponse)
+
+        self.assertEqual(low_confidence, [])
+        self.assertEqual(extracted.order_info.order_id, "RC-2001")
+        self.assertEqual(extracted.total_load_details.load_total, 3125.75)
+        self.assertEqual(extracted.trips[0].pickup_address, "5 Lake Rd, Barrie ON")
+        self.assertEqual(extracted.trips[0].delivery_address, "1 Port St, Halifax NS")
+        self.assertEqual(extracted.customer_details.customer_email, "ops@acme.test")
+
+    def test_missing_field_falls_back(self):
+        text, _ = sample("RC-2002", "5 Lake Rd, Barrie ON", "1 Port St, Halifax NS", 12, 900)
+        text = text.replace("Consignee:", "Deliver to:")
+
+        extracted, low_confidence = apply_rules(self.proposal["rules"], text, TripResponse)
+
+        self.assertIsNone(extracted)
+        self.assertIn("trips.0.deliver_to_details.delivery_address", low_confidence)
+        self.assertLess(anchor_score(self.proposal["anchors"], document_labels(text)), 1.0)
+
+
+class TemplateLookupTest(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="Acme")
+        proposal, _ = propose_layout(SAMPLES)
+        self.template = ExtractionTemplate.objects.create(
+            tenant=self.tenant, name="Acme", fingerprint=proposal["fingerprint"],
+            anchors=proposal["anchors"], rules=proposal["rules"],
+        )
+        self.text, _ = sample("RC-3001", "5 Lake Rd, Barrie ON", "1 Port St, Halifax NS", 12, 900)
+
+    def test_only_approved_templates_are_used(self):
+        # Proposals are live rows awaiting review, not deleted ones
+        self.assertTrue(self.template.is_active)
+        self.assertIsNone(extract_with_template(self.text, self.tenant.id))
+
+        ExtractionTemplate.objects.filter(pk=self.template.pk).update(approved=True)
+        details, _ = extract_with_template(self.text, self.tenant.id)
+        self.assertEqual(details["order_info"]["order_id"], "RC-3001")
+
+        ExtractionTemplate.objects.filter(pk=self.template.pk).update(is_active=False)
+        self.assertIsNone(extract_with_template(self.text, self.tenant.id))
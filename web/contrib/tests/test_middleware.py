@@ -0,0 +1,76 @@
+import json
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import ResolverMatch
+from contrib.middleware import QueryCountMiddleware
+from contrib.queries import QueryBudget, QueryRecorder, fingerprint, query_budget
+
+
+class FingerprintTest(SimpleTestCase):
+    def test_literals_and_in_lists_collapse(self):
+        self.assertEqual(
+            fingerprint('SELECT "a"."id" FROM "a" WHERE "a"."id" = %s LIMIT 21'),
+            'SELECT "a"."id" FROM "a" WHERE "a"."id" = ? LIMIT ?',
+        )
+        self.assertEqual(
+            fingerprint("SELECT * FROM t2 WHERE  name = 'x''y' AND id IN (%s, %s, %s)"),
+            fingerprint("SELECT * FROM t2 WHERE name = 'z' AND id IN (%s)"),
+        )
+        self.assertNotEqual(fingerprint("SELECT * FROM a"), fingerprint("SELECT * FROM b"))
+
+
+class QueryRecorderTest(TestCase):
+    def test_a_query_per_row_is_over_the_budget(self):
+        users = [User.objects.create(username=f"user{number}") for number in range(5)]
+        with QueryRecorder() as recorder:
+            for user in users:
+                User.objects.get(pk=user.pk)
+            User.objects.count()
+
+        self.assertEqual(recorder.count, 6)
+        self.assertEqual(recorder.worst_duplicate(), 5)
+        self.assertEqual(recorder.over(QueryBudget(10, max_duplicates=5)), [])
+        problems = recorder.over(QueryBudget(4))
+        self.assertEqual(problems[0], "6 queries, budget 4")
+        self.assertTrue(problems[1].startswith('5x SELECT "auth_user"'))
+
+
+class QueryCountMiddlewareTest(TestCase):
+    def run_view(self, view):
+        request = RequestFactory().get("/")
+        request.resolver_match = ResolverMatch(view, (), {}, url_name="users")
+        return QueryCountMiddleware(view)(request)
+
+    @override_settings(QUERY_COUNT_HEADERS=True, QUERY_METRICS=False)
+    def test_headers_count_the_queries_of_the_request(self):
+        def view(request):
+            User.objects.count()
+            User.objects.exists()
+            return HttpResponse("ok")
+
+        response = self.run_view(view)
+        self.assertEqual(response["X-DB-Queries"], "2")
+        self.assertEqual(response["X-DB-Duplicates"], "1")
+        self.assertGreaterEqual(float(response["X-DB-Time-Ms"]), 0)
+
+        # Queries outside a request are not counted
+        User.objects.count()
+        response = self.run_view(lambda request: HttpResponse("ok"))
+        self.assertEqual(response["X-DB-Queries"], "0")
+
+    @override_settings(QUERY_COUNT_HEADERS=False, QUERY_METRICS=True)
+    def test_metrics_log_a_line_per_request_and_flag_the_budget(self):
+        @query_budget(1)
+        def view(request):
+            User.objects.count()
+            User.objects.count()
+            return HttpResponse("ok")
+
+        with self.assertLogs("queries") as logs, self.assertLogs("django", "WARNING"):
+            response = self.run_view(view)
+
+        self.assertNotIn("X-DB-Queries", response)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["view"], "users")
+        self.assertEqual((line["queries"], line["duplicates"], line["over_budget"]), (2, 2, True))
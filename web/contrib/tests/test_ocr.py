@@ -0,0 +1,64 @@
+import os
+import stat
+import tempfile
+import unittest
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from contrib.ocr import needs_ocr
+from contrib.pdf_text import PdfiumEngine, iter_pages
+from contrib.tests.pdfs import make_pdf
+
+OCR_TEXT = "RATE CONFIRMATION Load 0042 Pickup Toronto ON Deliver Montreal QC Total 1,850.00"
+
+
+class NeedsOcrTest(SimpleTestCase):
+    def test_empty_and_garbage_text_layers(self):
+        self.assertTrue(needs_ocr(""))
+        self.assertTrue(needs_ocr("Page 1 of 2"))
+        self.assertTrue(needs_ocr("(cid:71)(cid:82)(cid:68)(cid:71) " * 20))
+        self.assertFalse(needs_ocr(OCR_TEXT))
+
+
+@unittest.skipUnless(PdfiumEngine.available(), "pypdfium2 is not installed")
+class OcrFallbackTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.calls = os.path.join(self.tmp_dir.name, "calls")
+        # Stands in for tesseract: counts its runs and prints fixed text
+        self.command = os.path.join(self.tmp_dir.name, "tesseract")
+        with open(self.command, "w") as f:
+            f.write(f"#!/bin/sh\ncat > /dev/null\necho run >> {self.calls}\necho '{OCR_TEXT}'\n")
+        os.chmod(self.command, os.stat(self.command).st_mode | stat.S_IEXEC)
+
+    def write_pdf(self, name, pages):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(make_pdf(pages))
+        return path
+
+    def ocr_runs(self):
+        if not os.path.exists(self.calls):
+            return 0
+        with open(self.calls) as f:
+            return len(f.readlines())
+
+    def test_scanned_pages_are_read_with_ocr_and_cached_by_page_hash(self):
+        text_page = ["RATE CONFIRMATION page 1", "Load 0041 Pickup Toronto ON Deliver Ottawa ON"]
+        with override_settings(OCR_TESSERACT_CMD=self.command, PDF_TEXT_WORKERS=1):
+            texts = list(iter_pages(self.write_pdf("scan.pdf", [text_page, []]), engine="pypdfium2"))
+            self.assertIn("Load 0041", texts[0])
+            self.assertEqual(texts[1].strip(), OCR_TEXT)
+            self.assertEqual(self.ocr_runs(), 1)
+
+            # A different document with the same blank scan reuses the cached page
+            other = self.write_pdf("other.pdf", [[], ["Another page with enough text to skip OCR entirely"]])
+            texts = list(iter_pages(other, engine="pypdfium2"))
+            self.assertEqual(texts[0].strip(), OCR_TEXT)
+            self.assertEqual(self.ocr_runs(), 1)
+
+    @override_settings(OCR_TESSERACT_CMD="tesseract-is-not-installed")
+    def test_missing_tesseract_keeps_text_layer(self):
+        texts = list(iter_pages(self.write_pdf("scan.pdf", [[]]), engine="pypdfium2"))
+        self.assertEqual(texts[0].strip(), "")
@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from django.http import Http404
+from django.test import TestCase
+from contrib.pagination import CursorPage, approximate_count
+from tenant.models import Tenant
+
+
+class CursorPageTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Tenant.objects.bulk_create([Tenant(name=f"Tenant {number:02d}") for number in range(25)])
+        # Ties on created_at are broken by id
+        Tenant.objects.filter(name__lt="Tenant 10").update(created_at=datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+    def walk(self, cursor=None, backwards=False):
+        pages = []
+        while True:
+            page = CursorPage(Tenant.objects.all(), ("-created_at", "-id"), 10, cursor)
+            pages.append([tenant.name for tenant in page])
+            cursor = page.previous_cursor if backwards else page.next_cursor
+            if not cursor:
+                return pages, page
+
+    def test_pages_cover_every_row_once_in_both_directions(self):
+        expected = [tenant.name for tenant in Tenant.objects.order_by("-created_at", "-id")]
+        pages, last = self.walk()
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), expected)
+        self.assertFalse(last.has_next())
+
+        back, first = self.walk(last.previous_cursor, backwards=True)
+        self.assertEqual(back, pages[-2::-1])
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+    def test_tampered_cursor_is_not_found(self):
+        with self.assertRaises(Http404):
+            CursorPage(Tenant.objects.all(), ("-created_at", "-id"), 10, "bm90IGEgY3Vyc29y")
+
+    def test_small_counts_are_exact(self):
+        self.assertEqual(approximate_count(Tenant.objects.all()), (25, False))
+        self.assertEqual(approximate_count(Tenant.objects.none()), (0, False))
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from contrib.file_reader import open_pdf
+from contrib import pdf_text
+from contrib.pdf_text import ENGINES, PdfiumEngine, PyPDF2Engine, iter_pages, shutdown_pool
+from contrib.tests.pdfs import make_pdf
+
+
+def page_lines(number):
+    return [f"RATE CONFIRMATION page {number}", f"Load {number:04d} Pickup Toronto ON"]
+
+
+class PdfTextTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        handle, self.path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(handle, "wb") as f:
+            f.write(make_pdf([page_lines(n) for n in range(1, 13)]))
+        self.addCleanup(os.remove, self.path)
+
+    def assert_pages(self, texts):
+        self.assertEqual(len(texts), 12)
+        for number, text in enumerate(texts, start=1):
+            self.assertIn(f"RATE CONFIRMATION page {number}", text)
+            self.assertIn(f"Load {number:04d}", text)
+
+    def test_pypdf2_engine(self):
+        self.assert_pages(list(iter_pages(self.path, engine=PyPDF2Engine.name)))
+
+    @unittest.skipUnless(PdfiumEngine.available(), "pypdfium2 is not installed")
+    def test_pdfium_engine(self):
+        self.assert_pages(list(iter_pages(self.path, engine=PdfiumEngine.name)))
+
+    @override_settings(PDF_TEXT_WORKERS=3, PDF_TEXT_PARALLEL_MIN_PAGES=2)
+    def test_process_pool_keeps_page_order(self):
+        self.addCleanup(shutdown_pool)
+        self.assert_pages(list(iter_pages(self.path, engine=PyPDF2Engine.name)))
+
+        pool = pdf_text._pool
+        shutdown_pool()
+        self.assertIsNone(pdf_text._pool)
+        with self.assertRaises(RuntimeError):
+            pool.submit(len, "")
+
+    def test_pages_are_cached_by_document_hash(self):
+        first = list(iter_pages(self.path, engine=PyPDF2Engine.name))
+        with mock.patch.object(PyPDF2Engine, "extract", side_effect=AssertionError) as extract:
+            second = list(iter_pages(self.path, engine=PyPDF2Engine.name))
+        extract.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_missing_engine_falls_back_to_pypdf2(self):
+        with mock.patch.object(PdfiumEngine, "available", return_value=False):
+            self.assert_pages(list(iter_pages(self.path, engine=PdfiumEngine.name)))
+
+    @unittest.skipUnless(PdfiumEngine.available(), "pypdfium2 is not installed")
+    def test_pages_pdfium_fails_on_are_read_with_pypdf2(self):
+        with mock.patch.object(PdfiumEngine, "extract", side_effect=RuntimeError("broken page")):
+            self.assert_pages(list(iter_pages(self.path, engine=PdfiumEngine.name)))
+
+    @unittest.skipUnless(PdfiumEngine.available(), "pypdfium2 is not installed")
+    @override_settings(PDF_TEXT_WORKERS=3, PDF_TEXT_PARALLEL_MIN_PAGES=2)
+    def test_failed_pool_range_is_read_with_pypdf2(self):
+        self.addCleanup(shutdown_pool)
+        extract_range = pdf_text._extract_range
+
+        def fail_second_range(engine_name, filepath, start, stop):
+            if start == 4:
+                raise RuntimeError("broken page")
+            return extract_range(engine_name, filepath, start, stop)
+
+        with mock.patch.object(pdf_text, "get_pool") as get_pool:
+            get_pool.return_value.submit.side_effect = lambda fn, *args: mock.Mock(
+                result=lambda: fail_second_range(*args)
+            )
+            self.assert_pages(list(iter_pages(self.path, engine=PdfiumEngine.name)))
+        self.assertEqual(get_pool.return_value.submit.call_count, 3)
+
+    def test_open_pdf_keeps_page_limit(self):
+        with self.assertRaisesMessage(ValueError, "more than 10 pages"):
+            open_pdf(self.path)
+
+    def test_engines_registered(self):
+        self.assertEqual(set(ENGINES), {"pypdfium2", "pypdf2"})
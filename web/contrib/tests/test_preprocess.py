@@ -0,0 +1,82 @@
+import sys
+from unittest import mock
+from django.test import SimpleTestCase
+from contrib.extraction.document import preprocess
+from contrib.extraction.document.preprocess import (
+    ENCODING_RETRY_SECONDS,
+    count_tokens,
+    normalize_whitespace,
+    preprocess_pages,
+    strip_boilerplate,
+    strip_page_furniture,
+)
+
+TERMS = (
+    "Carrier agrees that this load shall not be re-brokered, assigned or interlined to another "
+    "carrier without the prior written consent of the broker, and that any such act entitles "
+    "the broker to withhold payment in full for the services rendered under this confirmation."
+)
+
+
+def page(number, body):
+    return "\n".join([
+        "ACME FREIGHT BROKERAGE INC.",
+        "123 Harbour St, Toronto ON",
+        body,
+        f"Page {number} of 3",
+    ])
+
+
+class PreprocessTest(SimpleTestCase):
+    def test_normalize_whitespace(self):
+        text = "Load   #:\t 4411  \n\n\n\n---------\nRate:  $1,200.00 "
+        self.assertEqual(normalize_whitespace(text), "Load #: 4411\n\nRate: $1,200.00")
+
+    def test_repeated_header_and_footer_kept_once(self):
+        pages, removed = strip_page_furniture(
+            [page(1, "Pickup: Toronto"), page(2, "Delivery: Montreal"), page(3, "Total: $900")]
+        )
+        self.assertIn("ACME FREIGHT BROKERAGE INC.", pages[0])
+        self.assertNotIn("ACME FREIGHT", pages[1] + pages[2])
+        self.assertNotIn("Page 2 of 3", pages[1])
+        self.assertIn("Delivery: Montreal", pages[1])
+        self.assertEqual(removed, 6)
+
+    def test_lines_differing_in_numbers_are_not_furniture(self):
+        pages, removed = strip_page_furniture(["Stop 1 Toronto\nx", "Stop 2 Ottawa\ny"])
+        self.assertEqual(removed, 0)
+        self.assertIn("Stop 2 Ottawa", pages[1])
+
+    def test_boilerplate_paragraphs_dropped(self):
+        text = f"Detention: carrier agrees to $50/hr after 2 hours\n\n{TERMS}\n\nRate: $900"
+        cleaned, removed = strip_boilerplate(text)
+        self.assertEqual(removed, 1)
+        self.assertIn("Detention", cleaned)
+        self.assertIn("Rate: $900", cleaned)
+        self.assertNotIn("re-brokered", cleaned)
+
+    def test_stats_report_token_savings(self):
+        pages = [page(n, f"Stop {n}   Toronto\n\n{TERMS}") for n in range(1, 4)]
+        cleaned, stats = preprocess_pages(pages)
+        self.assertGreater(stats["tokens_before"], stats["tokens_after"])
+        self.assertEqual(stats["tokens_saved"], stats["tokens_before"] - stats["tokens_after"])
+        # The terms repeat at the foot of every page: the copies go as furniture, the first as boilerplate
+        self.assertEqual(stats["boilerplate_paragraphs_removed"], 1)
+        self.assertNotIn("re-brokered", "".join(cleaned))
+        self.assertIn("Stop 3 Toronto", cleaned[2])
+
+    def test_encoding_load_failure_is_retried(self):
+        tiktoken = mock.MagicMock()
+        tiktoken.get_encoding.side_effect = [OSError("download timed out"), mock.Mock(encode=lambda text, **kwargs: [1, 2])]
+        with mock.patch.dict(sys.modules, {"tiktoken": tiktoken}), \
+                mock.patch.object(preprocess, "_encoding", None), \
+                mock.patch.object(preprocess, "_encoding_failed_at", None), \
+                mock.patch.object(preprocess.time, "monotonic", return_value=1000.0) as monotonic:
+            self.assertEqual(count_tokens("12345678"), (2, "estimate"))
+            # Not retried on every call
+            self.assertEqual(count_tokens("12345678"), (2, "estimate"))
+            self.assertEqual(tiktoken.get_encoding.call_count, 1)
+
+            monotonic.return_value += ENCODING_RETRY_SECONDS
+            self.assertEqual(count_tokens("12345678"), (2, "o200k_base"))
+            self.assertEqual(tiktoken.get_encoding.call_count, 2)
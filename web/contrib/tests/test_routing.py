@@ -0,0 +1,74 @@
+import json
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from contrib.extraction.document import invoice
+from contrib.extraction.document.invoice import (
+    TripResponse,
+    extract_invoice_routed,
+    trip_response_problems,
+)
+from contrib.extraction.fake_server import FakeModelServer
+from contrib.extraction.routing import LARGE_MODEL, SMALL_MODEL
+from contrib.tests.test_chunked_extraction import response, trip
+from contrib.tests.test_gateway import make_gateway
+from subscriptions.models import ModelRouteLog
+
+
+class TripResponseProblemsTest(SimpleTestCase):
+    def test_consistent_response_passes(self):
+        parsed = TripResponse(**response([trip("Toronto", "Montreal", 1)], total=500, order_id="RC-1"))
+        self.assertEqual(trip_response_problems(parsed), [])
+
+    def test_reports_missing_id_bad_dates_and_totals(self):
+        bad = trip("Toronto", "Montreal", 1)
+        bad["pickup_details"]["pickup_date"] = "next tuesday-ish"
+        parsed = TripResponse(**response([bad, trip("Ottawa", "Quebec", 3)], total=5000))
+
+        problems = trip_response_problems(parsed)
+
+        self.assertIn("no order id", problems)
+        self.assertTrue(any("pickup date" in problem for problem in problems))
+        self.assertTrue(any("do not match load total" in problem for problem in problems))
+
+    def test_mixed_date_formats_are_ordered(self):
+        mixed = trip("Toronto", "Montreal", 1)
+        mixed["pickup_details"]["pickup_date"] = "2025-01-01T10:00Z"
+        parsed = TripResponse(**response([mixed], total=500, order_id="RC-1"))
+        self.assertEqual(trip_response_problems(parsed), [])
+
+        mixed["deliver_to_details"]["delivery_date"] = "12/31/2024"
+        parsed = TripResponse(**response([mixed], total=500, order_id="RC-1"))
+        self.assertEqual(trip_response_problems(parsed), ["trip 1 is delivered before pickup"])
+
+
+class RoutedExtractionTest(TestCase):
+    def setUp(self):
+        def answer(body):
+            # The mini model misses the order id, the large one finds it
+            order_id = "RC-7" if body["model"] == LARGE_MODEL else None
+            return json.dumps(response([trip("Toronto", "Montreal", 1)], total=500, order_id=order_id))
+
+        self.server = FakeModelServer(content=answer).start()
+        self.addCleanup(self.server.stop)
+        patcher = mock.patch.object(invoice, "gateway", make_gateway(self.server))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_escalates_to_large_model_when_validation_fails(self):
+        parsed, usage = extract_invoice_routed("Load RC-7 Toronto to Montreal")
+
+        self.assertEqual([r["model"] for r in self.server.requests], [SMALL_MODEL, LARGE_MODEL])
+        self.assertEqual(parsed.order_info.order_id, "RC-7")
+        self.assertTrue(usage["routing"]["escalated"])
+        self.assertEqual(usage["routing"]["reasons"], ["no order id"])
+        self.assertEqual(usage["total_tokens"], sum(a["total_tokens"] for a in usage["routing"]["attempts"]))
+
+        log = ModelRouteLog.objects.get()
+        self.assertEqual((log.task, log.first_model, log.model), ("order", SMALL_MODEL, LARGE_MODEL))
+        self.assertTrue(log.escalated)
+
+    def test_large_documents_skip_the_small_model(self):
+        extract_invoice_routed("Load RC-7", small_first=False)
+
+        self.assertEqual([r["model"] for r in self.server.requests], [LARGE_MODEL])
+        self.assertFalse(ModelRouteLog.objects.get().escalated)
@@ -0,0 +1,69 @@
+from contrib.search import search, search_q, terms
+from contrib.tests.base import SyntheticTenantTestCase
+from fleet.models import Customer, Driver
+
+
+class SearchTestData(SyntheticTenantTestCase):
+    seed = 46
+    tenants = 2
+    dataset = {"drivers": 3, "trucks": 2, "customers": 3, "days": 2}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.driver = Driver.objects.filter(tenant=cls.tenant).first()
+
+
+class SearchTest(SearchTestData):
+    """Runs against the SQLite FTS5 tables, which post_migrate built for the test database."""
+
+    def test_terms(self):
+        self.assertEqual(terms("  Petro-Canada, petro 12 "), ["petro", "canada", "12"])
+        self.assertEqual(terms(""), [])
+
+    def test_every_word_must_match_a_field(self):
+        drivers = Driver.objects.filter(tenant=self.tenant)
+        self.assertIn(self.driver, search(drivers, f"{self.driver.last_name.upper()} {self.driver.first_name[:4]}"))
+        self.assertNotIn(self.driver, search(drivers, f"{self.driver.first_name} zzzqqq"))
+        self.assertFalse(search(drivers, "").exists())
+
+    def test_substrings_and_short_words(self):
+        customers = Customer.objects.filter(tenant=self.tenant)
+        customer = customers.first()
+        self.assertIn(customer, search(customers, customer.email[2:8]))
+        self.assertIn(customer, search(customers, customer.email[:2]))
+
+    def test_index_follows_writes(self):
+        drivers = Driver.objects.filter(tenant=self.tenant)
+        other = drivers.exclude(pk=self.driver.pk).first()
+        drivers.filter(pk=self.driver.pk).update(first_name="Zebulon", last_name="Quartermaine")
+        drivers.filter(pk=other.pk).update(email="zebulon.quartermaine.fan@example.com")
+
+        hits = list(search(drivers, "zebulon quartermaine"))
+        self.assertCountEqual(hits, [self.driver, other])
+        self.assertGreaterEqual(hits[0].search_rank, hits[1].search_rank)
+
+        drivers.filter(pk=self.driver.pk).update(first_name="Anna")
+        self.assertEqual(list(search(drivers, "zebulon")), [other])
+
+    def test_scoped_by_the_queryset(self):
+        self.assertNotIn(self.driver, search(Driver.objects.exclude(tenant=self.tenant), self.driver.employee_id))
+        self.assertIn(self.driver, Driver.objects.filter(search_q(Driver, self.driver.employee_id), tenant=self.tenant))
+
+
+class GlobalSearchTest(SearchTestData):
+    def test_ranked_hits_of_the_users_tenant(self):
+        hits = self.client.get("/search/", {"q": self.driver.last_name}).json()["results"]
+        self.assertIn(("driver", str(self.driver.pk)), [(hit["kind"], hit["id"]) for hit in hits])
+        self.assertEqual([hit["rank"] for hit in hits], sorted((hit["rank"] for hit in hits), reverse=True))
+
+        other = Driver.objects.exclude(tenant=self.tenant).first()
+        hits = self.client.get("/search/", {"q": other.employee_id}).json()["results"]
+        self.assertNotIn(str(other.pk), {hit["id"] for hit in hits})
+
+        self.assertEqual(self.client.get("/search/", {"q": "x"}).json()["results"], [])
+
+    def test_inactive_records_are_hidden(self):
+        Driver.objects.filter(pk=self.driver.pk).update(is_active=False)
+        hits = self.client.get("/search/", {"q": self.driver.employee_id}).json()["results"]
+        self.assertNotIn(str(self.driver.pk), {hit["id"] for hit in hits})
@@ -11,7 +11,8 @@ from dispatch.models import (
     Dispatch,
     DriverTruckAssignment,
     StatusHistory,
-    Notification
+    Notification,
+    ExtractionTemplate,
 )
 from dispatch.models.log import OrderLog, TripLog
 
@@ -137,3 +138,13 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ('title', 'message')
     readonly_fields = ('created_at',)
     date_hierarchy = 'created_at'
+
+
+@admin.register(ExtractionTemplate)
+class ExtractionTemplateAdmin(admin.ModelAdmin):
+    """Admin interface for ExtractionTemplate model."""
+
+    list_display = ('name', 'tenant', 'customer', 'approved', 'is_active', 'hits', 'fallbacks', 'last_used_at')
+    list_filter = ('approved', 'is_active', 'tenant')
+    search_fields = ('name', 'fingerprint')
+    readonly_fields = ('fingerprint', 'source_orders', 'hits', 'fallbacks', 'last_used_at', 'created_at')
@@ -0,0 +1,141 @@
+"""
+Which drivers and trucks are free for a time window.
+
+A driver or truck is free for [start, end) when it can be assigned at all
+(active, with an available or on-duty status) and none of its assigned or
+on-duty assignments overlaps the window. Assignments without an end date
+are open ended, and so is a window without one, like the assignment
+EXCLUDE constraints on PostgreSQL.
+
+free_drivers() and free_trucks() answer with one NOT EXISTS query each.
+snapshots() answers many windows with one query per resource type and
+caches the answers per tenant for AVAILABILITY_TIMEOUT seconds; saving an
+assignment, driver, employment record or truck of the tenant invalidates
+them (see dispatch.signals).
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q, QuerySet
+from dispatch.models import AssignmentStatus, DriverTruckAssignment
+from fleet.models import Driver, DutyStatus, EmploymentStatus, Truck, TruckDutyStatus, TruckStatus
+
+logger = logging.getLogger("django")
+
+AVAILABILITY_TIMEOUT = 60
+
+BUSY_STATUSES = [AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY]
+
+DRIVER_FIELDS = ("id", "first_name", "last_name", "carrier_id", "carrier__name")
+TRUCK_FIELDS = ("id", "unit", "make", "model", "carrier_id", "carrier__name")
+
+Window = Tuple[datetime, Optional[datetime]]
+
+
+def overlapping_assignments(start: datetime, end: Optional[datetime] = None, exclude=None) -> QuerySet:
+    """Assigned or on-duty assignments overlapping [start, end), except the one with pk exclude."""
+    assignments = DriverTruckAssignment.objects.filter(
+        Q(end_date__isnull=True) | Q(end_date__gt=start),
+        status__in=BUSY_STATUSES,
+        is_active=True,
+    )
+    if end is not None:
+        assignments = assignments.filter(start_date__lt=end)
+    if exclude is not None:
+        assignments = assignments.exclude(pk=exclude)
+    return assignments
+
+
+def assignable_drivers(tenant) -> QuerySet:
+    return Driver.objects.filter(
+        tenant=tenant,
+        is_active=True,
+        driveremployment__employment_status=EmploymentStatus.ACTIVE,
+        driveremployment__duty_status__in=[DutyStatus.AVAILABLE, DutyStatus.ON_DUTY],
+    )
+
+
+def assignable_trucks(tenant) -> QuerySet:
+    return Truck.objects.filter(
+        tenant=tenant,
+        is_active=True,
+        status=TruckStatus.ACTIVE,
+        duty_status__in=[TruckDutyStatus.AVAILABLE, TruckDutyStatus.ON_DUTY],
+    )
+
+
+def _busy(resource: str, start: datetime, end: Optional[datetime], exclude=None) -> Exists:
+    return Exists(overlapping_assignments(start, end, exclude).filter(**{resource: OuterRef("pk")}))
+
+
+def free_drivers(tenant, start: datetime, end: Optional[datetime] = None, exclude=None) -> QuerySet:
+    """Drivers of tenant free for [start, end); exclude is an assignment to disregard, e.g. the one being edited."""
+    return assignable_drivers(tenant).filter(~_busy("driver", start, end, exclude))
+
+
+def free_trucks(tenant, start: datetime, end: Optional[datetime] = None, exclude=None) -> QuerySet:
+    """Trucks of tenant free for [start, end); exclude is an assignment to disregard."""
+    return assignable_trucks(tenant).filter(~_busy("truck", start, end, exclude))
+
+
+def _free_rows(queryset: QuerySet, resource: str, fields, windows: List[Window]) -> List[List[dict]]:
+    """For each window, the rows of queryset free in it, from a single query."""
+    flags = {f"free_{i}": ~_busy(resource, start, end) for i, (start, end) in enumerate(windows)}
+    free = [[] for _ in windows]
+    for row in queryset.annotate(**flags).values(*fields, *flags):
+        fields_only = {field: row[field] for field in fields}
+        for i in range(len(windows)):
+            if row[f"free_{i}"]:
+                free[i].append(fields_only)
+    return free
+
+
+def _version_key(tenant_id) -> str:
+    return f"availability_{tenant_id}_version"
+
+
+def _snapshot_key(tenant_id, version, window: Window) -> str:
+    start, end = window
+    return f"availability_{tenant_id}_{version}_{start.isoformat()}_{end.isoformat() if end else 'open'}"
+
+
+def snapshots(tenant, windows: Iterable[Window]) -> List[Dict[str, List[dict]]]:
+    """
+    Free drivers and trucks for each window, as {"drivers": [...], "trucks": [...]}.
+
+    Rows are dicts of DRIVER_FIELDS and TRUCK_FIELDS. Windows answered in the
+    last AVAILABILITY_TIMEOUT seconds come from the cache; the others cost
+    one query per resource type, however many there are.
+    """
+    windows = list(windows)
+    version = cache.get(_version_key(tenant.id), 0)
+    keys = [_snapshot_key(tenant.id, version, window) for window in windows]
+    cached = cache.get_many(keys)
+
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    if missing:
+        missed = [windows[i] for i in missing]
+        drivers = _free_rows(assignable_drivers(tenant).order_by("last_name", "first_name"), "driver", DRIVER_FIELDS, missed)
+        trucks = _free_rows(assignable_trucks(tenant).order_by("unit"), "truck", TRUCK_FIELDS, missed)
+        computed = {
+            keys[i]: {"drivers": drivers[n], "trucks": trucks[n]}
+            for n, i in enumerate(missing)
+        }
+        cache.set_many(computed, timeout=AVAILABILITY_TIMEOUT)
+        cached.update(computed)
+        logger.info(f"🚚Computed availability of {len(missing)} of {len(windows)} windows for tenant {tenant.id}")
+
+    return [cached[key] for key in keys]
+
+
+def snapshot(tenant, start: datetime, end: Optional[datetime] = None) -> Dict[str, List[dict]]:
+    """Free drivers and trucks for [start, end), see snapshots()."""
+    return snapshots(tenant, [(start, end)])[0]
+
+
+def invalidate(tenant_id) -> None:
+    """Drop the tenant's cached snapshots; later reads use a new version."""
+    cache.set(_version_key(tenant_id), time.time_ns(), timeout=None)
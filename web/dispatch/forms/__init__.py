@@ -1,15 +1,20 @@
 from .assignment import AssignmentForm  # noqa
 from .dispatch import DispatchForm, DispatchDetailForm  # noqa
+from .invoice import BulkInvoiceForm  # noqa
 from .order import OrderForm, OrderUpdateForm  # noqa
+from .planner import AutoDispatchForm  # noqa
 from .trip import TripForm  # noqa
-from .upload import FileUploadForm  # noqa
+from .upload import FileUploadForm, BatchFileUploadForm  # noqa
 
 __all__ = [
     'AssignmentForm',
     'DispatchForm',
     'DispatchDetailForm',
+    'BulkInvoiceForm',
+    'AutoDispatchForm',
     'OrderForm',
     'OrderUpdateForm',
     'TripForm',
     'FileUploadForm',
+    'BatchFileUploadForm',
 ]
\ No newline at end of file
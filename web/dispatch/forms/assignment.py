@@ -10,7 +10,7 @@ from dispatch.models import (
 )
 from fleet.models import Driver, Truck
 import logging
-from django.db import connection
+from dispatch.availability import free_drivers, free_trucks, overlapping_assignments
 
 logger = logging.getLogger(__name__)
 
@@ -157,88 +157,14 @@ class AssignmentForm(forms.ModelForm):
             return
             
         try:
-            # First get all trucks and check their status
-            all_trucks = Truck.objects.filter(tenant=self.tenant)
-            logger.info(f"[AssignmentForm.__init__] All trucks for tenant: {all_trucks.count()}")
-            
-            # Log status values in database
-            with connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT DISTINCT status, COUNT(*) 
-                    FROM fleet_truck 
-                    WHERE tenant_id = %s 
-                    GROUP BY status
-                """, [self.tenant.id])
-                status_counts = cursor.fetchall()
-                logger.info(f"[AssignmentForm.__init__] Truck status distribution: {status_counts}")
-                
-                cursor.execute("""
-                    SELECT DISTINCT duty_status, COUNT(*) 
-                    FROM fleet_truck 
-                    WHERE tenant_id = %s 
-                    GROUP BY duty_status
-                """, [self.tenant.id])
-                duty_status_counts = cursor.fetchall()
-                logger.info(f"[AssignmentForm.__init__] Truck duty_status distribution: {duty_status_counts}")
-            
-            # Log each truck's details
-            for truck in all_trucks:
-                logger.info(
-                    f"Truck {truck.id} ({truck.unit}): "
-                    f"status={truck.status}, "
-                    f"duty_status={truck.duty_status}"
-                )
-            
-            # Try different status values
-            active_trucks = all_trucks.filter(status__in=['ACTIVE', 'active', 'Active'])
-            logger.info(f"[AssignmentForm.__init__] Trucks with any active status: {active_trucks.count()}")
-            
-            available_trucks = active_trucks.filter(duty_status__in=['AVAILABLE', 'available', 'Available'])
-            logger.info(f"[AssignmentForm.__init__] Available trucks: {available_trucks.count()}")
-            
-            # Get current assignments
-            current_assignments = DriverTruckAssignment.objects.filter(
-                tenant=self.tenant,
-                status__in=[AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY],
-                end_date__isnull=True
-            )
-            
-            # Log assignments
-            logger.info(f"[AssignmentForm.__init__] Current assignments: {current_assignments.count()}")
-            for assignment in current_assignments:
-                logger.info(
-                    f"Assignment {assignment.id}: "
-                    f"truck={assignment.truck_id}, "
-                    f"status={assignment.status}"
-                )
-            
-            # Get busy truck IDs
-            busy_truck_ids = set(current_assignments.values_list('truck_id', flat=True))
-            logger.info(f"[AssignmentForm.__init__] Busy truck IDs: {busy_truck_ids}")
-            
-            # Get final available trucks
-            final_trucks = active_trucks.exclude(id__in=busy_truck_ids)
-            logger.info(f"[AssignmentForm.__init__] Final available trucks: {final_trucks.count()}")
-            
-            # Log final available trucks
-            for truck in final_trucks:
-                logger.info(
-                    f"Available truck: {truck.id} ({truck.unit}): "
-                    f"status={truck.status}, "
-                    f"duty_status={truck.duty_status}"
-                )
-            
-            # Set the queryset
-            self.fields['truck'].queryset = final_trucks
-            
-            # Get available drivers (using existing logic)
-            available_drivers = Driver.objects.filter(
-                tenant=self.tenant,
-                is_active=True
-            ).exclude(
-                id__in=current_assignments.values_list('driver_id', flat=True)
-            )
-            self.fields['driver'].queryset = available_drivers
+            # Offer the drivers and trucks free when the assignment starts
+            # (now, for a new one); clean() checks the whole period
+            if self.instance.pk:
+                start, exclude = self.instance.start_date, self.instance.pk
+            else:
+                start, exclude = timezone.now(), None
+            self.fields['truck'].queryset = free_trucks(self.tenant, start, start, exclude)
+            self.fields['driver'].queryset = free_drivers(self.tenant, start, start, exclude)
             
             # Get available dispatches
             available_dispatches = Dispatch.objects.filter(
@@ -376,20 +302,13 @@ class AssignmentForm(forms.ModelForm):
 
         # Check for scheduling conflicts (driver and truck availability)
         if driver and truck and start_date:
-            conflict_end = end_date or (start_date + timezone.timedelta(days=1))
-            
-            # Check driver conflicts
-            driver_conflicts = DriverTruckAssignment.objects.filter(
-                driver=driver,
-                tenant=self.tenant,
-                status__in=[AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY],
-                start_date__lt=conflict_end,
-                end_date__gt=start_date
+            # Open ended when there is no end date, like the database constraint
+            overlapping = overlapping_assignments(
+                start_date, end_date, exclude=self.instance.pk if self.instance else None
             )
             
-            # Exclude current instance if updating
-            if self.instance and self.instance.pk:
-                driver_conflicts = driver_conflicts.exclude(pk=self.instance.pk)
+            # Check driver conflicts
+            driver_conflicts = overlapping.filter(driver=driver)
             
             if driver_conflicts.exists():
                 conflict = driver_conflicts.first()
@@ -399,17 +318,7 @@ class AssignmentForm(forms.ModelForm):
                 )
             
             # Check truck conflicts
-            truck_conflicts = DriverTruckAssignment.objects.filter(
-                truck=truck,
-                tenant=self.tenant,
-                status__in=[AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY],
-                start_date__lt=conflict_end,
-                end_date__gt=start_date
-            )
-            
-            # Exclude current instance if updating
-            if self.instance and self.instance.pk:
-                truck_conflicts = truck_conflicts.exclude(pk=self.instance.pk)
+            truck_conflicts = overlapping.filter(truck=truck)
             
             if truck_conflicts.exists():
                 conflict = truck_conflicts.first()
@@ -508,21 +417,9 @@ class AssignmentForm(forms.ModelForm):
 
     def is_assignment_available(self, driver, truck, start_date, end_date):
         """Check if driver and truck are available for the assignment period."""
-        if not end_date:
-            end_date = start_date + timezone.timedelta(days=365)  # Default to one year
-
-        # Check for conflicting assignments
-        conflicting_assignments = DriverTruckAssignment.objects.filter(
-            Q(driver=driver) | Q(truck=truck),
-            tenant=self.tenant,
-            status__in=[AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY],
-            start_date__lt=end_date,
-            end_date__gt=start_date
-        )
-
-        # Exclude current instance if updating
-        if self.instance and self.instance.pk:
-            conflicting_assignments = conflicting_assignments.exclude(pk=self.instance.pk)
+        conflicting_assignments = overlapping_assignments(
+            start_date, end_date, exclude=self.instance.pk if self.instance else None
+        ).filter(Q(driver=driver) | Q(truck=truck))
 
         return not conflicting_assignments.exists()
 
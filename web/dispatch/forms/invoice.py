@@ -0,0 +1,65 @@
+from django import forms
+from dispatch.invoices import BULK_INVOICE_STATUSES, BULK_OUTPUT_PDF, BULK_OUTPUT_ZIP
+from dispatch.models import Dispatch
+from fleet.models import Customer
+
+
+class BulkInvoiceForm(forms.Form):
+    """Selects the dispatches a bulk invoicing job should bill."""
+
+    OUTPUT_CHOICES = [
+        (BULK_OUTPUT_ZIP, "ZIP archive (one PDF per dispatch)"),
+        (BULK_OUTPUT_PDF, "Single merged PDF"),
+    ]
+
+    start_date = forms.DateField(
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+        help_text="Include dispatches with an order date on or after this day",
+    )
+    end_date = forms.DateField(
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+        help_text="Include dispatches with an order date on or before this day",
+    )
+    customer = forms.ModelChoiceField(
+        queryset=Customer.objects.none(),
+        required=False,
+        empty_label="All customers",
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    status = forms.ChoiceField(
+        choices=[("", "Assigned and Delivered")]
+        + [(status.value, status.label) for status in BULK_INVOICE_STATUSES],
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    output = forms.ChoiceField(
+        choices=OUTPUT_CHOICES,
+        initial=BULK_OUTPUT_ZIP,
+        widget=forms.RadioSelect,
+    )
+
+    def __init__(self, *args, tenant=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tenant = tenant
+        if tenant:
+            self.fields["customer"].queryset = Customer.objects.filter(tenant=tenant).order_by("name")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get("start_date")
+        end_date = cleaned_data.get("end_date")
+        if start_date and end_date and start_date > end_date:
+            raise forms.ValidationError("Start date must be before end date.")
+        return cleaned_data
+
+    def get_queryset(self):
+        """Dispatches matching the cleaned filters."""
+        queryset = Dispatch.objects.filter(
+            tenant=self.tenant,
+            order_date__date__gte=self.cleaned_data["start_date"],
+            order_date__date__lte=self.cleaned_data["end_date"],
+            status__in=[self.cleaned_data["status"]] if self.cleaned_data.get("status") else BULK_INVOICE_STATUSES,
+        )
+        if self.cleaned_data.get("customer"):
+            queryset = queryset.filter(customer=self.cleaned_data["customer"])
+        return queryset
@@ -0,0 +1,25 @@
+from datetime import datetime, time, timedelta
+from django import forms
+from django.utils import timezone
+from dispatch.planner import MAX_HORIZON_DAYS
+
+
+class AutoDispatchForm(forms.Form):
+    """The horizon an auto-dispatch plan covers."""
+
+    start_date = forms.DateField(
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"}),
+        help_text="Plan trips picking up on or after this day",
+    )
+    days = forms.IntegerField(
+        min_value=1,
+        max_value=MAX_HORIZON_DAYS,
+        initial=7,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+        help_text=f"Number of days to plan, up to {MAX_HORIZON_DAYS}",
+    )
+
+    def get_window(self):
+        """Start and end of the horizon as aware datetimes in the current time zone."""
+        start = timezone.make_aware(datetime.combine(self.cleaned_data["start_date"], time.min))
+        return start, start + timedelta(days=self.cleaned_data["days"])
@@ -6,6 +6,20 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    """FileField that accepts several files from one input."""
+
+    def clean(self, data, initial=None):
+        single_file_clean = super().clean
+        if isinstance(data, (list, tuple)):
+            return [single_file_clean(d, initial) for d in data]
+        return single_file_clean(data, initial)
+
+
 class FileUploadForm(forms.Form):
     """Form for handling file uploads in the dispatch system."""
     
@@ -69,3 +83,24 @@ class FileUploadForm(forms.Form):
             str(tenant_id),
             filename
         )
+
+
+class BatchFileUploadForm(FileUploadForm):
+    """Upload several order documents at once."""
+
+    MAX_FILES = 20
+
+    files = MultipleFileField(
+        widget=MultipleFileInput(
+            attrs={
+                "accept": ".pdf",
+                "class": "form-control"
+            }
+        ),
+        help_text=f"Only PDF files are allowed. Maximum file size: 10MB, up to {MAX_FILES} files",
+    )
+
+    def clean_files(self):
+        if len(self.files.getlist("files")) > self.MAX_FILES:
+            raise forms.ValidationError(f"Upload at most {self.MAX_FILES} files at once")
+        return super().clean_files()
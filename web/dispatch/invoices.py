@@ -0,0 +1,420 @@
+"""Invoice PDF rendering and caching for dispatches."""
+
+import hashlib
+import json
+import logging
+import zipfile
+from io import BytesIO
+from typing import List, Optional
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.template.loader import get_template, render_to_string
+from django.db import transaction
+from django.utils import timezone
+from contrib.aws import s3_utils
+from dispatch.models import Dispatch, DispatchStatus, StatusHistory
+from fleet.models import Organization
+
+logger = logging.getLogger("django")
+
+INVOICE_TEMPLATE = "dispatch/invoice_template.html"
+INVOICE_CACHE_TIMEOUT = 60 * 60 * 24 * 30  # 30 days; S3 holds the PDF for good
+INVOICE_STATUS_TIMEOUT = 3600  # Keep rendering status for 1 hour
+
+# Statuses a bulk invoicing job picks up
+BULK_INVOICE_STATUSES = [DispatchStatus.ASSIGNED, DispatchStatus.DELIVERED]
+BULK_OUTPUT_ZIP = "zip"
+BULK_OUTPUT_PDF = "pdf"
+
+INVOICE_CSS = """
+    @page {
+        size: letter;
+        margin: 1.5cm;
+        @bottom-right {
+            content: "Page " counter(page) " of " counter(pages);
+        }
+    }
+    body { font-family: Arial, sans-serif; }
+    .invoice-header { margin-bottom: 20px; }
+    .company-details { margin-bottom: 30px; }
+    .billing-details { margin-bottom: 20px; }
+    .invoice-table { width: 100%; border-collapse: collapse; }
+    .invoice-table th, .invoice-table td {
+        border: 1px solid #ddd;
+        padding: 8px;
+    }
+    .invoice-total { margin-top: 20px; text-align: right; }
+"""
+
+# Every attribute invoice_template.html reads, per object. Changing any of them
+# changes the fingerprint and so invalidates the cached PDF.
+DISPATCH_FIELDS = [
+    "dispatch_id",
+    "order_number",
+    "order_date",
+    "commission_amount",
+    "commission_percentage",
+    "commission_currency",
+]
+CUSTOMER_FIELDS = ["name", "address", "city", "state", "zip_code"]
+ORDER_FIELDS = [
+    "order_number",
+    "customer_name",
+    "customer_email",
+    "customer_phone",
+    "remarks_or_special_instructions",
+    "load_total",
+    "load_currency",
+]
+ORGANIZATION_FIELDS = [
+    "name",
+    "address",
+    "city",
+    "state",
+    "zip_code",
+    "phone",
+    "logo",
+    "bank_details",
+]
+TRIP_FIELDS = [
+    "id",
+    "status",
+    "carrier",
+    "freight_value",
+    "freight_value_currency",
+    "pickup_address",
+    "pickup_contact_person",
+    "pickup_contact_phone",
+    "pickup_date",
+    "delivery_address",
+    "delivery_contact_person",
+    "delivery_contact_phone",
+    "delivery_date",
+]
+# The template only shows the dispatch status as a watermark, for these values
+# (compared as written there). Other transitions, such as a bulk job moving
+# dispatches to Invoiced, leave the PDF and so the fingerprint alone.
+WATERMARK_STATUSES = ("PAID", "CANCELLED")
+
+_font_config = None
+_stylesheet = None
+
+
+def get_font_config():
+    """Font configuration shared by every render in this process."""
+    global _font_config
+    if _font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+
+        _font_config = FontConfiguration()
+    return _font_config
+
+
+def get_stylesheet():
+    """Parse the invoice stylesheet once per process and reuse it for every render."""
+    global _stylesheet
+    if _stylesheet is None:
+        from weasyprint import CSS
+
+        _stylesheet = CSS(string=INVOICE_CSS, font_config=get_font_config())
+    return _stylesheet
+
+
+def get_organization(tenant) -> Optional[Organization]:
+    return Organization.objects.filter(tenant=tenant).first()
+
+
+def _values(obj, fields) -> Optional[list]:
+    if obj is None:
+        return None
+    return [str(getattr(obj, field, None)) for field in fields]
+
+
+def invoice_fingerprint(dispatch, organization) -> str:
+    """
+    Hash of everything the invoice template renders for a dispatch.
+
+    The issue date is left out: it is fixed on the dispatch (issue_dates) and
+    never changes what is billed.
+    """
+    order = dispatch.order
+    # Sorted here rather than in SQL so prefetched trips are reused
+    trips = sorted(order.trips.all(), key=lambda trip: trip.created_at) if order else []
+    payload = {
+        "template": get_template(INVOICE_TEMPLATE).template.source,
+        "css": INVOICE_CSS,
+        "dispatch": _values(dispatch, DISPATCH_FIELDS),
+        "watermark": dispatch.status if dispatch.status in WATERMARK_STATUSES else None,
+        "customer": _values(dispatch.customer, CUSTOMER_FIELDS),
+        "order": _values(order, ORDER_FIELDS),
+        "organization": _values(organization, ORGANIZATION_FIELDS),
+        "trips": [_values(trip, TRIP_FIELDS) for trip in trips],
+    }
+    encoded = json.dumps(payload, cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def build_invoice_context(dispatch, organization, date=None) -> dict:
+    order_currency = (dispatch.order.load_currency if dispatch.order else None) or "USD"
+    return {
+        "dispatch": dispatch,
+        "invoice_number": dispatch.dispatch_id,
+        "date": date or timezone.now(),
+        "company": organization,
+        "load_total": {
+            "amount": dispatch.order.load_total if dispatch.order else None,
+            "currency": order_currency,
+        },
+        "trip": dispatch.trip,
+        "billing_info": {
+            "commission_amount": dispatch.commission_amount,
+            "commission_percentage": dispatch.commission_percentage,
+            "commission_currency": dispatch.commission_currency or order_currency,
+        },
+        "customer": dispatch.customer,
+        "order": {
+            "number": dispatch.order_number,
+            "date": dispatch.order_date,
+            "currency": order_currency,
+        },
+    }
+
+
+def render_invoice_html(dispatch, organization, date=None) -> str:
+    return render_to_string(
+        INVOICE_TEMPLATE, build_invoice_context(dispatch, organization, date)
+    )
+
+
+def html_to_pdf(html_string: str) -> bytes:
+    """Convert invoice HTML to PDF bytes. CPU heavy and database free."""
+    from weasyprint import HTML
+
+    html = HTML(string=html_string, base_url=str(settings.BASE_DIR))
+    return html.write_pdf(stylesheets=[get_stylesheet()], font_config=get_font_config())
+
+
+def render_invoice_pdf(dispatch, organization, date=None) -> bytes:
+    """Render the invoice of a dispatch to PDF bytes. CPU heavy; run it in a worker."""
+    return html_to_pdf(render_invoice_html(dispatch, organization, date))
+
+
+def invoice_s3_key(dispatch, fingerprint: str) -> str:
+    return f"{settings.ENV}/{dispatch.tenant_id}/invoices/{dispatch.pk}/{fingerprint}.pdf"
+
+
+def invoice_cache_key(dispatch_pk) -> str:
+    """Cache key holding the fingerprint and S3 key of a dispatch's latest invoice."""
+    return f"invoice_pdf_{dispatch_pk}"
+
+
+def invoice_status_key(dispatch_pk) -> str:
+    """Cache key holding the rendering status of a dispatch's invoice."""
+    return f"invoice_pdf_{dispatch_pk}_status"
+
+
+def issue_dates(dispatches) -> List:
+    """
+    Date printed on each dispatch's invoice, in order.
+
+    Fixed the first time an invoice is rendered and kept on the dispatch, so
+    re-renders (after an edit or an evicted cache entry) keep the original date.
+    """
+    missing = [dispatch.pk for dispatch in dispatches if dispatch.invoice_issued_at is None]
+    if missing:
+        # Only fills dates nobody set meanwhile, then reads back whichever won
+        Dispatch.objects.filter(pk__in=missing, invoice_issued_at__isnull=True).update(
+            invoice_issued_at=timezone.now()
+        )
+        stored = dict(
+            Dispatch.objects.filter(pk__in=missing).values_list("pk", "invoice_issued_at")
+        )
+        for dispatch in dispatches:
+            if dispatch.pk in stored:
+                dispatch.invoice_issued_at = stored[dispatch.pk]
+    return [dispatch.invoice_issued_at for dispatch in dispatches]
+
+
+def get_cached_invoice(dispatch, fingerprint: str) -> Optional[str]:
+    """
+    S3 key of the invoice rendered for this fingerprint, or None.
+
+    Falls back to S3 when the cache entry is gone, since the key is derived
+    from the fingerprint.
+    """
+    entry = cache.get(invoice_cache_key(dispatch.pk))
+    if entry and entry.get("fingerprint") == fingerprint:
+        return entry["s3_key"]
+
+    s3_key = invoice_s3_key(dispatch, fingerprint)
+    if s3_utils.check_file_exists(s3_key):
+        cache.set(
+            invoice_cache_key(dispatch.pk),
+            {"fingerprint": fingerprint, "s3_key": s3_key},
+            timeout=INVOICE_CACHE_TIMEOUT,
+        )
+        return s3_key
+    return None
+
+
+def store_invoice(dispatch, organization) -> str:
+    """
+    Render and upload the invoice of a dispatch unless a current copy exists.
+
+    Returns:
+        S3 key of the invoice PDF
+    """
+    fingerprint = invoice_fingerprint(dispatch, organization)
+    s3_key = get_cached_invoice(dispatch, fingerprint)
+    if s3_key:
+        logger.info(f"♻️Invoice for dispatch {dispatch.dispatch_id} is current: {s3_key}")
+        return s3_key
+
+    issued = issue_dates([dispatch])[0]
+    pdf = render_invoice_pdf(dispatch, organization, date=issued)
+    return save_invoice(dispatch, fingerprint, pdf)
+
+
+def save_invoice(dispatch, fingerprint: str, pdf: bytes) -> str:
+    """Upload a rendered invoice and point the dispatch's cache entry at it."""
+    cache_key = invoice_cache_key(dispatch.pk)
+    previous = cache.get(cache_key) or {}
+
+    s3_key = invoice_s3_key(dispatch, fingerprint)
+    if not s3_utils.upload_fileobj(
+        BytesIO(pdf), s3_key, extra_args={"ContentType": "application/pdf"}
+    ):
+        raise Exception(f"Failed to upload invoice to S3: {s3_key}")
+
+    cache.set(
+        cache_key,
+        {"fingerprint": fingerprint, "s3_key": s3_key},
+        timeout=INVOICE_CACHE_TIMEOUT,
+    )
+    if previous.get("s3_key") and previous["s3_key"] != s3_key:
+        s3_utils.delete_file(previous["s3_key"])
+
+    logger.info(f"👌Rendered invoice for dispatch {dispatch.dispatch_id} ({len(pdf)} bytes)")
+    return s3_key
+
+
+def bulk_status_key(job_id: str) -> str:
+    """Cache key holding the status of a bulk invoicing job."""
+    return f"invoice_batch_{job_id}_status"
+
+
+def invoiceable_ids(tenant, dispatch_ids) -> List:
+    """IDs of the dispatches a bulk invoicing job can pick up, i.e. in BULK_INVOICE_STATUSES."""
+    return list(
+        Dispatch.objects.filter(
+            tenant=tenant, pk__in=dispatch_ids, status__in=BULK_INVOICE_STATUSES
+        ).values_list("pk", flat=True)
+    )
+
+
+def mark_invoiced(tenant, dispatch_ids, user=None) -> List:
+    """
+    Move the eligible dispatches to Invoiced in a single UPDATE.
+
+    Status history rows are bulk created alongside. Dispatches outside
+    BULK_INVOICE_STATUSES are left alone.
+
+    Returns:
+        IDs of the dispatches that were invoiced
+    """
+    with transaction.atomic():
+        rows = list(
+            Dispatch.objects.select_for_update()
+            .filter(tenant=tenant, pk__in=dispatch_ids, status__in=BULK_INVOICE_STATUSES)
+            .values_list("pk", "status", "dispatch_id", "order_number")
+        )
+        if not rows:
+            return []
+
+        now = timezone.now()
+        Dispatch.objects.filter(pk__in=[row[0] for row in rows]).update(
+            status=DispatchStatus.INVOICED, updated_at=now
+        )
+        content_type = ContentType.objects.get_for_model(Dispatch)
+        StatusHistory.objects.bulk_create(
+            [
+                StatusHistory(
+                    content_type=content_type,
+                    object_id=pk,
+                    old_status=old_status,
+                    new_status=DispatchStatus.INVOICED,
+                    changed_at=now,
+                    changed_by=user,
+                    metadata={
+                        "dispatch_id": dispatch_id,
+                        "order_number": order_number,
+                        "bulk_invoice": True,
+                    },
+                    tenant=tenant,
+                )
+                for pk, old_status, dispatch_id, order_number in rows
+            ]
+        )
+
+    logger.info(f"👌Invoiced {len(rows)} dispatches in bulk")
+    return [row[0] for row in rows]
+
+
+def bundle_pdfs(named_pdfs: List[tuple], output: str = BULK_OUTPUT_ZIP) -> bytes:
+    """Pack (filename, pdf bytes) pairs into a ZIP, or append them into one PDF."""
+    buffer = BytesIO()
+    if output == BULK_OUTPUT_PDF:
+        from PyPDF2 import PdfWriter
+
+        writer = PdfWriter()
+        for _, pdf in named_pdfs:
+            writer.append(BytesIO(pdf))
+        writer.write(buffer)
+    else:
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for filename, pdf in named_pdfs:
+                archive.writestr(filename, pdf)
+    return buffer.getvalue()
+
+
+def create_invoice_bundle(tenant, dispatch_ids, job_id: str, output: str = BULK_OUTPUT_ZIP) -> str:
+    """
+    Render the invoices of many dispatches and upload them as one file.
+
+    Invoices render one after another: the job already runs in a Celery
+    worker, and a process pool inside a prefork child would multiply the
+    worker's footprint. Each invoice is also stored on its own, so single
+    downloads of these dispatches are served from the cache afterwards.
+
+    Returns:
+        S3 key of the ZIP or merged PDF
+    """
+    dispatches = list(
+        Dispatch.objects.filter(tenant=tenant, pk__in=dispatch_ids)
+        .select_related("order", "customer", "trip", "tenant")
+        .prefetch_related("order__trips")
+        .order_by("dispatch_id")
+    )
+    organization = get_organization(tenant)
+
+    pdfs = [
+        render_invoice_pdf(dispatch, organization, issued)
+        for dispatch, issued in zip(dispatches, issue_dates(dispatches))
+    ]
+
+    for dispatch, pdf in zip(dispatches, pdfs):
+        save_invoice(dispatch, invoice_fingerprint(dispatch, organization), pdf)
+
+    bundle = bundle_pdfs(
+        [(f"invoice_{dispatch.dispatch_id}.pdf", pdf) for dispatch, pdf in zip(dispatches, pdfs)],
+        output,
+    )
+    content_type = "application/pdf" if output == BULK_OUTPUT_PDF else "application/zip"
+    s3_key = f"{settings.ENV}/{tenant.id}/invoices/batches/{job_id}.{output}"
+    if not s3_utils.upload_fileobj(BytesIO(bundle), s3_key, extra_args={"ContentType": content_type}):
+        raise Exception(f"Failed to upload invoice bundle to S3: {s3_key}")
+
+    logger.info(f"👌Bundled {len(dispatches)} invoices into {s3_key} ({len(bundle)} bytes)")
+    return s3_key
@@ -0,0 +1,200 @@
+"""
+Management command to benchmark document extraction against the fixture corpus.
+
+Runs every case of contrib/extraction/corpus through `extract` (orders) or
+`extract_license_info` (licenses) and reports latency, tokens and per-field
+accuracy. By default the model is the local fake server answering with each
+case's recorded response, so runs are offline and measure our own pipeline;
+--live uses the configured provider to measure prompt or model changes.
+
+Usage:
+    python manage.py benchmark_extraction
+    python manage.py benchmark_extraction --kind order --latency 0.5
+    python manage.py benchmark_extraction --live --record
+    python manage.py benchmark_extraction --save-baseline
+    python manage.py benchmark_extraction --fail-on-regression
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import nullcontext
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from contrib.extraction import benchmark
+from contrib.extraction.document.driver_license import extract_license_info
+from contrib.extraction.fake_server import FakeModelServer
+from contrib.extraction.gateway import ExtractionGateway
+from contrib.extraction.oai import use_gateway
+from dispatch.utils import extract
+
+
+class Command(BaseCommand):
+    help = 'Benchmark extraction latency, tokens and field accuracy on the fixture corpus'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            choices=benchmark.KINDS,
+            action='append',
+            help='Only run cases of this kind (repeatable)'
+        )
+
+        parser.add_argument(
+            '--corpus',
+            type=str,
+            default=str(benchmark.CORPUS_DIR),
+            help='Directory of case files'
+        )
+
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.0,
+            help='Seconds the fake model takes per request'
+        )
+
+        parser.add_argument(
+            '--live',
+            action='store_true',
+            help='Call the configured model provider instead of the recorded responses'
+        )
+
+        parser.add_argument(
+            '--record',
+            action='store_true',
+            help='With --live, save each extraction as the case\'s recorded response'
+        )
+
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            default=str(benchmark.BASELINE_PATH),
+            help='Baseline summary to compare with'
+        )
+
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Store this run\'s summary as the baseline'
+        )
+
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Exit with an error when the run is worse than the baseline'
+        )
+
+    def handle(self, *args, **options):
+        if options['record'] and not options['live']:
+            raise CommandError("--record needs --live; recorded responses come from the real model")
+
+        cases = benchmark.load_corpus(options['corpus'], options['kind'] or benchmark.KINDS)
+        if not cases:
+            raise CommandError(f"No cases in {options['corpus']}")
+
+        server = None
+        if not options['live']:
+            server = FakeModelServer(latency=options['latency']).start()
+        try:
+            fake_gateway = server and ExtractionGateway(
+                max_concurrency=settings.LLM_MAX_CONCURRENCY,
+                tenant_rate_per_minute=60000,
+                tenant_burst=1000,
+                base_url=server.url,
+                api_key="fake",
+            )
+            with tempfile.TemporaryDirectory() as tmp_dir, (
+                use_gateway(fake_gateway) if fake_gateway else nullcontext()
+            ):
+                # Route logs, cached page text and the like are not kept
+                with transaction.atomic():
+                    results = [self._run(case, tmp_dir, server, options) for case in cases]
+                    transaction.set_rollback(True)
+        finally:
+            if server:
+                server.stop()
+
+        summary = benchmark.summarize(results)
+        self._report(results, summary)
+
+        baseline = benchmark.load_baseline(options['baseline'])
+        regressions = benchmark.compare(summary, baseline) if baseline else []
+        if not baseline:
+            self.stdout.write(f"\nNo baseline at {options['baseline']}")
+        elif regressions:
+            self.stdout.write(self.style.ERROR(f"\n{len(regressions)} regressions against the baseline:"))
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f"  {regression}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("\nNo regressions against the baseline"))
+
+        if options['save_baseline']:
+            benchmark.save_baseline(summary, options['baseline'])
+            self.stdout.write(f"Baseline saved to {options['baseline']}")
+        elif regressions and options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} regressions against the baseline")
+
+    def _run(self, case, tmp_dir, server, options):
+        suffix = os.path.splitext(case.get('file') or 'document.pdf')[1]
+        path = os.path.join(tmp_dir, f"{case['name']}{suffix}")
+        with open(path, 'wb') as f:
+            f.write(benchmark.document_bytes(case))
+        if server:
+            server.content = benchmark.recorded_responder(case)
+
+        actual, usage, error = None, {}, None
+        started = time.perf_counter()
+        try:
+            if case['kind'] == 'order':
+                actual, usage, _ = extract(path)
+            else:
+                license_info, usage = extract_license_info(path)
+                actual = license_info.model_dump()
+        except Exception as e:
+            error = f"{e.__class__.__name__}: {e}"
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        if options['record'] and actual is not None:
+            data = json.loads(case['path'].read_text())
+            data['responses'] = {'default': actual}
+            case['path'].write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n")
+
+        return {
+            'case': case['name'],
+            'kind': case['kind'],
+            'latency_ms': latency_ms,
+            'total_tokens': usage.get('total_tokens') or 0,
+            'escalated': usage.get('routing', {}).get('escalated', False),
+            'fields': benchmark.score(case['expected'], actual),
+            'error': error,
+        }
+
+    def _report(self, results, summary):
+        self.stdout.write(f"\n{'='*78}")
+        self.stdout.write(f"{'case':<34}{'kind':<9}{'ms':>9}{'tokens':>9}{'fields':>9}{'escalated':>11}")
+        self.stdout.write(f"{'='*78}")
+        for result in results:
+            fields = f"{sum(result['fields'].values())}/{len(result['fields'])}"
+            line = (
+                f"{result['case']:<34}{result['kind']:<9}{result['latency_ms']:>9.1f}"
+                f"{result['total_tokens']:>9}{fields:>9}"
+                f"{'yes' if result['escalated'] else '':>11}"
+            )
+            if result['error']:
+                self.stdout.write(self.style.ERROR(f"{line}  {result['error']}"))
+            else:
+                self.stdout.write(line)
+
+        for kind, stats in summary.items():
+            self.stdout.write(
+                f"\n{kind}: {stats['cases']} cases, {stats['failed']} failed, "
+                f"p50 {stats['latency_ms_p50']:.1f}ms, p95 {stats['latency_ms_p95']:.1f}ms, "
+                f"{stats['tokens_mean']:.0f} tokens per document, {stats['escalated']} escalated, "
+                f"accuracy {stats['accuracy']:.1%}"
+            )
+            for path, accuracy in stats['field_accuracy'].items():
+                if accuracy < 1:
+                    self.stdout.write(self.style.WARNING(f"  {path}: {accuracy:.0%}"))
@@ -0,0 +1,168 @@
+"""
+Management command to time the tenant-scoped hot queries with and without the index pack.
+
+The index pack is the indexes added by dispatch 0005_index_pack and expense
+0003_index_pack. The second pass drops them inside a transaction that is
+rolled back afterwards, so nothing changes, but the tables stay locked while
+it runs: use a database filled by generate_synthetic_dataset, not production.
+
+Usage:
+    python manage.py generate_synthetic_dataset --tenants 3
+    python manage.py benchmark_indexes
+    python manage.py benchmark_indexes --tenant-id=<id> --repeat 20
+"""
+
+import statistics
+import time
+from datetime import timedelta
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.operations import AddIndex
+from django.db.models import Count, Max, Q
+from contrib.pagination import keyset_filter
+from dispatch.models import AssignmentStatus, Dispatch, DriverTruckAssignment, Order, StatusHistory, Trip
+from expense.models import BVD, AccountPayableStatus
+from tenant.models import Tenant
+
+PACK_MIGRATIONS = [("dispatch", "0005_index_pack"), ("expense", "0003_index_pack")]
+
+# Rows per list page, as the list views fetch them (page size + 1)
+PAGE = 11
+# Depth of the "deep page" queries, in rows
+DEEP = 500
+
+
+def pack_indexes() -> list[str]:
+    """Names of the indexes the pack migrations add, PostgreSQL-only ones included."""
+    loader = MigrationLoader(connection, ignore_no_migrations=True)
+    names = []
+    for app_label, name in PACK_MIGRATIONS:
+        for operation in loader.get_migration(app_label, name).operations:
+            operation = getattr(operation, "operation", operation)  # PostgresOnly
+            if isinstance(operation, AddIndex):
+                names.append(operation.index.name)
+    return names
+
+
+def hot_queries(tenant) -> list[tuple[str, object]]:
+    """The queries the list views, payouts and availability checks run, for one tenant."""
+    dispatches = Dispatch.objects.filter(tenant=tenant)
+    busiest = dispatches.exclude(driver=None).values("driver").annotate(count=Count("id")).order_by("-count").first()
+    driver_id = busiest["driver"] if busiest else None
+    period_end = dispatches.aggregate(last=Max("actual_end"))["last"]
+    if period_end is None:
+        raise CommandError(f"Tenant {tenant} has no finished dispatches; generate a synthetic dataset first")
+    period = (period_end - timedelta(days=30), period_end)
+
+    recent = ("-created_at", "-id")
+    deep = list(dispatches.order_by(*recent).values_list("created_at", "id")[DEEP:DEEP + 1])
+    active = [AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY]
+    queries = [
+        ("order list", Order.objects.filter(tenant=tenant).order_by(*recent)[:PAGE]),
+        ("dispatch list", dispatches.order_by(*recent)[:PAGE]),
+        ("trip list", Trip.objects.filter(tenant=tenant).order_by("-created_at")[:PAGE]),
+        ("assignment list", DriverTruckAssignment.objects.filter(tenant=tenant).order_by(*recent)[:PAGE]),
+        ("bvd list", BVD.objects.filter(tenant=tenant, is_active=True).order_by("-date", "-id")[:PAGE]),
+        ("payout dispatches", dispatches.filter(
+            driver_id=driver_id,
+            status__in=["completed", "delivered", "invoiced", "payment_received"],
+            actual_end__range=period,
+        )),
+        ("payout fuel", BVD.objects.filter(
+            tenant=tenant,
+            driver_id=driver_id,
+            date__range=period,
+            status__in=[AccountPayableStatus.PENDING, AccountPayableStatus.ACCOUNTED],
+        )),
+        ("busy assignments", DriverTruckAssignment.objects.filter(
+            tenant=tenant, status__in=active, start_date__lt=period[1], end_date__gt=period[0],
+        ).values_list("driver_id", flat=True)),
+        ("driver overlap", DriverTruckAssignment.objects.filter(driver_id=driver_id, status__in=active).filter(
+            Q(start_date__range=period) | Q(end_date__range=period) | Q(start_date__lte=period[0], end_date__gte=period[1])
+        )),
+    ]
+    if deep:
+        queries.insert(2, (
+            f"dispatch list, row {DEEP}",
+            dispatches.filter(keyset_filter(recent, deep[0])).order_by(*recent)[:PAGE],
+        ))
+    dispatch = dispatches.first()
+    queries.append(("status history", StatusHistory.objects.filter(
+        content_type=ContentType.objects.get_for_model(Dispatch), object_id=dispatch.pk,
+    ).order_by("-changed_at")[:20]))
+    return queries
+
+
+class Command(BaseCommand):
+    help = 'Time the tenant-scoped hot queries with and without the index pack'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=str,
+            help='Tenant whose data to query (default: the one with the most dispatches)'
+        )
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=10,
+            help='Timed runs per query and pass (default: 10)'
+        )
+
+    def handle(self, *args, **options):
+        tenant_id = options['tenant_id'] or (
+            Dispatch.objects.values('tenant').annotate(count=Count('id')).order_by('-count')
+            .values_list('tenant', flat=True).first()
+        )
+        tenant = Tenant.objects.filter(id=tenant_id).first() if tenant_id else None
+        if tenant is None:
+            raise CommandError("No tenant to benchmark")
+
+        queries = hot_queries(tenant)
+        names = pack_indexes()
+        self.stdout.write(
+            f"Benchmarking {len(queries)} queries for {tenant.name} on {connection.vendor}, "
+            f"best of {options['repeat']} runs"
+        )
+
+        with_pack = self._time(queries, options['repeat'])
+        used = {label: [name for name in names if name in queryset.explain()] for label, queryset in queries}
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for name in names:
+                    cursor.execute(f"DROP INDEX IF EXISTS {connection.ops.quote_name(name)}")
+            without_pack = self._time(queries, options['repeat'])
+            transaction.set_rollback(True)
+
+        self._report(queries, with_pack, without_pack, used)
+
+    def _time(self, queries, repeat):
+        timings = {}
+        for label, queryset in queries:
+            list(queryset.all())  # Warm up the page cache
+            runs = []
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                list(queryset.all())
+                runs.append(time.perf_counter() - started)
+            timings[label] = min(runs) * 1000
+        return timings
+
+    def _report(self, queries, with_pack, without_pack, used):
+        self.stdout.write(f"\n{'='*96}")
+        self.stdout.write(f"{'query':<26}{'with ms':>10}{'without ms':>12}{'speedup':>10}  index used")
+        self.stdout.write(f"{'='*96}")
+        speedups = []
+        for label, _ in queries:
+            speedup = without_pack[label] / with_pack[label] if with_pack[label] else 0
+            speedups.append(speedup)
+            self.stdout.write(
+                f"{label:<26}{with_pack[label]:>10.2f}{without_pack[label]:>12.2f}{speedup:>9.1f}x"
+                f"  {', '.join(used[label]) or '-'}"
+            )
+        self.stdout.write(f"\nGeometric mean speedup: {statistics.geometric_mean([s for s in speedups if s > 0]):.1f}x")
+        self.stdout.write("Timings are the best of the repeated runs; 'without' drops the pack in a rolled back transaction.")
@@ -0,0 +1,172 @@
+"""
+Management command to compare PDF text engines on real rate confirmations.
+
+Usage:
+    python manage.py benchmark_pdf_text path/to/ratecon.pdf path/to/folder/
+    python manage.py benchmark_pdf_text --orders 50 --tenant-id=<id>
+    python manage.py benchmark_pdf_text --orders 50 --repeat 5 --workers 4
+"""
+
+import os
+import statistics
+import tempfile
+import time
+from django.core.management.base import BaseCommand, CommandError
+from contrib.aws import s3_utils
+from contrib.pdf_text import ENGINES, FALLBACK_ENGINE, _extract_pages
+from dispatch.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Compare PDF text extraction engines (speed and agreement with PyPDF2)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='*',
+            help='PDF files or folders of PDFs'
+        )
+
+        parser.add_argument(
+            '--orders',
+            type=int,
+            default=0,
+            help='Also download the PDFs of the N most recent orders from S3'
+        )
+
+        parser.add_argument(
+            '--tenant-id',
+            type=str,
+            help='Only use orders of this tenant'
+        )
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Timed runs per document and engine (default: 3)'
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=0,
+            help='Also time the process pool with this many workers'
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            documents = self._collect(options, tmp_dir)
+            if not documents:
+                raise CommandError("No PDF documents to benchmark")
+
+            engines = [engine() for engine in ENGINES.values() if engine.available()]
+            self.stdout.write(
+                f"Benchmarking {len(documents)} documents with {', '.join(e.name for e in engines)}"
+            )
+            results = {engine.name: self._run(engine, documents, options) for engine in engines}
+
+        self._report(results)
+
+    def _collect(self, options, tmp_dir):
+        documents = []
+        for path in options['paths']:
+            if os.path.isdir(path):
+                documents += sorted(
+                    os.path.join(path, name)
+                    for name in os.listdir(path)
+                    if name.lower().endswith('.pdf')
+                )
+            elif os.path.exists(path):
+                documents.append(path)
+            else:
+                raise CommandError(f"{path} does not exist")
+
+        if options['orders']:
+            orders = Order.objects.exclude(pdf__isnull=True).exclude(pdf='')
+            if options['tenant_id']:
+                orders = orders.filter(tenant_id=options['tenant_id'])
+            keys = orders.order_by('-created_at').values_list('pdf', flat=True)[:options['orders']]
+            for index, s3_key in enumerate(keys):
+                local_path = os.path.join(tmp_dir, f"{index}_{os.path.basename(s3_key)}")
+                if s3_utils.download_file(s3_key, local_path):
+                    documents.append(local_path)
+                else:
+                    self.stdout.write(self.style.WARNING(f"Could not download {s3_key}"))
+
+        return documents
+
+    def _run(self, engine, documents, options):
+        serial, pooled, texts, pages, failures = [], [], {}, 0, 0
+        for path in documents:
+            try:
+                count = engine.page_count(path)
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    texts[path] = engine.extract(path, 0, count)
+                    timings.append(time.perf_counter() - started)
+                serial.append(min(timings))
+                pages += count
+
+                if options['workers']:
+                    # Best run, so starting the pool's processes is not counted
+                    timings = []
+                    for _ in range(max(2, options['repeat'])):
+                        started = time.perf_counter()
+                        list(self._pooled(engine, path, count, options['workers']))
+                        timings.append(time.perf_counter() - started)
+                    pooled.append(min(timings))
+            except Exception as e:
+                failures += 1
+                self.stdout.write(self.style.WARNING(f"{engine.name} failed on {path}: {e}"))
+
+        return {
+            'serial': serial,
+            'pooled': pooled,
+            'texts': texts,
+            'pages': pages,
+            'failures': failures,
+        }
+
+    def _pooled(self, engine, path, count, workers):
+        from django.test.utils import override_settings
+
+        with override_settings(PDF_TEXT_WORKERS=workers, PDF_TEXT_PARALLEL_MIN_PAGES=1):
+            yield from _extract_pages(engine, path, list(range(count)))
+
+    def _agreement(self, texts, reference):
+        """Share of the reference's words the engine also found, averaged over documents"""
+        scores = []
+        for path, pages in texts.items():
+            if path not in reference:
+                continue
+            expected = set(" ".join(reference[path]).split())
+            found = set(" ".join(pages).split())
+            scores.append(len(expected & found) / len(expected) if expected else 1.0)
+        return statistics.mean(scores) if scores else 0.0
+
+    def _report(self, results):
+        reference = results.get(FALLBACK_ENGINE, {}).get('texts', {})
+        self.stdout.write(f"\n{'='*78}")
+        self.stdout.write(
+            f"{'engine':<12}{'docs':>6}{'pages':>7}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'pages/s':>10}{'pool ms':>10}{'agree':>9}{'failed':>8}"
+        )
+        self.stdout.write(f"{'='*78}")
+        for name, result in results.items():
+            serial = sorted(result['serial'])
+            if not serial:
+                self.stdout.write(self.style.ERROR(f"{name:<12} failed on every document"))
+                continue
+            p50 = serial[len(serial) // 2] * 1000
+            p95 = serial[min(len(serial) - 1, int(len(serial) * 0.95))] * 1000
+            pages_per_second = result['pages'] / sum(serial) if sum(serial) else 0
+            pool = f"{sum(result['pooled']) * 1000:.0f}" if result['pooled'] else "-"
+            self.stdout.write(
+                f"{name:<12}{len(serial):>6}{result['pages']:>7}{p50:>10.1f}{p95:>10.1f}"
+                f"{pages_per_second:>10.0f}{pool:>10}"
+                f"{self._agreement(result['texts'], reference):>9.1%}{result['failures']:>8}"
+            )
+        self.stdout.write("\nTimings are the best of the repeated runs, without the page cache.")
+        self.stdout.write("'agree' is the share of PyPDF2's words each engine also extracted.")
@@ -0,0 +1,132 @@
+"""
+Management command to propose extraction templates from past orders.
+
+Orders of the same customer usually share a layout. For each customer with
+enough orders, the command learns anchors and rules from the documents and
+the model's extraction (Order.raw_extract), and keeps only rules that
+reproduce the extraction on the customer's orders.
+
+Usage:
+    python manage.py propose_extraction_templates --tenant-id=<id>
+    python manage.py propose_extraction_templates --tenant-id=<id> --min-orders 10 --approve
+"""
+
+import os
+import tempfile
+from django.core.management.base import BaseCommand, CommandError
+from contrib.aws import s3_utils
+from contrib.extraction.document.layout import propose_layout
+from contrib.pdf_text import read_pdf_text
+from dispatch.models import ExtractionTemplate, Order
+from tenant.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Propose extraction templates for customers whose documents share a layout'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=str,
+            required=True,
+            help='Tenant to propose templates for'
+        )
+
+        parser.add_argument(
+            '--min-orders',
+            type=int,
+            default=5,
+            help='Orders a customer needs before a template is proposed'
+        )
+
+        parser.add_argument(
+            '--max-orders',
+            type=int,
+            default=30,
+            help='Most recent orders per customer to learn from'
+        )
+
+        parser.add_argument(
+            '--min-share',
+            type=float,
+            default=0.9,
+            help='Share of orders an anchor must appear in and a rule must reproduce'
+        )
+
+        parser.add_argument(
+            '--approve',
+            action='store_true',
+            help='Approve proposed templates instead of leaving them for review'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tenant = Tenant.objects.get(id=options['tenant_id'])
+        except (Tenant.DoesNotExist, ValueError):
+            raise CommandError(f"Tenant {options['tenant_id']} does not exist")
+
+        orders = (
+            Order.objects.filter(tenant=tenant, is_active=True, customer__isnull=False)
+            .select_related('customer')
+            .order_by('customer_id', '-created_at')
+        )
+        by_customer = {}
+        for order in orders:
+            by_customer.setdefault(order.customer, []).append(order)
+
+        known = set(
+            ExtractionTemplate.objects.filter(tenant=tenant).values_list('fingerprint', flat=True)
+        )
+        proposed = 0
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for customer, customer_orders in by_customer.items():
+                if len(customer_orders) < options['min_orders']:
+                    continue
+                samples = [
+                    (text, order.raw_extract)
+                    for order in customer_orders[:options['max_orders']]
+                    for text in [self._text(order, tmp_dir)]
+                    if text
+                ]
+                proposal, reason = propose_layout(samples, options['min_share'])
+                if proposal is None:
+                    self.stdout.write(f"{customer.name}: {reason}")
+                    continue
+                if proposal['fingerprint'] in known:
+                    self.stdout.write(f"{customer.name}: template already exists")
+                    continue
+
+                ExtractionTemplate.objects.create(
+                    tenant=tenant,
+                    customer=customer,
+                    name=f"{customer.name} ({len(proposal['anchors'])} anchors)",
+                    fingerprint=proposal['fingerprint'],
+                    anchors=proposal['anchors'],
+                    rules=proposal['rules'],
+                    min_score=options['min_share'],
+                    accuracy=proposal['accuracy'],
+                    source_orders=len(samples),
+                    approved=options['approve'],
+                )
+                known.add(proposal['fingerprint'])
+                proposed += 1
+                self.stdout.write(self.style.SUCCESS(f"{customer.name}: {reason}"))
+
+        state = 'approved' if options['approve'] else 'awaiting review, approve them in the admin'
+        self.stdout.write(f"Proposed {proposed} templates ({state})")
+
+    def _text(self, order, tmp_dir):
+        """Document text kept on the order, or read again from S3 for older orders."""
+        if order.raw_text:
+            return order.raw_text
+        if not order.pdf:
+            return None
+        local_path = os.path.join(tmp_dir, f"{order.id}.pdf")
+        if not s3_utils.download_file(order.pdf, local_path):
+            self.stdout.write(self.style.WARNING(f"Could not download {order.pdf}"))
+            return None
+        try:
+            return read_pdf_text(local_path)
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"Could not read {order.pdf}: {e}"))
+            return None
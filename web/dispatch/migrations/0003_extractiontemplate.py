@@ -0,0 +1,43 @@
+# Generated by Django 5.1.2 on 2026-10-19 11:34
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dispatch', '0002_initial'),
+        ('fleet', '0003_carrier_tax_currency_carrier_tax_rate'),
+        ('tenant', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractionTemplate',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('name', models.CharField(max_length=255)),
+                ('fingerprint', models.CharField(help_text='Hash of the sorted anchors', max_length=64)),
+                ('anchors', models.JSONField(default=list, help_text='Static labels that identify the layout')),
+                ('rules', models.JSONField(default=list, help_text='Field rules: field, pattern, type, index')),
+                ('min_score', models.FloatField(default=0.9, help_text='Share of anchors a document must contain to use this template')),
+                ('accuracy', models.JSONField(blank=True, default=dict, help_text='Per field share of source orders each rule reproduced')),
+                ('source_orders', models.IntegerField(default=0, help_text='Orders the rules were learned from')),
+                ('hits', models.IntegerField(default=0, help_text='Documents extracted with the rules')),
+                ('fallbacks', models.IntegerField(default=0, help_text='Matching documents sent to the model because a rule did not match')),
+                ('last_used_at', models.DateTimeField(blank=True, null=True)),
+                ('customer', models.ForeignKey(blank=True, help_text='Customer whose documents use this layout', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='extraction_templates', to='fleet.customer')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tenant.tenant')),
+            ],
+            options={
+                'ordering': ['-hits', 'name'],
+                'unique_together': {('tenant', 'fingerprint')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-19 14:02
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from contrib.search import AddSearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dispatch', '0003_extractiontemplate'),
+    ]
+
+    operations = [
+        # No-ops outside PostgreSQL; SQLite gets FTS5 tables after migrate
+        TrigramExtension(),
+        AddSearchIndex(
+            model_name='order',
+            fields=['order_number', 'customer_name', 'origin', 'destination', 'cargo_type'],
+        ),
+        AddSearchIndex(
+            model_name='dispatch',
+            fields=['dispatch_id', 'order_number', 'notes'],
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:12
+
+import contrib.postgres
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, BtreeGistExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built CONCURRENTLY on PostgreSQL, which can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('dispatch', '0004_search_indexes'),
+        ('fleet', '0004_search_indexes'),
+        ('tenant', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='statushistory',
+            name='dispatch_st_content_ccb71b_idx',
+        ),
+        contrib.postgres.AddIndexConcurrentlyOnPostgres(
+            model_name='dispatch',
+            index=models.Index(fields=['tenant', '-created_at', '-id'], name='dispatch_tenant_recent_idx'),
+        ),
+        contrib.postgres.AddIndexConcurrentlyOnPostgres(
+            model_name='dispatch',
+            index=models.Index(fields=['tenant', 'driver', 'status', 'actual_end'], name='dispatch_driver_payout_idx'),
+        ),
+        contrib.postgres.AddIndexConcurrentlyOnPostgres(
+            model_name='drivertruckassignment',
+            index=models.Index(fields=['tenant', '-created_at', '-id'], name='assignment_tenant_recent_idx'),
+        ),
+        contrib.postgres.AddIndexConcurrentlyOnPostgres(
+            model_name='drivertruckassignment',
+            index=models.Index(fields=['tenant', 'status', 'start_date', 'end_date'], name='assignment_busy_idx'),
+        ),
+        contrib.postgres.AddIndexConcurrentlyOnPostgres(
+            model_name='drivertruckassignment',
+            index=models.Index(fields=['driver', 'status', 'start_date'], name='assignment_driver_busy_idx'),
+        ),
+        contrib.postgres.AddIndexConcurrentlyOnPostgres(
+            model_name='order',
+            index=models.Index(fields=['tenant', '-created_at', '-id'], name='order_tenant_recent_idx'),
+        ),
+        contrib.postgres.AddIndexConcurrentlyOnPostgres(
+            model_name='statushistory',
+            index=models.Index(fields=['content_type', 'object_id', '-changed_at'], name='status_history_object_idx'),
+        ),
+        contrib.postgres.AddIndexConcurrentlyOnPostgres(
+            model_name='trip',
+            index=models.Index(fields=['tenant', '-created_at'], name='trip_tenant_recent_idx'),
+        ),
+        # Overlap (&&) searches on the periods of live assignments, per tenant
+        BtreeGistExtension(),
+        contrib.postgres.PostgresOnly(
+            AddIndexConcurrently(
+                model_name='drivertruckassignment',
+                index=django.contrib.postgres.indexes.GistIndex(
+                    models.F('tenant'),
+                    contrib.postgres.TsTzRange('start_date', 'end_date'),
+                    condition=models.Q(('status__in', ['assigned', 'on_duty'])),
+                    name='assignment_period_gist',
+                ),
+            ),
+        ),
+    ]
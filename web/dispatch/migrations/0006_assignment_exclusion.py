@@ -0,0 +1,72 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:16
+
+import contrib.postgres
+import django.contrib.postgres.constraints
+from django.db import migrations, models
+from django.db.models import F
+
+
+def close_inverted_periods(apps, schema_editor):
+    # Rows saved before clean() checked the dates would fail the CHECK below;
+    # end them where they start, which also keeps them out of any overlap
+    DriverTruckAssignment = apps.get_model('dispatch', 'DriverTruckAssignment')
+    DriverTruckAssignment.objects.filter(end_date__lt=F('start_date')).update(end_date=F('start_date'))
+
+
+def cancel_overlapping_assignments(apps, schema_editor):
+    # Truck overlaps were never checked and driver overlaps used closed
+    # periods, so live rows may already break the constraints below. Keep the
+    # latest assignment of each driver and truck and cancel the ones it overlaps.
+    DriverTruckAssignment = apps.get_model('dispatch', 'DriverTruckAssignment')
+    live = DriverTruckAssignment.objects.filter(is_active=True, status__in=['assigned', 'on_duty'])
+    kept = {}
+    cancelled = []
+    for assignment in live.order_by('-start_date', '-created_at').iterator():
+        if assignment.end_date == assignment.start_date:
+            continue  # An empty period overlaps nothing
+        keys = [('driver', assignment.driver_id), ('truck', assignment.truck_id)]
+        overlapped = [
+            other for key in keys for other in kept.get(key, [])
+            if (other.end_date is None or assignment.start_date < other.end_date)
+            and (assignment.end_date is None or other.start_date < assignment.end_date)
+        ]
+        if overlapped:
+            assignment.status = 'cancelled'
+            note = f"Cancelled by migration: overlapped assignment {overlapped[0].pk}"
+            assignment.notes = f"{assignment.notes}\n{note}" if assignment.notes else note
+            cancelled.append(assignment)
+        else:
+            for key in keys:
+                kept.setdefault(key, []).append(assignment)
+    DriverTruckAssignment.objects.bulk_update(cancelled, ['status', 'notes'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dispatch', '0005_index_pack'),
+        ('fleet', '0004_search_indexes'),
+        ('tenant', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_inverted_periods, migrations.RunPython.noop),
+        migrations.RunPython(cancel_overlapping_assignments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='drivertruckassignment',
+            constraint=models.CheckConstraint(condition=models.Q(('end_date__isnull', True), ('end_date__gte', models.F('start_date')), _connector='OR'), name='assignment_period_valid'),
+        ),
+        # btree_gist was installed by 0005_index_pack
+        contrib.postgres.PostgresOnly(
+            migrations.AddConstraint(
+                model_name='drivertruckassignment',
+                constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[('driver', '='), (contrib.postgres.TsTzRange('start_date', 'end_date'), '&&')], condition=models.Q(('is_active', True), ('status__in', ['assigned', 'on_duty'])), name='assignment_driver_no_overlap'),
+            ),
+        ),
+        contrib.postgres.PostgresOnly(
+            migrations.AddConstraint(
+                model_name='drivertruckassignment',
+                constraint=django.contrib.postgres.constraints.ExclusionConstraint(expressions=[('truck', '='), (contrib.postgres.TsTzRange('start_date', 'end_date'), '&&')], condition=models.Q(('is_active', True), ('status__in', ['assigned', 'on_duty'])), name='assignment_truck_no_overlap'),
+            ),
+        ),
+    ]
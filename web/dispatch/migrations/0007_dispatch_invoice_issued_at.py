@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dispatch', '0006_assignment_exclusion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dispatch',
+            name='invoice_issued_at',
+            field=models.DateTimeField(blank=True, help_text='Date printed on the invoice, fixed when it is first rendered', null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.2 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+def split_review_from_deletion(apps, schema_editor):
+    # Templates in use were approved; inactive ones that were never deleted
+    # were proposals awaiting review, which is_active no longer stands for
+    ExtractionTemplate = apps.get_model('dispatch', 'ExtractionTemplate')
+    ExtractionTemplate.objects.filter(is_active=True).update(approved=True)
+    ExtractionTemplate.objects.filter(is_active=False, deleted_at__isnull=True).update(is_active=True)
+
+
+def merge_review_into_deletion(apps, schema_editor):
+    ExtractionTemplate = apps.get_model('dispatch', 'ExtractionTemplate')
+    ExtractionTemplate.objects.filter(approved=False).update(is_active=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dispatch', '0007_dispatch_invoice_issued_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='extractiontemplate',
+            name='approved',
+            field=models.BooleanField(default=False, help_text='Reviewed and used for extraction; proposals await review'),
+        ),
+        migrations.RunPython(split_review_from_deletion, merge_review_into_deletion),
+    ]
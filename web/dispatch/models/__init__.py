@@ -2,11 +2,12 @@ from django.apps import AppConfig
 from .order import Order, OrderStatus
 from .trip import Trip, TripStatus
 from .dispatch import Dispatch, DispatchStatus
-from .drivertruckassignment import DriverTruckAssignment, AssignmentStatus
+from .drivertruckassignment import DriverTruckAssignment, AssignmentStatus, assignment_conflict, overlap_is_enforced
 from .status_history import StatusHistory
 from .notification import Notification
 from .uploadfile import UploadFile
 from .sequence import TenantSequence, SequenceType
+from .extraction_template import ExtractionTemplate
 
 __all__ = [
     'Order',
@@ -17,9 +18,12 @@ __all__ = [
     'DispatchStatus',
     'DriverTruckAssignment',
     'AssignmentStatus',
+    'assignment_conflict',
+    'overlap_is_enforced',
     'StatusHistory',
     'Notification',
     'UploadFile',
     'TenantSequence',
     'SequenceType',
+    'ExtractionTemplate',
 ] 
\ No newline at end of file
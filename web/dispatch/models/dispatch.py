@@ -33,6 +33,9 @@ class Dispatch(BaseModel):
     status_history = GenericRelation('dispatch.StatusHistory')
     notifications = GenericRelation('dispatch.Notification')
 
+    # Columns of the global search (contrib/search.py)
+    search_fields = ("dispatch_id", "order_number", "notes")
+
     # Identification
     dispatch_id = models.CharField(
         max_length=50,
@@ -137,6 +140,11 @@ class Dispatch(BaseModel):
         blank=True,
         help_text="Actual end time"
     )
+    invoice_issued_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Date printed on the invoice, fixed when it is first rendered"
+    )
 
     # Status and metadata
     status = models.CharField(
@@ -159,6 +167,12 @@ class Dispatch(BaseModel):
         ordering = ["-created_at"]
         verbose_name = "Dispatch"
         verbose_name_plural = "Dispatches"
+        indexes = [
+            # Dispatch list, newest first, paged by (created_at, id) cursors
+            models.Index(fields=["tenant", "-created_at", "-id"], name="dispatch_tenant_recent_idx"),
+            # Payout.calculate_totals: a driver's finished dispatches in a period
+            models.Index(fields=["tenant", "driver", "status", "actual_end"], name="dispatch_driver_payout_idx"),
+        ]
 
     def __str__(self):
         return f"Dispatch {self.dispatch_id} - {self.get_status_display()}"
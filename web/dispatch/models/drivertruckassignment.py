@@ -1,7 +1,7 @@
 from django.db import models
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from django.db import transaction
+from django.db import IntegrityError, connection, transaction
 from models.models import BaseModel
 from django.contrib.contenttypes.fields import GenericRelation
 from fleet.models import Driver, Truck, Carrier, DutyStatus, TruckDutyStatus
@@ -17,6 +17,34 @@ class AssignmentStatus(models.TextChoices):
     CANCELLED = "cancelled", "Cancelled"  # Assignment was cancelled
 
 
+# Constraints whose violations save() reports as a ValidationError
+ASSIGNMENT_CONFLICTS = {
+    "assignment_driver_no_overlap": "Driver has overlapping assignments in this time period",
+    "assignment_truck_no_overlap": "Truck has overlapping assignments in this time period",
+    "assignment_period_valid": "End date cannot be before start date",
+}
+
+
+def overlap_is_enforced() -> bool:
+    """
+    Whether the database itself rejects overlapping assignments.
+
+    On PostgreSQL the EXCLUDE constraints of migration 0006 do, so writers
+    insert optimistically and handle the conflict. Elsewhere the overlap is
+    checked in clean() and under row locks in dispatch.utils.
+    """
+    return connection.vendor == "postgresql"
+
+
+def assignment_conflict(error: IntegrityError):
+    """The message for an assignment constraint violation, or None for other errors."""
+    text = str(error)
+    for name, message in ASSIGNMENT_CONFLICTS.items():
+        if name in text:
+            return message
+    return None
+
+
 class DriverTruckAssignment(BaseModel):
     """Tracks assignment of drivers to trucks for specific time periods"""
 
@@ -109,7 +137,22 @@ class DriverTruckAssignment(BaseModel):
             models.UniqueConstraint(
                 fields=["driver", "truck", "start_date"],
                 name="unique_driver_truck_assignment"
-            )
+            ),
+            models.CheckConstraint(
+                condition=models.Q(end_date__isnull=True) | models.Q(end_date__gte=models.F("start_date")),
+                name="assignment_period_valid",
+            ),
+        ]
+        # PostgreSQL also has a GiST index on the assignment period (migration
+        # 0005_index_pack) and EXCLUDE constraints against overlapping driver
+        # and truck assignments (migration 0006_assignment_exclusion)
+        indexes = [
+            # Assignment list, newest first, paged by (created_at, id) cursors
+            models.Index(fields=["tenant", "-created_at", "-id"], name="assignment_tenant_recent_idx"),
+            # Availability: the tenant's assigned or on-duty assignments in a period
+            models.Index(fields=["tenant", "status", "start_date", "end_date"], name="assignment_busy_idx"),
+            # Overlap checks for one driver (clean(), auto-assignment)
+            models.Index(fields=["driver", "status", "start_date"], name="assignment_driver_busy_idx"),
         ]
 
     def __str__(self):
@@ -136,8 +179,16 @@ class DriverTruckAssignment(BaseModel):
         # Call clean to run validation
         self.clean()
         
-        # Call super to save
-        return super().save(*args, **kwargs)
+        # On PostgreSQL the database rejects overlaps, including ones written
+        # by a concurrent request; report them like clean() would
+        try:
+            with transaction.atomic():
+                return super().save(*args, **kwargs)
+        except IntegrityError as e:
+            conflict = assignment_conflict(e)
+            if conflict is None:
+                raise
+            raise ValidationError(conflict) from e
 
     def clean(self):
         """Validate the assignment dates and status transitions"""
@@ -149,26 +200,9 @@ class DriverTruckAssignment(BaseModel):
         if self.end_date and self.start_date and self.end_date < self.start_date:
             raise ValidationError("End date cannot be before start date")
         
-        # Check for overlapping assignments
-        overlapping = DriverTruckAssignment.objects.filter(
-            driver=self.driver,
-            status__in=[AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY]
-        ).exclude(id=self.id)
-        
-        if self.end_date:
-            overlapping = overlapping.filter(
-                models.Q(start_date__range=(self.start_date, self.end_date)) |
-                models.Q(end_date__range=(self.start_date, self.end_date)) |
-                models.Q(start_date__lte=self.start_date, end_date__gte=self.end_date)
-            )
-        else:
-            overlapping = overlapping.filter(
-                models.Q(start_date__gte=self.start_date) |
-                models.Q(end_date__isnull=True)
-            )
-            
-        if overlapping.exists():
-            raise ValidationError("Driver has overlapping assignments in this time period")
+        # Check for overlapping assignments; PostgreSQL enforces this on save
+        if not overlap_is_enforced():
+            self._check_overlap()
 
         # Validate driver availability
         if self.driver.driveremployment.duty_status not in [DutyStatus.AVAILABLE, DutyStatus.ON_DUTY]:
@@ -178,6 +212,23 @@ class DriverTruckAssignment(BaseModel):
         if self.truck.duty_status not in [TruckDutyStatus.AVAILABLE, TruckDutyStatus.ON_DUTY]:
             raise ValidationError("Truck is not available for assignment")
 
+    def _check_overlap(self):
+        """Reject an assignment overlapping the driver's or the truck's (SQLite fallback)"""
+        # Same rows and half-open periods as the PostgreSQL exclusion constraints
+        overlapping = DriverTruckAssignment.objects.filter(
+            is_active=True,
+            status__in=[AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY],
+        ).filter(
+            models.Q(end_date__isnull=True) | models.Q(end_date__gt=self.start_date)
+        ).exclude(id=self.id)
+        if self.end_date:
+            overlapping = overlapping.filter(start_date__lt=self.end_date)
+
+        if overlapping.filter(driver=self.driver).exists():
+            raise ValidationError(ASSIGNMENT_CONFLICTS["assignment_driver_no_overlap"])
+        if overlapping.filter(truck=self.truck).exists():
+            raise ValidationError(ASSIGNMENT_CONFLICTS["assignment_truck_no_overlap"])
+
     def validate_status_transition(self, new_status):
         """Validate if the status transition is allowed"""
         if not self.status:
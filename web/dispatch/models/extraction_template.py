@@ -0,0 +1,59 @@
+"""Known document layouts extracted with rules instead of the model."""
+
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+from models.models import BaseModel
+
+
+class ExtractionTemplate(BaseModel):
+    """
+    A shipper's document layout, recognised by its anchors (static labels) and
+    extracted with regex rules. See contrib.extraction.document.layout.
+
+    Templates proposed by `manage.py propose_extraction_templates` are not
+    used until approved. is_active stays the soft-delete flag.
+    """
+
+    tenant = models.ForeignKey("tenant.Tenant", on_delete=models.CASCADE)
+    customer = models.ForeignKey(
+        "fleet.Customer",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="extraction_templates",
+        help_text="Customer whose documents use this layout",
+    )
+    name = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64, help_text="Hash of the sorted anchors")
+    anchors = models.JSONField(default=list, help_text="Static labels that identify the layout")
+    rules = models.JSONField(default=list, help_text="Field rules: field, pattern, type, index")
+    min_score = models.FloatField(
+        default=0.9, help_text="Share of anchors a document must contain to use this template"
+    )
+    accuracy = models.JSONField(
+        default=dict, blank=True, help_text="Per field share of source orders each rule reproduced"
+    )
+    source_orders = models.IntegerField(default=0, help_text="Orders the rules were learned from")
+    hits = models.IntegerField(default=0, help_text="Documents extracted with the rules")
+    fallbacks = models.IntegerField(
+        default=0, help_text="Matching documents sent to the model because a rule did not match"
+    )
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    approved = models.BooleanField(
+        default=False, help_text="Reviewed and used for extraction; proposals await review"
+    )
+
+    class Meta:
+        ordering = ["-hits", "name"]
+        unique_together = ("tenant", "fingerprint")
+
+    def __str__(self):
+        return self.name
+
+    def record_use(self, extracted: bool):
+        """Count a matching document without racing concurrent extractions."""
+        counter = "hits" if extracted else "fallbacks"
+        type(self).objects.filter(pk=self.pk).update(
+            **{counter: F(counter) + 1}, last_used_at=timezone.now()
+        )
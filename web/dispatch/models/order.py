@@ -18,6 +18,9 @@ class Order(BaseModel):
     status_history = GenericRelation('dispatch.StatusHistory')
     notifications = GenericRelation('dispatch.Notification')
 
+    # Columns of the global search (contrib/search.py)
+    search_fields = ("order_number", "customer_name", "origin", "destination", "cargo_type")
+
     # Order fields
     order_number = models.CharField(
         max_length=255,
@@ -90,6 +93,10 @@ class Order(BaseModel):
         ordering = ["-created_at"]
         verbose_name = "Order"
         verbose_name_plural = "Orders"
+        indexes = [
+            # Order list, newest first, paged by (created_at, id) cursors
+            models.Index(fields=["tenant", "-created_at", "-id"], name="order_tenant_recent_idx"),
+        ]
 
     def __str__(self):
         return self.order_number
@@ -129,8 +136,11 @@ class Order(BaseModel):
         """Generate a unique order number."""
         # Get next sequence number for this tenant
         sequence = TenantSequence.get_next_sequence(self.tenant, SequenceType.ORDER)
-        
-        # Format: ORD-YYYYMMDD-XXXX where XXXX is the sequence number
+        return self.format_order_number(sequence)
+
+    @staticmethod
+    def format_order_number(sequence):
+        """Format: ORD-YYYYMMDD-XXXX where XXXX is the sequence number"""
         date_str = timezone.now().strftime("%Y%m%d")
         return f"ORD-{date_str}-{sequence:04d}"
 
@@ -43,6 +43,14 @@ class TenantSequence(BaseModel):
         Get the next sequence number for the given tenant and sequence type.
         Resets daily.
         """
+        return cls.get_next_sequences(tenant, sequence_type, 1)[0]
+
+    @classmethod
+    def get_next_sequences(cls, tenant, sequence_type, count):
+        """
+        Reserve `count` consecutive sequence numbers with a single locked update.
+        Resets daily.
+        """
         today = timezone.now().date()
         
         with transaction.atomic():
@@ -58,7 +66,8 @@ class TenantSequence(BaseModel):
                 sequence.last_reset = today
             
             # Increment sequence
-            sequence.current_value += 1
+            first = sequence.current_value + 1
+            sequence.current_value += count
             sequence.save()
             
-            return sequence.current_value 
\ No newline at end of file
+            return list(range(first, sequence.current_value + 1))
@@ -35,7 +35,8 @@ class StatusHistory(BaseModel):
         verbose_name = "Status History"
         verbose_name_plural = "Status Histories"
         indexes = [
-            models.Index(fields=['content_type', 'object_id']),
+            # An object's history, latest first
+            models.Index(fields=['content_type', 'object_id', '-changed_at'], name='status_history_object_idx'),
             models.Index(fields=['changed_at']),
         ]
 
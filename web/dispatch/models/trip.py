@@ -140,6 +140,9 @@ class Trip(BaseModel):
         ordering = ["-created_at"]
         verbose_name = "Trip"
         verbose_name_plural = "Trips"
+        indexes = [
+            models.Index(fields=["tenant", "-created_at"], name="trip_tenant_recent_idx"),
+        ]
 
     def __str__(self):
         return f"Trip {self.trip_id}"
@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from dispatch.availability import invalidate
+
+
+@receiver(post_save, sender="dispatch.DriverTruckAssignment")
+@receiver(post_delete, sender="dispatch.DriverTruckAssignment")
+@receiver(post_save, sender="fleet.Driver")
+@receiver(post_delete, sender="fleet.Driver")
+@receiver(post_save, sender="fleet.DriverEmployment")
+@receiver(post_save, sender="fleet.Truck")
+@receiver(post_delete, sender="fleet.Truck")
+def invalidate_availability(sender, instance, **kwargs):
+    # After the commit, so a concurrent read can't cache the old state again
+    tenant_id = instance.tenant_id
+    transaction.on_commit(lambda: invalidate(tenant_id))
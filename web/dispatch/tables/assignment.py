@@ -2,11 +2,19 @@ import django_tables2 as tables
 from django.urls import reverse
 from django.utils.html import format_html
 from dispatch.models import DriverTruckAssignment
+from contrib.tables import EagerLoadingTable
 
 
-class AssignmentTable(tables.Table):
+class AssignmentTable(EagerLoadingTable):
     """Table for displaying driver-truck assignments in a paginated format."""
 
+    select_related = ("driver", "driver__carrier", "truck")
+    only = (
+        "start_date", "end_date", "status", "odometer_start", "odometer_end", "created_at",
+        "driver__first_name", "driver__last_name", "driver__carrier__name",
+        "truck__unit", "truck__plate",
+    )
+
     driver = tables.Column(
         accessor="driver",
         verbose_name="Driver",
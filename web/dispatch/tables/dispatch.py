@@ -2,11 +2,21 @@ import django_tables2 as tables
 from django.urls import reverse
 from django.utils.html import format_html
 from dispatch.models import Dispatch
+from contrib.tables import EagerLoadingTable
 
 
-class DispatchTable(tables.Table):
+class DispatchTable(EagerLoadingTable):
     """Table for displaying dispatches in a paginated format."""
 
+    select_related = ("order", "driver", "truck", "carrier")
+    only = (
+        "dispatch_id", "status", "commission_amount", "actual_start", "actual_end", "created_at",
+        "order__order_number", "order__created_at", "order__load_total",
+        "driver__first_name", "driver__last_name",
+        "truck__unit", "truck__plate",
+        "carrier__name",
+    )
+
     dispatch_id = tables.Column(
         accessor="dispatch_id",
         verbose_name="Dispatch ID",
@@ -110,7 +120,8 @@ class DispatchTable(tables.Table):
             "tenant",
             "notes",
             "trip",
-            "created_at"
+            "created_at",
+            "invoice_issued_at",
         )
         attrs = {
             "class": "table table-bordered table-striped table-hover align-middle",
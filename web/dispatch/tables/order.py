@@ -2,11 +2,17 @@ import django_tables2 as tables  # type: ignore
 from django.urls import reverse  # type: ignore
 from django.utils.html import format_html  # type: ignore
 from dispatch.models import Order
+from contrib.tables import EagerLoadingTable
 
 
-class OrderTable(tables.Table):
+class OrderTable(EagerLoadingTable):
     """Table for displaying orders in a paginated format."""
 
+    only = (
+        "order_number", "customer_name", "origin", "destination", "cargo_type",
+        "pickup_date", "delivery_date", "status", "load_total", "load_currency", "created_at",
+    )
+
     created_at = tables.DateTimeColumn(
         format="M d, Y, P",
         verbose_name="Created On",
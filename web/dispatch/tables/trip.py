@@ -2,11 +2,18 @@ import django_tables2 as tables
 from django.urls import reverse
 from django.utils.html import format_html
 from dispatch.models import Trip
+from contrib.tables import EagerLoadingTable
 
 
-class TripTable(tables.Table):
+class TripTable(EagerLoadingTable):
     """Table for displaying trips in a paginated format."""
 
+    select_related = ("order",)
+    only = (
+        "trip_id", "created_at", "status", "estimated_distance", "freight_value", "currency",
+        "order__origin", "order__destination",
+    )
+
     # Add action buttons
     actions = tables.TemplateColumn(
         template_name="partials/trip_actions.html",
@@ -0,0 +1,300 @@
+"""Celery tasks for the dispatch app."""
+
+import os
+import logging
+import secrets
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from contrib.aws import s3_utils
+from contrib.blobstore import adopt_file
+from dispatch.invoices import (
+    INVOICE_STATUS_TIMEOUT,
+    bulk_status_key,
+    create_invoice_bundle,
+    get_organization,
+    invoice_status_key,
+    invoiceable_ids,
+    mark_invoiced,
+    store_invoice,
+)
+from django.utils import timezone
+from contrib.extraction.document.utils import calculate_file_size_mb
+from dispatch.models import Dispatch, UploadFile
+from dispatch.utils import create_orders, extract_documents, process_order_document
+from tenant.models import Tenant
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_STATUS_TIMEOUT = 3600  # Keep upload status for 1 hour
+
+
+def upload_status_key(upload_id: str) -> str:
+    """Cache key holding the processing status of a direct upload."""
+    return f"order_upload_{upload_id}_status"
+
+
+def batch_status_key(batch_id: str) -> str:
+    """Cache key holding the processing status of a batch of uploaded orders."""
+    return f"order_batch_{batch_id}_status"
+
+
+@shared_task(bind=True)
+def process_order_upload(self, upload_id, upload_file_id):
+    """
+    Extract an order from a document the browser uploaded straight to S3
+
+    Args:
+        upload_id: Identifier issued with the presigned POST
+        upload_file_id: ID of the UploadFile record pointing at the S3 key
+    """
+    status_key = upload_status_key(upload_id)
+    cache.set(status_key, {"status": "PROCESSING"}, timeout=UPLOAD_STATUS_TIMEOUT)
+
+    upload_file = UploadFile.objects.select_related("tenant").get(id=upload_file_id)
+    s3_key = upload_file.file
+
+    tmp_dir = os.path.join(settings.BASE_DIR, "tmp", "documents")
+    os.makedirs(tmp_dir, exist_ok=True)
+    local_path = os.path.join(
+        tmp_dir, f"{secrets.token_urlsafe(6)}_{os.path.basename(s3_key)}"
+    )
+
+    try:
+        logger.info(f"Downloading file from S3: {s3_key}")
+        if not s3_utils.download_file(s3_key, local_path):
+            raise Exception(f"Failed to download file from S3: {s3_key}")
+
+        # Identical bytes already stored for this tenant are reused, not charged twice
+        blob, created = adopt_file(
+            upload_file.tenant,
+            local_path,
+            s3_key,
+            os.path.basename(s3_key),
+            content_type="application/pdf",
+            references=1,  # UploadFile.file; the order takes its own once created
+        )
+        upload_file.file = blob.s3_key
+        upload_file.save(update_fields=["file", "updated_at"])
+
+        order = process_order_document(
+            local_path, upload_file.tenant, blob.s3_key, count_file_storage=created
+        )
+
+        upload_file.order = order
+        upload_file.save(update_fields=["order", "updated_at"])
+
+        cache.set(
+            status_key,
+            {
+                "status": "COMPLETED",
+                "order_id": str(order.id),
+                "order_number": order.order_number,
+            },
+            timeout=UPLOAD_STATUS_TIMEOUT,
+        )
+        return str(order.id)
+
+    except Exception as e:
+        logger.error(f"Error processing upload {upload_id}: {str(e)}", exc_info=True)
+        cache.set(
+            status_key,
+            {"status": "FAILED", "error": str(e)},
+            timeout=UPLOAD_STATUS_TIMEOUT,
+        )
+        raise
+
+    finally:
+        try:
+            if os.path.exists(local_path):
+                os.remove(local_path)
+        except Exception as e:
+            logger.warning(f"Failed to cleanup temporary file: {str(e)}")
+
+
+@shared_task(bind=True)
+def process_order_batch(self, batch_id, tenant_id, uploads):
+    """
+    Extract a batch of uploaded order documents concurrently and create the orders together
+
+    Args:
+        batch_id: Identifier of the batch, reported through its status key
+        tenant_id: ID of the tenant owning the documents
+        uploads: One dict per document, in upload order, with upload_file_id, name
+            and created (whether its blob is new, i.e. charged to storage)
+    """
+    status_key = batch_status_key(batch_id)
+    status = {"status": "PROCESSING", "tenant_id": str(tenant_id), "total": len(uploads), "done": 0}
+    cache.set(status_key, status, timeout=UPLOAD_STATUS_TIMEOUT)
+
+    tmp_dir = os.path.join(settings.BASE_DIR, "tmp", "documents")
+    os.makedirs(tmp_dir, exist_ok=True)
+    paths = []
+
+    try:
+        tenant = Tenant.objects.get(id=tenant_id)
+        upload_files = {
+            str(pk): upload_file
+            for pk, upload_file in UploadFile.objects.in_bulk(
+                [upload["upload_file_id"] for upload in uploads]
+            ).items()
+        }
+
+        for upload in uploads:
+            s3_key = upload_files[upload["upload_file_id"]].file
+            local_path = os.path.join(
+                tmp_dir, f"{secrets.token_urlsafe(6)}_{os.path.basename(s3_key)}"
+            )
+            if not s3_utils.download_file(s3_key, local_path):
+                raise Exception(f"Failed to download file from S3: {s3_key}")
+            paths.append(local_path)
+
+        def progress(done):
+            cache.set(status_key, {**status, "done": done}, timeout=UPLOAD_STATUS_TIMEOUT)
+
+        logger.info(f"Starting PDF processing for {len(paths)} files in batch {batch_id}")
+        extracted = extract_documents(paths, tenant_id=tenant.id, progress=progress)
+
+        results = [{"name": upload["name"], "error": None} for upload in uploads]
+        documents = []
+        for index, (upload, path, outcome) in enumerate(zip(uploads, paths, extracted)):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error processing PDF {upload['name']}: {str(outcome)}")
+                results[index]["error"] = str(outcome)
+                continue
+            order_details, token_usage, pages = outcome
+            documents.append({
+                "index": index,
+                "name": upload["name"],
+                "s3_key": upload_files[upload["upload_file_id"]].file,
+                "order_details": order_details,
+                "token_usage": token_usage,
+                "pages": pages,
+                "file_size_mb": calculate_file_size_mb(path) if upload["created"] else 0,
+            })
+
+        created = create_orders(tenant, documents) if documents else []
+        linked = []
+        for document, result in zip(documents, created):
+            order = result["order"]
+            if not order:
+                results[document["index"]]["error"] = result["error"]
+                continue
+            results[document["index"]].update(order_id=str(order.id), order_number=order.order_number)
+            upload_file = upload_files[uploads[document["index"]]["upload_file_id"]]
+            upload_file.order = order
+            upload_file.updated_at = timezone.now()
+            linked.append(upload_file)
+        UploadFile.objects.bulk_update(linked, ["order", "updated_at"])
+
+        cache.set(
+            status_key,
+            {**status, "status": "COMPLETED", "done": len(uploads), "results": results},
+            timeout=UPLOAD_STATUS_TIMEOUT,
+        )
+        return [result.get("order_id") for result in results]
+
+    except Exception as e:
+        logger.error(f"Error processing upload batch {batch_id}: {str(e)}", exc_info=True)
+        cache.set(
+            status_key,
+            {"status": "FAILED", "tenant_id": str(tenant_id), "error": str(e)},
+            timeout=UPLOAD_STATUS_TIMEOUT,
+        )
+        raise
+
+    finally:
+        for path in paths:
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except Exception as e:
+                logger.warning(f"Failed to cleanup temporary file: {str(e)}")
+
+
+@shared_task(bind=True)
+def render_invoice(self, dispatch_id):
+    """
+    Render a dispatch's invoice PDF to S3, reusing the stored copy when still current
+
+    Args:
+        dispatch_id: ID of the Dispatch to invoice
+    """
+    status_key = invoice_status_key(dispatch_id)
+    cache.set(status_key, {"status": "PROCESSING"}, timeout=INVOICE_STATUS_TIMEOUT)
+
+    try:
+        dispatch = Dispatch.objects.select_related(
+            "order", "customer", "trip", "tenant"
+        ).get(id=dispatch_id)
+        s3_key = store_invoice(dispatch, get_organization(dispatch.tenant))
+
+        cache.set(
+            status_key,
+            {"status": "COMPLETED", "s3_key": s3_key},
+            timeout=INVOICE_STATUS_TIMEOUT,
+        )
+        return s3_key
+
+    except Exception as e:
+        logger.error(f"Error rendering invoice for dispatch {dispatch_id}: {str(e)}", exc_info=True)
+        cache.set(
+            status_key,
+            {"status": "FAILED", "error": str(e)},
+            timeout=INVOICE_STATUS_TIMEOUT,
+        )
+        raise
+
+
+@shared_task(bind=True)
+def generate_bulk_invoices(self, job_id, tenant_id, dispatch_ids, output, user_id=None):
+    """
+    Invoice a set of dispatches and bundle their PDFs into one download
+
+    Args:
+        job_id: Identifier of the bulk invoicing job
+        tenant_id: ID of the tenant owning the dispatches
+        dispatch_ids: IDs of the dispatches selected for invoicing
+        output: "zip" for one PDF per dispatch, "pdf" for a single merged PDF
+        user_id: ID of the user who started the job
+    """
+    status_key = bulk_status_key(job_id)
+    cache.set(
+        status_key,
+        {"status": "PROCESSING", "tenant_id": str(tenant_id)},
+        timeout=INVOICE_STATUS_TIMEOUT,
+    )
+
+    try:
+        tenant = Tenant.objects.get(id=tenant_id)
+        user = User.objects.filter(id=user_id).first() if user_id else None
+
+        eligible_ids = invoiceable_ids(tenant, dispatch_ids)
+        if not eligible_ids:
+            raise Exception("None of the selected dispatches can be invoiced")
+
+        # Dispatches only move to Invoiced once their bundle is stored
+        s3_key = create_invoice_bundle(tenant, eligible_ids, job_id, output)
+        invoiced_ids = mark_invoiced(tenant, eligible_ids, user)
+
+        cache.set(
+            status_key,
+            {
+                "status": "COMPLETED",
+                "tenant_id": str(tenant_id),
+                "s3_key": s3_key,
+                "count": len(invoiced_ids),
+            },
+            timeout=INVOICE_STATUS_TIMEOUT,
+        )
+        return s3_key
+
+    except Exception as e:
+        logger.error(f"Error in bulk invoicing job {job_id}: {str(e)}", exc_info=True)
+        cache.set(
+            status_key,
+            {"status": "FAILED", "tenant_id": str(tenant_id), "error": str(e)},
+            timeout=INVOICE_STATUS_TIMEOUT,
+        )
+        raise
@@ -0,0 +1,95 @@
+from datetime import timedelta
+from importlib import import_module
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from contrib.tests.base import SyntheticTenantTestCase, free_fleet
+from dispatch.models import AssignmentStatus, DriverTruckAssignment, assignment_conflict, overlap_is_enforced
+from fleet.models import Driver, Truck
+
+
+class AssignmentOverlapTest(SyntheticTenantTestCase):
+    """SQLite keeps the clean() check; the CHECK constraint applies everywhere."""
+
+    seed = 48
+    dataset = {"drivers": 4, "trucks": 3, "customers": 2, "days": 5}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        free_fleet(cls.tenant)
+        cls.driver = Driver.objects.filter(tenant=cls.tenant).first()
+        cls.trucks = list(Truck.objects.filter(tenant=cls.tenant)[:2])
+        cls.start = timezone.now() + timedelta(days=30)
+
+    def assign(self, truck, start, days=2):
+        return DriverTruckAssignment.objects.create(
+            driver=self.driver, truck=truck, tenant=self.tenant,
+            start_date=start, end_date=start + timedelta(days=days), status=AssignmentStatus.ASSIGNED,
+        )
+
+    def test_overlapping_driver_assignment_is_rejected(self):
+        self.assertFalse(overlap_is_enforced())
+        self.assign(self.trucks[0], self.start)
+        with self.assertRaisesMessage(ValidationError, "Driver has overlapping assignments"):
+            self.assign(self.trucks[1], self.start + timedelta(days=1))
+        self.assign(self.trucks[1], self.start + timedelta(days=3))
+
+    def test_overlapping_truck_assignment_is_rejected(self):
+        self.assign(self.trucks[0], self.start)
+        other = Driver.objects.filter(tenant=self.tenant).exclude(pk=self.driver.pk).first()
+        with self.assertRaisesMessage(ValidationError, "Truck has overlapping assignments"):
+            DriverTruckAssignment.objects.create(
+                driver=other, truck=self.trucks[0], tenant=self.tenant, start_date=self.start + timedelta(days=1),
+                status=AssignmentStatus.ASSIGNED,
+            )
+        # Periods are half open, like the PostgreSQL constraints: back to back is fine
+        DriverTruckAssignment.objects.create(
+            driver=other, truck=self.trucks[0], tenant=self.tenant, start_date=self.start + timedelta(days=2),
+            end_date=self.start + timedelta(days=3), status=AssignmentStatus.ASSIGNED,
+        )
+
+    def test_period_check_constraint(self):
+        assignment = self.assign(self.trucks[0], self.start)
+        with self.assertRaises(IntegrityError) as raised, transaction.atomic():
+            DriverTruckAssignment.objects.filter(pk=assignment.pk).update(end_date=self.start - timedelta(hours=1))
+        self.assertEqual(assignment_conflict(raised.exception), "End date cannot be before start date")
+
+    def test_conflict_messages(self):
+        error = IntegrityError('conflicting key value violates exclusion constraint "assignment_truck_no_overlap"')
+        self.assertEqual(assignment_conflict(error), "Truck has overlapping assignments in this time period")
+        self.assertIsNone(assignment_conflict(IntegrityError("UNIQUE constraint failed: fleet_truck.vin")))
+
+    def test_migration_cancels_all_but_the_latest_overlap(self):
+        other = Driver.objects.filter(tenant=self.tenant).exclude(pk=self.driver.pk).first()
+
+        def row(driver, truck, days, length=2):
+            start = self.start + timedelta(days=days)
+            return DriverTruckAssignment(
+                driver=driver, truck=truck, tenant=self.tenant, start_date=start,
+                end_date=start + timedelta(days=length), status=AssignmentStatus.ASSIGNED,
+            )
+
+        # bulk_create skips the clean() check, like rows saved before it existed
+        rows = DriverTruckAssignment.objects.bulk_create([
+            row(self.driver, self.trucks[0], 0),
+            row(self.driver, self.trucks[1], 1),  # Driver overlap with the first
+            row(other, self.trucks[1], 4),
+            row(other, self.trucks[0], 5),  # Truck overlap with the next one
+            row(self.driver, self.trucks[0], 6),
+            row(other, self.trucks[0], 8),  # Back to back with the previous one
+        ])
+
+        migration = import_module("dispatch.migrations.0006_assignment_exclusion")
+        migration.cancel_overlapping_assignments(apps, None)
+
+        statuses = dict(DriverTruckAssignment.objects.filter(pk__in=[r.pk for r in rows]).values_list("pk", "status"))
+        self.assertEqual(
+            [statuses[r.pk] for r in rows],
+            [
+                AssignmentStatus.CANCELLED, AssignmentStatus.ASSIGNED, AssignmentStatus.ASSIGNED,
+                AssignmentStatus.CANCELLED, AssignmentStatus.ASSIGNED, AssignmentStatus.ASSIGNED,
+            ],
+        )
+        self.assertIn(str(rows[1].pk), DriverTruckAssignment.objects.get(pk=rows[0].pk).notes)
@@ -0,0 +1,66 @@
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from contrib.tests.base import SyntheticTenantTestCase, free_fleet
+from dispatch.availability import free_drivers, free_trucks, snapshot, snapshots
+from dispatch.models import AssignmentStatus, DriverTruckAssignment
+
+
+class AvailabilityTest(SyntheticTenantTestCase):
+    seed = 49
+    dataset = {"drivers": 5, "trucks": 4, "customers": 2, "days": 5}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        free_fleet(cls.tenant)
+        cls.start = timezone.now() + timedelta(days=60)
+
+    def book(self, end_days=2):
+        driver = free_drivers(self.tenant, self.start).first()
+        truck = free_trucks(self.tenant, self.start).first()
+        assignment = DriverTruckAssignment.objects.create(
+            driver=driver, truck=truck, tenant=self.tenant, status=AssignmentStatus.ASSIGNED,
+            start_date=self.start, end_date=self.start + timedelta(days=end_days) if end_days else None,
+        )
+        return driver, truck, assignment
+
+    def fleet_queries(self, context):
+        return [query for query in context.captured_queries if "fleet_" in query["sql"]]
+
+    def test_window_overlap(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            driver, truck, assignment = self.book()
+        later = self.start + timedelta(days=2)
+        self.assertNotIn(driver, free_drivers(self.tenant, self.start - timedelta(days=1), self.start + timedelta(hours=1)))
+        self.assertNotIn(truck, free_trucks(self.tenant, self.start + timedelta(days=1)))
+        self.assertIn(driver, free_drivers(self.tenant, later, later + timedelta(days=1)))
+        self.assertIn(driver, free_drivers(self.tenant, self.start, exclude=assignment.pk))
+
+    def test_open_ended_assignment_blocks_every_later_window(self):
+        driver, _, _ = self.book(end_days=None)
+        self.assertNotIn(driver, free_drivers(self.tenant, self.start + timedelta(days=400), self.start + timedelta(days=401)))
+        self.assertIn(driver, free_drivers(self.tenant, self.start - timedelta(days=2), self.start))
+
+    def test_batch_is_one_query_per_resource_type(self):
+        windows = [(self.start + timedelta(days=day), self.start + timedelta(days=day + 1)) for day in range(6)]
+        with CaptureQueriesContext(connection) as context:
+            answers = snapshots(self.tenant, windows)
+        self.assertEqual(len(self.fleet_queries(context)), 2)
+        self.assertEqual(len(answers), 6)
+        self.assertEqual(answers[0]["drivers"], list(free_drivers(self.tenant, *windows[0]).order_by(
+            "last_name", "first_name").values("id", "first_name", "last_name", "carrier_id", "carrier__name")))
+
+    def test_snapshots_are_cached_until_a_change(self):
+        window = (self.start, self.start + timedelta(days=1))
+        before = snapshot(self.tenant, *window)
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(snapshot(self.tenant, *window), before)
+        self.assertEqual(self.fleet_queries(context), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            driver, truck, _ = self.book()
+        after = snapshot(self.tenant, *window)
+        self.assertNotIn(driver.id, [row["id"] for row in after["drivers"]])
+        self.assertEqual(len(after["trucks"]), len(before["trucks"]) - 1)
@@ -0,0 +1,35 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from contrib.tests.base import SyntheticTenantTestCase
+from dispatch.management.commands.benchmark_indexes import pack_indexes
+
+
+class BenchmarkIndexesTest(SyntheticTenantTestCase):
+    seed = 47
+    dataset = {"drivers": 6, "trucks": 5, "customers": 3, "days": 30}
+
+    def indexes(self):
+        with connection.cursor() as cursor:
+            return {
+                name
+                for table in connection.introspection.table_names(cursor)
+                for name in connection.introspection.get_constraints(cursor, table)
+            }
+
+    def test_reports_every_query_and_keeps_the_indexes(self):
+        names = pack_indexes()
+        self.assertIn("assignment_period_gist", names)
+        before = self.indexes()
+        # The PostgreSQL-only GiST index is skipped on SQLite
+        self.assertEqual(set(names) - before, {"assignment_period_gist"})
+
+        out = StringIO()
+        call_command("benchmark_indexes", "--repeat=1", stdout=out)
+        report = out.getvalue()
+
+        for label in ("order list", "dispatch list", "bvd list", "payout dispatches", "busy assignments"):
+            self.assertIn(label, report)
+        self.assertIn("bvd_active_recent_idx", report)
+        self.assertIn("order_tenant_recent_idx", report)
+        self.assertEqual(self.indexes(), before)
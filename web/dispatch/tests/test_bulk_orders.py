@@ -0,0 +1,88 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from dispatch.models import Order, StatusHistory
+from dispatch.utils import create_orders
+from fleet.models import Customer
+from subscriptions.models import QuotaService, UsageLog
+from tenant.models import Tenant
+
+
+def document(name, email, order_id=None):
+    return {
+        "name": name,
+        "s3_key": f"test/blobs/{name}",
+        "order_details": {
+            "order_info": {"order_id": order_id},
+            "customer_details": {
+                "customer_name": f"Customer {email}",
+                "customer_email": email,
+                "customer_address": "1 Main St",
+                "customer_phone": "555-0100",
+            },
+            "trips": [{}],
+        },
+        "token_usage": {"prompt_tokens": 80, "completion_tokens": 20, "total_tokens": 100},
+        "pages": "page text",
+        "file_size_mb": 0.5,
+    }
+
+
+class CreateOrdersTest(TestCase):
+    def setUp(self):
+        self.tenant = Tenant.objects.create(name="Acme")
+        Customer.objects.create(
+            tenant=self.tenant, email="known@example.com", name="Known", phone="", address=""
+        )
+
+    def test_creates_orders_customers_and_history_in_batches(self):
+        documents = [
+            document("a.pdf", "known@example.com", "RC-1"),
+            document("b.pdf", "new@example.com"),
+            document("c.pdf", "new@example.com"),
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            results = create_orders(self.tenant, documents)
+
+        # One insert per table, however many documents are in the batch
+        for table in ["fleet_customer", "dispatch_order", "dispatch_statushistory", "subscriptions_usagelog"]:
+            inserts = [q for q in queries if q["sql"].startswith(f'INSERT INTO "{table}"')]
+            self.assertEqual(len(inserts), 1, table)
+
+        self.assertEqual([r["error"] for r in results], [None, None, None])
+        self.assertEqual(Customer.objects.filter(tenant=self.tenant).count(), 2)
+        numbers = [r["order"].order_number for r in results]
+        self.assertEqual(numbers[0], "RC-1")
+        self.assertTrue(numbers[1].startswith("ORD-"))
+        self.assertNotEqual(numbers[1], numbers[2])
+        self.assertEqual(results[0]["order"].prompt_tokens, 80)
+        self.assertEqual(results[0]["order"].usage_details["total_tokens"], 100)
+        self.assertEqual(
+            StatusHistory.objects.filter(
+                content_type=ContentType.objects.get_for_model(Order), tenant=self.tenant
+            ).count(),
+            3,
+        )
+        self.assertEqual(UsageLog.objects.filter(tenant=self.tenant).count(), 3)
+        usage_period = QuotaService(self.tenant).usage_period
+        self.assertEqual(usage_period.orders_processed, 3)
+        self.assertEqual(usage_period.tokens_used, 300)
+
+    def test_reports_unusable_documents_without_failing_the_batch(self):
+        create_orders(self.tenant, [document("first.pdf", "known@example.com", "RC-1")])
+        documents = [
+            document("dup.pdf", "known@example.com", "RC-1"),
+            document("ok.pdf", "known@example.com", "RC-2"),
+            document("again.pdf", "known@example.com", "RC-2"),
+            document("noemail.pdf", None),
+        ]
+
+        results = create_orders(self.tenant, documents)
+
+        self.assertIn("RC-1 already exists", results[0]["error"])
+        self.assertEqual(results[1]["order"].order_number, "RC-2")
+        self.assertIn("RC-2 already exists", results[2]["error"])
+        self.assertIsNotNone(results[3]["error"])
+        self.assertEqual(Order.objects.filter(tenant=self.tenant).count(), 2)  # RC-1 and RC-2
@@ -0,0 +1,191 @@
+import zipfile
+from io import BytesIO
+from unittest import mock
+from django.core.cache import cache
+from PyPDF2 import PdfReader, PdfWriter
+from contrib.tests.base import SyntheticTenantTestCase
+from dispatch import invoices
+from dispatch.invoices import (
+    BULK_OUTPUT_PDF,
+    BULK_OUTPUT_ZIP,
+    bundle_pdfs,
+    get_organization,
+    invoice_cache_key,
+    invoice_fingerprint,
+    mark_invoiced,
+    store_invoice,
+)
+from dispatch.models import Dispatch, DispatchStatus, StatusHistory
+from dispatch.tasks import generate_bulk_invoices
+from tenant.models import Tenant
+
+
+class InvoiceCacheTest(SyntheticTenantTestCase):
+    seed = 28
+    dataset = {"drivers": 3, "trucks": 3, "customers": 2, "days": 10}
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        # An explicit mock, so patching does not inspect (and connect) the lazy S3 client
+        self.s3 = mock.MagicMock()
+        self.s3.upload_fileobj.return_value = True
+        self.s3.check_file_exists.return_value = False
+        patchers = [
+            mock.patch.object(invoices, "s3_utils", self.s3),
+            mock.patch.object(invoices, "render_invoice_pdf", return_value=b"%PDF invoice"),
+        ]
+        self.render = patchers[1].start()
+        patchers[0].start()
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        self.organization = get_organization(self.tenant)
+
+    def dispatch(self):
+        return Dispatch.objects.select_related("order", "customer", "trip").filter(tenant=self.tenant).order_by("dispatch_id").first()
+
+    def test_fingerprint_follows_rendered_fields(self):
+        dispatch = self.dispatch()
+        fingerprint = invoice_fingerprint(dispatch, self.organization)
+        self.assertEqual(invoice_fingerprint(self.dispatch(), self.organization), fingerprint)
+
+        # Fields the template does not show leave it alone
+        dispatch.notes = "called ahead"
+        dispatch.invoice_issued_at = dispatch.created_at
+        self.assertEqual(invoice_fingerprint(dispatch, self.organization), fingerprint)
+
+        # Only the watermark shows the status, so invoicing keeps the PDF current
+        dispatch.status = DispatchStatus.DELIVERED
+        delivered = invoice_fingerprint(dispatch, self.organization)
+        dispatch.status = DispatchStatus.INVOICED
+        self.assertEqual(invoice_fingerprint(dispatch, self.organization), delivered)
+
+        dispatch.commission_amount += 1
+        self.assertNotEqual(invoice_fingerprint(dispatch, self.organization), fingerprint)
+
+        dispatch = self.dispatch()
+        dispatch.customer.name = "Renamed Freight"
+        self.assertNotEqual(invoice_fingerprint(dispatch, self.organization), fingerprint)
+
+    def test_edit_renders_a_new_invoice_and_drops_the_old_one(self):
+        first = store_invoice(self.dispatch(), self.organization)
+        self.assertEqual(store_invoice(self.dispatch(), self.organization), first)
+        self.assertEqual(self.render.call_count, 1)
+
+        dispatch = self.dispatch()
+        Dispatch.objects.filter(pk=dispatch.pk).update(commission_amount=dispatch.commission_amount + 1)
+        second = store_invoice(self.dispatch(), self.organization)
+        self.assertNotEqual(second, first)
+        self.assertEqual(self.render.call_count, 2)
+        self.s3.delete_file.assert_called_once_with(first)
+
+    def test_evicted_entry_is_rebuilt_from_s3(self):
+        s3_key = store_invoice(self.dispatch(), self.organization)
+        cache.delete(invoice_cache_key(self.dispatch().pk))
+        self.s3.check_file_exists.return_value = True
+
+        self.assertEqual(store_invoice(self.dispatch(), self.organization), s3_key)
+        self.assertEqual(self.render.call_count, 1)
+        self.assertEqual(cache.get(invoice_cache_key(self.dispatch().pk))["s3_key"], s3_key)
+
+    def test_issue_date_survives_cache_eviction(self):
+        store_invoice(self.dispatch(), self.organization)
+        issued = self.dispatch().invoice_issued_at
+        self.assertIsNotNone(issued)
+
+        cache.clear()
+        dispatch = self.dispatch()
+        Dispatch.objects.filter(pk=dispatch.pk).update(commission_amount=dispatch.commission_amount + 1)
+        store_invoice(self.dispatch(), self.organization)
+
+        self.assertEqual(self.render.call_count, 2)
+        self.assertEqual([call.kwargs["date"] for call in self.render.call_args_list], [issued, issued])
+        self.assertEqual(self.dispatch().invoice_issued_at, issued)
+
+
+def blank_pdf(pages):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+class BulkInvoiceTest(SyntheticTenantTestCase):
+    seed = 29
+    dataset = {"drivers": 3, "trucks": 3, "customers": 2, "days": 30}
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        dispatches = list(Dispatch.objects.filter(tenant=self.tenant).order_by("dispatch_id")[:3])
+        self.assertEqual(len(dispatches), 3)
+        Dispatch.objects.filter(pk=dispatches[0].pk).update(status=DispatchStatus.ASSIGNED)
+        Dispatch.objects.filter(pk=dispatches[1].pk).update(status=DispatchStatus.DELIVERED)
+        Dispatch.objects.filter(pk=dispatches[2].pk).update(status=DispatchStatus.PENDING)
+        self.ids = [dispatch.pk for dispatch in dispatches]
+
+    def statuses(self):
+        return dict(Dispatch.objects.filter(pk__in=self.ids).values_list("pk", "status"))
+
+    def test_mark_invoiced_moves_eligible_dispatches(self):
+        invoiced = mark_invoiced(self.tenant, self.ids)
+
+        self.assertCountEqual(invoiced, self.ids[:2])
+        statuses = self.statuses()
+        self.assertEqual(statuses[self.ids[0]], DispatchStatus.INVOICED)
+        self.assertEqual(statuses[self.ids[1]], DispatchStatus.INVOICED)
+        self.assertEqual(statuses[self.ids[2]], DispatchStatus.PENDING)
+
+        history = StatusHistory.objects.filter(object_id__in=self.ids, new_status=DispatchStatus.INVOICED)
+        self.assertEqual(
+            sorted(history.values_list("old_status", flat=True)),
+            [DispatchStatus.ASSIGNED, DispatchStatus.DELIVERED],
+        )
+        self.assertTrue(all(entry.metadata["bulk_invoice"] for entry in history))
+
+        # Already invoiced, and other tenants' dispatches are never touched
+        self.assertEqual(mark_invoiced(self.tenant, self.ids), [])
+        self.assertEqual(mark_invoiced(Tenant.objects.create(name="Other"), self.ids), [])
+
+    def test_bundle_pdfs(self):
+        named = [("invoice_1.pdf", blank_pdf(1)), ("invoice_2.pdf", blank_pdf(2))]
+
+        with zipfile.ZipFile(BytesIO(bundle_pdfs(named, BULK_OUTPUT_ZIP))) as archive:
+            self.assertEqual(archive.namelist(), ["invoice_1.pdf", "invoice_2.pdf"])
+            self.assertEqual(archive.read("invoice_2.pdf"), named[1][1])
+
+        merged = PdfReader(BytesIO(bundle_pdfs(named, BULK_OUTPUT_PDF)))
+        self.assertEqual(len(merged.pages), 3)
+
+    @mock.patch.object(invoices, "s3_utils", mock.MagicMock())
+    def test_dispatches_stay_uninvoiced_when_rendering_fails(self):
+        with mock.patch.object(invoices, "render_invoice_pdf", side_effect=ValueError("no fonts")):
+            with self.assertRaises(ValueError):
+                generate_bulk_invoices("failed", str(self.tenant.id), self.ids, BULK_OUTPUT_ZIP)
+        self.assertNotIn(DispatchStatus.INVOICED, self.statuses().values())
+        self.assertEqual(cache.get(invoices.bulk_status_key("failed"))["status"], "FAILED")
+
+        with mock.patch.object(invoices, "render_invoice_pdf", return_value=blank_pdf(1)):
+            generate_bulk_invoices("done", str(self.tenant.id), self.ids, BULK_OUTPUT_ZIP)
+        status = cache.get(invoices.bulk_status_key("done"))
+        self.assertEqual(status["status"], "COMPLETED")
+        self.assertEqual(status["count"], 2)
+        self.assertEqual(list(self.statuses().values()).count(DispatchStatus.INVOICED), 2)
+
+    def test_single_download_after_a_bulk_job_is_a_cache_hit(self):
+        s3 = mock.MagicMock()
+        s3.check_file_exists.return_value = False
+        with mock.patch.object(invoices, "s3_utils", s3), \
+                mock.patch.object(invoices, "render_invoice_pdf", return_value=blank_pdf(1)) as render:
+            generate_bulk_invoices("done", str(self.tenant.id), self.ids, BULK_OUTPUT_ZIP)
+            self.assertEqual(render.call_count, 2)
+
+            dispatch = Dispatch.objects.select_related("order", "customer", "trip").get(pk=self.ids[0])
+            self.assertEqual(dispatch.status, DispatchStatus.INVOICED)
+            s3_key = store_invoice(dispatch, get_organization(self.tenant))
+
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(cache.get(invoice_cache_key(self.ids[0]))["s3_key"], s3_key)
+        s3.delete_file.assert_not_called()
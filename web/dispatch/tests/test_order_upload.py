@@ -0,0 +1,202 @@
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from contrib.tests.base import STATIC
+from contrib.tests.pdfs import make_pdf
+from dispatch.models import Order, UploadFile
+from dispatch.tasks import process_order_batch, process_order_upload
+from dispatch.tests.test_bulk_orders import document
+from subscriptions.models import TenantCustomQuota
+from tenant.models import Tenant
+
+MB = 1024 * 1024
+
+
+def make_user(tenant, name):
+    user = User(username=name)
+    user._tenant = tenant
+    user.set_password("secret")
+    user.save()
+    return user
+
+
+class DirectUploadTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Acme")
+        make_user(self.tenant, "dispatcher")
+        self.client.login(username="dispatcher", password="secret")
+        # An explicit mock, so patching does not inspect (and connect) the lazy S3 client
+        self.s3 = mock.MagicMock()
+        patcher = mock.patch("dispatch.views.api.s3_utils", self.s3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.s3.generate_presigned_post.side_effect = lambda key, **kwargs: {"url": "https://s3", "fields": {"key": key}}
+
+    def presign(self, size=MB, filename="rate con.pdf"):
+        return self.client.post(
+            reverse("dispatch:api_order_upload_presign"),
+            {"filename": filename, "size": size, "content_type": "application/pdf"},
+        )
+
+    def complete(self, upload_id):
+        return self.client.post(reverse("dispatch:api_order_upload_complete"), {"upload_id": upload_id})
+
+    def status(self, upload_id):
+        return self.client.get(reverse("dispatch:api_order_upload_status", kwargs={"upload_id": upload_id}))
+
+    def test_presigned_key_is_scoped_to_the_tenant(self):
+        response = self.presign(filename="../../other/rate con.pdf")
+        self.assertEqual(response.status_code, 200)
+        key = response.json()["fields"]["key"]
+        self.assertTrue(key.startswith(f"{settings.ENV}/{self.tenant.id}/orders/"))
+        self.assertTrue(key.endswith("_rate con.pdf"))
+        self.assertNotIn("..", key)
+        self.assertEqual(self.s3.generate_presigned_post.call_args.kwargs["max_size"], MB)
+
+    def test_presign_is_refused_over_the_storage_quota(self):
+        TenantCustomQuota.objects.create(tenant=self.tenant, storage_limit_mb=1)
+        response = self.presign(size=2 * MB)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()["error"], "Storage limit exceeded")
+        self.s3.generate_presigned_post.assert_not_called()
+
+    def test_complete_checks_tenant_and_uploaded_size(self):
+        upload_id = self.presign().json()["upload_id"]
+
+        other = Tenant.objects.create(name="Other")
+        make_user(other, "intruder")
+        self.client.login(username="intruder", password="secret")
+        self.assertEqual(self.complete(upload_id).status_code, 404)
+
+        self.client.login(username="dispatcher", password="secret")
+        self.s3.get_file_size.return_value = MB + 1
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"], "Uploaded file does not match the requested size")
+        self.assertFalse(UploadFile.objects.filter(tenant=self.tenant).exists())
+
+    @mock.patch("dispatch.views.api.process_order_upload")
+    def test_complete_queues_extraction_once(self, task):
+        upload_id = self.presign().json()["upload_id"]
+        self.s3.get_file_size.return_value = MB
+
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 202)
+        upload_file = UploadFile.objects.get(tenant=self.tenant)
+        task.delay.assert_called_once_with(upload_id, str(upload_file.id))
+        self.assertEqual(self.status(upload_id).json(), {"status": "QUEUED"})
+
+        # The presigned upload is spent
+        self.assertEqual(self.complete(upload_id).status_code, 404)
+        self.assertEqual(self.status("unknown").status_code, 404)
+
+    @mock.patch("dispatch.tasks.adopt_file")
+    @mock.patch("dispatch.tasks.s3_utils", mock.MagicMock())
+    def test_task_reports_completion_and_failure(self, adopt_file):
+        upload_file = UploadFile.objects.create(file=f"{settings.ENV}/{self.tenant.id}/orders/a.pdf", tenant=self.tenant)
+        adopt_file.return_value = (mock.Mock(s3_key=f"{settings.ENV}/{self.tenant.id}/blobs/ab/ab.pdf"), True)
+        order = Order.objects.create(
+            tenant=self.tenant, order_number="RC-7", raw_extract={}, raw_text="", completion_tokens=0,
+            prompt_tokens=0, total_tokens=0, llm_model_name="test", usage_details={},
+        )
+
+        def extract(*args, **kwargs):
+            self.assertEqual(self.status("ok").json(), {"status": "PROCESSING"})
+            return order
+
+        with mock.patch("dispatch.tasks.process_order_document", side_effect=extract):
+            process_order_upload("ok", str(upload_file.id))
+        status = self.status("ok").json()
+        self.assertEqual(status["status"], "COMPLETED")
+        self.assertEqual(status["order_number"], "RC-7")
+        self.assertEqual(status["redirect_url"], reverse("dispatch:order_detail", kwargs={"pk": order.id}))
+
+        with mock.patch("dispatch.tasks.process_order_document", side_effect=ValueError("unreadable")):
+            with self.assertRaises(ValueError):
+                process_order_upload("bad", str(upload_file.id))
+        self.assertEqual(self.status("bad").json(), {"status": "FAILED", "error": "unreadable"})
+
+
+@override_settings(STORAGES=STATIC)
+class BatchUploadTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tenant = Tenant.objects.create(name="Acme")
+        self.user = make_user(self.tenant, "dispatcher")
+        self.client.login(username="dispatcher", password="secret")
+
+    def status(self, batch_id):
+        return self.client.get(reverse("dispatch:api_order_batch_status", kwargs={"batch_id": batch_id}))
+
+    @mock.patch("dispatch.views.order.process_order_batch")
+    @mock.patch("dispatch.views.order.store_file")
+    def test_batch_is_queued_not_extracted_in_the_request(self, store_file, task):
+        store_file.side_effect = lambda tenant, path, filename, **kwargs: (
+            mock.Mock(s3_key=f"{settings.ENV}/{tenant.id}/blobs/{filename}"), True
+        )
+        files = [
+            SimpleUploadedFile(f"{name}.pdf", make_pdf([[name]]), content_type="application/pdf")
+            for name in ["first", "second"]
+        ]
+
+        response = self.client.post(reverse("dispatch:order_create"), {"files": files})
+
+        batch_id = task.delay.call_args.args[0]
+        self.assertRedirects(
+            response, f"{reverse('dispatch:order_create')}?batch={batch_id}", fetch_redirect_response=False
+        )
+        uploads = task.delay.call_args.args[2]
+        self.assertEqual([upload["name"] for upload in uploads], ["first.pdf", "second.pdf"])
+        self.assertEqual(UploadFile.objects.filter(tenant=self.tenant, order=None).count(), 2)
+        self.assertEqual(self.status(batch_id).json(), {"status": "QUEUED", "total": 2, "done": 0})
+
+        page = self.client.get(response.url)
+        self.assertContains(page, reverse("dispatch:api_order_batch_status", kwargs={"batch_id": batch_id}))
+
+    @mock.patch("dispatch.tasks.s3_utils", mock.MagicMock())
+    @mock.patch("dispatch.tasks.extract_documents")
+    def test_task_creates_orders_and_reports_each_file(self, extract_documents):
+        upload_files = [
+            UploadFile.objects.create(file=f"{settings.ENV}/{self.tenant.id}/blobs/{name}", tenant=self.tenant)
+            for name in ["good.pdf", "bad.pdf"]
+        ]
+        uploads = [
+            {"upload_file_id": str(upload_file.id), "name": name, "created": False}
+            for upload_file, name in zip(upload_files, ["good.pdf", "bad.pdf"])
+        ]
+        good = document("good.pdf", "shipper@example.com", "RC-32")
+
+        def extract(paths, tenant_id, progress):
+            progress(1)
+            self.assertEqual(self.status("batch").json()["done"], 1)
+            return [(good["order_details"], good["token_usage"], good["pages"]), ValueError("unreadable")]
+
+        extract_documents.side_effect = extract
+        process_order_batch("batch", str(self.tenant.id), uploads)
+
+        order = Order.objects.get(tenant=self.tenant, order_number="RC-32")
+        upload_files[0].refresh_from_db()
+        self.assertEqual(upload_files[0].order, order)
+        status = self.status("batch").json()
+        self.assertEqual(status["status"], "COMPLETED")
+        self.assertEqual(status["done"], 2)
+        self.assertEqual(
+            status["results"],
+            [
+                {
+                    "name": "good.pdf", "error": None, "order_id": str(order.id), "order_number": "RC-32",
+                    "redirect_url": reverse("dispatch:order_detail", kwargs={"pk": order.id}),
+                },
+                {"name": "bad.pdf", "error": "unreadable"},
+            ],
+        )
+
+        # Another tenant cannot read the batch
+        make_user(Tenant.objects.create(name="Other"), "intruder")
+        self.client.login(username="intruder", password="secret")
+        self.assertEqual(self.status("batch").status_code, 404)
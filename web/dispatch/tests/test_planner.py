@@ -0,0 +1,103 @@
+from datetime import timedelta
+from itertools import permutations
+import numpy as np
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from contrib.tests.base import SyntheticTenantTestCase, free_fleet
+from dispatch.models import Dispatch, DriverTruckAssignment, Order, Trip, TripStatus
+from dispatch.planner import plan_dispatches, solve_assignment
+
+
+def brute_force(cost):
+    """(matches, total cost) of the best assignment, trying every one."""
+    rows, columns = cost.shape
+    if rows > columns:
+        return brute_force(cost.T)
+    best = (0, 0.0)
+    for chosen in permutations(range(columns), rows):
+        values = cost[np.arange(rows), chosen]
+        values = values[np.isfinite(values)]
+        candidate = (len(values), values.sum())
+        if candidate[0] > best[0] or (candidate[0] == best[0] and candidate[1] < best[1]):
+            best = candidate
+    return best
+
+
+class SolveAssignmentTest(TestCase):
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(50)
+        for shape in [(4, 4), (3, 6), (6, 3), (5, 5), (1, 4)]:
+            for _ in range(20):
+                cost = rng.integers(0, 20, size=shape).astype(float)
+                cost[rng.random(shape) < 0.3] = np.inf
+                pairs = solve_assignment(cost)
+                self.assertEqual(len({row for row, _ in pairs}), len(pairs))
+                self.assertEqual(len({column for _, column in pairs}), len(pairs))
+                self.assertEqual((len(pairs), sum(cost[row, column] for row, column in pairs)), brute_force(cost))
+
+    def test_nothing_allowed(self):
+        self.assertEqual(solve_assignment(np.full((2, 3), np.inf)), [])
+        self.assertEqual(solve_assignment(np.zeros((0, 3))), [])
+
+
+class AutoDispatchTest(SyntheticTenantTestCase):
+    seed = 50
+    dataset = {"drivers": 5, "trucks": 5, "customers": 2, "days": 5}
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        free_fleet(cls.tenant)
+
+        # Three days of overlapping day and overnight runs
+        cls.start = (timezone.now() + timedelta(days=60)).replace(hour=0, minute=0, second=0, microsecond=0)
+        cls.trips = []
+        for day in range(3):
+            for hour, hours in [(6, 10), (7, 8), (8, 20), (14, 6), (20, 12)]:
+                pickup = cls.start + timedelta(days=day, hours=hour)
+                order = Order.objects.create(
+                    tenant=cls.tenant, customer_name="Planned Freight", pickup_date=pickup,
+                    delivery_date=pickup + timedelta(hours=hours), load_total=1000.0,
+                    raw_extract={}, raw_text="", completion_tokens=0, prompt_tokens=0, total_tokens=0,
+                    llm_model_name="test", usage_details={},
+                )
+                cls.trips.append(Trip.objects.create(order=order, tenant=cls.tenant, status=TripStatus.PENDING))
+
+    def test_plan_is_conflict_free(self):
+        plan = plan_dispatches(self.tenant, self.start, self.start + timedelta(days=3))
+        self.assertEqual(len(plan.trips), len(self.trips))
+        self.assertTrue(plan.planned)
+        self.assertEqual(len({crew.driver.id for crew in plan.crews}), len(plan.crews))
+        self.assertEqual(len({crew.truck.id for crew in plan.crews}), len(plan.crews))
+        for crew in plan.crews:
+            self.assertTrue(crew.driver.is_qualified_for_truck(crew.truck)[0])
+
+        for n, first in enumerate(plan.planned):
+            for second in plan.planned[n + 1:]:
+                if first.crew is second.crew:
+                    self.assertTrue(first.end <= second.start or second.end <= first.start)
+        for row in plan.unplanned:
+            self.assertTrue(row.reason)
+        if len(plan.crews) < 3:
+            self.assertTrue(plan.unplanned)
+
+    def test_create_planned_dispatches(self):
+        url = reverse("dispatch:dispatch_auto")
+        query = {"start_date": (self.start + timedelta(days=1)).date().isoformat(), "days": 1}
+        response = self.client.get(url, query)
+        self.assertEqual(response.status_code, 200)
+        plan = response.context["plan"]
+        rows = [f"{row.trip.id}:{row.crew.driver.id}:{row.crew.truck.id}" for row in plan.planned]
+        self.assertTrue(rows)
+
+        response = self.client.post(url, {"rows": rows})
+        self.assertRedirects(response, reverse("dispatch:dispatch_list"), fetch_redirect_response=False)
+        dispatches = Dispatch.objects.filter(trip__in=[row.trip for row in plan.planned])
+        self.assertEqual(dispatches.count(), len(rows))
+        self.assertEqual(DriverTruckAssignment.objects.filter(dispatch__in=dispatches).count(), len(rows))
+        self.assertFalse(self.client.get(url, query).context["plan"].planned)
+
+        # Dispatched trips are no longer pending, so a second submission creates nothing
+        self.client.post(url, {"rows": rows})
+        self.assertEqual(Dispatch.objects.filter(trip__in=[row.trip for row in plan.planned]).count(), len(rows))
@@ -0,0 +1,33 @@
+from contrib.queries import QueryBudgetMixin
+from contrib.tests.base import SyntheticTenantTestCase
+from dispatch.models import Dispatch, Order, Trip
+
+
+class DispatchQueryBudgetTest(QueryBudgetMixin, SyntheticTenantTestCase):
+    """Pages list more rows than the duplicate threshold, so a query per row fails."""
+
+    def test_order_list(self):
+        self.assertGreater(Order.objects.count(), 10)
+        self.assertQueryBudget("/dispatch/orders/")
+
+    def test_order_detail(self):
+        order = Order.objects.filter(dispatches__isnull=False).first()
+        for model in (Trip, Dispatch):
+            model.objects.filter(pk__in=list(model.objects.exclude(order=order).values_list("pk", flat=True)[:5])).update(order=order)
+        self.assertQueryBudget(f"/dispatch/orders/{order.pk}/")
+
+    def test_dispatch_list(self):
+        self.assertGreater(Dispatch.objects.count(), 10)
+        response = self.assertQueryBudget("/dispatch/")
+        # Cursor pages cost the same however deep they are
+        page = response.context["page_obj"]
+        second = self.assertQueryBudget(f"/dispatch/{page.next_url}").context["page_obj"]
+        self.assertTrue(second.has_previous())
+        self.assertFalse({dispatch.pk for dispatch in page} & {dispatch.pk for dispatch in second})
+
+    def test_available_resources(self):
+        response = self.assertQueryBudget("/dispatch/api/assignments/available-resources/?start_date=2030-01-01T08:00")
+        self.assertGreater(len(response.json()["drivers"]), 3)
+
+    def test_assignment_list(self):
+        self.assertQueryBudget("/dispatch/assignments/")
@@ -0,0 +1,51 @@
+from unittest import mock
+from contrib.queries import QueryRecorder
+from contrib.tests.base import SyntheticTenantTestCase
+from dispatch.models import Dispatch, DriverTruckAssignment, Order, Trip
+from dispatch.tables import DispatchTable, TripTable
+from dispatch.views.assignment import AssignmentListView
+from dispatch.views.dispatch import DispatchListView
+from dispatch.views.order import OrderListView
+
+
+class EagerLoadingTableTest(SyntheticTenantTestCase):
+    """A page costs the same number of queries whether it shows 2 rows or 10."""
+
+    def queries(self, url):
+        # Warm up first: the first request after a cache clear also loads content types
+        self.client.get(url)
+        with QueryRecorder() as recorder:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return recorder.count
+
+    def assertConstantPerPage(self, view, url):
+        counts = []
+        for page_size in (2, 10):
+            with mock.patch.object(view, "paginate_by", page_size):
+                counts.append(self.queries(url))
+        self.assertEqual(counts[0], counts[1], f"{url}: {counts[0]} queries for 2 rows, {counts[1]} for 10")
+
+    def test_list_pages(self):
+        self.assertGreater(Order.objects.count(), 10)
+        self.assertGreater(Dispatch.objects.count(), 10)
+        self.assertGreater(DriverTruckAssignment.objects.count(), 2)
+        self.assertConstantPerPage(OrderListView, "/dispatch/orders/")
+        self.assertConstantPerPage(DispatchListView, "/dispatch/")
+        self.assertConstantPerPage(DispatchListView, "/dispatch/?sort=driver")
+        self.assertConstantPerPage(AssignmentListView, "/dispatch/assignments/")
+
+    def test_order_detail_trips(self):
+        order = Order.objects.filter(trips__isnull=False).first()
+        one_trip = self.queries(f"/dispatch/orders/{order.pk}/")
+        Trip.objects.filter(pk__in=list(Trip.objects.exclude(order=order).values_list("pk", flat=True)[:5])).update(order=order)
+        self.assertEqual(self.queries(f"/dispatch/orders/{order.pk}/"), one_trip)
+
+    def test_prepare_queryset_loads_only_the_shown_fields(self):
+        dispatch = DispatchTable.prepare_queryset(Dispatch.objects.all()).first()
+        with self.assertNumQueries(0):
+            DispatchTable([dispatch]).as_values()
+        self.assertIn("notes", dispatch.get_deferred_fields())
+
+        trip = TripTable.prepare_queryset(Trip.objects.all(), "estimated_duration").first()
+        self.assertNotIn("estimated_duration", trip.get_deferred_fields())
@@ -36,11 +36,14 @@ urlpatterns = [
     
     # Dispatch URLs
     path('', views.DispatchListView.as_view(), name='dispatch_list'),
+    path('invoices/bulk/', views.DispatchBulkInvoiceView.as_view(), name='dispatch_bulk_invoice'),
+    path('auto-dispatch/', views.AutoDispatchView.as_view(), name='dispatch_auto'),
     path('create/<uuid:order_pk>/', views.DispatchCreateView.as_view(), name='dispatch_create'),
     path('<uuid:pk>/', views.DispatchDetailView.as_view(), name='dispatch_detail'),
     path('<uuid:pk>/update/', views.DispatchUpdateView.as_view(), name='dispatch_update'),
     path('<uuid:pk>/delete/', views.DispatchDeleteView.as_view(), name='dispatch_delete'),
     path('<uuid:pk>/invoice/', views.DispatchInvoiceView.as_view(), name='dispatch_invoice'),
+    path('<uuid:pk>/invoice/pdf/', views.DispatchInvoicePDFView.as_view(), name='dispatch_invoice_pdf'),
     
     # Assignment URLs
     path('assignments/', AssignmentListView.as_view(), name='assignment-list'),
@@ -56,6 +59,12 @@ urlpatterns = [
     path('api/assignments/available/', available_assignments, name='api_available_assignments'),
     path('api/assignments/available-resources/', available_resources, name='api_available_resources'),
     path('api/orders/extract/', api.order_extract, name='api_order_extract'),
+    path('api/orders/upload/presign/', api.order_upload_presign, name='api_order_upload_presign'),
+    path('api/orders/upload/complete/', api.order_upload_complete, name='api_order_upload_complete'),
+    path('api/orders/upload/<str:upload_id>/status/', api.order_upload_status, name='api_order_upload_status'),
+    path('api/orders/batch/<str:batch_id>/status/', api.order_batch_status, name='api_order_batch_status'),
+    path('api/dispatches/<uuid:pk>/invoice/status/', api.dispatch_invoice_status, name='api_dispatch_invoice_status'),
+    path('api/dispatches/invoices/bulk/<str:job_id>/status/', api.bulk_invoice_status, name='api_bulk_invoice_status'),
     path('api/orders/validate/', api.order_validate, name='api_order_validate'),
     path('api/trips/status/', api.trip_status_update, name='api_trip_status_update'),
     path('api/assignments/status/', api.assignment_status_update, name='api_assignment_status_update'),
@@ -3,17 +3,24 @@
 import os
 import logging
 import secrets
-from typing import Final, Optional, Tuple, Dict, Any
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Final, Optional, Tuple, Dict, Any, List
 from uuid import UUID
 from datetime import datetime, timedelta
 from dateutil import parser as date_parser
 from django.core.exceptions import ValidationError
 from django.conf import settings
-from django.db import transaction
+from django.db import connections, transaction
 from django.utils import timezone
 from contrib.aws import s3_utils
-from contrib.extraction.document.invoice import extract_invoice, MODELS, TripResponse
-from contrib.file_reader import open_pdf
+from contrib.blobstore import retain
+from contrib.extraction.document.invoice import extract_invoice_routed, MODELS, TripResponse
+from contrib.extraction.document.chunked import extract_invoice_chunked
+from contrib.extraction.document.layout import anchor_score, apply_rules, document_labels
+from contrib.extraction.document.preprocess import count_tokens, preprocess_pages
+from contrib.pdf_text import iter_pages
 from tenant.models import Tenant
 from dispatch.models import (
     Order,
@@ -21,7 +28,10 @@ from dispatch.models import (
     TripStatus,
     DispatchStatus,
     OrderStatus,
-    StatusHistory
+    StatusHistory,
+    TenantSequence,
+    SequenceType,
+    ExtractionTemplate,
 )
 from fleet.models import Customer, Driver, Truck
 from django.contrib.contenttypes.models import ContentType
@@ -36,12 +46,19 @@ TASK_RETRY_BACKOFF_MAX: Final[int] = 1600
 logger = logging.getLogger("django")
 
 
-def extract(filepath: str) -> Tuple[Dict[str, Any], Dict[str, int], str]:
+def extract(filepath: str, tenant_id=None) -> Tuple[Dict[str, Any], Dict[str, int], str]:
     """
     Extract data from PDF file.
+
+    Documents in a known layout are extracted with the tenant's template rules,
+    without the model. Short documents go out in one prompt, to the mini model
+    first when they are small (see contrib.extraction.routing). Longer ones
+    are split into windows that are extracted concurrently and merged (see
+    contrib.extraction.document.chunked).
     
     Args:
         filepath: Path to the PDF file
+        tenant_id: Tenant whose rate limit the model call counts against
         
     Returns:
         Tuple containing:
@@ -50,12 +67,47 @@ def extract(filepath: str) -> Tuple[Dict[str, Any], Dict[str, int], str]:
         - String containing extracted text pages
     """
     try:
-        pages, num_pages = open_pdf(filepath)
-        extracted_response = extract_invoice(pages, model=MODELS.GPT4o_16k.value)
-        logger.info(f"👏Extracted response from {num_pages} pages")
-        
-        order_details = extracted_response.choices[0].message.parsed.model_dump()
-        token_usage = extracted_response.usage.model_dump()
+        page_texts = list(iter_pages(filepath, max_pages=settings.EXTRACTION_MAX_PAGES))
+        pages = "".join(text + "\n\n" for text in page_texts)
+        num_pages = len(page_texts)
+
+        if tenant_id and settings.EXTRACTION_TEMPLATES:
+            templated = extract_with_template(pages, tenant_id)
+            if templated:
+                order_details, token_usage = templated
+                return order_details, token_usage, pages
+
+        # Headers, footers and legal terms are billed as prompt tokens but hold no order data
+        preprocessing = None
+        if settings.EXTRACTION_PREPROCESS:
+            page_texts, preprocessing = preprocess_pages(page_texts)
+
+        if num_pages >= settings.EXTRACTION_CHUNK_MIN_PAGES:
+            response, token_usage = extract_invoice_chunked(
+                page_texts,
+                window_pages=settings.EXTRACTION_WINDOW_PAGES,
+                overlap=settings.EXTRACTION_WINDOW_OVERLAP,
+                model=MODELS.GPT4o_16k.value,
+                tenant_id=tenant_id,
+            )
+            order_details = response.model_dump()
+        else:
+            text = "".join(text + "\n\n" for text in page_texts)
+            small_first = (
+                settings.EXTRACTION_ROUTING
+                and num_pages <= settings.EXTRACTION_SMALL_MODEL_MAX_PAGES
+                and count_tokens(text)[0] <= settings.EXTRACTION_SMALL_MODEL_MAX_TOKENS
+            )
+            response, token_usage = extract_invoice_routed(
+                text, small_first=small_first, tenant_id=tenant_id
+            )
+            logger.info(
+                f"👏Extracted response from {num_pages} pages with {token_usage['routing']['model']}"
+            )
+            order_details = response.model_dump()
+
+        if preprocessing:
+            token_usage["preprocessing"] = preprocessing
         
         return order_details, token_usage, pages
         
@@ -64,6 +116,50 @@ def extract(filepath: str) -> Tuple[Dict[str, Any], Dict[str, int], str]:
         raise
 
 
+def extract_with_template(text: str, tenant_id) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Extract a document with the best matching approved ExtractionTemplate of the tenant.
+
+    Args:
+        text: Document text, as returned by `extract`
+        tenant_id: Tenant whose templates are tried
+
+    Returns:
+        Tuple of (order details, token usage) or None when the layout is unknown
+        or a rule did not match cleanly, in which case the model is used
+    """
+    started = time.perf_counter()
+    labels = document_labels(text)
+    best, best_score = None, 0.0
+    for template in ExtractionTemplate.objects.filter(tenant_id=tenant_id, is_active=True, approved=True):
+        score = anchor_score(template.anchors, labels)
+        if score >= template.min_score and score > best_score:
+            best, best_score = template, score
+    if best is None:
+        return None
+
+    response, low_confidence = apply_rules(best.rules, text, TripResponse)
+    best.record_use(extracted=response is not None)
+    if response is None:
+        logger.info(f"💫Template {best.name} matched, model needed for {', '.join(low_confidence)}")
+        return None
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"👏Extracted with template {best.name} in {elapsed_ms}ms")
+    token_usage = {
+        "completion_tokens": 0,
+        "prompt_tokens": 0,
+        "total_tokens": 0,
+        "template": {
+            "id": str(best.id),
+            "name": best.name,
+            "score": round(best_score, 3),
+            "elapsed_ms": elapsed_ms,
+        },
+    }
+    return response.model_dump(), token_usage
+
+
 def parse_weight(weight_str: Optional[str]) -> Optional[float]:
     """
     Parse weight string to float value.
@@ -98,7 +194,98 @@ def parse_weight(weight_str: Optional[str]) -> Optional[float]:
         return None
 
 
-def map_order(order_details: Dict[str, Any], tenant: Tenant, s3_key: str) -> Order:
+def get_customer_phone(order_details: Dict[str, Any]) -> Optional[str]:
+    """Customer phone from the document, falling back to the listed contact numbers."""
+    customer_data = order_details.get('customer_details', {})
+    customer_phone = customer_data.get('customer_phone')
+    
+    # If customer phone is empty, try to find it in contact_numbers
+    if not customer_phone and order_details.get('other_details', {}).get('contact_numbers'):
+        # Look for a phone number associated with the customer name
+        customer_name = customer_data.get('customer_name', '').lower()
+        for phone in order_details.get('other_details', {}).get('contact_numbers', []):
+            # If we find a phone number near the customer name in the raw text, use it
+            if customer_name and customer_name in str(order_details.get('raw_text', '')).lower():
+                customer_phone = phone
+                break
+
+    return customer_phone
+
+
+def build_order(
+    order_details: Dict[str, Any],
+    tenant: Tenant,
+    s3_key: str,
+    customer: Customer,
+    token_usage: Optional[Dict[str, Any]] = None,
+    raw_text: str = "",
+) -> Order:
+    """
+    Build an unsaved Order from extracted data.
+    
+    Args:
+        order_details: Dictionary containing extracted order details
+        tenant: Tenant instance
+        s3_key: S3 key of the uploaded file
+        customer: Customer the order belongs to
+        token_usage: Token usage reported by `extract`, kept in usage_details
+        raw_text: Document text, kept for proposing extraction templates
+        
+    Returns:
+        Unsaved Order instance
+    """
+    token_usage = token_usage or {}
+    customer_data = order_details.get('customer_details', {})
+
+    # Get load details
+    load_details = order_details.get('total_load_details', {})
+    
+    # Parse weight value
+    weight_str = order_details.get('freight_details', {}).get('freight_weight')
+    weight = parse_weight(weight_str)
+    
+    # Get trip details
+    trip_data = order_details.get('trips', [{}])[0]
+    pickup_details = trip_data.get('pickup_details', {})
+    delivery_details = trip_data.get('deliver_to_details', {})
+    
+    return Order(
+        tenant=tenant,
+        customer=customer,
+        order_number=order_details.get('order_info', {}).get('order_id'),
+        customer_name=customer_data.get('customer_name'),
+        customer_address=customer_data.get('customer_address'),
+        customer_email=customer_data.get('customer_email'),
+        customer_phone=get_customer_phone(order_details),
+        origin=pickup_details.get('pickup_address'),
+        destination=delivery_details.get('delivery_address'),
+        cargo_type=order_details.get('freight_details', {}).get('freight_type'),
+        weight=weight,
+        load_total=load_details.get('load_total'),
+        load_currency=load_details.get('currency'),
+        pickup_date=parse_date(pickup_details.get('pickup_date')),
+        delivery_date=parse_date(delivery_details.get('delivery_date')),
+        pdf=s3_key,
+        status=OrderStatus.PENDING,
+        remarks_or_special_instructions=order_details.get('remarks_or_special_instructions'),
+        raw_extract=order_details,
+        raw_text=raw_text,
+        completion_tokens=token_usage.get('completion_tokens') or 0,
+        prompt_tokens=token_usage.get('prompt_tokens') or 0,
+        total_tokens=token_usage.get('total_tokens') or 0,
+        llm_model_name=token_usage.get('routing', {}).get('model', MODELS.GPT4o_16k.value),
+        usage_details=token_usage,
+        processed=False  # Set to False initially, will be set to True when dispatch is created
+    )
+
+
+def map_order(
+    order_details: Dict[str, Any],
+    tenant: Tenant,
+    s3_key: str,
+    token_usage: Optional[Dict[str, Any]] = None,
+    raw_text: str = "",
+) -> Order:
     """
     Map extracted data to Order model.
     
@@ -106,25 +293,15 @@ def map_order(order_details: Dict[str, Any], tenant: Tenant, s3_key: str) -> Ord
         order_details: Dictionary containing extracted order details
         tenant: Tenant instance
         s3_key: S3 key of the uploaded file
+        token_usage: Token usage reported by `extract`
+        raw_text: Document text reported by `extract`
         
     Returns:
         Created Order instance
     """
     try:
         with transaction.atomic():
-            # Get customer details and phone numbers
             customer_data = order_details.get('customer_details', {})
-            customer_phone = customer_data.get('customer_phone')
-            
-            # If customer phone is empty, try to find it in contact_numbers
-            if not customer_phone and order_details.get('other_details', {}).get('contact_numbers'):
-                # Look for a phone number associated with the customer name
-                customer_name = customer_data.get('customer_name', '').lower()
-                for phone in order_details.get('other_details', {}).get('contact_numbers', []):
-                    # If we find a phone number near the customer name in the raw text, use it
-                    if customer_name and customer_name in str(order_details.get('raw_text', '')).lower():
-                        customer_phone = phone
-                        break
 
             # Create or update customer
             customer, created = Customer.objects.get_or_create(
@@ -132,52 +309,15 @@ def map_order(order_details: Dict[str, Any], tenant: Tenant, s3_key: str) -> Ord
                 email=customer_data.get('customer_email'),
                 defaults={
                     'name': customer_data.get('customer_name'),
-                    'phone': customer_phone,
+                    'phone': get_customer_phone(order_details),
                     'address': customer_data.get('customer_address')
                 }
             )
 
-            # Get load details
-            load_details = order_details.get('total_load_details', {})
-            
-            # Parse weight value
-            weight_str = order_details.get('freight_details', {}).get('freight_weight')
-            weight = parse_weight(weight_str)
-            
-            # Get trip details
-            trip_data = order_details.get('trips', [{}])[0]
-            pickup_details = trip_data.get('pickup_details', {})
-            delivery_details = trip_data.get('deliver_to_details', {})
-            
             # Create order
-            order = Order.objects.create(
-                tenant=tenant,
-                customer=customer,
-                order_number=order_details.get('order_info', {}).get('order_id'),
-                customer_name=customer_data.get('customer_name'),
-                customer_address=customer_data.get('customer_address'),
-                customer_email=customer_data.get('customer_email'),
-                customer_phone=customer_phone,  # Use the potentially updated customer phone
-                origin=pickup_details.get('pickup_address'),
-                destination=delivery_details.get('delivery_address'),
-                cargo_type=order_details.get('freight_details', {}).get('freight_type'),
-                weight=weight,
-                load_total=load_details.get('load_total'),
-                load_currency=load_details.get('currency'),
-                pickup_date=parse_date(pickup_details.get('pickup_date')),
-                delivery_date=parse_date(delivery_details.get('delivery_date')),
-                pdf=s3_key,
-                status=OrderStatus.PENDING,
-                remarks_or_special_instructions=order_details.get('remarks_or_special_instructions'),
-                raw_extract=order_details,
-                raw_text="",  # This will be filled by the extraction process
-                completion_tokens=0,  # These will be filled by the extraction process
-                prompt_tokens=0,
-                total_tokens=0,
-                llm_model_name=MODELS.GPT4o_16k.value,
-                usage_details={},
-                processed=False  # Set to False initially, will be set to True when dispatch is created
-            )
+            order = build_order(order_details, tenant, s3_key, customer, token_usage, raw_text)
+            order.save()
+            retain(tenant, s3_key)  # Order.pdf
 
             # Create status history with empty string for old_status
             StatusHistory.objects.create(
@@ -195,6 +335,242 @@ def map_order(order_details: Dict[str, Any], tenant: Tenant, s3_key: str) -> Ord
         raise
 
 
+def process_order_document(
+    local_path: str, tenant: Tenant, s3_key: str, count_file_storage: bool = True
+) -> Order:
+    """
+    Extract a downloaded order document, create the order and record usage.
+
+    Args:
+        local_path: Path to the local copy of the PDF
+        tenant: Tenant instance
+        s3_key: S3 key of the stored document
+        count_file_storage: False when the bytes were already stored (deduplicated)
+            and must not count against the storage quota again
+
+    Returns:
+        Created Order instance
+    """
+    quota_service = QuotaService(tenant)
+    file_size_mb = calculate_file_size_mb(local_path) if count_file_storage else 0
+
+    order_details, token_usage, pages = extract(local_path, tenant_id=tenant.id)
+    total_tokens = token_usage.get("total_tokens", 0)
+    logger.info(f"👏Extraction completed with {total_tokens} tokens used")
+
+    order = map_order(order_details, tenant, s3_key, token_usage, pages)
+    if not order:
+        raise ValidationError("Failed to create order")
+
+    UsageLog.objects.create(
+        tenant=tenant,
+        usage_period=quota_service.usage_period,
+        feature="order_processing",
+        tokens_used=total_tokens,
+        storage_delta_mb=file_size_mb,
+        content_type=ContentType.objects.get_for_model(Order),
+        object_id=order.id,
+    )
+
+    quota_service.usage_period.orders_processed += 1
+    quota_service.usage_period.tokens_used += total_tokens
+    quota_service.usage_period.storage_used_mb += file_size_mb
+    quota_service.usage_period.save()
+
+    logger.info(
+        f"Successfully processed order {order.id}. "
+        f"File size: {file_size_mb}MB, Tokens: {total_tokens}"
+    )
+    return order
+
+
+def extract_documents(
+    paths: List[str],
+    tenant_id=None,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> List[Any]:
+    """
+    Extract several order documents concurrently.
+
+    Every extraction goes through the model gateway, which caps requests in flight
+    and applies the tenant's rate limit, so the pool only has to keep it fed.
+    Run it from a Celery task: a batch takes longer than a web request may.
+
+    Args:
+        paths: Local paths of the PDFs
+        tenant_id: Tenant whose rate limit the model calls count against
+        max_workers: Threads extracting at once, defaults to LLM_MAX_CONCURRENCY
+        progress: Called from the calling thread with the number of documents done
+
+    Returns:
+        One entry per path, in order: the `extract` tuple, or the exception it raised
+    """
+    if not paths:
+        return []
+
+    def run(path):
+        try:
+            return extract(path, tenant_id=tenant_id)
+        except Exception as e:
+            return e
+        finally:
+            # extract() reads templates and writes route logs; the thread's connection dies with it
+            connections.close_all()
+
+    workers = min(len(paths), max_workers or settings.LLM_MAX_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="order-extract") as pool:
+        futures = [pool.submit(run, path) for path in paths]
+        for done, _ in enumerate(as_completed(futures), 1):
+            if progress:
+                progress(done)
+        return [future.result() for future in futures]
+
+
+def create_orders(tenant: Tenant, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Create the orders for a batch of extracted documents with batched inserts.
+
+    Customers, Orders, StatusHistory and UsageLog rows are each written with a single
+    bulk_create, and the usage period is updated once. Documents that cannot become
+    an order (duplicate order number, no customer email) are reported and skipped.
+
+    Args:
+        tenant: Tenant instance
+        documents: Dicts with name, s3_key, order_details, token_usage, pages and
+            file_size_mb for each extracted document
+
+    Returns:
+        One dict per document, in order, with name and either order or error
+    """
+    results = [{"name": document["name"], "order": None, "error": None} for document in documents]
+    quota_service = QuotaService(tenant)
+
+    # bulk_create skips the pre_save quota signal, so check storage here
+    if quota_service.storage_used_mb > quota_service.get_limit("storage_limit_mb"):
+        raise ValidationError("Storage limit exceeded")
+
+    with transaction.atomic():
+        # Order numbers printed on the documents must stay unique
+        numbers = [
+            document["order_details"].get("order_info", {}).get("order_id")
+            for document in documents
+        ]
+        taken = set(
+            Order.objects.filter(order_number__in=[n for n in numbers if n])
+            .values_list("order_number", flat=True)
+        )
+
+        emails = set()
+        for result, document, number in zip(results, documents, numbers):
+            email = document["order_details"].get("customer_details", {}).get("customer_email")
+            if number and number in taken:
+                result["error"] = f"Order number {number} already exists"
+            elif not email:
+                result["error"] = "No customer email found in the document"
+            else:
+                if number:
+                    taken.add(number)
+                emails.add(email)
+
+        # Reuse existing customers and create the rest in one insert
+        customers = {}
+        for customer in Customer.objects.filter(tenant=tenant, email__in=emails):
+            customers.setdefault(customer.email, customer)
+        new_customers = []
+        for result, document in zip(results, documents):
+            if result["error"]:
+                continue
+            order_details = document["order_details"]
+            customer_data = order_details.get("customer_details", {})
+            email = customer_data.get("customer_email")
+            if email not in customers:
+                customers[email] = Customer(
+                    tenant=tenant,
+                    email=email,
+                    name=customer_data.get("customer_name"),
+                    phone=get_customer_phone(order_details),
+                    address=customer_data.get("customer_address"),
+                )
+                new_customers.append(customers[email])
+        Customer.objects.bulk_create(new_customers)
+
+        orders = []
+        for result, document in zip(results, documents):
+            if result["error"]:
+                continue
+            order_details = document["order_details"]
+            email = order_details.get("customer_details", {}).get("customer_email")
+            result["order"] = build_order(
+                order_details,
+                tenant,
+                document["s3_key"],
+                customers[email],
+                document["token_usage"],
+                document["pages"],
+            )
+            orders.append(result["order"])
+
+        # bulk_create bypasses Order.save(), so number the orders up front
+        unnumbered = [order for order in orders if not order.order_number]
+        if unnumbered:
+            sequences = TenantSequence.get_next_sequences(
+                tenant, SequenceType.ORDER, len(unnumbered)
+            )
+            for order, sequence in zip(unnumbered, sequences):
+                order.order_number = Order.format_order_number(sequence)
+        Order.objects.bulk_create(orders)
+        for s3_key, count in Counter(order.pdf for order in orders).items():
+            retain(tenant, s3_key, count)  # Order.pdf
+
+        order_type = ContentType.objects.get_for_model(Order)
+        StatusHistory.objects.bulk_create([
+            StatusHistory(
+                content_type=order_type,
+                object_id=order.id,
+                old_status="",
+                new_status=OrderStatus.PENDING,
+                tenant=tenant,
+            )
+            for order in orders
+        ])
+
+        usage_logs = []
+        total_tokens = 0
+        total_storage_mb = 0
+        for result, document in zip(results, documents):
+            if not result["order"]:
+                continue
+            tokens = document["token_usage"].get("total_tokens", 0)
+            storage_mb = document["file_size_mb"]
+            usage_logs.append(
+                UsageLog(
+                    tenant=tenant,
+                    usage_period=quota_service.usage_period,
+                    feature="order_processing",
+                    tokens_used=tokens,
+                    storage_delta_mb=storage_mb,
+                    content_type=order_type,
+                    object_id=result["order"].id,
+                )
+            )
+            total_tokens += tokens
+            total_storage_mb += storage_mb
+        UsageLog.objects.bulk_create(usage_logs)
+
+        quota_service.usage_period.orders_processed += len(orders)
+        quota_service.usage_period.tokens_used += total_tokens
+        quota_service.usage_period.storage_used_mb += total_storage_mb
+        quota_service.usage_period.save()
+
+    logger.info(
+        f"👌Created {len(orders)} of {len(documents)} orders "
+        f"({len(new_customers)} new customers), Tokens: {total_tokens}, "
+        f"Total storage: {total_storage_mb}MB"
+    )
+    return results
+
+
 def parse_date(date_str: Optional[str]) -> Optional[datetime]:
     """
     Parse date string to datetime object.
@@ -229,40 +605,18 @@ def parse_date(date_str: Optional[str]) -> Optional[datetime]:
 def get_available_drivers(tenant: Tenant, start_date: datetime, end_date: datetime) -> Dict[UUID, Driver]:
     """
     Get drivers available for assignment during specified period.
-    Uses SELECT FOR UPDATE to prevent race conditions.
+
+    The result is advisory: on PostgreSQL the assignment EXCLUDE constraints
+    reject a double booking when it is saved, so nothing is locked. Other
+    databases fall back to locking the drivers with SELECT FOR UPDATE.
     """
-    from fleet.models import Driver, EmploymentStatus, DutyStatus
-    from dispatch.models import DriverTruckAssignment, AssignmentStatus
+    from dispatch.availability import free_drivers
+    from dispatch.models import overlap_is_enforced
     
     with transaction.atomic():
-        # Get all active drivers for the tenant with locking
-        available_drivers = Driver.objects.select_for_update().filter(
-            tenant=tenant,
-            is_active=True,
-            driveremployment__employment_status=EmploymentStatus.ACTIVE,
-            driveremployment__duty_status__in=[DutyStatus.AVAILABLE, DutyStatus.ON_DUTY]
-        ).select_related('driveremployment', 'carrier')
-        
-        # Filter out drivers with conflicting assignments
-        if end_date:
-            conflicting_driver_ids = DriverTruckAssignment.objects.filter(
-                driver__in=available_drivers,
-                status__in=[AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY],
-                start_date__lt=end_date,
-                end_date__gt=start_date,
-                is_active=True
-            ).values_list('driver_id', flat=True)
-        else:
-            # For open-ended assignments, check for any active assignments
-            conflicting_driver_ids = DriverTruckAssignment.objects.filter(
-                driver__in=available_drivers,
-                status__in=[AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY],
-                end_date__isnull=True,
-                is_active=True
-            ).values_list('driver_id', flat=True)
-        
-        # Exclude drivers with conflicts
-        available_drivers = available_drivers.exclude(id__in=conflicting_driver_ids)
+        available_drivers = free_drivers(tenant, start_date, end_date).select_related('driveremployment', 'carrier')
+        if not overlap_is_enforced():
+            available_drivers = available_drivers.select_for_update()
         
         # Check driver qualifications and license validity
         qualified_drivers = {}
@@ -279,40 +633,18 @@ def get_available_drivers(tenant: Tenant, start_date: datetime, end_date: dateti
 def get_available_trucks(tenant: Tenant, start_date: datetime, end_date: datetime) -> Dict[UUID, Truck]:
     """
     Get trucks available for assignment during specified period.
-    Uses SELECT FOR UPDATE to prevent race conditions.
+
+    The result is advisory: on PostgreSQL the assignment EXCLUDE constraints
+    reject a double booking when it is saved, so nothing is locked. Other
+    databases fall back to locking the trucks with SELECT FOR UPDATE.
     """
-    from fleet.models import Truck, TruckStatus, TruckDutyStatus
-    from dispatch.models import DriverTruckAssignment, AssignmentStatus
+    from dispatch.availability import free_trucks
+    from dispatch.models import overlap_is_enforced
     
     with transaction.atomic():
-        # Get all active trucks for the tenant with locking
-        available_trucks = Truck.objects.select_for_update().filter(
-            tenant=tenant,
-            is_active=True,
-            status=TruckStatus.ACTIVE,
-            duty_status__in=[TruckDutyStatus.AVAILABLE, TruckDutyStatus.ON_DUTY]
-        ).select_related('carrier')
-        
-        # Filter out trucks with conflicting assignments
-        if end_date:
-            conflicting_truck_ids = DriverTruckAssignment.objects.filter(
-                truck__in=available_trucks,
-                status__in=[AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY],
-                start_date__lt=end_date,
-                end_date__gt=start_date,
-                is_active=True
-            ).values_list('truck_id', flat=True)
-        else:
-            # For open-ended assignments, check for any active assignments
-            conflicting_truck_ids = DriverTruckAssignment.objects.filter(
-                truck__in=available_trucks,
-                status__in=[AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY],
-                end_date__isnull=True,
-                is_active=True
-            ).values_list('truck_id', flat=True)
-        
-        # Exclude trucks with conflicts
-        available_trucks = available_trucks.exclude(id__in=conflicting_truck_ids)
+        available_trucks = free_trucks(tenant, start_date, end_date).select_related('carrier')
+        if not overlap_is_enforced():
+            available_trucks = available_trucks.select_for_update()
         
         # Return as dictionary for easy lookup
         return {truck.id: truck for truck in available_trucks}
@@ -320,7 +652,11 @@ def get_available_trucks(tenant: Tenant, start_date: datetime, end_date: datetim
 
 def check_resource_availability_with_lock(driver_id: UUID, truck_id: UUID, start_date: datetime, end_date: datetime = None, exclude_assignment_id: UUID = None) -> Tuple[bool, str]:
     """
-    Check if driver and truck are available for assignment with database locking.
+    Check if driver and truck are available for assignment.
+
+    On PostgreSQL this is a plain read that gives the form an early answer;
+    the assignment EXCLUDE constraints decide when the assignment is saved.
+    Other databases lock the driver and truck rows while checking.
     
     Args:
         driver_id: UUID of the driver
@@ -333,13 +669,17 @@ def check_resource_availability_with_lock(driver_id: UUID, truck_id: UUID, start
         Tuple of (is_available: bool, reason: str)
     """
     from fleet.models import Driver, Truck
-    from dispatch.models import DriverTruckAssignment, AssignmentStatus
+    from dispatch.availability import overlapping_assignments
+    from dispatch.models import overlap_is_enforced
     
     with transaction.atomic():
         try:
-            # Lock the driver and truck records
-            driver = Driver.objects.select_for_update().get(id=driver_id)
-            truck = Truck.objects.select_for_update().get(id=truck_id)
+            drivers, trucks = Driver.objects.all(), Truck.objects.all()
+            if not overlap_is_enforced():
+                # Lock the driver and truck records
+                drivers, trucks = drivers.select_for_update(), trucks.select_for_update()
+            driver = drivers.get(id=driver_id)
+            truck = trucks.get(id=truck_id)
             
             # Check driver qualification for truck
             is_qualified, reason = driver.is_qualified_for_truck(truck)
@@ -347,42 +687,16 @@ def check_resource_availability_with_lock(driver_id: UUID, truck_id: UUID, start
                 return False, reason
             
             # Check for conflicting assignments
-            conflict_filter = {
-                'status__in': [AssignmentStatus.ASSIGNED, AssignmentStatus.ON_DUTY],
-                'is_active': True
-            }
-            
-            if end_date:
-                conflict_filter.update({
-                    'start_date__lt': end_date,
-                    'end_date__gt': start_date
-                })
-            else:
-                conflict_filter.update({
-                    'start_date__gte': start_date,
-                    'end_date__isnull': True
-                })
+            overlapping = overlapping_assignments(start_date, end_date, exclude=exclude_assignment_id)
             
             # Check driver conflicts
-            driver_conflicts = DriverTruckAssignment.objects.filter(
-                driver=driver,
-                **conflict_filter
-            )
-            
-            if exclude_assignment_id:
-                driver_conflicts = driver_conflicts.exclude(id=exclude_assignment_id)
+            driver_conflicts = overlapping.filter(driver=driver)
                 
             if driver_conflicts.exists():
                 return False, f"Driver {driver.get_full_name()} has conflicting assignments"
             
             # Check truck conflicts  
-            truck_conflicts = DriverTruckAssignment.objects.filter(
-                truck=truck,
-                **conflict_filter
-            )
-            
-            if exclude_assignment_id:
-                truck_conflicts = truck_conflicts.exclude(id=exclude_assignment_id)
+            truck_conflicts = overlapping.filter(truck=truck)
                 
             if truck_conflicts.exists():
                 return False, f"Truck {truck.unit} has conflicting assignments"
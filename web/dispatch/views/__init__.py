@@ -29,7 +29,8 @@ from .assignment import (
     AssignmentUpdateView,
     AssignmentDeleteView,
 )
-from .invoice import DispatchInvoiceView
+from .invoice import DispatchInvoiceView, DispatchInvoicePDFView, DispatchBulkInvoiceView
+from .planner import AutoDispatchView
 
 __all__ = [
     'OrderListView',
@@ -51,6 +52,9 @@ __all__ = [
     'DispatchUpdateView',
     'DispatchDeleteView',
     'DispatchInvoiceView',
+    'DispatchInvoicePDFView',
+    'DispatchBulkInvoiceView',
+    'AutoDispatchView',
     'AssignmentListView',
     'AssignmentDetailView',
     'AssignmentCreateView',
@@ -5,14 +5,22 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
-from dispatch.models import Order, Trip, UploadFile, DriverTruckAssignment, AssignmentStatus, TripStatus
+from dispatch.models import Dispatch, Order, Trip, UploadFile, DriverTruckAssignment, AssignmentStatus, TripStatus
 from dispatch.forms import FileUploadForm
 from contrib.aws import s3_utils
 import os
 import secrets
 from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
 from django.utils import timezone
-from fleet.models import Driver, Truck
+from contrib.blobstore import store_file
+from contrib.queries import query_budget
+from subscriptions.models import QuotaService
+from dispatch.availability import snapshot
+from dispatch.invoices import bulk_status_key, invoice_status_key
+from dispatch.tasks import batch_status_key, process_order_upload, upload_status_key, UPLOAD_STATUS_TIMEOUT
+from dispatch.utils import process_order_document
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -55,99 +63,34 @@ def order_extract(request):
             for chunk in file.chunks():
                 destination.write(chunk)
 
-        # Create upload file record
-        uploaded_file = UploadFile.objects.create(
-            file=file,
-            tenant=tenant,
-            uploaded_by=request.user,
-        )
-        logger.info(f"Created UploadFile record: {uploaded_file.id}")
-
-        # Upload to S3
-        s3_key = f"{settings.ENV}/{tenant.id}/orders/{filename}"
-        logger.info(f"s3_key: {s3_key}")
-        s3_upload_success = s3_utils.upload_file(
-            filepath,
-            s3_key,
-        )
-        logger.info(f"s3_upload_success: {s3_upload_success}")
-
-        if not s3_upload_success:
-            return JsonResponse({"error": "Failed to upload file to S3"}, status=500)
-
         try:
-            # Process the PDF file synchronously
-            logger.info(f"Starting PDF processing for file: {filename}")
-            
-            # Create tmp directory if it doesn't exist
-            tmp_dir = os.path.join(settings.BASE_DIR, "tmp", "documents")
-            os.makedirs(tmp_dir, exist_ok=True)
-            
-            # Download from S3 to process
-            local_path = os.path.join(tmp_dir, f"{secrets.token_urlsafe(6)}_{filename}")
-            logger.info(f"Downloading file from S3: {s3_key}")
-            s3_download_success = s3_utils.download_file(s3_key, local_path)
-            logger.info(f"s3_download_success: {s3_download_success}")
-            
-            if not s3_download_success:
-                raise Exception(f"Failed to download file from S3: {s3_key}")
-
-            # Get quota service for the tenant
-            quota_service = QuotaService(tenant)
-
-            # Calculate file size for quota
-            file_size_mb = round(os.path.getsize(local_path) / (1024 * 1024), 3)
-            logger.info(f"Processing file of size: {file_size_mb}MB")
-
-            # Extract data from the file
-            logger.info("Starting PDF extraction")
-            order_details, token_usage, pages = extract(local_path)
-            total_tokens = token_usage.get("total_tokens", 0)
-            logger.info(f"Extraction completed with {total_tokens} tokens used")
-
-            # Create order
-            logger.info("Creating order from extracted data")
-            order = map_order(order_details, tenant, s3_key)
-            
-            if not order:
-                raise ValidationError("Failed to create order")
-
-            # Calculate total storage including extracted text
-            total_storage_mb = file_size_mb + round(
-                len(pages.encode("utf-8")) / (1024 * 1024), 3
+            # Store the PDF once per tenant; identical re-uploads reuse the blob
+            blob, created = store_file(
+                tenant,
+                filepath,
+                filename,
+                content_type=file.content_type,
+                references=1,  # UploadFile.file; the order takes its own once created
             )
+            s3_key = blob.s3_key
+            logger.info(f"s3_key: {s3_key} (new blob: {created})")
 
-            # Create usage log
-            UsageLog.objects.create(
+            # Create upload file record
+            uploaded_file = UploadFile.objects.create(
+                file=s3_key,
                 tenant=tenant,
-                usage_period=quota_service.usage_period,
-                feature="order_processing",
-                tokens_used=total_tokens,
-                storage_delta_mb=total_storage_mb,
-                content_type=ContentType.objects.get_for_model(Order),
-                object_id=order.id,
+                uploaded_by=request.user,
             )
+            logger.info(f"Created UploadFile record: {uploaded_file.id}")
 
-            # Update usage period totals
-            quota_service.usage_period.orders_processed += 1
-            quota_service.usage_period.tokens_used += total_tokens
-            quota_service.usage_period.storage_used_mb += total_storage_mb
-            quota_service.usage_period.save()
-
-            logger.info(
-                f"Successfully processed order {order.id}. "
-                f"File size: {file_size_mb}MB, Text size: {round(len(pages.encode('utf-8')) / (1024 * 1024), 3)}MB, "
-                f"Total storage: {total_storage_mb}MB, Tokens: {total_tokens}"
+            # Process the PDF file synchronously
+            logger.info(f"Starting PDF processing for file: {filename}")
+            order = process_order_document(
+                filepath, tenant, s3_key, count_file_storage=created
             )
 
-            # Cleanup temporary files
-            try:
-                if os.path.exists(local_path):
-                    os.remove(local_path)
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-            except Exception as e:
-                logger.warning(f"Failed to cleanup temporary files: {str(e)}")
+            uploaded_file.order = order
+            uploaded_file.save(update_fields=["order", "updated_at"])
 
             # Return success response with extracted data
             return JsonResponse({
@@ -170,17 +113,15 @@ def order_extract(request):
             })
 
         except Exception as e:
-            # Clean up files in case of error
+            logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
+            return JsonResponse({"error": f"Failed to process PDF: {str(e)}"}, status=500)
+
+        finally:
             try:
-                if os.path.exists(local_path):
-                    os.remove(local_path)
                 if os.path.exists(filepath):
                     os.remove(filepath)
-            except Exception as cleanup_error:
-                logger.warning(f"Failed to cleanup files after error: {str(cleanup_error)}")
-            
-            logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
-            return JsonResponse({"error": f"Failed to process PDF: {str(e)}"}, status=500)
+            except Exception as e:
+                logger.warning(f"Failed to cleanup temporary files: {str(e)}")
 
     except ValidationError as e:
         return JsonResponse({"error": str(e)}, status=400)
@@ -188,6 +129,158 @@ def order_extract(request):
         logger.error(f"Error processing upload: {str(e)}", exc_info=True)
         return JsonResponse({"error": "An unexpected error occurred"}, status=500)
 
+@login_required
+@require_http_methods(["POST"])
+def order_upload_presign(request):
+    """Issue a quota-checked presigned POST for a direct browser-to-S3 upload."""
+    try:
+        filename = os.path.basename(request.POST.get("filename", "")).strip()
+        content_type = request.POST.get("content_type") or "application/pdf"
+        try:
+            size = int(request.POST.get("size", 0))
+        except ValueError:
+            return JsonResponse({"error": "Invalid file size"}, status=400)
+
+        if not filename:
+            return JsonResponse({"error": "No files were selected"}, status=400)
+
+        file_ext = os.path.splitext(filename)[1].lower()
+        if file_ext not in FileUploadForm.ALLOWED_EXTENSIONS or content_type not in FileUploadForm.ALLOWED_MIME_TYPES:
+            return JsonResponse(
+                {"error": f"Invalid file type. Allowed types: {', '.join(FileUploadForm.ALLOWED_EXTENSIONS)}"},
+                status=400,
+            )
+
+        max_size = settings.DIRECT_UPLOAD_MAX_SIZE
+        if size <= 0 or size > max_size:
+            return JsonResponse(
+                {"error": f"File size cannot exceed {max_size / (1024 * 1024):.0f}MB"},
+                status=400,
+            )
+
+        tenant = request.user.profile.tenant
+        quota_service = QuotaService(tenant)
+        allowed, message = quota_service.check_usage(
+            "order_processing", storage_mb=round(size / (1024 * 1024), 3)
+        )
+        if not allowed:
+            return JsonResponse({"error": message}, status=403)
+
+        upload_id = secrets.token_urlsafe(16)
+        s3_key = f"{settings.ENV}/{tenant.id}/orders/{secrets.token_urlsafe(6)}_{filename}"
+        presigned = s3_utils.generate_presigned_post(
+            s3_key,
+            max_size=size,
+            content_type=content_type,
+            expiration=settings.DIRECT_UPLOAD_EXPIRATION,
+        )
+        if not presigned:
+            return JsonResponse({"error": "Failed to prepare upload"}, status=500)
+
+        # Remember what was issued so the completion callback cannot be pointed elsewhere
+        cache.set(
+            f"order_upload_{upload_id}",
+            {
+                "tenant_id": str(tenant.id),
+                "user_id": request.user.id,
+                "s3_key": s3_key,
+                "size": size,
+            },
+            timeout=settings.DIRECT_UPLOAD_EXPIRATION * 2,
+        )
+        logger.info(f"Issued direct upload {upload_id} for {s3_key}")
+
+        return JsonResponse({
+            "upload_id": upload_id,
+            "url": presigned["url"],
+            "fields": presigned["fields"],
+        })
+
+    except ValidationError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.error(f"Error issuing presigned upload: {str(e)}", exc_info=True)
+        return JsonResponse({"error": "An unexpected error occurred"}, status=500)
+
+@login_required
+@require_http_methods(["POST"])
+def order_upload_complete(request):
+    """Record a finished direct upload and queue it for extraction."""
+    try:
+        upload_id = request.POST.get("upload_id")
+        pending = cache.get(f"order_upload_{upload_id}") if upload_id else None
+        tenant = request.user.profile.tenant
+
+        if not pending or pending["tenant_id"] != str(tenant.id):
+            return JsonResponse({"error": "Upload not found or expired"}, status=404)
+
+        s3_key = pending["s3_key"]
+        size = s3_utils.get_file_size(s3_key)
+        if size is None:
+            return JsonResponse({"error": "File was not uploaded to S3"}, status=400)
+        if size > pending["size"]:
+            return JsonResponse({"error": "Uploaded file does not match the requested size"}, status=400)
+
+        # Each presigned upload can only be completed once
+        cache.delete(f"order_upload_{upload_id}")
+
+        uploaded_file = UploadFile.objects.create(
+            file=s3_key,
+            tenant=tenant,
+            uploaded_by=request.user,
+        )
+        logger.info(f"Created UploadFile record: {uploaded_file.id}")
+
+        cache.set(upload_status_key(upload_id), {"status": "QUEUED"}, timeout=UPLOAD_STATUS_TIMEOUT)
+        process_order_upload.delay(upload_id, str(uploaded_file.id))
+
+        return JsonResponse({
+            "upload_id": upload_id,
+            "status": "QUEUED",
+            "status_url": reverse("dispatch:api_order_upload_status", kwargs={"upload_id": upload_id}),
+        }, status=202)
+
+    except Exception as e:
+        logger.error(f"Error completing direct upload: {str(e)}", exc_info=True)
+        return JsonResponse({"error": "An unexpected error occurred"}, status=500)
+
+@login_required
+@require_http_methods(["GET"])
+def order_upload_status(request, upload_id):
+    """Report the extraction status of a direct upload."""
+    status = cache.get(upload_status_key(upload_id))
+    if not status:
+        return JsonResponse({"error": "Upload not found or expired"}, status=404)
+
+    if status.get("order_id"):
+        status = {
+            **status,
+            "redirect_url": reverse("dispatch:order_detail", kwargs={"pk": status["order_id"]}),
+        }
+    return JsonResponse(status)
+
+
+@login_required
+@require_http_methods(["GET"])
+def order_batch_status(request, batch_id):
+    """Report the progress of a batch of uploaded orders, with links once done."""
+    status = cache.get(batch_status_key(batch_id))
+    if not status or status.get("tenant_id") != str(request.user.profile.tenant.id):
+        return JsonResponse({"error": "Batch not found or expired"}, status=404)
+
+    response = {key: value for key, value in status.items() if key != "tenant_id"}
+    if "results" in status:
+        response["results"] = [
+            {
+                **result,
+                "redirect_url": reverse("dispatch:order_detail", kwargs={"pk": result["order_id"]}),
+            }
+            if result.get("order_id")
+            else result
+            for result in status["results"]
+        ]
+    return JsonResponse(response)
+
 @login_required
 @require_http_methods(["POST"])
 def order_validate(request):
@@ -374,10 +467,12 @@ def assignment_status_update(request):
             'error': 'Internal server error'
         }, status=500)
 
+# A cache miss also writes the snapshot to the database cache (5 queries)
+@query_budget(13)
 @login_required
 @require_http_methods(["GET"])
 def available_resources(request):
-    """Get available drivers and trucks for assignment."""
+    """Get available drivers and trucks for assignment (see dispatch.availability)."""
     try:
         tenant = request.user.profile.tenant
         
@@ -412,65 +507,34 @@ def available_resources(request):
             except ValueError:
                 return JsonResponse({"error": "Invalid date format"}, status=400)
         
-        # Get all active drivers with correct case for status values
-        drivers = Driver.objects.filter(
-            tenant=tenant,
-            is_active=True,
-            driveremployment__employment_status='active',
-            driveremployment__duty_status='available'
-        ).select_related('carrier', 'driveremployment')
-        
-        # Get all active trucks with correct case for status values
-        trucks = Truck.objects.filter(
-            tenant=tenant,
-            status='active',
-            is_active=True,
-            duty_status='available'
-        ).select_related('carrier')
-        
-        # Exclude drivers and trucks that have conflicting assignments
-        if end_date:
-            conflicting_assignments = DriverTruckAssignment.objects.filter(
-                tenant=tenant,
-                status__in=['assigned', 'on_duty'],  # Fix case for assignment status
-                start_date__lt=end_date,
-                end_date__gt=start_date
-            )
-        else:
-            conflicting_assignments = DriverTruckAssignment.objects.filter(
-                tenant=tenant,
-                status__in=['assigned', 'on_duty'],  # Fix case for assignment status
-                start_date__lt=start_date + timezone.timedelta(days=365),  # Default to one year
-                end_date__gt=start_date
-            )
-            
-        busy_driver_ids = conflicting_assignments.values_list('driver_id', flat=True)
-        busy_truck_ids = conflicting_assignments.values_list('truck_id', flat=True)
-        
-        available_drivers = drivers.exclude(id__in=busy_driver_ids)
-        available_trucks = trucks.exclude(id__in=busy_truck_ids)
-        
+        if timezone.is_naive(start_date):
+            start_date = timezone.make_aware(start_date)
+        if end_date and timezone.is_naive(end_date):
+            end_date = timezone.make_aware(end_date)
+
+        free = snapshot(tenant, start_date, end_date)
+
         # Prepare response data with carrier information
         driver_data = [{
-            'id': str(driver.id),
-            'first_name': driver.first_name,
-            'last_name': driver.last_name,
+            'id': str(driver['id']),
+            'first_name': driver['first_name'],
+            'last_name': driver['last_name'],
             'carrier': {
-                'id': str(driver.carrier.id),
-                'name': driver.carrier.name
-            } if driver.carrier else None
-        } for driver in available_drivers]
+                'id': str(driver['carrier_id']),
+                'name': driver['carrier__name']
+            } if driver['carrier_id'] else None
+        } for driver in free['drivers']]
         
         truck_data = [{
-            'id': str(truck.id),
-            'unit': truck.unit,
-            'make': truck.make,
-            'model': truck.model,
+            'id': str(truck['id']),
+            'unit': truck['unit'],
+            'make': truck['make'],
+            'model': truck['model'],
             'carrier': {
-                'id': str(truck.carrier.id),
-                'name': truck.carrier.name
-            } if truck.carrier else None
-        } for truck in available_trucks]
+                'id': str(truck['carrier_id']),
+                'name': truck['carrier__name']
+            } if truck['carrier_id'] else None
+        } for truck in free['trucks']]
         
         return JsonResponse({
             'drivers': driver_data,
@@ -479,4 +543,34 @@ def available_resources(request):
         
     except Exception as e:
         logger.error(f"Error fetching available resources: {str(e)}", exc_info=True)
-        return JsonResponse({"error": "An unexpected error occurred"}, status=500)
\ No newline at end of file
+        return JsonResponse({"error": "An unexpected error occurred"}, status=500)
+
+
+@login_required
+@require_http_methods(["GET"])
+def dispatch_invoice_status(request, pk):
+    """Report the rendering status of a dispatch's invoice PDF."""
+    if not Dispatch.objects.filter(pk=pk, tenant=request.user.profile.tenant).exists():
+        return JsonResponse({"error": "Dispatch not found"}, status=404)
+
+    status = cache.get(invoice_status_key(pk))
+    if not status:
+        return JsonResponse({"error": "No invoice is being generated"}, status=404)
+
+    status = {key: value for key, value in status.items() if key != "s3_key"}
+    if status["status"] == "COMPLETED":
+        status["download_url"] = reverse("dispatch:dispatch_invoice_pdf", kwargs={"pk": pk})
+    return JsonResponse(status)
+
+@login_required
+@require_http_methods(["GET"])
+def bulk_invoice_status(request, job_id):
+    """Report the status of a bulk invoicing job, with a download link once done."""
+    status = cache.get(bulk_status_key(job_id))
+    if not status or status.get("tenant_id") != str(request.user.profile.tenant.id):
+        return JsonResponse({"error": "Job not found or expired"}, status=404)
+
+    response = {key: value for key, value in status.items() if key not in ["tenant_id", "s3_key"]}
+    if status["status"] == "COMPLETED":
+        response["download_url"] = s3_utils.generate_presigned_url(status["s3_key"])
+    return JsonResponse(response)
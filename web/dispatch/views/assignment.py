@@ -19,11 +19,14 @@ from dispatch.models import (
     DispatchStatus
 )
 from dispatch.forms import AssignmentForm
+from contrib.pagination import CursorPaginationMixin
+from contrib.queries import query_budget
 import logging
 
 logger = logging.getLogger(__name__)
 
-class AssignmentListView(LoginRequiredMixin, ListView):
+@query_budget(10)
+class AssignmentListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = DriverTruckAssignment
     template_name = 'assignment/list.html'
     context_object_name = 'assignments'
@@ -35,10 +38,9 @@ class AssignmentListView(LoginRequiredMixin, ListView):
         queryset = DriverTruckAssignment.objects.filter(
             tenant=self.request.user.profile.tenant
         ).select_related(
-            'driver',
-            'truck',
-            'dispatch',
-            'dispatch__order'
+            # Driver.__str__ shows the employment status
+            'driver__driveremployment',
+            'truck'
         )
 
         # Add search functionality
@@ -228,6 +230,11 @@ class AssignmentCreateView(LoginRequiredMixin, CreateView):
                 messages.success(self.request, "Assignment created successfully!")
                 return super().form_valid(form)
 
+        except ValidationError as e:
+            # Includes a driver or truck booked by a concurrent request
+            logger.warning(f"[AssignmentCreateView.form_valid] Assignment rejected: {e.messages}")
+            form.add_error(None, e)
+            return self.form_invalid(form)
         except Exception as e:
             logger.error(f"[AssignmentCreateView.form_valid] Error creating assignment: {str(e)}", exc_info=True)
             form.add_error(None, f"Error creating assignment: {str(e)}")
@@ -1,11 +1,9 @@
 import logging
 import json
 from collections import Counter
-from django.template.loader import render_to_string
-from django.template import TemplateDoesNotExist
 from django.utils import timezone
 from django.db import transaction, models
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponseRedirect
 from django.contrib import messages
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse_lazy
@@ -16,8 +14,8 @@ from django_tables2 import SingleTableView
 from django.views.generic.edit import UpdateView
 from django import forms
 from django.core.serializers.json import DjangoJSONEncoder
+from django.core.cache import cache
 from models.models import Currency
-from weasyprint import HTML, CSS
 from django.db.models import Sum
 from dispatch.models import (
     Order,
@@ -31,6 +29,11 @@ from dispatch.models import (
 )
 from fleet.models import Customer, Driver, Truck, Carrier
 from contrib.aws import s3_utils
+from contrib.pagination import CursorPaginationMixin
+from contrib.tables import EagerLoadingTableMixin
+from contrib.queries import query_budget
+from ..invoices import INVOICE_STATUS_TIMEOUT, get_organization, invoice_status_key
+from ..tasks import render_invoice
 from ..forms import DispatchForm, DispatchDetailForm
 from ..tables import DispatchTable
 
@@ -276,34 +279,17 @@ class DispatchCreateView(LoginRequiredMixin, CreateView):
         return super().post(request, *args, **kwargs)
 
 
-class DispatchListView(LoginRequiredMixin, SingleTableView):
+@query_budget(14)
+class DispatchListView(LoginRequiredMixin, EagerLoadingTableMixin, CursorPaginationMixin, SingleTableView):
     model = Dispatch
     table_class = DispatchTable
     template_name = "dispatch/list.html"
     paginate_by = 10
 
     def get_queryset(self):
-        """Optimized queryset with proper relationships loaded"""
+        """Dispatches of the tenant; DispatchTable declares the relations it shows"""
         return Dispatch.objects.filter(
             tenant=self.request.user.profile.tenant
-        ).select_related(
-            'order',
-            'order__customer', 
-            'trip',
-            'trip__order',
-            'customer',
-            'driver',
-            'driver__driveremployment',
-            'truck',
-            'truck__carrier',
-            'carrier',
-            'tenant'
-        ).prefetch_related(
-            'assignments',
-            'assignments__driver',
-            'assignments__truck',
-            'status_history',
-            'notifications'
         ).order_by("-created_at")
 
     def get_table(self, **kwargs):
@@ -376,8 +362,19 @@ class DispatchDetailView(UserPassesTestMixin, DetailView):
             DispatchStatus.CANCELLED,
         ]
 
+        # Invoice download, and whether a render is still running
+        context["is_invoiced"] = dispatch.status in [
+            DispatchStatus.INVOICED,
+            DispatchStatus.PAYMENT_RECEIVED,
+            DispatchStatus.COMPLETED,
+        ]
+        invoice_status = cache.get(invoice_status_key(dispatch.pk)) or {}
+        context["invoice_pending"] = invoice_status.get("status") in ["QUEUED", "PROCESSING"]
+
         # Add URL names to context for template use
         context["dispatch_list_url"] = reverse_lazy("dispatch:dispatch_list")
+        context["invoice_pdf_url"] = reverse_lazy("dispatch:dispatch_invoice_pdf", kwargs={"pk": dispatch.pk})
+        context["invoice_status_url"] = reverse_lazy("dispatch:api_dispatch_invoice_status", kwargs={"pk": dispatch.pk})
         context["dispatch_detail_url"] = reverse_lazy("dispatch:dispatch_detail", kwargs={"pk": dispatch.pk})
         context["dispatch_update_url"] = reverse_lazy("dispatch:dispatch_update", kwargs={"pk": dispatch.pk})
         context["dispatch_delete_url"] = reverse_lazy("dispatch:dispatch_delete", kwargs={"pk": dispatch.pk})
@@ -403,13 +400,6 @@ class DispatchDetailView(UserPassesTestMixin, DetailView):
                 )
                 return redirect("dispatch:dispatch_detail", pk=self.object.pk)
 
-            order = get_object_or_404(
-                Order,
-                pk=self.object.order.id,
-                tenant=self.request.user.profile.tenant,
-            )
-            # Update all trips associated with this order to INVOICED status
-            Trip.objects.filter(order=order).update(status=TripStatus.INVOICED)
             return self.generate_invoice(request, self.object)
 
         # Handle form submission
@@ -469,7 +459,10 @@ class DispatchDetailView(UserPassesTestMixin, DetailView):
 
     def generate_invoice(self, request, dispatch: Dispatch):
         """
-        Generate an invoice PDF for a dispatch and change its status to Invoiced.
+        Mark a dispatch as Invoiced and queue its invoice PDF for rendering.
+
+        The PDF is rendered by a worker and kept in S3; the detail page polls
+        until it can be downloaded.
         """
         # Validate dispatch status
         if dispatch.status != DispatchStatus.ASSIGNED:
@@ -479,117 +472,47 @@ class DispatchDetailView(UserPassesTestMixin, DetailView):
             )
             return redirect("dispatch:dispatch_detail", pk=dispatch.pk)
 
-        try:
-            # Generate unique invoice number
-            invoice_number = dispatch.dispatch_id
-
-            # Get the associated trip
-            trip = dispatch.order.trip_set.first()
-
-            # Get organization details
-            organization = organization.objects.filter(
-                tenant=request.user.profile.tenant
-            ).first()
-
-            if not organization:
-                messages.error(
-                    request,
-                    "Organization details not found. Please set up your organization first.",
-                )
-                return redirect("dispatch:dispatch_detail", pk=dispatch.pk)
-
-            # Get the order's currency
-            order_currency = (
-                dispatch.order.load_currency or "USD"
-            )  # Default to USD if not set
-
-            # Prepare context with dynamic currency
-            context = {
-                "dispatch": dispatch,
-                "invoice_number": invoice_number,
-                "date": timezone.now(),
-                "company": organization,
-                "load_total": {
-                    "amount": dispatch.order.load_total,
-                    "currency": order_currency,
-                },
-                "trip": trip,
-                "billing_info": {
-                    "commission_amount": dispatch.commission_amount,
-                    "commission_percentage": dispatch.commission_percentage,
-                    "commission_currency": dispatch.commission_currency
-                    or order_currency,
-                },
-                "customer": dispatch.customer,
-                "order": {
-                    "number": dispatch.order_number,
-                    "date": dispatch.order_date,
-                    "currency": order_currency,
-                },
-            }
-
-            # Render invoice HTML template
-            try:
-                html_string = render_to_string(
-                    "dispatch/invoice_template.html", context
-                )
-            except TemplateDoesNotExist:
-                messages.error(request, "Invoice template not found.")
-                return redirect("dispatch:dispatch_detail", pk=dispatch.pk)
-
-            # Convert to PDF using WeasyPrint
-            try:
-                html = HTML(string=html_string, base_url=request.build_absolute_uri())
+        if not get_organization(request.user.profile.tenant):
+            messages.error(
+                request,
+                "Organization details not found. Please set up your organization first.",
+            )
+            return redirect("dispatch:dispatch_detail", pk=dispatch.pk)
 
-                # Create response with PDF content
-                response = HttpResponse(content_type="application/pdf")
-                response["Content-Disposition"] = (
-                    f'attachment; filename="invoice_{invoice_number}.pdf"'
+        try:
+            with transaction.atomic():
+                old_status = dispatch.status
+                dispatch.status = DispatchStatus.INVOICED
+                # Saved as a queryset update: the transition table only allows
+                # Delivered -> Invoiced, but invoicing has always started from Assigned
+                Dispatch.objects.filter(pk=dispatch.pk).update(
+                    status=DispatchStatus.INVOICED, updated_at=timezone.now()
                 )
-
-                # Generate PDF with custom styling
-                css = CSS(
-                    string="""
-                    @page {
-                        size: letter;
-                        margin: 1.5cm;
-                        @bottom-right {
-                            content: "Page " counter(page) " of " counter(pages);
-                        }
-                    }
-                    body { font-family: Arial, sans-serif; }
-                    .invoice-header { margin-bottom: 20px; }
-                    .company-details { margin-bottom: 30px; }
-                    .billing-details { margin-bottom: 20px; }
-                    .invoice-table { width: 100%; border-collapse: collapse; }
-                    .invoice-table th, .invoice-table td {
-                        border: 1px solid #ddd;
-                        padding: 8px;
+                StatusHistory.log_status_change(
+                    obj=dispatch,
+                    old_status=old_status,
+                    new_status=DispatchStatus.INVOICED,
+                    user=request.user,
+                    metadata={
+                        'dispatch_id': dispatch.dispatch_id,
+                        'order_number': dispatch.order_number,
+                        'customer': str(dispatch.customer) if dispatch.customer else None,
                     }
-                    .invoice-total { margin-top: 20px; text-align: right; }
-                """
                 )
 
-                html.write_pdf(response, stylesheets=[css])
-
-                # Update dispatch status to Invoiced
-                dispatch.status = DispatchStatus.INVOICED
-                dispatch.save()
-
-                # Store invoice generation metadata
-                dispatch.invoice_number = invoice_number
-                dispatch.invoice_date = timezone.now()
-                dispatch.invoice_generated_by = request.user
-                dispatch.save()
-
-                messages.success(
-                    request, f"Invoice {invoice_number} generated successfully."
-                )
-                return response
+            cache.set(
+                invoice_status_key(dispatch.pk),
+                {"status": "QUEUED"},
+                timeout=INVOICE_STATUS_TIMEOUT,
+            )
+            # Queued once the status change is committed, so the worker sees it
+            transaction.on_commit(lambda: render_invoice.delay(str(dispatch.pk)))
 
-            except Exception as e:
-                messages.error(request, f"Error generating PDF: {str(e)}")
-                return redirect("dispatch:dispatch_detail", pk=dispatch.pk)
+            messages.success(
+                request,
+                f"Invoice {dispatch.dispatch_id} is being generated. The download will start when it is ready.",
+            )
+            return redirect("dispatch:dispatch_detail", pk=dispatch.pk)
 
         except Exception as e:
             messages.error(request, f"Error generating invoice: {str(e)}")
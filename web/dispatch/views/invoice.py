@@ -1,8 +1,35 @@
 """Views for handling dispatch invoices."""
 
-from django.views.generic import DetailView
+import logging
+import secrets
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
+from django.views.generic import DetailView, FormView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from dispatch.models import Dispatch
+from contrib.aws import s3_utils
+from dispatch.forms import BulkInvoiceForm
+from dispatch.invoices import (
+    INVOICE_STATUS_TIMEOUT,
+    bulk_status_key,
+    get_cached_invoice,
+    get_organization,
+    invoice_fingerprint,
+    invoice_status_key,
+)
+from dispatch.models import Dispatch, DispatchStatus
+from dispatch.tasks import generate_bulk_invoices, render_invoice
+
+logger = logging.getLogger("django")
+
+INVOICED_STATUSES = [
+    DispatchStatus.INVOICED,
+    DispatchStatus.PAYMENT_RECEIVED,
+    DispatchStatus.COMPLETED,
+]
+
 
 class DispatchInvoiceView(LoginRequiredMixin, DetailView):
     """View for generating dispatch invoices."""
@@ -28,4 +55,88 @@ class DispatchInvoiceView(LoginRequiredMixin, DetailView):
         total_amount = sum(trip.amount for trip in context["trips"] if trip.amount)
         context["total_amount"] = total_amount
         
-        return context 
\ No newline at end of file
+        return context
+
+
+class DispatchInvoicePDFView(LoginRequiredMixin, View):
+    """Download a dispatch's invoice PDF, queueing a render when no current copy exists."""
+
+    def get(self, request, pk):
+        dispatch = get_object_or_404(
+            Dispatch.objects.select_related("order", "customer", "trip", "tenant"),
+            pk=pk,
+            tenant=request.user.profile.tenant,
+        )
+        if dispatch.status not in INVOICED_STATUSES:
+            messages.error(request, "This dispatch has not been invoiced yet.")
+            return redirect("dispatch:dispatch_detail", pk=dispatch.pk)
+
+        fingerprint = invoice_fingerprint(dispatch, get_organization(dispatch.tenant))
+        s3_key = get_cached_invoice(dispatch, fingerprint)
+        if s3_key:
+            url = s3_utils.generate_presigned_url(s3_key)
+            if url:
+                return redirect(url)
+
+        # Missing or stale: render again in the background, unless already queued
+        status_key = invoice_status_key(dispatch.pk)
+        status = (cache.get(status_key) or {}).get("status")
+        if status not in ["QUEUED", "PROCESSING"]:
+            cache.set(status_key, {"status": "QUEUED"}, timeout=INVOICE_STATUS_TIMEOUT)
+            transaction.on_commit(lambda: render_invoice.delay(str(dispatch.pk)))
+
+        messages.info(
+            request,
+            f"Invoice {dispatch.dispatch_id} is being generated. The download will start when it is ready.",
+        )
+        return redirect("dispatch:dispatch_detail", pk=dispatch.pk)
+
+
+class DispatchBulkInvoiceView(LoginRequiredMixin, FormView):
+    """Invoice every matching dispatch at once and download the PDFs as one file."""
+
+    template_name = "dispatch/bulk_invoice.html"
+    form_class = BulkInvoiceForm
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["tenant"] = self.request.user.profile.tenant
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        job_id = self.request.GET.get("job")
+        if job_id:
+            context["job_id"] = job_id
+            context["job_status_url"] = reverse(
+                "dispatch:api_bulk_invoice_status", kwargs={"job_id": job_id}
+            )
+        return context
+
+    def form_valid(self, form):
+        tenant = self.request.user.profile.tenant
+        dispatch_ids = [str(pk) for pk in form.get_queryset().values_list("pk", flat=True)]
+        if not dispatch_ids:
+            messages.warning(self.request, "No dispatches ready for invoicing match these filters.")
+            return self.form_invalid(form)
+
+        job_id = secrets.token_urlsafe(12)
+        cache.set(
+            bulk_status_key(job_id),
+            {"status": "QUEUED", "tenant_id": str(tenant.id)},
+            timeout=INVOICE_STATUS_TIMEOUT,
+        )
+        generate_bulk_invoices.delay(
+            job_id,
+            str(tenant.id),
+            dispatch_ids,
+            form.cleaned_data["output"],
+            self.request.user.id,
+        )
+        logger.info(f"💫Queued bulk invoicing job {job_id} for {len(dispatch_ids)} dispatches")
+
+        messages.success(
+            self.request,
+            f"Invoicing {len(dispatch_ids)} dispatches. The download will start when it is ready.",
+        )
+        return redirect(f"{reverse('dispatch:dispatch_bulk_invoice')}?job={job_id}")
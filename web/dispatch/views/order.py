@@ -13,24 +13,28 @@ from django.views.generic.edit import UpdateView
 from django.conf import settings
 from django_tables2 import SingleTableView # type: ignore
 from dispatch.models import Order, Trip, UploadFile
-from dispatch.forms import OrderForm, FileUploadForm, OrderUpdateForm
+from dispatch.forms import OrderForm, FileUploadForm, BatchFileUploadForm, OrderUpdateForm
 from dispatch.tables import OrderTable, TripTable
 from dispatch.models import Dispatch
 from contrib.aws import s3_utils
-from django.db.models import Q
 from django.core.exceptions import ValidationError
 from django.contrib import messages
 from dispatch.models.drivertruckassignment import DriverTruckAssignment
-from subscriptions.models import QuotaService, UsageLog
+from subscriptions.models import QuotaService
 from subscriptions.signals import check_quota_thresholds
 from fleet.models import Customer
-from django.contrib.contenttypes.models import ContentType
-from ..utils import extract, map_order
+from dispatch.tasks import process_order_batch, batch_status_key, UPLOAD_STATUS_TIMEOUT
+from contrib.blobstore import store_file
+from contrib.pagination import CursorPaginationMixin
+from contrib.tables import EagerLoadingTableMixin
+from contrib.queries import query_budget
 from django.utils import timezone
-from django.db.models import F
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from dispatch.models import TripStatus, DispatchStatus, AssignmentStatus
-from fleet.models import Driver, Truck, Carrier
+from fleet.models import Driver, Truck
 from django.views.generic import View
+from django.core.cache import cache
 from django.urls import reverse
 from django.http import HttpResponseRedirect, FileResponse, HttpResponse
 from django.views.decorators.clickjacking import xframe_options_exempt
@@ -41,7 +45,14 @@ import mimetypes
 logger = logging.getLogger("django")
 
 
-class OrderListView(LoginRequiredMixin, SingleTableView):
+def count_per_order(model):
+    """Rows of model per order, for annotate(); counted only for the rows of the page."""
+    rows = model.objects.filter(order=OuterRef("pk")).order_by().values("order")
+    return Coalesce(Subquery(rows.annotate(count=Count("pk")).values("count")), 0)
+
+
+@query_budget(12)
+class OrderListView(LoginRequiredMixin, EagerLoadingTableMixin, CursorPaginationMixin, SingleTableView):
     model = Order
     table_class = OrderTable
     template_name = "order/list.html"
@@ -49,9 +60,11 @@ class OrderListView(LoginRequiredMixin, SingleTableView):
 
     def get_queryset(self):
         # Update the ordering field name here too
-        return Order.objects.filter(tenant=self.request.user.profile.tenant).order_by(
-            "-created_at"
-        )
+        # The delete modals show the counts; annotate them instead of two queries per row
+        return Order.objects.filter(tenant=self.request.user.profile.tenant).annotate(
+            dispatch_count=count_per_order(Dispatch),
+            trip_count=count_per_order(Trip),
+        ).order_by("-created_at")
 
     def get_table(self, **kwargs):
         table = super().get_table(**kwargs)
@@ -74,8 +87,13 @@ class OrderCreateView(LoginRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["upload_form"] = FileUploadForm()
+        context["upload_form"] = BatchFileUploadForm()
         context["cancel_url"] = reverse_lazy("dispatch:order_list")
+        batch_id = self.request.GET.get("batch")
+        if batch_id:
+            context["batch_status_url"] = reverse(
+                "dispatch:api_order_batch_status", kwargs={"batch_id": batch_id}
+            )
         return context
 
     def form_valid(self, form):
@@ -125,7 +143,7 @@ class OrderCreateView(LoginRequiredMixin, CreateView):
             quota_service = QuotaService(tenant)
 
             # Check storage quota
-            current_storage = quota_service.usage_period.storage_used_mb
+            current_storage = quota_service.storage_used_mb
             storage_limit = quota_service.get_limit("storage_limit_mb")
             if current_storage + file_size_mb > storage_limit:
                 messages.error(
@@ -175,10 +193,88 @@ class OrderCreateView(LoginRequiredMixin, CreateView):
             messages.error(self.request, "Error processing file upload")
             raise ValidationError(f"Error processing file: {str(e)}")
 
+    def check_batch_quota(self, files, tenant):
+        """Reject the whole batch up front rather than failing part way through"""
+        quota_service = QuotaService(tenant)
+
+        batch_size_mb = sum(self.calculate_file_size_mb(file) for file in files)
+        current_storage = quota_service.storage_used_mb
+        storage_limit = quota_service.get_limit("storage_limit_mb")
+        if current_storage + batch_size_mb > storage_limit:
+            messages.error(
+                self.request,
+                f"Storage quota would be exceeded. Current: {current_storage:.2f}MB, Limit: {storage_limit}MB",
+            )
+            raise ValidationError("Storage quota exceeded")
+
+        current_orders = quota_service.usage_period.orders_processed
+        order_limit = quota_service.get_limit("monthly_order_limit")
+        if current_orders + len(files) > order_limit:
+            messages.error(
+                self.request,
+                f"Monthly order limit would be exceeded by {len(files)} files. "
+                f"Current: {current_orders}, Limit: {order_limit}",
+            )
+            raise ValidationError("Order limit exceeded")
+
+    def process_files(self, files):
+        """Store every file and queue the batch; extraction runs in a Celery task"""
+        request = self.request
+        tenant = request.user.profile.tenant
+        uploads = []
+
+        for file in files:
+            # Handle file upload with quota checking
+            filepath, filename, content_type, file_dir = self.handle_uploaded_file(
+                file, request.user
+            )
+            try:
+                # Store the PDF once per tenant; identical re-uploads reuse the blob
+                blob, created = store_file(
+                    tenant,
+                    filepath,
+                    filename,
+                    content_type=content_type,
+                    references=1,  # UploadFile.file; create_orders takes Order.pdf's
+                )
+            finally:
+                try:
+                    if os.path.exists(filepath):
+                        os.remove(filepath)
+                except Exception as e:
+                    logger.warning(f"Failed to cleanup temporary files: {str(e)}")
+            logger.info(f"s3_key: {blob.s3_key} (new blob: {created})")
+
+            uploaded_file = UploadFile.objects.create(
+                file=blob.s3_key,
+                tenant=tenant,
+                uploaded_by=request.user,
+            )
+            uploads.append({
+                "upload_file_id": str(uploaded_file.id),
+                "name": file.name,
+                "created": created,
+            })
+
+        batch_id = secrets.token_urlsafe(12)
+        cache.set(
+            batch_status_key(batch_id),
+            {"status": "QUEUED", "tenant_id": str(tenant.id), "total": len(uploads), "done": 0},
+            timeout=UPLOAD_STATUS_TIMEOUT,
+        )
+        process_order_batch.delay(batch_id, str(tenant.id), uploads)
+        logger.info(f"💫Queued order batch {batch_id} with {len(uploads)} files")
+
+        messages.success(
+            request,
+            f"Processing {len(uploads)} documents. The orders will be listed here when they are ready.",
+        )
+        return redirect(f"{reverse('dispatch:order_create')}?batch={batch_id}")
+
     def post(self, request, *args, **kwargs):
         if "files" in request.FILES:
             try:
-                form = FileUploadForm(request.POST, request.FILES)
+                form = BatchFileUploadForm(request.POST, request.FILES)
                 if not form.is_valid():
                     messages.error(request, "Invalid form submission")
                     return redirect("dispatch:order_create")
@@ -188,126 +284,8 @@ class OrderCreateView(LoginRequiredMixin, CreateView):
                     messages.error(request, "No files were selected")
                     return redirect("dispatch:order_create")
 
-                file = files[0]
-                tenant = request.user.profile.tenant
-
-                # Handle file upload with quota checking
-                filepath, filename, content_type, file_dir = self.handle_uploaded_file(
-                    file, request.user
-                )
-
-                # Create upload file record
-                uploaded_file = UploadFile.objects.create(
-                    file=file,
-                    tenant=tenant,
-                    uploaded_by=request.user,
-                )
-                logger.info(f"Created UploadFile record: {uploaded_file.id}")
-
-                # Upload to S3
-                s3_key = f"{settings.ENV}/{tenant.id}/orders/{filename}"
-                logger.info(f"s3_key: {s3_key}")
-                s3_upload_success = s3_utils.upload_file(
-                    filepath,
-                    s3_key,
-                )
-                logger.info(f"s3_upload_success: {s3_upload_success}")
-
-                if not s3_upload_success:
-                    messages.error(request, "Failed to upload file to S3")
-                    raise ValidationError("Failed to upload file to S3")
-
-                try:
-                    # Process the PDF file synchronously
-                    logger.info(f"Starting PDF processing for file: {filename}")
-                    
-                    # Create tmp directory if it doesn't exist
-                    tmp_dir = os.path.join(settings.BASE_DIR, "tmp", "documents")
-                    os.makedirs(tmp_dir, exist_ok=True)
-                    
-                    # Download from S3 to process
-                    local_path = os.path.join(tmp_dir, f"{secrets.token_urlsafe(6)}_{filename}")
-                    logger.info(f"Downloading file from S3: {s3_key}")
-                    s3_download_success = s3_utils.download_file(s3_key, local_path)
-                    logger.info(f"s3_download_success: {s3_download_success}")
-                    
-                    if not s3_download_success:
-                        raise Exception(f"Failed to download file from S3: {s3_key}")
-
-                    # Get quota service for the tenant
-                    quota_service = QuotaService(tenant)
-
-                    # Calculate file size for quota
-                    file_size_mb = round(os.path.getsize(local_path) / (1024 * 1024), 3)
-                    logger.info(f"Processing file of size: {file_size_mb}MB")
-
-                    # Extract data from the file
-                    logger.info("Starting PDF extraction")
-                    order_details, token_usage, pages = extract(local_path)
-                    total_tokens = token_usage.get("total_tokens", 0)
-                    logger.info(f"Extraction completed with {total_tokens} tokens used")
-
-                    # Create order and trips
-                    logger.info("Creating order and trips from extracted data")
-                    order = map_order(order_details, tenant, s3_key)
-                    
-                    if not order:
-                        raise ValidationError("Failed to create order")
-
-                    # Calculate total storage including extracted text
-                    total_storage_mb = file_size_mb + round(
-                        len(pages.encode("utf-8")) / (1024 * 1024), 3
-                    )
-
-                    # Create usage log
-                    UsageLog.objects.create(
-                        tenant=tenant,
-                        usage_period=quota_service.usage_period,
-                        feature="order_processing",
-                        tokens_used=total_tokens,
-                        storage_delta_mb=total_storage_mb,
-                        content_type=ContentType.objects.get_for_model(Order),
-                        object_id=order.id,
-                    )
-
-                    # Update usage period totals
-                    quota_service.usage_period.orders_processed += 1
-                    quota_service.usage_period.tokens_used += total_tokens
-                    quota_service.usage_period.storage_used_mb += total_storage_mb
-                    quota_service.usage_period.save()
-
-                    logger.info(
-                        f"Successfully processed order {order.id}. "
-                        f"File size: {file_size_mb}MB, Text size: {round(len(pages.encode('utf-8')) / (1024 * 1024), 3)}MB, "
-                        f"Total storage: {total_storage_mb}MB, Tokens: {total_tokens}"
-                    )
-
-                    messages.success(request, "File uploaded and processed successfully.")
-
-                    # Cleanup temporary files in a separate try block
-                    try:
-                        if os.path.exists(local_path):
-                            os.remove(local_path)
-                        if os.path.exists(filepath):
-                            os.remove(filepath)
-                    except Exception as e:
-                        logger.warning(f"Failed to cleanup temporary files: {str(e)}")
-
-                    return redirect("dispatch:order_detail", pk=order.id)
-
-                except Exception as e:
-                    # Clean up files in case of error
-                    try:
-                        if os.path.exists(local_path):
-                            os.remove(local_path)
-                        if os.path.exists(filepath):
-                            os.remove(filepath)
-                    except Exception as cleanup_error:
-                        logger.warning(f"Failed to cleanup files after error: {str(cleanup_error)}")
-                    
-                    logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
-                    messages.error(request, f"Failed to process PDF: {str(e)}")
-                    return redirect("dispatch:order_create", pk=order.id)
+                self.check_batch_quota(files, request.user.profile.tenant)
+                return self.process_files(files)
 
             except ValidationError as e:
                 messages.error(request, str(e))
@@ -321,6 +299,7 @@ class OrderCreateView(LoginRequiredMixin, CreateView):
         return super().post(request, *args, **kwargs)
 
 
+@query_budget(14)
 class OrderDetailView(LoginRequiredMixin, DetailView):
     model = Order
     template_name = "order/detail.html"
@@ -328,38 +307,30 @@ class OrderDetailView(LoginRequiredMixin, DetailView):
 
     def get_queryset(self):
         """Get orders with related data."""
+        # Trips and dispatches are loaded once in get_context_data
         return Order.objects.filter(
             tenant=self.request.user.profile.tenant
         ).select_related(
             'customer',
             'tenant'
-        ).prefetch_related(
-            'trips',
-            'trips__status_history',
-            'dispatches',
-            'dispatches__driver',
-            'dispatches__truck',
-            'dispatches__carrier',
-            'dispatches__status_history'
         )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         order = self.object
 
-        # Get trips for this order with optimized queries
-        trips = Trip.objects.filter(
-            order=order
-        ).prefetch_related(
-            'status_history'
-        ).order_by('-created_at')
+        # Get trips for this order with optimized queries; evaluated once and
+        # reused by the table, the delete modals and the metrics below
+        trips = list(TripTable.prepare_queryset(
+            Trip.objects.filter(order=order), 'estimated_duration'
+        ).order_by('-created_at'))
 
         # Create table instance with trips
         table = TripTable(trips)
         context["table"] = table
 
         # Get dispatches with related data
-        dispatches = Dispatch.objects.filter(
+        dispatches = list(Dispatch.objects.filter(
             order=order
         ).select_related(
             'driver',
@@ -367,7 +338,7 @@ class OrderDetailView(LoginRequiredMixin, DetailView):
             'carrier'
         ).prefetch_related(
             'status_history'
-        ).order_by('-created_at')
+        ).order_by('-created_at'))
         context["dispatches"] = dispatches
 
         # Add PDF URL to context if available - use local endpoint instead of presigned URL
@@ -384,10 +355,10 @@ class OrderDetailView(LoginRequiredMixin, DetailView):
             context["has_pdf"] = False
 
         # Calculate order completion metrics
-        total_trips = trips.count()
-        completed_trips = trips.filter(status=TripStatus.COMPLETED).count()
-        cancelled_trips = trips.filter(status=TripStatus.CANCELLED).count()
-        in_progress_trips = trips.filter(status=TripStatus.IN_PROGRESS).count()
+        total_trips = len(trips)
+        completed_trips = sum(trip.status == TripStatus.COMPLETED for trip in trips)
+        cancelled_trips = sum(trip.status == TripStatus.CANCELLED for trip in trips)
+        in_progress_trips = sum(trip.status == TripStatus.IN_PROGRESS for trip in trips)
 
         context.update({
             'total_trips': total_trips,
@@ -398,13 +369,14 @@ class OrderDetailView(LoginRequiredMixin, DetailView):
         })
 
         # Check if all required trip data is complete
-        trips_with_issues = trips.filter(
-            Q(estimated_distance__isnull=True) |
-            Q(estimated_duration__isnull=True) |
-            Q(freight_value__isnull=True)
-        )
-        
-        if trips_with_issues.exists():
+        trips_with_issues = [
+            trip for trip in trips
+            if trip.estimated_distance is None
+            or trip.estimated_duration is None
+            or trip.freight_value is None
+        ]
+
+        if trips_with_issues:
             logger.info("Incomplete trips found:")
             for trip in trips_with_issues:
                 issues = []
@@ -417,8 +389,8 @@ class OrderDetailView(LoginRequiredMixin, DetailView):
                 logger.info(f"Trip {trip.trip_id}: {', '.join(issues)}")
 
         context["trips_complete"] = (
-            trips.exists() and  # At least one trip exists
-            not trips_with_issues.exists()  # No trips have missing required data
+            bool(trips) and  # At least one trip exists
+            not trips_with_issues  # No trips have missing required data
         )
 
         # Add financial summary
@@ -439,9 +411,9 @@ class OrderDetailView(LoginRequiredMixin, DetailView):
 
         # Add related entities summary
         context.update({
-            'unique_carriers': Carrier.objects.filter(
-                dispatch__order=order
-            ).distinct().count()
+            'unique_carriers': len({
+                dispatch.carrier_id for dispatch in dispatches if dispatch.carrier_id
+            })
         })
 
         return context
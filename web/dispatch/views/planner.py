@@ -0,0 +1,59 @@
+"""View for planning and creating dispatches in bulk."""
+
+import logging
+import uuid
+from django.contrib import messages
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils import timezone
+from django.views.generic import FormView
+from django.contrib.auth.mixins import LoginRequiredMixin
+from dispatch.forms import AutoDispatchForm
+from dispatch.planner import create_dispatches, plan_dispatches
+
+logger = logging.getLogger("django")
+
+
+class AutoDispatchView(LoginRequiredMixin, FormView):
+    """
+    Propose a driver and truck for every pending trip of a horizon (GET), and
+    create the dispatches of the rows kept (POST).
+    """
+
+    template_name = "dispatch/auto_dispatch.html"
+    form_class = AutoDispatchForm
+
+    def get_initial(self):
+        return {"start_date": timezone.localdate()}
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        if "start_date" in self.request.GET:
+            kwargs["data"] = self.request.GET
+        return kwargs
+
+    def get(self, request, *args, **kwargs):
+        form = self.get_form()
+        context = {"form": form}
+        if form.is_bound and form.is_valid():
+            context["plan"] = plan_dispatches(request.user.profile.tenant, *form.get_window())
+        return self.render_to_response(self.get_context_data(**context))
+
+    def post(self, request, *args, **kwargs):
+        rows = []
+        for value in request.POST.getlist("rows"):
+            try:
+                rows.append(tuple(uuid.UUID(part) for part in value.split(":")))
+            except ValueError:
+                logger.warning(f"🔥Ignoring malformed auto-dispatch row {value!r}")
+        rows = [row for row in rows if len(row) == 3]
+        if not rows:
+            messages.warning(request, "No trips were selected.")
+            return redirect(f"{reverse('dispatch:dispatch_auto')}?{request.GET.urlencode()}")
+
+        created, failed = create_dispatches(request.user.profile.tenant, rows, user=request.user)
+        if created:
+            messages.success(request, f"Created {len(created)} dispatches.")
+        for message in failed:
+            messages.error(request, message)
+        return redirect("dispatch:dispatch_list")
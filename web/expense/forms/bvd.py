@@ -84,10 +84,11 @@ class BVDForm(forms.ModelForm):
         # Filter querysets by tenant if provided
         if tenant:
             if "driver" in self.fields:
+                # Driver labels read the employment status
                 self.fields["driver"].queryset = self.fields["driver"].queryset.filter(
                     tenant=tenant,
                     is_active=True
-                )
+                ).select_related("driveremployment")
             if "truck" in self.fields:
                 self.fields["truck"].queryset = self.fields["truck"].queryset.filter(
                     tenant=tenant,
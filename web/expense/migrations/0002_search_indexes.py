@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-19 14:02
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from contrib.search import AddSearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense', '0001_initial'),
+    ]
+
+    operations = [
+        # No-ops outside PostgreSQL; SQLite gets FTS5 tables after migrate
+        TrigramExtension(),
+        AddSearchIndex(
+            model_name='bvd',
+            fields=['site_name', 'site_city', 'card_number', 'company_name', 'transaction_id'],
+        ),
+    ]
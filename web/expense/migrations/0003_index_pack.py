@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-19 12:12
+
+import contrib.postgres
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built CONCURRENTLY on PostgreSQL, which can't run in a transaction
+    atomic = False
+
+    dependencies = [
+        ('expense', '0002_search_indexes'),
+        ('fleet', '0004_search_indexes'),
+        ('tenant', '0001_initial'),
+    ]
+
+    operations = [
+        contrib.postgres.AddIndexConcurrentlyOnPostgres(
+            model_name='bvd',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['tenant', '-date', '-id'], name='bvd_active_recent_idx'),
+        ),
+        contrib.postgres.AddIndexConcurrentlyOnPostgres(
+            model_name='bvd',
+            index=models.Index(fields=['tenant', 'driver', 'status', 'date'], name='bvd_driver_payout_idx'),
+        ),
+        contrib.postgres.AddIndexConcurrentlyOnPostgres(
+            model_name='otherexpense',
+            index=models.Index(fields=['tenant', 'driver', 'status', 'date'], name='otherexpense_payout_idx'),
+        ),
+    ]
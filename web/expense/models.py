@@ -198,6 +198,9 @@ class BaseExpense(BaseModel):
 
 class BVD(BaseExpense):
     """Fuel expense model for BVD (Bulk Vehicle Data) records"""
+    # Columns of the global search (contrib/search.py); the driver is searched through Driver
+    search_fields = ("site_name", "site_city", "card_number", "company_name", "transaction_id")
+
     # Basic info
     company_name = models.CharField(max_length=255)
     card_number = models.CharField(max_length=255)
@@ -243,6 +246,14 @@ class BVD(BaseExpense):
             models.Index(fields=["tenant", "date", "unit"]),
             models.Index(fields=["tenant", "auth_code"]),
             models.Index(fields=["unit", "date"]),
+            # BVD list: records that weren't soft-deleted, newest first, paged by (date, id) cursors
+            models.Index(
+                fields=["tenant", "-date", "-id"],
+                condition=models.Q(is_active=True),
+                name="bvd_active_recent_idx",
+            ),
+            # Payout.calculate_totals: a driver's fuel in a period
+            models.Index(fields=["tenant", "driver", "status", "date"], name="bvd_driver_payout_idx"),
         ]
 
     def clean(self):
@@ -339,6 +350,8 @@ class OtherExpense(BaseExpense):
             models.Index(fields=["category"]),
             models.Index(fields=["status"]),
             models.Index(fields=["reimbursement_status"]),
+            # Payout.calculate_totals: a driver's other expenses in a period
+            models.Index(fields=["tenant", "driver", "status", "date"], name="otherexpense_payout_idx"),
         ]
 
     def __str__(self):
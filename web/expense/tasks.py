@@ -1,5 +1,4 @@
 from celery import shared_task
-import pandas as pd
 import logging
 from django.core.cache import cache
 from django.core.exceptions import ValidationError
@@ -9,6 +8,9 @@ from django.db import transaction
 from datetime import datetime, timedelta
 import pytz
 from django.conf import settings
+from contrib.lazy import lazy_import
+
+pd = lazy_import("pandas")
 
 logger = logging.getLogger("django")
 
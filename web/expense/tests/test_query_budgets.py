@@ -0,0 +1,37 @@
+from datetime import timedelta
+from contrib.queries import QueryBudgetMixin
+from contrib.tests.base import SyntheticTenantTestCase
+from expense.models import BVD, Payout, PayoutStatus
+from fleet.models import Driver
+
+
+class ExpenseQueryBudgetTest(QueryBudgetMixin, SyntheticTenantTestCase):
+    """Pages list more rows than the duplicate threshold, so a query per row fails."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for number, driver in enumerate(Driver.objects.select_related("tenant")):
+            Payout.objects.create(
+                driver=driver,
+                tenant=driver.tenant,
+                from_date=driver.created_at,
+                to_date=driver.created_at + timedelta(days=14),
+                status=PayoutStatus.COMPLETED if number % 2 else PayoutStatus.DRAFT,
+            )
+
+    def test_bvd_list(self):
+        self.assertGreater(BVD.objects.count(), 10)
+        self.assertQueryBudget("/accounts/expenses/fuel/bvd/")
+
+    def test_bvd_search(self):
+        bvd = BVD.objects.select_related("driver").first()
+        response = self.assertQueryBudget("/accounts/expenses/fuel/bvd/", data={"q": bvd.site_city})
+        self.assertTrue(response.context["bvds"])
+        self.assertTrue(all(row.site_city == bvd.site_city for row in response.context["bvds"]))
+
+        response = self.assertQueryBudget("/accounts/expenses/fuel/bvd/", data={"q": bvd.driver.last_name})
+        self.assertTrue(all(row.driver.last_name == bvd.driver.last_name for row in response.context["bvds"]))
+
+    def test_payout_list(self):
+        self.assertQueryBudget("/accounts/payout/")
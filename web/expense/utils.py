@@ -2,7 +2,6 @@ import uuid
 import logging
 from datetime import datetime, timedelta
 from decimal import Decimal
-import pandas as pd
 import pytz
 from django.conf import settings
 from django.db.models import Q
@@ -19,6 +18,9 @@ from dispatch.models import DriverTruckAssignment, AssignmentStatus
 import re
 import decimal
 from django.utils import timezone
+from contrib.lazy import lazy_import
+
+pd = lazy_import("pandas")
 
 logger = logging.getLogger("django")
 
@@ -1,5 +1,4 @@
 import logging
-import pandas as pd
 import pytz
 import uuid
 from django.conf import settings
@@ -16,63 +15,51 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
 from django.shortcuts import redirect
 from django.http import HttpResponse, JsonResponse
-from django.db.models import Q, Sum
+from django.db.models import Count, Q, Sum
 from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
 from expense.models import BVD, AccountPayableStatus
-from fleet.models import Truck
+from fleet.models import Driver, Truck
 from expense.forms import BVDForm
 from expense.utils import BVDFileProcessor
 from django.core.cache import cache
 from django.utils import timezone
 import csv
+from contrib.lazy import lazy_import
+from contrib.pagination import CursorPaginationMixin
+from contrib.queries import query_budget
+from contrib.search import search_q
+
+pd = lazy_import("pandas")
 
 logger = logging.getLogger("django")
 
 
+def bvd_search_q(text):
+    """BVDs whose site or card match text, or whose driver does, through the search indexes."""
+    return search_q(BVD, text) | Q(driver__in=Driver.objects.filter(search_q(Driver, text)))
+
+
 class BVDBaseView(LoginRequiredMixin):
     """Base view for BVD operations with common functionality"""
     model = BVD
     
     def get_queryset(self):
         """Get BVDs for current tenant"""
-        # Log tenant info
         tenant = self.request.user.profile.tenant
         logger.info(f"Getting BVDs for tenant: {tenant.id} ({tenant.name})")
-        
-        # Get base queryset
-        base_qs = BVD.objects.all()
-        logger.info(f"Total BVDs (before tenant filter): {base_qs.count()}")
-        
-        # Log SQL query
-        logger.info(f"SQL Query: {str(base_qs.query)}")
-        
-        # Apply tenant filter
-        tenant_qs = base_qs.filter(tenant=tenant)
-        logger.info(f"BVDs for tenant (before active filter): {tenant_qs.count()}")
-        logger.info(f"Tenant filter SQL: {str(tenant_qs.query)}")
-        
-        # Apply active filter and select related
-        final_qs = (
-            tenant_qs.filter(is_active=True)
+
+        return (
+            BVD.objects.filter(tenant=tenant, is_active=True)
             .select_related("truck", "driver", "tenant")
             .order_by("-date")
         )
-        logger.info(f"Final BVDs for tenant (active only): {final_qs.count()}")
-        logger.info(f"Final SQL: {str(final_qs.query)}")
-        
-        # Log a few sample records
-        sample_records = final_qs[:5]
-        logger.info("Sample BVD records from base queryset:")
-        for record in sample_records:
-            logger.info(f"BVD: {record.id} | Unit: {record.unit} | Date: {record.date} | Amount: {record.amount} {record.currency}")
-            logger.info(f"Record tenant: {record.tenant.id} | Active: {record.is_active}")
-        
-        return final_qs
 
 
-class BVDListView(BVDBaseView, ListView):
+@query_budget(12)
+class BVDListView(BVDBaseView, CursorPaginationMixin, ListView):
     """List view for BVD records with search and filter capabilities"""
+    cursor_ordering = ("-date", "-id")
     template_name = "expense/fuel/bvd/list.html"
     context_object_name = "bvds"
     paginate_by = 50  # Add pagination
@@ -81,18 +68,6 @@ class BVDListView(BVDBaseView, ListView):
         """Get BVDs with filters"""
         queryset = super().get_queryset()
         
-        # Log initial queryset details
-        logger.info(f"Initial BVD queryset count: {queryset.count()}")
-        logger.info(f"Current tenant: {self.request.user.profile.tenant}")
-        logger.info(f"Initial SQL: {str(queryset.query)}")
-        
-        # Log sample records
-        sample_records = queryset[:5]
-        logger.info("Sample records from initial queryset:")
-        for record in sample_records:
-            logger.info(f"BVD: {record.id} | Unit: {record.unit} | Date: {record.date} | Amount: {record.amount} {record.currency}")
-            logger.info(f"Record tenant: {record.tenant.id} | Active: {record.is_active}")
-        
         # Get search parameters
         search_query = self.request.GET.get("q")
         start_date = self.request.GET.get("start_date")
@@ -109,15 +84,7 @@ class BVDListView(BVDBaseView, ListView):
         
         # Apply filters
         if search_query:
-            queryset = queryset.filter(
-                Q(driver__first_name__icontains=search_query) |
-                Q(driver__last_name__icontains=search_query) |
-                Q(site_name__icontains=search_query) |
-                Q(site_city__icontains=search_query) |
-                Q(card_number__icontains=search_query)
-            )
-            logger.info(f"After search filter: {queryset.count()} records")
-            logger.info(f"Search filter SQL: {str(queryset.query)}")
+            queryset = queryset.filter(bvd_search_q(search_query))
             
         if start_date:
             try:
@@ -125,8 +92,6 @@ class BVDListView(BVDBaseView, ListView):
                 if settings.USE_TZ:
                     start_date = timezone.make_aware(start_date)
                 queryset = queryset.filter(date__gte=start_date)
-                logger.info(f"After start date filter: {queryset.count()} records")
-                logger.info(f"Start date filter SQL: {str(queryset.query)}")
             except ValueError:
                 logger.warning(f"Invalid start date format: {start_date}")
                 
@@ -138,35 +103,18 @@ class BVDListView(BVDBaseView, ListView):
                 # Add one day to include the entire end date
                 end_date = end_date + timedelta(days=1)
                 queryset = queryset.filter(date__lt=end_date)
-                logger.info(f"After end date filter: {queryset.count()} records")
-                logger.info(f"End date filter SQL: {str(queryset.query)}")
             except ValueError:
                 logger.warning(f"Invalid end date format: {end_date}")
                 
         if truck:
             queryset = queryset.filter(truck_id=truck)
-            logger.info(f"After truck filter: {queryset.count()} records")
-            logger.info(f"Truck filter SQL: {str(queryset.query)}")
             
         if card_number:
             queryset = queryset.filter(card_number__icontains=card_number)
-            logger.info(f"After card number filter: {queryset.count()} records")
-            logger.info(f"Card number filter SQL: {str(queryset.query)}")
             
         # Order by date descending
         queryset = queryset.order_by("-date")
         
-        # Log final queryset details
-        logger.info(f"Final queryset count: {queryset.count()}")
-        logger.info(f"Final SQL: {str(queryset.query)}")
-        
-        # Log final sample records
-        final_sample_records = queryset[:5]
-        logger.info("Sample records from final queryset:")
-        for record in final_sample_records:
-            logger.info(f"BVD: {record.id} | Unit: {record.unit} | Date: {record.date} | Amount: {record.amount} {record.currency}")
-            logger.info(f"Record tenant: {record.tenant.id} | Active: {record.is_active}")
-            
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -176,12 +124,6 @@ class BVDListView(BVDBaseView, ListView):
         # Add form to context
         context['form'] = BVDForm(tenant=self.request.user.profile.tenant)
         
-        # Log context data
-        logger.info("Context data:")
-        logger.info(f"Context keys: {context.keys()}")
-        logger.info(f"BVDs in context: {context.get('bvds')}")
-        logger.info(f"BVDs count: {context.get('bvds').count() if context.get('bvds') else 0}")
-        
         # Get current filter values
         context["search_query"] = self.request.GET.get("q", "")
         context["start_date"] = self.request.GET.get("start_date", "")
@@ -195,23 +137,22 @@ class BVDListView(BVDBaseView, ListView):
             is_active=True
         ).order_by("unit")
         
-        # Calculate summary statistics
-        queryset = self.get_queryset()
-        context["record_count"] = queryset.count()
-        
-        # Use aggregate to calculate totals with proper defaults
-        totals = queryset.aggregate(
+        # Calculate summary statistics and status counts in one query
+        totals = self.object_list.aggregate(
+            record_count=Count("id"),
             total_quantity=Sum("quantity"),
-            total_amount=Sum("amount")
+            total_amount=Sum("amount"),
+            pending_count=Count("id", filter=Q(status='Pending')),
+            accounted_count=Count("id", filter=Q(status='Accounted')),
+            paid_count=Count("id", filter=Q(status='Paid')),
         )
         
+        context["record_count"] = totals["record_count"]
         context["total_quantity"] = totals["total_quantity"] or 0
         context["total_amount"] = totals["total_amount"] or 0
-        
-        # Calculate status counts
-        context["pending_count"] = queryset.filter(status='Pending').count()
-        context["accounted_count"] = queryset.filter(status='Accounted').count() 
-        context["paid_count"] = queryset.filter(status='Paid').count()
+        context["pending_count"] = totals["pending_count"]
+        context["accounted_count"] = totals["accounted_count"]
+        context["paid_count"] = totals["paid_count"]
         
         # Add filter preservation for pagination
         current_filters = {}
@@ -220,10 +161,6 @@ class BVDListView(BVDBaseView, ListView):
                 current_filters[key] = value
         context['current_filters'] = current_filters
         
-        # Log final context data
-        logger.info("Final context data:")
-        logger.info(f"Context keys: {context.keys()}")
-        
         return context
 
     def post(self, request, *args, **kwargs):
@@ -334,13 +271,7 @@ class BVDSearchView(BVDBaseView, ListView):
 
         # Apply filters
         if search_query:
-            queryset = queryset.filter(
-                Q(driver__first_name__icontains=search_query) |
-                Q(driver__last_name__icontains=search_query) |
-                Q(site_name__icontains=search_query) |
-                Q(site_city__icontains=search_query) |
-                Q(card_number__icontains=search_query)
-            )
+            queryset = queryset.filter(bvd_search_q(search_query))
 
         if start_date:
             try:
@@ -7,9 +7,11 @@ from django.shortcuts import redirect
 from django.http import HttpResponse, JsonResponse
 from django.db.models import Q, Sum
 from django.core.exceptions import ValidationError
-import pandas as pd
 from expense.models import OtherExpense
 from expense.forms import OtherExpenseForm
+from contrib.lazy import lazy_import
+
+pd = lazy_import("pandas")
 
 logger = logging.getLogger("django")
 
@@ -8,8 +8,6 @@ from django.http import HttpResponse, JsonResponse
 from django.db.models import Q, Sum, Count
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from django.db import connection
-import pandas as pd
 import json
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -18,19 +16,12 @@ from expense.models import Payout, PayoutStatus, BVD, OtherExpense
 from expense.forms.payout import (
     PayoutCalculationForm, PayoutUpdateForm, PayoutFilterForm, PayoutBulkActionForm
 )
+from contrib.lazy import lazy_import
+from contrib.queries import query_budget
 
-logger = logging.getLogger("django")
-
+pd = lazy_import("pandas")
 
-def check_column_exists(table_name, column_name):
-    """Check if a column exists in the database table"""
-    with connection.cursor() as cursor:
-        cursor.execute("""
-            SELECT COUNT(*) 
-            FROM information_schema.columns 
-            WHERE table_name = %s AND column_name = %s
-        """, [table_name, column_name])
-        return cursor.fetchone()[0] > 0
+logger = logging.getLogger("django")
 
 
 class PayoutBaseView(LoginRequiredMixin):
@@ -45,7 +36,7 @@ class PayoutBaseView(LoginRequiredMixin):
                 return Payout.objects.none()  # Return empty queryset if no tenant
             
             return (
-                Payout.objects.select_related("driver", "tenant")
+                Payout.objects.select_related("driver", "driver__driveremployment", "tenant")
                 .prefetch_related("bvd_expenses", "other_expenses")
                 .filter(tenant=tenant)
                 .order_by("-from_date")
@@ -54,6 +45,7 @@ class PayoutBaseView(LoginRequiredMixin):
             return Payout.objects.none()  # Return empty queryset if no profile/tenant
 
 
+@query_budget(14)
 class PayoutListView(PayoutBaseView, ListView):
     """List view for Payout records with filtering and bulk actions"""
     template_name = "expense/payout/list.html"
@@ -108,34 +100,20 @@ class PayoutListView(PayoutBaseView, ListView):
         else:
             context["drivers"] = []
         
-        # Add summary statistics with safe column checking
-        queryset = self.get_queryset()
+        # Add summary statistics
+        queryset = self.object_list
         
-        # Check if the new columns exist before trying to aggregate them
-        has_final_cad = check_column_exists('expense_payout', 'final_cad_amount')
-        has_final_usd = check_column_exists('expense_payout', 'final_usd_amount')
-        
-        totals = {
-            'total_payouts': queryset.count(),
-            'draft_count': queryset.filter(status=PayoutStatus.DRAFT).count(),
-            'processing_count': queryset.filter(status=PayoutStatus.PROCESSING).count(),
-            'completed_count': queryset.filter(status=PayoutStatus.COMPLETED).count(),
-        }
-        
-        # Only add amount totals if columns exist
-        if has_final_cad:
-            totals['total_cad_amount'] = queryset.aggregate(
-                total=Sum("final_cad_amount")
-            )['total'] or 0
-        else:
-            totals['total_cad_amount'] = 0
-            
-        if has_final_usd:
-            totals['total_usd_amount'] = queryset.aggregate(
-                total=Sum("final_usd_amount")
-            )['total'] or 0
-        else:
-            totals['total_usd_amount'] = 0
+        # Counts and amount totals in one query
+        totals = queryset.aggregate(
+            total_payouts=Count("id"),
+            draft_count=Count("id", filter=Q(status=PayoutStatus.DRAFT)),
+            processing_count=Count("id", filter=Q(status=PayoutStatus.PROCESSING)),
+            completed_count=Count("id", filter=Q(status=PayoutStatus.COMPLETED)),
+            total_cad_amount=Sum("final_cad_amount"),
+            total_usd_amount=Sum("final_usd_amount"),
+        )
+        totals['total_cad_amount'] = totals['total_cad_amount'] or 0
+        totals['total_usd_amount'] = totals['total_usd_amount'] or 0
         
         # Check for status synchronization issues in completed payouts
         completed_payouts = queryset.filter(status=PayoutStatus.COMPLETED)
@@ -168,14 +146,6 @@ class PayoutListView(PayoutBaseView, ListView):
                 current_filters[key] = value
         context["current_filters"] = current_filters
         
-        # Add a warning message if columns are missing
-        if not has_final_cad or not has_final_usd:
-            messages.warning(
-                self.request, 
-                "Database schema update required. Some payout calculations may not display correctly. "
-                "Please contact your system administrator to run the database migration."
-            )
-        
         return context
 
     def post(self, request, *args, **kwargs):
@@ -0,0 +1,615 @@
+"""
+Synthetic multi-tenant dataset for benchmarking.
+
+Each tenant gets carriers, customers, licensed drivers and trucks, then every
+carrier's fleet is walked through time: a free driver is paired with a free
+truck for a few days to a few weeks, never overlapping for either of them, and
+the pair hauls a load every day or two (order, trip and dispatch) and fuels up
+along the way (BVD rows). A few unassigned orders are left pending at the end.
+
+Everything is drawn from one seeded random.Random, so a seed and end date
+always give the same dataset. Rows are written with bulk_create, which skips
+save() overrides and signals; the values they would fill in (employment
+records, assignment carriers, formatted phone and license numbers,
+identifiers) are set here instead.
+"""
+
+import heapq
+import logging
+import math
+import random
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from dispatch.models import (
+    AssignmentStatus,
+    Dispatch,
+    DispatchStatus,
+    DriverTruckAssignment,
+    Order,
+    OrderStatus,
+    Trip,
+    TripStatus,
+)
+from expense.models import BVD
+from fleet.models import (
+    Carrier,
+    CarrierStatus,
+    Customer,
+    Driver,
+    DriverEmployment,
+    DriverLicense,
+    DutyStatus,
+    EmploymentStatus,
+    OwnershipType,
+    Truck,
+    TruckDutyStatus,
+    TruckStatus,
+)
+from tenant.models import Tenant
+
+logger = logging.getLogger("django")
+
+TENANT_PREFIX = "Synthetic"
+
+FIRST_NAMES = [
+    "James", "Maria", "Robert", "Linda", "Michael", "Priya", "David", "Sarah", "Daniel", "Aisha",
+    "Joseph", "Emily", "Thomas", "Mei", "Charles", "Olivia", "Gurpreet", "Sofia", "Mark", "Fatima",
+    "Paul", "Chloe", "Kevin", "Nadia", "Brian", "Hannah", "George", "Amara", "Jason", "Lucia",
+]
+LAST_NAMES = [
+    "Smith", "Tremblay", "Singh", "Nguyen", "Brown", "Martin", "Wilson", "Gagnon", "Patel", "Roy",
+    "Taylor", "Cote", "Anderson", "Li", "Thomas", "Bouchard", "Garcia", "Gill", "White", "Morin",
+    "Clark", "Lavoie", "Lewis", "Kaur", "Walker", "Fortin", "Young", "Chen", "King", "Pelletier",
+]
+# City, province/state, country, latitude, longitude
+CITIES = [
+    ("Toronto", "ON", "Canada", 43.65, -79.38),
+    ("Mississauga", "ON", "Canada", 43.59, -79.64),
+    ("Ottawa", "ON", "Canada", 45.42, -75.70),
+    ("London", "ON", "Canada", 42.98, -81.25),
+    ("Windsor", "ON", "Canada", 42.31, -83.04),
+    ("Montreal", "QC", "Canada", 45.50, -73.57),
+    ("Quebec City", "QC", "Canada", 46.81, -71.21),
+    ("Winnipeg", "MB", "Canada", 49.90, -97.14),
+    ("Calgary", "AB", "Canada", 51.05, -114.07),
+    ("Edmonton", "AB", "Canada", 53.55, -113.49),
+    ("Vancouver", "BC", "Canada", 49.28, -123.12),
+    ("Halifax", "NS", "Canada", 44.65, -63.58),
+    ("Detroit", "MI", "USA", 42.33, -83.05),
+    ("Chicago", "IL", "USA", 41.88, -87.63),
+    ("Buffalo", "NY", "USA", 42.89, -78.88),
+    ("Columbus", "OH", "USA", 39.96, -83.00),
+    ("Indianapolis", "IN", "USA", 39.77, -86.16),
+    ("Memphis", "TN", "USA", 35.15, -90.05),
+    ("Dallas", "TX", "USA", 32.78, -96.80),
+    ("Atlanta", "GA", "USA", 33.75, -84.39),
+]
+STREETS = ["Industrial Pkwy", "Commerce Dr", "Logistics Way", "Rail Side Rd", "Harbour St", "Distribution Blvd"]
+MAKES = [
+    ("Peterbilt", "579"), ("Freightliner", "Cascadia"), ("Kenworth", "T680"),
+    ("Volvo", "VNL 860"), ("International", "LT625"), ("Mack", "Anthem"),
+]
+CARGO_TYPES = ["Dry van", "Reefer", "Flatbed", "Auto parts", "Produce", "Paper", "Steel coils", "Consumer goods"]
+CUSTOMER_WORDS = ["Maple", "Northern", "Great Lakes", "Summit", "Prairie", "Atlantic", "Pioneer", "Harbour"]
+CUSTOMER_KINDS = ["Foods", "Steel", "Retail", "Paper Mills", "Auto Parts", "Distribution", "Building Supply"]
+FUEL_BRANDS = ["Petro-Canada", "Pilot Flying J", "Esso", "Husky", "Love's", "Shell"]
+
+# Taxes charged on fuel by province; elsewhere none
+FUEL_TAX = {"ON": ("hst", Decimal("0.13")), "NS": ("hst", Decimal("0.15")), "QC": ("qst", Decimal("0.09975"))}
+
+CENTS = Decimal("0.01")
+
+
+def tenant_name(seed: int, number: int) -> str:
+    return f"{TENANT_PREFIX} {seed}-{number:02d}"
+
+
+def username(seed: int, number: int) -> str:
+    return f"synthetic-{seed}-{number:02d}"
+
+
+def distance_km(origin, destination) -> float:
+    """Great-circle distance between two CITIES entries, plus a fifth for the roads."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (origin[3], origin[4], destination[3], destination[4]))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(a)) * 1.2
+
+
+def describe(counts: Dict[str, int]) -> str:
+    return ", ".join(f"{count} {name}" for name, count in counts.items())
+
+
+class BulkWriter:
+    """
+    Buffers new rows per model and writes them with bulk_create.
+
+    Models are given parents first; every flush writes all buffers in that
+    order, so a row is never written before the rows it points at.
+    """
+
+    def __init__(self, models: List, batch_size: int):
+        self.buffers = {model: [] for model in models}
+        self.batch_size = batch_size
+        self.counts = Counter()
+
+    def add(self, obj):
+        rows = self.buffers[type(obj)]
+        rows.append(obj)
+        if len(rows) >= self.batch_size:
+            self.flush()
+        return obj
+
+    def flush(self):
+        for model, rows in self.buffers.items():
+            if rows:
+                model.objects.bulk_create(rows, batch_size=self.batch_size)
+                self.counts[model.__name__] += len(rows)
+                rows.clear()
+
+
+class SyntheticDataset:
+    """
+    Generates tenants with a year (by default) of dispatch history.
+
+    Args:
+        seed: Seed of the random generator; the same seed gives the same data
+        tenants: Number of tenants
+        drivers: Drivers per tenant
+        trucks: Trucks per tenant
+        customers: Customers per tenant
+        carriers: Carriers per tenant; drivers only haul with trucks of their carrier
+        days: Days of history per tenant
+        end: End of the history, by default midnight today
+        batch_size: Rows per bulk_create
+        password: Password of each tenant's login user
+        log: Called with progress messages
+    """
+
+    def __init__(
+        self,
+        seed: int = 1,
+        tenants: int = 3,
+        drivers: int = 300,
+        trucks: int = 250,
+        customers: int = 60,
+        carriers: int = 2,
+        days: int = 365,
+        end: Optional[datetime] = None,
+        batch_size: int = 2000,
+        password: str = "synthetic",
+        log: Callable[[str], None] = logger.info,
+    ):
+        self.seed = seed
+        self.tenants = tenants
+        self.drivers = drivers
+        self.trucks = trucks
+        self.customers = customers
+        self.carriers = carriers
+        self.days = days
+        self.end = end or timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.start = self.end - timedelta(days=days)
+        self.batch_size = batch_size
+        self.password = password
+        self.log = log
+        self.rng = random.Random(seed)
+
+    def existing_tenants(self):
+        return Tenant.objects.filter(name__startswith=f"{TENANT_PREFIX} {self.seed}-")
+
+    def clear(self):
+        """Delete the tenants (and everything in them) and users of an earlier run with this seed."""
+        User.objects.filter(username__startswith=f"synthetic-{self.seed}-").delete()
+        self.existing_tenants().delete()
+
+    def generate(self) -> Counter:
+        """Write the dataset and return the number of rows created per model."""
+        counts = Counter()
+        # Unit numbers are unique across tenants; start above any real truck
+        last_unit = Truck.objects.order_by("-unit").values_list("unit", flat=True).first() or 0
+        self.next_unit = max(last_unit + 1, 100000)
+
+        for number in range(1, self.tenants + 1):
+            with transaction.atomic():
+                writer = BulkWriter(
+                    [Carrier, Customer, DriverLicense, Driver, Truck, Order, Trip, Dispatch,
+                     DriverTruckAssignment, DriverEmployment, BVD],
+                    self.batch_size,
+                )
+                tenant = self._tenant(number)
+                self._history(tenant, number, writer)
+                writer.flush()
+            self.log(f"👌{tenant.name}: {describe(writer.counts)}")
+            counts.update(writer.counts)
+            counts["Tenant"] += 1
+        return counts
+
+    def _uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _moment(self, start: datetime, end: datetime) -> datetime:
+        return start + timedelta(seconds=self.rng.uniform(0, (end - start).total_seconds()))
+
+    def _phone(self) -> str:
+        return f"+1{self.rng.choice(['416', '647', '514', '403', '604', '313'])}{self.rng.randint(2000000, 9999999)}"
+
+    def _address(self, city) -> str:
+        return f"{self.rng.randint(10, 9999)} {self.rng.choice(STREETS)}, {city[0]}, {city[1]}"
+
+    def _tenant(self, number: int) -> Tenant:
+        tenant = Tenant.objects.create(id=self._uuid(), name=tenant_name(self.seed, number))
+        user = User(username=username(self.seed, number), email=f"{username(self.seed, number)}@example.com")
+        user._tenant = tenant  # Picked up by the profile signal
+        user.set_password(self.password)
+        user.save()
+        return tenant
+
+    def _history(self, tenant: Tenant, number: int, writer: BulkWriter):
+        code = f"S{self.seed}T{number}"
+        self.sequence = Counter()
+        self.odometer = {}
+
+        carriers = [self._carrier(tenant, code, index, writer) for index in range(self.carriers)]
+        self.tenant_customers = [self._customer(tenant, writer) for _ in range(self.customers)]
+        drivers = [self._driver(tenant, code, index, self.rng.choice(carriers), writer) for index in range(self.drivers)]
+        trucks = [self._truck(tenant, self.rng.choice(carriers), writer) for _ in range(self.trucks)]
+
+        self.employment = {
+            driver.id: DriverEmployment(
+                id=self._uuid(),
+                driver=driver,
+                tenant=tenant,
+                employment_status=self.rng.choices(
+                    [EmploymentStatus.ACTIVE, EmploymentStatus.ON_LEAVE, EmploymentStatus.TERMINATED], [92, 4, 4]
+                )[0],
+                duty_status=DutyStatus.AVAILABLE,
+                current_location=f"{driver.city}, {driver.state}",
+                max_hours_per_week=self.rng.choice([40, 50, 60, 70]),
+            )
+            for driver in drivers
+        }
+        for employment in self.employment.values():
+            if employment.employment_status == EmploymentStatus.ON_LEAVE:
+                employment.duty_status = DutyStatus.ON_LEAVE
+
+        ongoing_trucks = []
+        for carrier in carriers:
+            active_drivers = [
+                driver for driver in drivers
+                if driver.carrier_id == carrier.id
+                and self.employment[driver.id].employment_status == EmploymentStatus.ACTIVE
+            ]
+            carrier_trucks = [truck for truck in trucks if truck.carrier_id == carrier.id]
+            ongoing_trucks += self._timeline(tenant, code, carrier, active_drivers, carrier_trucks, writer)
+
+        for employment in self.employment.values():
+            writer.add(employment)
+        self._pending_orders(tenant, code, writer)
+        writer.flush()
+
+        # Trucks were written before their timeline was known
+        Truck.objects.filter(id__in=[truck.id for truck in ongoing_trucks]).update(duty_status=TruckDutyStatus.ON_DUTY)
+
+    def _carrier(self, tenant, code, index, writer) -> Carrier:
+        city = self.rng.choice(CITIES)
+        name = f"{self.rng.choice(CUSTOMER_WORDS)} Transport {code}-{index + 1}"
+        return writer.add(Carrier(
+            id=self._uuid(),
+            name=name,
+            legal_name=f"{name} Inc.",
+            business_number=f"BN{code}{index:03d}",
+            mc_number=f"MC{code}{index:03d}",
+            dot_number=f"DOT{code}{index:03d}",
+            email=f"dispatch{index + 1}@{code.lower()}.example.com",
+            phone=self._phone(),
+            address=self._address(city),
+            city=city[0],
+            state=city[1],
+            country=city[2],
+            status=CarrierStatus.ACTIVE,
+            tenant=tenant,
+        ))
+
+    def _customer(self, tenant, writer) -> Customer:
+        city = self.rng.choice(CITIES)
+        name = f"{self.rng.choice(CUSTOMER_WORDS)} {self.rng.choice(CUSTOMER_KINDS)}"
+        return writer.add(Customer(
+            id=self._uuid(),
+            name=name,
+            address=self._address(city),
+            email=f"shipping@{name.lower().replace(' ', '')}.example.com",
+            phone=self._phone(),
+            tenant=tenant,
+        ))
+
+    def _driver(self, tenant, code, index, carrier, writer) -> Driver:
+        city = self.rng.choice(CITIES)
+        first_name, last_name = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+        born = self.start - timedelta(days=self.rng.randint(23 * 365, 62 * 365))
+        issued = self.start - timedelta(days=self.rng.randint(30, 4 * 365))
+        # A few licenses run out during the period
+        expires = issued + timedelta(days=5 * 365) if self.rng.random() < 0.97 else self._moment(self.start, self.end)
+        license_number = f"{code}D{index:05d}"
+        license = writer.add(DriverLicense(
+            id=self._uuid(),
+            name=f"{first_name} {last_name}",
+            license_number=license_number,
+            date_of_birth=born,
+            issued_date=issued,
+            expiry_date=expires,
+            country=city[2],
+            province=city[1] if city[2] == "Canada" else None,
+            state=city[1] if city[2] == "USA" else None,
+            license_type="Class AZ" if city[2] == "Canada" else "Class A CDL",
+            llm_model_name="synthetic",
+            uploaded_file_name="",
+            file_save_path="",
+            tenant=tenant,
+        ))
+        hired = self.start - timedelta(days=self.rng.randint(0, 8 * 365))
+        return writer.add(Driver(
+            id=self._uuid(),
+            first_name=first_name,
+            last_name=last_name,
+            date_of_birth=born.date(),
+            license_number=license_number,
+            phone=self._phone(),
+            email=f"{first_name}.{last_name}.{index}@{code.lower()}.example.com".lower(),
+            address=self._address(city),
+            city=city[0],
+            state=city[1],
+            country=city[2],
+            employee_id=f"{code}E{index:05d}",
+            hire_date=hired.date(),
+            joining_date=hired,
+            drivers_license=license,
+            carrier=carrier,
+            tenant=tenant,
+        ))
+
+    def _truck(self, tenant, carrier, writer) -> Truck:
+        unit = self.next_unit
+        self.next_unit += 1
+        make, model = self.rng.choice(MAKES)
+        city = self.rng.choice(CITIES)
+        self.odometer[unit] = self.rng.randint(20000, 900000)
+        return writer.add(Truck(
+            id=self._uuid(),
+            unit=unit,
+            plate=f"{city[1]}{self.rng.randint(10000, 99999)}",
+            vin=f"{self.rng.getrandbits(80):020X}"[:17],
+            make=make,
+            model=model,
+            value=float(self.rng.randint(60, 190) * 1000),
+            year=self.end.year - self.rng.randint(0, 9),
+            country=city[2],
+            state=city[1],
+            ownership_type=self.rng.choice(OwnershipType.values),
+            terminal=city[0],
+            status=TruckStatus.ACTIVE,
+            duty_status=TruckDutyStatus.AVAILABLE,
+            carrier=carrier,
+            tenant=tenant,
+        ))
+
+    def _timeline(self, tenant, code, carrier, drivers, trucks, writer) -> List[Truck]:
+        """
+        Pair free drivers with free trucks until the end of the period.
+
+        Returns the trucks still on an assignment at the end.
+        """
+        # (free from, tiebreak, row)
+        free_trucks = [(self._moment(self.start, self.start + timedelta(days=3)), i, truck) for i, truck in enumerate(trucks)]
+        free_drivers = [(self._moment(self.start, self.start + timedelta(days=5)), i, driver) for i, driver in enumerate(drivers)]
+        heapq.heapify(free_trucks)
+        heapq.heapify(free_drivers)
+
+        ongoing = []
+        while free_trucks and free_drivers:
+            truck_free, truck_index, truck = heapq.heappop(free_trucks)
+            driver_free, driver_index, driver = heapq.heappop(free_drivers)
+            begin = max(truck_free, driver_free)
+            if begin >= self.end:
+                break
+
+            finish = begin + timedelta(days=self.rng.randint(2, 24), hours=self.rng.randint(0, 23))
+            assignment = self._assignment(tenant, code, carrier, driver, truck, begin, finish, writer)
+            if assignment.end_date is None:
+                ongoing.append(truck)
+                employment = self.employment[driver.id]
+                employment.current_assignment = assignment
+                employment.duty_status = DutyStatus.ON_DUTY
+                continue
+
+            # Trucks turn around quickly; drivers rest between assignments
+            heapq.heappush(free_trucks, (finish + timedelta(hours=self.rng.uniform(2, 48)), truck_index, truck))
+            heapq.heappush(free_drivers, (finish + timedelta(hours=self.rng.uniform(24, 120)), driver_index, driver))
+        return ongoing
+
+    def _assignment(self, tenant, code, carrier, driver, truck, begin, finish, writer) -> DriverTruckAssignment:
+        ongoing = finish >= self.end
+        odometer_start = self.odometer[truck.unit]
+        assignment = DriverTruckAssignment(
+            id=self._uuid(),
+            driver=driver,
+            truck=truck,
+            carrier=carrier,
+            tenant=tenant,
+            start_date=begin,
+            end_date=None if ongoing else finish,
+            odometer_start=odometer_start,
+            status=AssignmentStatus.ON_DUTY if ongoing else AssignmentStatus.OFF_DUTY,
+        )
+
+        # A load every day or two, as long as it is delivered within the assignment
+        pickup = begin + timedelta(hours=self.rng.uniform(2, 20))
+        while pickup < min(finish, self.end):
+            dispatch = self._load(tenant, code, carrier, driver, truck, pickup, finish, writer)
+            if dispatch is None:
+                break
+            assignment.dispatch = assignment.dispatch or dispatch
+            pickup = dispatch.actual_end + timedelta(hours=self.rng.uniform(4, 30))
+
+        # Fuel every day or three
+        fueled = begin + timedelta(hours=self.rng.uniform(6, 30))
+        while fueled < min(finish, self.end):
+            self._fuel(tenant, driver, truck, fueled, writer)
+            fueled += timedelta(hours=self.rng.uniform(20, 72))
+
+        if not ongoing:
+            assignment.odometer_end = self.odometer[truck.unit]
+        writer.add(assignment)
+        return assignment
+
+    def _next_id(self, kind: str, code: str, when: datetime) -> str:
+        self.sequence[kind] += 1
+        return f"{kind}-{when:%Y%m%d}-{code}-{self.sequence[kind]:06d}"
+
+    def _load(self, tenant, code, carrier, driver, truck, pickup, finish, writer) -> Optional[Dispatch]:
+        origin, destination = self.rng.sample(CITIES, 2)
+        distance = round(distance_km(origin, destination), 1)
+        # About 70km/h, with ten hours at the wheel a day
+        transit = timedelta(hours=distance / 70 * 2.4 + self.rng.uniform(2, 8))
+        delivery = pickup + transit
+        if delivery > finish:
+            return None
+
+        customer = self.rng.choice(self.tenant_customers)
+        currency = "USD" if "USA" in (origin[2], destination[2]) else "CAD"
+        load_total = round(distance * self.rng.uniform(2.1, 3.6) + self.rng.choice([0, 0, 75, 150]), 2)
+        if delivery <= self.end:
+            order_status, trip_status = OrderStatus.COMPLETED, TripStatus.COMPLETED
+            age = (self.end - delivery).days
+            dispatch_status = (
+                DispatchStatus.DELIVERED if age < 3
+                else DispatchStatus.INVOICED if age < 30
+                else self.rng.choice([DispatchStatus.PAYMENT_RECEIVED, DispatchStatus.COMPLETED])
+            )
+        else:
+            order_status, trip_status, dispatch_status = OrderStatus.IN_PROGRESS, TripStatus.IN_PROGRESS, DispatchStatus.IN_TRANSIT
+
+        order = writer.add(self._order(tenant, code, customer, origin, destination, pickup, delivery, load_total, currency, order_status))
+        trip = writer.add(Trip(
+            id=self._uuid(),
+            trip_id=self._next_id("TRIP", code, pickup),
+            order=order,
+            tenant=tenant,
+            estimated_distance=distance,
+            estimated_duration=transit,
+            actual_distance=round(distance * self.rng.uniform(0.98, 1.08), 1) if trip_status == TripStatus.COMPLETED else None,
+            actual_duration=transit if trip_status == TripStatus.COMPLETED else None,
+            fuel_estimated=round(distance * 0.38 * 1.65, 2),
+            freight_value=Decimal(str(load_total)).quantize(CENTS),
+            currency=currency,
+            start_time=pickup,
+            end_time=delivery if trip_status == TripStatus.COMPLETED else None,
+            status=trip_status,
+        ))
+        commission = Decimal(str(load_total)) * Decimal("0.12")
+        dispatch = writer.add(Dispatch(
+            id=self._uuid(),
+            dispatch_id=self._next_id("DISP", code, pickup),
+            order_number=order.order_number,
+            order_date=pickup,
+            order=order,
+            customer=customer,
+            trip=trip,
+            driver=driver,
+            truck=truck,
+            carrier=carrier,
+            tenant=tenant,
+            commission_percentage=Decimal("12.0"),
+            commission_amount=commission.quantize(CENTS),
+            commission_currency=currency,
+            actual_start=pickup,
+            actual_end=delivery,
+            status=dispatch_status,
+        ))
+        self.odometer[truck.unit] += int(distance)
+        return dispatch
+
+    def _order(self, tenant, code, customer, origin, destination, pickup, delivery, load_total, currency, status) -> Order:
+        return Order(
+            id=self._uuid(),
+            order_number=self._next_id("ORD", code, pickup),
+            customer=customer,
+            customer_name=customer.name,
+            customer_address=customer.address,
+            customer_email=customer.email,
+            customer_phone=customer.phone,
+            origin=self._address(origin),
+            destination=self._address(destination),
+            cargo_type=self.rng.choice(CARGO_TYPES),
+            weight=float(self.rng.randint(8, 44) * 1000),
+            pickup_date=pickup,
+            delivery_date=delivery,
+            load_total=load_total,
+            load_currency=currency,
+            raw_extract={},
+            raw_text="",
+            completion_tokens=0,
+            prompt_tokens=0,
+            total_tokens=0,
+            llm_model_name="synthetic",
+            usage_details={},
+            processed=True,
+            status=status,
+            tenant=tenant,
+        )
+
+    def _fuel(self, tenant, driver, truck, when, writer):
+        city = self.rng.choice(CITIES)
+        quantity = Decimal(self.rng.uniform(150, 600)).quantize(CENTS)
+        retail_ppu = Decimal(self.rng.uniform(1.45, 1.95)).quantize(Decimal("0.0001"))
+        billed_ppu = (retail_ppu - Decimal("0.0500")).quantize(Decimal("0.0001"))
+        pre_tax = (quantity * billed_ppu).quantize(CENTS)
+        taxes = {}
+        if city[1] in FUEL_TAX:
+            field, rate = FUEL_TAX[city[1]]
+            taxes[field] = (pre_tax * rate).quantize(CENTS)
+        elif city[2] == "Canada":
+            taxes["gst"] = (pre_tax * Decimal("0.05")).quantize(CENTS)
+        writer.add(BVD(
+            id=self._uuid(),
+            date=when,
+            amount=pre_tax + sum(taxes.values(), Decimal("0")),
+            currency="USD" if city[2] == "USA" else "CAD",
+            driver=driver,
+            truck=truck,
+            tenant=tenant,
+            company_name=truck.carrier.name if truck.carrier else tenant.name,
+            card_number=f"70830{truck.unit:011d}",
+            time=f"{when:%H:%M}",
+            auth_code=f"{self.rng.randint(0, 99999999):08d}",
+            unit=truck.unit,
+            odometer=self.odometer[truck.unit],
+            quantity=quantity,
+            uom="L",
+            retail_ppu=retail_ppu,
+            billed_ppu=billed_ppu,
+            pre_tax_amt=pre_tax,
+            site_number=f"{self.rng.randint(100, 9999):05d}",
+            site_name=f"{self.rng.choice(FUEL_BRANDS)} {city[0]}",
+            site_city=city[0],
+            prov_st=city[1],
+            import_batch=f"synthetic-{self.seed}",
+            **taxes,
+        ))
+
+    def _pending_orders(self, tenant, code, writer):
+        """Orders picked up in the coming week that nobody hauls yet."""
+        for _ in range(max(1, self.trucks // 10)):
+            origin, destination = self.rng.sample(CITIES, 2)
+            pickup = self._moment(self.end + timedelta(hours=6), self.end + timedelta(days=7))
+            delivery = pickup + timedelta(hours=distance_km(origin, destination) / 70 * 2.4 + 4)
+            customer = self.rng.choice(self.tenant_customers)
+            currency = "USD" if "USA" in (origin[2], destination[2]) else "CAD"
+            load_total = round(distance_km(origin, destination) * self.rng.uniform(2.1, 3.6), 2)
+            writer.add(self._order(
+                tenant, code, customer, origin, destination, pickup, delivery, load_total, currency, OrderStatus.PENDING
+            ))
@@ -0,0 +1,75 @@
+"""
+Management command to generate a synthetic multi-tenant dataset for benchmarking.
+
+Each tenant gets a login user (synthetic-<seed>-<nn>) so the load tests in
+loadtest/locustfile.py can run against it. See fleet/examples/synthetic.py for
+what is generated.
+
+Usage:
+    python manage.py generate_synthetic_dataset
+    python manage.py generate_synthetic_dataset --tenants 10 --drivers 2000 --trucks 1500 --end 2026-01-01
+    python manage.py generate_synthetic_dataset --seed 7 --clear
+"""
+
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from fleet.examples.synthetic import SyntheticDataset, describe, username
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic multi-tenant dataset with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--tenants', type=int, default=3, help='Number of tenants')
+        parser.add_argument('--drivers', type=int, default=300, help='Drivers per tenant')
+        parser.add_argument('--trucks', type=int, default=250, help='Trucks per tenant')
+        parser.add_argument('--customers', type=int, default=60, help='Customers per tenant')
+        parser.add_argument('--carriers', type=int, default=2, help='Carriers per tenant')
+        parser.add_argument('--days', type=int, default=365, help='Days of dispatch history')
+        parser.add_argument('--end', type=str, help='Last day of the history (YYYY-MM-DD), by default today')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk insert')
+        parser.add_argument('--password', type=str, default='synthetic', help='Password of the tenant users')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete the tenants of an earlier run with this seed first'
+        )
+
+    def handle(self, *args, **options):
+        end = None
+        if options['end']:
+            try:
+                end = timezone.make_aware(datetime.strptime(options['end'], '%Y-%m-%d'))
+            except ValueError:
+                raise CommandError(f"Invalid --end date {options['end']}, expected YYYY-MM-DD")
+
+        dataset = SyntheticDataset(
+            seed=options['seed'],
+            tenants=options['tenants'],
+            drivers=options['drivers'],
+            trucks=options['trucks'],
+            customers=options['customers'],
+            carriers=options['carriers'],
+            days=options['days'],
+            end=end,
+            batch_size=options['batch_size'],
+            password=options['password'],
+            log=self.stdout.write,
+        )
+
+        if dataset.existing_tenants().exists():
+            if not options['clear']:
+                raise CommandError(f"Seed {options['seed']} was generated before; pass --clear to replace it")
+            self.stdout.write(f"♻️Deleting the previous seed {options['seed']} dataset...")
+            dataset.clear()
+
+        started = time.perf_counter()
+        counts = dataset.generate()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(f"\nGenerated {describe(counts)} in {elapsed:.1f}s"))
+        users = [username(options['seed'], number) for number in range(1, options['tenants'] + 1)]
+        self.stdout.write(f"Log in as {', '.join(users)} with password {options['password']!r}")
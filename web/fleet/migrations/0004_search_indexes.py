@@ -0,0 +1,29 @@
+# Generated by Django 5.1.2 on 2026-10-19 14:02
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+from contrib.search import AddSearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fleet', '0003_carrier_tax_currency_carrier_tax_rate'),
+    ]
+
+    operations = [
+        # No-ops outside PostgreSQL; SQLite gets FTS5 tables after migrate
+        TrigramExtension(),
+        AddSearchIndex(
+            model_name='customer',
+            fields=['name', 'email', 'phone', 'address'],
+        ),
+        AddSearchIndex(
+            model_name='driver',
+            fields=['first_name', 'last_name', 'employee_id', 'license_number', 'email', 'phone'],
+        ),
+        AddSearchIndex(
+            model_name='truck',
+            fields=['unit', 'plate', 'vin', 'make', 'model'],
+        ),
+    ]
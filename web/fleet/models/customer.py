@@ -2,6 +2,9 @@ from django.db import models
 from models.models import BaseModel
 
 class Customer(BaseModel):
+    # Columns of the global search (contrib/search.py)
+    search_fields = ("name", "email", "phone", "address")
+
     name = models.CharField(max_length=255)
     address = models.CharField(max_length=255)
     email = models.EmailField()
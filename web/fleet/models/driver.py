@@ -52,6 +52,9 @@ class DriverLicense(BaseModel):
         return f"{self.name} {self.license_number}"
 
 class Driver(BaseModel):
+    # Columns of the global search (contrib/search.py)
+    search_fields = ("first_name", "last_name", "employee_id", "license_number", "email", "phone")
+
     # Personal Information
     first_name = models.CharField(max_length=50)
     last_name = models.CharField(max_length=50)
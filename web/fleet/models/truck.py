@@ -31,6 +31,9 @@ class TruckDutyStatus(models.TextChoices):
 
 class Truck(BaseModel):
     """Truck model"""
+    # Columns of the global search (contrib/search.py)
+    search_fields = ("unit", "plate", "vin", "make", "model")
+
     # Core Information
     unit = models.IntegerField(
         unique=True, 
@@ -1 +1,53 @@
-# Create your tests here.
+from datetime import datetime, timezone
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from dispatch.models import Dispatch, DriverTruckAssignment, Order, OrderStatus
+from expense.models import BVD
+
+ARGS = ["--tenants", "2", "--drivers", "12", "--trucks", "10", "--days", "45", "--end", "2026-06-01"]
+
+
+class SyntheticDatasetTest(TestCase):
+    def generate(self, *extra):
+        call_command("generate_synthetic_dataset", *ARGS, *extra, stdout=StringIO())
+
+    def fingerprint(self):
+        return (
+            list(Dispatch.objects.order_by("dispatch_id").values_list("dispatch_id", "driver__license_number", "truck__unit", "commission_amount")),
+            list(BVD.objects.order_by("id").values_list("id", "unit", "amount")),
+        )
+
+    def test_assignments_never_overlap_and_loads_fall_inside_them(self):
+        self.generate()
+        end = datetime(2026, 6, 1, tzinfo=timezone.utc)
+        self.assertGreater(Dispatch.objects.count(), 50)
+        self.assertTrue(Order.objects.filter(status=OrderStatus.PENDING, dispatches__isnull=True).exists())
+
+        assignments = list(DriverTruckAssignment.objects.order_by("start_date"))
+        for key in ("driver_id", "truck_id"):
+            busy_until = {}
+            for assignment in assignments:
+                owner = getattr(assignment, key)
+                self.assertLessEqual(busy_until.get(owner, assignment.start_date), assignment.start_date)
+                busy_until[owner] = assignment.end_date or end
+
+        for dispatch in Dispatch.objects.select_related("truck")[:200]:
+            self.assertTrue(
+                DriverTruckAssignment.objects.filter(
+                    driver_id=dispatch.driver_id,
+                    truck_id=dispatch.truck_id,
+                    start_date__lte=dispatch.actual_start,
+                ).exists()
+            )
+        self.assertFalse(BVD.objects.exclude(unit__in=DriverTruckAssignment.objects.values("truck__unit")).exists())
+
+    def test_same_seed_gives_the_same_dataset(self):
+        self.generate()
+        first = self.fingerprint()
+        with self.assertRaises(CommandError):
+            self.generate()
+
+        self.generate("--clear")
+        self.assertEqual(self.fingerprint(), first)
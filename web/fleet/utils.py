@@ -1,7 +1,6 @@
 import os
 import secrets
 import logging
-import json
 from datetime import datetime
 from uuid import UUID
 from pathlib import Path  # type: ignore
@@ -9,10 +8,7 @@ from django.conf import settings  # type: ignore
 from django.contrib.contenttypes.models import ContentType  # type: ignore
 from django.core.exceptions import ValidationError  # type: ignore
 from contrib.aws import s3_utils
-from contrib.extraction.document.driver_license import (
-    extract_license_info,
-    DriverLicenseExtraction,
-)
+from contrib.extraction.document.driver_license import extract_license_info
 from fleet.models import Driver, DriverLicense, DriverEmployment
 from tenant.models import Tenant
 from subscriptions.models import QuotaService, UsageLog
@@ -155,7 +151,7 @@ def extract_driver_license_workflow(s3_key: str, tenant_id: UUID):
         logger.info(f"Processing license file of size: {file_size_mb}MB")
 
         # Check storage quota
-        current_storage = quota_service.usage_period.storage_used_mb
+        current_storage = quota_service.storage_used_mb
         storage_limit = quota_service.get_limit("storage_limit_mb")
         if current_storage + file_size_mb > storage_limit:
             raise ValidationError(
@@ -179,7 +175,7 @@ def extract_driver_license_workflow(s3_key: str, tenant_id: UUID):
         # Process document after quota checks
         try:
             logger.info(f"Extracting license info from {local_path}")
-            response, token_usage = extract_license_info(local_path)
+            driver_license_object, token_usage = extract_license_info(local_path, tenant_id=tenant.id)
             logger.info("License info extraction completed successfully")
         except Exception as e:
             logger.error(f"Error extracting license info: {str(e)}", exc_info=True)
@@ -193,42 +189,6 @@ def extract_driver_license_workflow(s3_key: str, tenant_id: UUID):
         ):
             raise ValidationError("Monthly token limit would be exceeded")
 
-        # Extract the actual license data from the response
-        if not response.choices or not response.choices[0].message.content:
-            raise ValueError("No content in response choices")
-
-        # Get the string content and try to parse it as JSON
-        license_data_str = response.choices[0].message.content
-        try:
-            license_data = json.loads(license_data_str)
-        except json.JSONDecodeError:
-            logger.warning("Failed to parse JSON response, attempting string parsing")
-            lines = license_data_str.split("\n")
-            license_data = {}
-            for line in lines:
-                if ":" in line:
-                    key, value = line.split(":", 1)
-                    license_data[key.strip().lower().replace(" ", "_")] = value.strip()
-
-        # Parse response into Pydantic model
-        try:
-            driver_license_object = DriverLicenseExtraction(
-                name=str(license_data.get("name", "")),
-                license_number=str(license_data.get("license_number", "")),
-                date_of_birth=str(license_data.get("date_of_birth", "")),
-                issued_date=str(license_data.get("issued_date", "")),
-                expiry_date=str(license_data.get("expiry_date", "")),
-                gender=str(license_data.get("gender", "")),
-                address=str(license_data.get("address", "")),
-                country=str(license_data.get("country", "")),
-                province=str(license_data.get("province", "")),
-                state=str(license_data.get("state", "")),
-            )
-        except Exception as e:
-            logger.error(f"Error parsing driver license data: {e}")
-            logger.error(f"Raw license data: {license_data_str}")
-            raise
-
         issue_date = parse_date(driver_license_object.issued_date)
         expiry_date = parse_date(driver_license_object.expiry_date)
         dob = parse_date(driver_license_object.date_of_birth)
@@ -254,7 +214,7 @@ def extract_driver_license_workflow(s3_key: str, tenant_id: UUID):
                 "completion_tokens": token_usage["completion_tokens"],
                 "prompt_tokens": token_usage["prompt_tokens"],
                 "total_tokens": token_usage["total_tokens"],
-                "llm_model_name": response.model,
+                "llm_model_name": token_usage["routing"]["model"],
                 "uploaded_file_name": filename,
                 "file_save_path": s3_key,
             },
@@ -358,12 +318,13 @@ def extract_driver_license_workflow(s3_key: str, tenant_id: UUID):
                 logger.warning(f"Failed to cleanup temporary file: {str(e)}")
 
 
-def extract_driver_license_info(file_path: str) -> Tuple[Any, Dict[str, int]]:
+def extract_driver_license_info(file_path: str, tenant_id=None) -> Tuple[Any, Dict[str, int]]:
     """
     Extract information from a driver's license file
     
     Args:
         file_path: Path to the license file (image or PDF)
+        tenant_id: Tenant whose rate limit the model calls count against
         
     Returns:
         Tuple containing:
@@ -371,25 +332,8 @@ def extract_driver_license_info(file_path: str) -> Tuple[Any, Dict[str, int]]:
         - Token usage dictionary
     """
     try:
-        # Extract information using GPT-4 Vision
-        response = extract_license_info(file_path)
-        
-        # For image files, we get a ParsedChatCompletion object
-        # We need to get the actual DriverLicenseExtraction from the parsed field
-        if hasattr(response, 'parsed'):
-            license_info = response.parsed
-        else:
-            # For PDF files or direct responses
-            license_info = response
-        
-        # Get token usage information
-        token_usage = {
-            "completion_tokens": getattr(response, 'completion_tokens', 0),
-            "prompt_tokens": getattr(response, 'prompt_tokens', 0),
-            "total_tokens": getattr(response, 'total_tokens', 397)  # Default if not available
-        }
-        
-        return license_info, token_usage
+        # One structured-output call for images, text extraction plus parsing for PDFs
+        return extract_license_info(file_path, tenant_id=tenant_id)
         
     except Exception as e:
         logger.error(f"Error extracting license info: {str(e)}", exc_info=True)
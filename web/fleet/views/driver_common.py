@@ -9,6 +9,7 @@ import logging
 from pathlib import Path
 from django.conf import settings
 from contrib.aws import s3_utils
+from contrib.blobstore import retain, store_file
 from fleet.utils import extract_driver_license_info, map_driver_data, ensure_tmp_directories
 from fleet.models import DriverLicense, Driver
 from django.core.exceptions import ValidationError
@@ -72,19 +73,11 @@ class DriverLicenseUploadView(LoginRequiredMixin, View):
             )
             logger.info(f"File saved locally at: {filepath}")
 
-            # Upload to S3
-            s3_key = f"{settings.ENV}/{tenant.id}/driver_licenses/{filename}"
-            logger.info(f"Uploading to S3 with key: {s3_key}")
-            
-            s3_upload_success = s3_utils.upload_file(
-                filepath,
-                s3_key,
-            )
-            logger.info(f"S3 upload success: {s3_upload_success}")
-
-            if not s3_upload_success:
-                messages.error(request, "Failed to upload file to S3")
-                raise ValidationError("Failed to upload file to S3")
+            # Store once per tenant; identical re-uploads reuse the existing blob
+            # The license row takes its reference once extraction succeeds
+            blob, created = store_file(tenant, filepath, filename, content_type=content_type, references=0)
+            s3_key = blob.s3_key
+            logger.info(f"Stored license with key: {s3_key} (new blob: {created})")
 
             try:
                 # Process the license file synchronously
@@ -105,7 +98,7 @@ class DriverLicenseUploadView(LoginRequiredMixin, View):
 
                 # Extract license information
                 logger.info("Starting license information extraction")
-                license_info, token_usage = extract_driver_license_info(local_path)
+                license_info, token_usage = extract_driver_license_info(local_path, tenant_id=tenant.id)
                 logger.info(f"License info extracted with {token_usage.get('total_tokens', 0)} tokens used")
 
                 # Create driver license record
@@ -123,11 +116,12 @@ class DriverLicenseUploadView(LoginRequiredMixin, View):
                     completion_tokens=token_usage.get("completion_tokens", 0),
                     prompt_tokens=token_usage.get("prompt_tokens", 0),
                     total_tokens=token_usage.get("total_tokens", 0),
-                    llm_model_name=MODELS.GPT4o_16k.value,
+                    llm_model_name=token_usage.get("routing", {}).get("model", MODELS.GPT4o_16k.value),
                     uploaded_file_name=filename,
                     file_save_path=s3_key,
                     tenant=tenant,
                 )
+                retain(tenant, s3_key)
 
                 # Map and create/update driver record
                 driver = map_driver_data(license_info, driver_license, tenant)
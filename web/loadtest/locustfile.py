@@ -0,0 +1,219 @@
+"""
+Load-test scenarios for the web tier.
+
+Drives the real views through HTTP as a logged-in dispatcher: order upload
+(with extraction), dispatch list and detail, assignment create, BVD import
+and list, and the payout calculation API. Locust reports throughput and
+latency percentiles per scenario; with QUERY_COUNT_HEADERS=True on the server
+(contrib/middleware.py) this file adds the database queries behind each one.
+
+The compose "loadtest" profile runs gunicorn with the production worker count
+and limits, MinIO for S3 and the fake model server for OpenAI:
+
+    make loadtest-up loadtest-migrate
+    open http://localhost:8089
+
+Against a local server instead:
+
+    python -m contrib.extraction.fake_server --case single_trip_ratecon --latency 2
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake AWS_ENDPOINT_URL=http://127.0.0.1:9000 \\
+        QUERY_COUNT_HEADERS=True uv run gunicorn mdh.wsgi -w 2 --bind 0.0.0.0:8000
+    uv run --with locust locust -f loadtest/locustfile.py --host http://127.0.0.1:8000 \\
+        --headless -u 20 -r 2 -t 5m --csv tmp/loadtest
+
+The user in LOADTEST_USERNAME/LOADTEST_PASSWORD needs a tenant with drivers,
+trucks and dispatches. Scenarios without data to work on are skipped.
+LOADTEST_BVD_UNITS lists the truck unit numbers used in imported BVD rows.
+`manage.py generate_synthetic_dataset` makes such tenants:
+
+    LOADTEST_USERNAME=synthetic-1-01 LOADTEST_PASSWORD=synthetic LOADTEST_BVD_UNITS=100000,100001 \
+        uv run --with locust locust -f loadtest/locustfile.py --host http://127.0.0.1:8000
+"""
+
+import html
+import json
+import os
+import random
+import re
+import sys
+import uuid
+from datetime import date, timedelta
+from locust import HttpUser, between, events, task
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from contrib.extraction.benchmark import load_corpus  # noqa: E402
+from contrib.tests.pdfs import make_pdf  # noqa: E402
+
+USERNAME = os.environ.get("LOADTEST_USERNAME", "loadtest")
+PASSWORD = os.environ.get("LOADTEST_PASSWORD", "loadtest")
+BVD_UNITS = os.environ.get("LOADTEST_BVD_UNITS", "101,102,103").split(",")
+QUERY_REPORT = os.environ.get("LOADTEST_QUERY_REPORT")  # JSON file for the query counts
+
+UUID = r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+ORDER_PAGES = [case["pages"] for case in load_corpus(kinds=("order",)) if case.get("pages")]
+
+# Request name -> [(queries, db ms), ...]
+query_stats = {}
+
+
+def options(html: str, select_id: str):
+    """Values of the non-empty options of a <select>."""
+    match = re.search(rf'<select[^>]*id="{select_id}"[^>]*>(.*?)</select>', html, re.S)
+    return re.findall(rf'value="({UUID})"', match.group(1)) if match else []
+
+
+def order_pdf() -> bytes:
+    """A corpus rate confirmation made unique, so every upload stores new bytes."""
+    pages = [list(page) for page in random.choice(ORDER_PAGES)]
+    pages[-1].append(f"Reference {uuid.uuid4()}")
+    return make_pdf(pages)
+
+
+def bvd_csv(rows: int = 20) -> bytes:
+    lines = ["Date,Unit #,Final Amount,Quantity,Site City"]
+    for _ in range(rows):
+        day = date.today() - timedelta(days=random.randint(0, 30))
+        lines.append(f"{day:%Y-%m-%d},{random.choice(BVD_UNITS)},{random.uniform(150, 900):.2f},"
+                     f"{random.uniform(100, 500):.1f},Toronto")
+    return "\n".join(lines).encode()
+
+
+class Dispatcher(HttpUser):
+    wait_time = between(1, 5)
+
+    def on_start(self):
+        self.client.get("/login/", name="login")
+        self.client.post(
+            "/login/",
+            {"username": USERNAME, "password": PASSWORD, "csrfmiddlewaretoken": self.csrf},
+            name="login",
+        )
+        self.dispatch_ids = re.findall(rf'href="/dispatch/({UUID})/"', self.client.get("/dispatch/", name="dispatch list").text)
+        self.next_dispatch_page = None
+        payout_form = self.client.get("/accounts/payout/calculate/", name="payout calculate form").text
+        self.payout_driver_ids = options(payout_form, "id_driver")
+
+    @property
+    def csrf(self) -> str:
+        return self.client.cookies.get("csrftoken", "")
+
+    def ajax_headers(self):
+        return {"X-CSRFToken": self.csrf, "X-Requested-With": "XMLHttpRequest"}
+
+    @task(2)
+    def upload_order(self):
+        with self.client.post(
+            "/dispatch/api/orders/extract/",
+            files={"files": ("ratecon.pdf", order_pdf(), "application/pdf")},
+            headers=self.ajax_headers(),
+            name="order upload",
+            catch_response=True,
+        ) as response:
+            if response.status_code != 200:
+                response.failure(response.text[:200])
+
+    @task(10)
+    def dispatch_list(self):
+        # Mostly follow the cursor's Next link deeper, sometimes start over
+        url = "/dispatch/"
+        if self.next_dispatch_page and random.random() < 0.7:
+            url = f"/dispatch/{html.unescape(self.next_dispatch_page)}"
+        response = self.client.get(url, name="dispatch list")
+        self.dispatch_ids = re.findall(rf'href="/dispatch/({UUID})/"', response.text) or self.dispatch_ids
+        match = re.search(r'href="(\?[^"]*cursor=[^"]+)">Next<', response.text)
+        self.next_dispatch_page = match.group(1) if match else None
+
+    @task(8)
+    def dispatch_detail(self):
+        if self.dispatch_ids:
+            self.client.get(f"/dispatch/{random.choice(self.dispatch_ids)}/", name="dispatch detail")
+
+    @task(2)
+    def create_assignment(self):
+        form = self.client.get("/dispatch/assignments/create/", name="assignment create form").text
+        drivers, trucks = options(form, "id_driver"), options(form, "id_truck")
+        if not drivers or not trucks:
+            return
+        self.client.post(
+            "/dispatch/assignments/create/",
+            {
+                "csrfmiddlewaretoken": self.csrf,
+                "driver": random.choice(drivers),
+                "truck": random.choice(trucks),
+                "start_date": f"{date.today():%Y-%m-%d}T08:00",
+                "status": "assigned",
+                "odometer_start": random.randint(10000, 900000),
+            },
+            name="assignment create",
+        )
+
+    @task(1)
+    def import_bvd(self):
+        with self.client.post(
+            "/accounts/expenses/fuel/bvd/import/",
+            files={"bvd_file": ("bvd.csv", bvd_csv(), "text/csv")},
+            headers=self.ajax_headers(),
+            name="bvd import",
+            catch_response=True,
+        ) as response:
+            if response.json().get("status") == "error":
+                response.failure(response.json().get("message"))
+
+    @task(5)
+    def bvd_list(self):
+        self.client.get("/accounts/expenses/fuel/bvd/", name="bvd list")
+
+    @task(3)
+    def calculate_payout(self):
+        if not self.payout_driver_ids:
+            return
+        to_date = date.today()
+        self.client.post(
+            "/accounts/api/payout/calculate/",
+            data=json.dumps({
+                "driver_id": random.choice(self.payout_driver_ids),
+                "from_date": f"{to_date - timedelta(days=14)}T00:00:00",
+                "to_date": f"{to_date}T23:59:59",
+            }),
+            headers={**self.ajax_headers(), "Content-Type": "application/json"},
+            name="payout calculate",
+        )
+
+
+@events.request.add_listener
+def count_queries(name, response, exception, **kwargs):
+    if exception or response is None or "X-DB-Queries" not in response.headers:
+        return
+    query_stats.setdefault(name, []).append(
+        (int(response.headers["X-DB-Queries"]), float(response.headers.get("X-DB-Time-Ms", 0)))
+    )
+
+
+@events.test_stop.add_listener
+def report_queries(**kwargs):
+    if not query_stats:
+        print("No X-DB-Queries headers; run the server with QUERY_COUNT_HEADERS=True for query counts")
+        return
+
+    report = {}
+    for name, samples in sorted(query_stats.items()):
+        counts = sorted(queries for queries, _ in samples)
+        report[name] = {
+            "requests": len(samples),
+            "queries_p50": counts[len(counts) // 2],
+            "queries_p95": counts[min(len(counts) - 1, int(len(counts) * 0.95))],
+            "queries_max": counts[-1],
+            "db_ms_mean": round(sum(ms for _, ms in samples) / len(samples), 1),
+        }
+
+    print(f"\n{'scenario':<26}{'requests':>10}{'queries p50':>13}{'p95':>6}{'max':>6}{'db ms':>9}")
+    for name, stats in report.items():
+        print(
+            f"{name:<26}{stats['requests']:>10}{stats['queries_p50']:>13}{stats['queries_p95']:>6}"
+            f"{stats['queries_max']:>6}{stats['db_ms_mean']:>9.1f}"
+        )
+
+    if QUERY_REPORT:
+        with open(QUERY_REPORT, "w") as f:
+            json.dump(report, f, indent=2)
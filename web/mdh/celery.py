@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init
 from django.conf import settings
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mdh.settings")
@@ -7,3 +8,11 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mdh.settings")
 app = Celery("mdh")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
+
+
+@worker_process_init.connect
+def load_tokenizer(**kwargs):
+    """Load the token counting encoding before the first task needs it."""
+    from contrib.extraction.document.preprocess import load_encoding
+
+    load_encoding()
@@ -80,6 +80,13 @@ MIDDLEWARE = [
     "tenant.middleware.StorageQuotaMiddleware",
 ]
 
+# Per-request query counts (contrib/middleware.py): response headers outside
+# production, one JSON line per request to logs/queries.log in production
+QUERY_COUNT_HEADERS = config("QUERY_COUNT_HEADERS", default=DEBUG, cast=bool)
+QUERY_METRICS = config("QUERY_METRICS", default=not DEBUG, cast=bool)
+if QUERY_COUNT_HEADERS or QUERY_METRICS:
+    MIDDLEWARE.insert(0, "contrib.middleware.QueryCountMiddleware")
+
 if DEBUG:
     INTERNAL_IPS = ["127.0.0.1", "localhost"]
 
@@ -276,6 +283,10 @@ LOGGING = {
             "format": "{levelname} {message}",
             "style": "{",
         },
+        "metrics": {
+            "format": "{asctime} {message}",
+            "style": "{",
+        },
     },
     "handlers": {
         "console": {
@@ -304,6 +315,13 @@ LOGGING = {
             "backupCount": 5,
             "level": "ERROR",
         },
+        "queries": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "formatter": "metrics",
+            "filename": os.path.join(LOGS_DIR, "queries.log"),
+            "maxBytes": 10485760,  # 10MB
+            "backupCount": 5,
+        },
     },
     "loggers": {
         "django": {
@@ -326,6 +344,11 @@ LOGGING = {
             "level": "INFO",
             "propagate": True,
         },
+        "queries": {
+            "handlers": ["queries"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
 
@@ -347,6 +370,10 @@ CELERY_BEAT_SCHEDULE = {
         "task": "tenant.tasks.cleanup_incomplete_onboarding",
         "schedule": timedelta(minutes=60),
     },
+    "collect-unreferenced-blobs": {
+        "task": "models.tasks.collect_unreferenced_blobs",
+        "schedule": timedelta(hours=24),
+    },
 }
 
 # Custom
@@ -364,8 +391,53 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 FILE_UPLOAD_PERMISSIONS = 0o644
 
+# Direct-to-S3 uploads (browser -> presigned POST -> completion callback)
+DIRECT_UPLOAD_MAX_SIZE = config("DIRECT_UPLOAD_MAX_SIZE", default=25 * 1024 * 1024, cast=int)  # 25MB
+DIRECT_UPLOAD_EXPIRATION = config("DIRECT_UPLOAD_EXPIRATION", default=900, cast=int)  # 15 minutes
+
+# PDF text extraction (contrib/pdf_text.py): pypdfium2 or pypdf2
+PDF_TEXT_ENGINE = config("PDF_TEXT_ENGINE", default="pypdfium2")
+# Pool processes per web/worker process; 1 reads in-process. Raise it on hosts with spare cores
+PDF_TEXT_WORKERS = config("PDF_TEXT_WORKERS", default=1, cast=int)
+# Shorter documents are read in-process; a pool only pays off for long ones
+PDF_TEXT_PARALLEL_MIN_PAGES = config("PDF_TEXT_PARALLEL_MIN_PAGES", default=8, cast=int)
+# Scanned pages without a usable text layer are read with Tesseract (contrib/ocr.py)
+OCR_ENABLED = config("OCR_ENABLED", default=True, cast=bool)
+OCR_TESSERACT_CMD = config("OCR_TESSERACT_CMD", default="tesseract")
+OCR_LANGUAGE = config("OCR_LANGUAGE", default="eng")
+OCR_DPI = config("OCR_DPI", default=300, cast=int)
+OCR_TIMEOUT = config("OCR_TIMEOUT", default=60, cast=int)  # seconds per page
+
+# Order extraction (dispatch/utils.py). Documents of at least EXTRACTION_CHUNK_MIN_PAGES
+# are extracted in windows of EXTRACTION_WINDOW_PAGES pages, concurrently
+EXTRACTION_MAX_PAGES = config("EXTRACTION_MAX_PAGES", default=60, cast=int)
+# Strip whitespace runs, repeated headers/footers and legal boilerplate before prompting
+EXTRACTION_PREPROCESS = config("EXTRACTION_PREPROCESS", default=True, cast=bool)
+# Documents matching an approved dispatch.ExtractionTemplate are extracted with its rules, not the model
+EXTRACTION_TEMPLATES = config("EXTRACTION_TEMPLATES", default=True, cast=bool)
+EXTRACTION_CHUNK_MIN_PAGES = config("EXTRACTION_CHUNK_MIN_PAGES", default=6, cast=int)
+EXTRACTION_WINDOW_PAGES = config("EXTRACTION_WINDOW_PAGES", default=4, cast=int)
+EXTRACTION_WINDOW_OVERLAP = config("EXTRACTION_WINDOW_OVERLAP", default=1, cast=int)
+# Short documents go to the mini model first and escalate when the result fails validation
+EXTRACTION_ROUTING = config("EXTRACTION_ROUTING", default=True, cast=bool)
+EXTRACTION_SMALL_MODEL_MAX_PAGES = config("EXTRACTION_SMALL_MODEL_MAX_PAGES", default=2, cast=int)
+EXTRACTION_SMALL_MODEL_MAX_TOKENS = config("EXTRACTION_SMALL_MODEL_MAX_TOKENS", default=4000, cast=int)
+
+# Model provider gateway (contrib/extraction/gateway.py)
+OPENAI_BASE_URL = config("OPENAI_BASE_URL", default=None)  # e.g. a local fake server
+# Per process: size it as the provider's limit divided by web + worker processes
+LLM_MAX_CONCURRENCY = config("LLM_MAX_CONCURRENCY", default=4, cast=int)
+# Tenant rate limits are shared through this Redis across all processes
+LLM_RATE_LIMIT_REDIS_URL = config("LLM_RATE_LIMIT_REDIS_URL", default=CELERY_BROKER_URL)
+LLM_TENANT_RATE_PER_MINUTE = config("LLM_TENANT_RATE_PER_MINUTE", default=30, cast=float)
+LLM_TENANT_BURST = config("LLM_TENANT_BURST", default=5, cast=int)
+LLM_REQUEST_TIMEOUT = config("LLM_REQUEST_TIMEOUT", default=60, cast=float)  # seconds
+LLM_MAX_RETRIES = config("LLM_MAX_RETRIES", default=4, cast=int)
+
 AWS_BUCKET = config("AWS_BUCKET")
 AWS_KEY = config("AWS_KEY")
 AWS_SECRET = config("AWS_SECRET")
 AWS_REGION = config("AWS_REGION", default="ca-central-1")
+# Point at a local MinIO/moto server in development, leave unset for AWS
+AWS_ENDPOINT_URL = config("AWS_ENDPOINT_URL", default=None)
 ENV = config("ENV", default="dev")
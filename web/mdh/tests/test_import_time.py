@@ -0,0 +1,56 @@
+import os
+import re
+import subprocess
+import sys
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Cold start budget for `manage.py check`, as the sum of per-module self times
+IMPORT_TIME_BUDGET_MS = int(os.environ.get("IMPORT_TIME_BUDGET_MS", 1500))
+
+# Modules that must only load when a code path actually uses them
+DEFERRED_MODULES = ["pandas", "openai", "weasyprint", "boto3", "PyPDF2"]
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)\s*$")
+
+
+def profile_imports(*args):
+    """Run manage.py under `python -X importtime` and return {module: self time in microseconds}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "manage.py", *args],
+        cwd=settings.BASE_DIR,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if result.returncode != 0:
+        raise AssertionError(f"manage.py {' '.join(args)} failed:\n{result.stdout}\n{result.stderr}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules[match.group(2)] = int(match.group(1))
+    return modules
+
+
+class ImportTimeBudgetTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.modules = profile_imports("check")
+
+    def test_heavy_modules_are_deferred(self):
+        loaded = [name for name in DEFERRED_MODULES if name in self.modules]
+        self.assertEqual(loaded, [], f"Imported at startup: {', '.join(loaded)}")
+
+    def test_cold_start_within_budget(self):
+        total_ms = sum(self.modules.values()) / 1000
+        slowest = sorted(self.modules.items(), key=lambda item: item[1], reverse=True)[:10]
+        report = "\n".join(f"  {name}: {micros / 1000:.1f}ms" for name, micros in slowest)
+        self.assertLessEqual(
+            total_ms,
+            IMPORT_TIME_BUDGET_MS,
+            f"manage.py check imports took {total_ms:.0f}ms (budget {IMPORT_TIME_BUDGET_MS}ms). Slowest:\n{report}",
+        )
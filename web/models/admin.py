@@ -1,7 +1,9 @@
 from django.contrib import admin
 from models.models import (
+    DocumentBlob,
     ExchangeRate,
 )
 
 # Register your models here.
 admin.site.register(ExchangeRate)
+admin.site.register(DocumentBlob)
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ModelsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "models"
+
+    def ready(self):
+        import models.signals  # noqa
+        from contrib.search import sync_search_tables
+
+        # SQLite full-text tables; PostgreSQL indexes come from the migrations
+        post_migrate.connect(sync_search_tables, sender=self)
@@ -0,0 +1,36 @@
+"""
+Management command to move documents uploaded before the blob store into it.
+
+Objects under the old {ENV}/{tenant}/orders/... and driver_licenses/... keys
+are hashed, stored under their content key and counted by the storage quota.
+See contrib/blobstore.py backfill_blobs.
+
+Usage:
+    python manage.py backfill_document_blobs --dry-run
+    python manage.py backfill_document_blobs --tenant-id=<id>
+"""
+
+from django.core.management.base import BaseCommand
+from contrib.blobstore import backfill_blobs
+
+
+class Command(BaseCommand):
+    help = 'Hash documents stored before the blob store into DocumentBlob rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant-id', type=str, help='Only backfill this tenant')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count the legacy objects without touching S3 or the database'
+        )
+
+    def handle(self, *args, **options):
+        stats = backfill_blobs(tenant_id=options['tenant_id'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f"{stats['objects']} legacy objects to backfill")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled {stats['objects']} legacy objects: {stats['stored']} stored "
+            f"({stats['bytes']} bytes), {stats['deduplicated']} deduplicated, {stats['missing']} missing"
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.2 on 2026-10-19 11:10
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('models', '0001_initial'),
+        ('tenant', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentBlob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('sha256', models.CharField(max_length=64)),
+                ('size_bytes', models.BigIntegerField()),
+                ('s3_key', models.CharField(max_length=512, unique=True)),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_blobs', to='tenant.tenant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'updated_at'], name='models_docu_ref_cou_048097_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'sha256'), name='unique_tenant_blob_hash')],
+            },
+        ),
+    ]
@@ -27,3 +27,34 @@ class ExchangeRate(BaseModel):
 
     def __str__(self):
         return f"{self.from_currency} to {self.to_currency}: {self.rate}"
+
+
+class DocumentBlob(BaseModel):
+    """
+    A tenant's document stored once in S3 under its content hash.
+
+    UploadFile.file, Order.pdf and DriverLicense.file_save_path point at
+    s3_key; ref_count tracks how many of those rows currently do.
+    """
+
+    tenant = models.ForeignKey(
+        "tenant.Tenant", on_delete=models.CASCADE, related_name="document_blobs"
+    )
+    sha256 = models.CharField(max_length=64)
+    size_bytes = models.BigIntegerField()
+    s3_key = models.CharField(max_length=512, unique=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    ref_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "sha256"], name="unique_tenant_blob_hash"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["ref_count", "updated_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size_bytes} bytes, {self.ref_count} refs)"
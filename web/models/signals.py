@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from contrib.blobstore import release
+
+
+@receiver(post_delete, sender="dispatch.UploadFile")
+def release_upload_blob(sender, instance, **kwargs):
+    release(instance.tenant_id, instance.file)
+
+
+@receiver(post_delete, sender="dispatch.Order")
+def release_order_blob(sender, instance, **kwargs):
+    release(instance.tenant_id, instance.pdf)
+
+
+@receiver(post_delete, sender="fleet.DriverLicense")
+def release_license_blob(sender, instance, **kwargs):
+    release(instance.tenant_id, instance.file_save_path)
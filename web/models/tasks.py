@@ -0,0 +1,16 @@
+import logging
+from celery import shared_task
+from contrib.blobstore import collect_garbage
+
+logger = logging.getLogger("django")
+
+
+@shared_task
+def collect_unreferenced_blobs():
+    """Delete document blobs that no upload, order or license points at any more"""
+    try:
+        stats = collect_garbage()
+        return stats
+    except Exception as e:
+        logger.error(f"Error in blob garbage collection: {str(e)}")
+        raise
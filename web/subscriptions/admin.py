@@ -5,6 +5,7 @@ from .models import (
     TenantCustomQuota,
     UsagePeriod,
     UsageLog,
+    ModelRouteLog,
     QuotaAlert,
 )
 
@@ -14,4 +15,5 @@ admin.site.register(TenantSubscription)
 admin.site.register(TenantCustomQuota)
 admin.site.register(UsagePeriod)
 admin.site.register(UsageLog)
+admin.site.register(ModelRouteLog)
 admin.site.register(QuotaAlert)
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.2 on 2026-10-19 11:36
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0001_initial'),
+        ('tenant', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelRouteLog',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('task', models.CharField(max_length=50)),
+                ('first_model', models.CharField(max_length=255)),
+                ('model', models.CharField(help_text='Model whose result was kept', max_length=255)),
+                ('escalated', models.BooleanField(default=False)),
+                ('reasons', models.JSONField(blank=True, default=list, help_text="Why the small model's result was rejected")),
+                ('latency_ms', models.FloatField(default=0.0)),
+                ('prompt_tokens', models.IntegerField(default=0)),
+                ('completion_tokens', models.IntegerField(default=0)),
+                ('total_tokens', models.IntegerField(default=0)),
+                ('tenant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='tenant.tenant')),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['tenant', 'task', 'timestamp'], name='subscriptio_tenant__2302fd_idx')],
+            },
+        ),
+    ]
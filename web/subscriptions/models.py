@@ -116,6 +116,51 @@ class UsageLog(BaseModel):
         return f"{self.tenant.name} - {self.feature} - {self.timestamp}"
 
 
+class ModelRouteLog(BaseModel):
+    """One routed model extraction: the tier it started on, whether it escalated, and its cost."""
+
+    tenant = models.ForeignKey("tenant.Tenant", on_delete=models.CASCADE, null=True, blank=True)
+    timestamp = models.DateTimeField(auto_now_add=True)
+    task = models.CharField(max_length=50)  # e.g., 'order', 'license'
+    first_model = models.CharField(max_length=255)
+    model = models.CharField(max_length=255, help_text="Model whose result was kept")
+    escalated = models.BooleanField(default=False)
+    reasons = models.JSONField(default=list, blank=True, help_text="Why the small model's result was rejected")
+    latency_ms = models.FloatField(default=0.0)
+    prompt_tokens = models.IntegerField(default=0)
+    completion_tokens = models.IntegerField(default=0)
+    total_tokens = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["tenant", "task", "timestamp"]),
+        ]
+
+    def __str__(self):
+        return f"{self.task} - {self.model} - {self.timestamp}"
+
+    @classmethod
+    def summary(cls, tenant, since=None):
+        """Calls, escalation rate, tokens and latency per task for a tenant."""
+        logs = cls.objects.filter(tenant=tenant)
+        if since:
+            logs = logs.filter(timestamp__gte=since)
+        rows = logs.values("task").annotate(
+            calls=models.Count("id"),
+            escalations=models.Count("id", filter=models.Q(escalated=True)),
+            total_tokens=models.Sum("total_tokens"),
+            avg_latency_ms=models.Avg("latency_ms"),
+        )
+        return {
+            row["task"]: {
+                **row,
+                "escalation_rate": round(row["escalations"] / row["calls"], 3) if row["calls"] else 0.0,
+            }
+            for row in rows
+        }
+
+
 class QuotaAlert(BaseModel):
     tenant = models.ForeignKey("tenant.Tenant", on_delete=models.CASCADE)
     alert_type = models.CharField(max_length=20, choices=AlertType.choices)
@@ -197,6 +242,14 @@ class QuotaService:
 
         return usage_period
 
+    @property
+    def storage_used_mb(self) -> float:
+        """Storage the tenant occupies now, counting each distinct stored file once"""
+        # Imported here: the blob store imports the models app
+        from contrib.blobstore import unique_storage_bytes
+
+        return round(unique_storage_bytes(self.tenant) / (1024 * 1024), 3)
+
     def get_limit(self, quota_type: str) -> int:
         """Get effective limit for a quota type, considering custom quotas"""
         if self.custom_quota:
@@ -217,6 +270,25 @@ class QuotaService:
         Check if usage is allowed and log it if it is
         Returns (allowed, message)
         """
+        allowed, message = self.check_usage(feature, tokens=tokens, storage_mb=storage_mb)
+        if not allowed:
+            return allowed, message
+
+        try:
+            self._log_usage(feature, tokens, storage_mb, related_object)
+        except Exception as e:
+            logger.error(f"Error logging usage: {str(e)}", exc_info=True)
+            return False, f"Error logging usage: {str(e)}"
+
+        return True, "Usage allowed"
+
+    def check_usage(
+        self, feature: str, tokens: int = 0, storage_mb: float = 0
+    ) -> Tuple[bool, str]:
+        """
+        Check if usage is allowed without logging it
+        Returns (allowed, message)
+        """
         try:
             # Check relevant quotas based on feature
             if feature == "order_processing":
@@ -235,9 +307,6 @@ class QuotaService:
             if storage_mb > 0 and not self._check_storage_quota(storage_mb):
                 return False, "Storage limit exceeded"
 
-            # If we got here, usage is allowed - log it
-            self._log_usage(feature, tokens, storage_mb, related_object)
-
             return True, "Usage allowed"
 
         except Exception as e:
@@ -261,7 +330,7 @@ class QuotaService:
 
     def _check_storage_quota(self, additional_mb: int) -> bool:
         limit = self.get_limit("storage_limit_mb")
-        current = self.usage_period.storage_used_mb
+        current = self.storage_used_mb
         return (current + additional_mb) <= limit
 
     def _log_usage(
@@ -318,7 +387,7 @@ class QuotaService:
             elif quota_type == "monthly_token_limit":
                 current = self.usage_period.tokens_used
             else:  # storage_limit_mb
-                current = self.usage_period.storage_used_mb
+                current = self.storage_used_mb
 
             # Check each threshold
             for threshold in thresholds:
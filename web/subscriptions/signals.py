@@ -53,7 +53,7 @@ def check_quota_thresholds(tenant, usage_period, request=None):
             "License Processing",
         ),
         "monthly_token_limit": (usage_period.tokens_used, "API Token"),
-        "storage_limit_mb": (usage_period.storage_used_mb, "Storage"),
+        "storage_limit_mb": (quota_service.storage_used_mb, "Storage"),
     }
 
     for quota_type, (current_usage, display_name) in quotas_to_check.items():
@@ -99,7 +99,7 @@ def check_quota_signal(sender, instance, **kwargs):
         # Only check storage limit on initial creation
         if not instance.pk:  # New instance
             quota_service = QuotaService(instance.tenant)
-            current_storage = quota_service.usage_period.storage_used_mb
+            current_storage = quota_service.storage_used_mb
             storage_limit = quota_service.get_limit("storage_limit_mb")
 
             if current_storage > storage_limit:
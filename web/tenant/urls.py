@@ -16,7 +16,7 @@ Including another URLconf
 """
 
 from django.urls import path
-from .views import tenant, user_management
+from .views import search, tenant, user_management
 
 app_name = "tenant"
 urlpatterns = [
@@ -25,6 +25,7 @@ urlpatterns = [
     path("privacy/", tenant.ProfileView.as_view(), name="privacy"),
     path("faq/", tenant.ProfileView.as_view(), name="faq"),
     path("profile/", tenant.ProfileView.as_view(), name="profile"),
+    path("search/", search.global_search, name="search"),
     path("login/", tenant.login_view, name="login"),
     path("logout/", tenant.logout_view, name="logout"),
     path(
@@ -0,0 +1,98 @@
+"""Global search across the tenant's orders, dispatches, customers, fleet and fuel records."""
+
+import logging
+from dataclasses import dataclass
+from typing import Callable
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+from contrib.queries import query_budget
+from contrib.search import search
+from dispatch.models import Dispatch, Order
+from expense.models import BVD
+from fleet.models import Customer, Driver, Truck
+
+logger = logging.getLogger("django")
+
+# Hits per kind of record, and the shortest search worth running
+PER_KIND = 5
+MIN_LENGTH = 2
+
+
+@dataclass(frozen=True)
+class SearchTarget:
+    kind: str
+    model: type
+    url_name: str
+    title: Callable
+    subtitle: Callable
+
+
+TARGETS = (
+    SearchTarget(
+        "order", Order, "dispatch:order_detail",
+        lambda order: order.order_number,
+        lambda order: f"{order.customer_name or ''} · {order.origin or '?'} → {order.destination or '?'}",
+    ),
+    SearchTarget(
+        "dispatch", Dispatch, "dispatch:dispatch_detail",
+        lambda dispatch: dispatch.dispatch_id,
+        lambda dispatch: f"Order {dispatch.order_number or '-'}",
+    ),
+    SearchTarget(
+        "customer", Customer, "customer_detail",
+        lambda customer: customer.name,
+        lambda customer: customer.email,
+    ),
+    SearchTarget(
+        "driver", Driver, "fleet:driver-detail",
+        lambda driver: f"{driver.first_name} {driver.last_name}",
+        lambda driver: driver.employee_id,
+    ),
+    SearchTarget(
+        "truck", Truck, "fleet:truck-detail",
+        lambda truck: f"#{truck.unit} {truck.make} {truck.model}",
+        lambda truck: truck.plate,
+    ),
+    SearchTarget(
+        "bvd", BVD, "fuel_expense_bvd_detail",
+        lambda bvd: bvd.site_name,
+        lambda bvd: f"{bvd.site_city} · {bvd.date:%Y-%m-%d}",
+    ),
+)
+
+
+@query_budget(10)
+@login_required
+@require_GET
+def global_search(request):
+    """
+    Ranked hits for ?q= across every searchable model, one indexed query per
+    model, scoped to the user's tenant and its active (not soft-deleted) records:
+
+        {"query": "petro", "results": [{"kind", "id", "title", "subtitle", "url", "rank"}, ...]}
+
+    Ranks come from the same formula per database, so hits of different
+    kinds sort together; best first.
+    """
+    text = request.GET.get("q", "").strip()
+    if len(text) < MIN_LENGTH:
+        return JsonResponse({"query": text, "results": []})
+
+    tenant = request.user.profile.tenant
+    results = []
+    for target in TARGETS:
+        for record in search(target.model.objects.filter(tenant=tenant, is_active=True), text)[:PER_KIND]:
+            results.append({
+                "kind": target.kind,
+                "id": str(record.pk),
+                "title": target.title(record),
+                "subtitle": target.subtitle(record),
+                "url": reverse(target.url_name, kwargs={"pk": record.pk}),
+                "rank": round(record.search_rank or 0, 4),
+            })
+
+    results.sort(key=lambda hit: hit["rank"], reverse=True)
+    logger.info(f"🔎 Search {text!r}: {len(results)} hits")
+    return JsonResponse({"query": text, "results": results})